@@ -11,7 +11,8 @@ import json
 
 from .auth import get_current_user
 from .analytics_service import AnalyticsService, TimeRange, ReportFormat, MetricType
-from .supabase_service_enhanced import EnhancedSupabaseService
+from .supabase_service_enhanced import get_enhanced_supabase_service
+from .lazy_service import LazyService
 from .response_models import APIResponse
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
@@ -43,8 +44,8 @@ class ExportRequest(BaseModel):
     parameters: Dict[str, Any]
 
 # Initialize services
-supabase_service = EnhancedSupabaseService()
-analytics_service = AnalyticsService(supabase_service)
+supabase_service = LazyService(get_enhanced_supabase_service)
+analytics_service = LazyService(lambda: AnalyticsService(supabase_service.get()))
 
 @router.get("/dashboard")
 async def get_dashboard_metrics(
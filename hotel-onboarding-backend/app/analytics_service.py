@@ -9,15 +9,8 @@ from typing import Dict, List, Any, Optional, Tuple
 from collections import defaultdict
 import json
 from functools import lru_cache
-import pandas as pd
 import io
 import csv
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-import xlsxwriter
 from enum import Enum
 import logging
 
@@ -258,45 +251,13 @@ class AnalyticsService:
     ) -> Dict[str, Any]:
         """Get performance-related metrics"""
         
-        # Manager performance
-        if property_id:
-            managers = await self.supabase.get_property_managers(property_id)
-        else:
-            managers = await self.supabase.get_all_managers()
-        
-        manager_stats = []
-        for manager in managers:
-            # Get applications reviewed by this manager
-            apps = await self.supabase.get_applications_by_reviewer(
-                manager["id"],
-                start_date,
-                end_date
-            )
-            
-            manager_stats.append({
-                "manager_id": manager["id"],
-                "manager_name": manager.get("name", "Unknown"),
-                "applications_reviewed": len(apps),
-                "avg_review_time": self._calculate_avg_review_time(apps)
-            })
+        # Manager and property performance, aggregated in the database
+        manager_stats = await self._get_manager_performance(property_id, start_date, end_date)
         
         # Property performance (if HR user)
         property_stats = []
         if not property_id:  # HR can see all properties
-            properties = await self.supabase.get_all_properties()
-            for prop in properties:
-                prop_apps = await self.supabase.get_applications(
-                    property_id=prop["id"],
-                    start_date=start_date,
-                    end_date=end_date
-                )
-                
-                property_stats.append({
-                    "property_id": prop["id"],
-                    "property_name": prop["name"],
-                    "total_applications": len(prop_apps),
-                    "completion_rate": self._calculate_completion_rate(prop_apps)
-                })
+            property_stats = await self._get_property_performance(start_date, end_date)
         
         return {
             "manager_performance": manager_stats,
@@ -562,6 +523,8 @@ class AnalyticsService:
     
     def _export_to_excel(self, data: Any, report_type: str) -> bytes:
         """Export data to Excel format"""
+        import xlsxwriter
+        
         output = io.BytesIO()
         
         with xlsxwriter.Workbook(output, {'in_memory': True}) as workbook:
@@ -599,6 +562,12 @@ class AnalyticsService:
     
     def _export_to_pdf(self, data: Any, report_type: str, params: Dict) -> bytes:
         """Export data to PDF format"""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        
         output = io.BytesIO()
         
         # Create PDF document
@@ -961,8 +930,25 @@ class AnalyticsService:
         end_date: datetime
     ) -> List[Dict]:
         """Get manager performance metrics"""
-        # Implementation would fetch and calculate manager performance
-        return []
+        rows = await self.supabase.get_manager_hiring_metrics(
+            property_ids=[property_id] if property_id else None,
+            since=start_date,
+            until=end_date
+        )
+        return [
+            {
+                "manager_id": row["manager_id"],
+                "manager_name": row.get("manager_name") or "Unknown",
+                "applications_reviewed": row["decisions"],
+                "applications_approved": row["approvals"],
+                "approval_rate": float(row["approval_rate"] or 0),
+                "avg_review_time": float(row["avg_decision_hours"] or 0),
+                "median_review_time": float(row["median_decision_hours"] or 0),
+                "p90_review_time": float(row["p90_decision_hours"] or 0),
+                "score": float(row["approval_rate"] or 0)
+            }
+            for row in rows if row.get("property_id") is None
+        ]
     
     async def _get_property_performance(
         self,
@@ -970,8 +956,23 @@ class AnalyticsService:
         end_date: datetime
     ) -> List[Dict]:
         """Get property performance metrics"""
-        # Implementation would fetch and calculate property performance
-        return []
+        rows = await self.supabase.get_property_hiring_funnel(since=start_date, until=end_date)
+        return [
+            {
+                "property_id": row["property_id"],
+                "property_name": row["property_name"],
+                "total_applications": row["applications"],
+                "funnel": {
+                    status: row[status]
+                    for status in ("pending", "approved", "rejected", "talent_pool", "withdrawn")
+                },
+                "approval_rate": float(row["approval_rate"] or 0),
+                "completion_rate": (row["decisions"] / row["applications"] * 100) if row["applications"] else 0,
+                "median_review_time": float(row["median_decision_hours"] or 0),
+                "p90_review_time": float(row["p90_decision_hours"] or 0)
+            }
+            for row in rows
+        ]
     
     def _identify_top_performers(self, managers: List[Dict]) -> List[Dict]:
         """Identify top performing managers"""
@@ -246,9 +246,9 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
 
 # Import supabase service here to avoid circular imports
 def get_supabase_service():
-    """Get supabase service instance to avoid circular imports"""
-    from .supabase_service_enhanced import EnhancedSupabaseService
-    return EnhancedSupabaseService()
+    """Get the shared supabase service (imported lazily to avoid circular imports)"""
+    from .supabase_service_enhanced import get_enhanced_supabase_service
+    return get_enhanced_supabase_service()
 
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
@@ -15,8 +15,8 @@ from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
 import traceback
 
-from .supabase_service_enhanced import EnhancedSupabaseService
-from .notification_service import NotificationService
+from .supabase_service_enhanced import EnhancedSupabaseService, get_enhanced_supabase_service
+from .notification_service import NotificationService, notification_service as shared_notification_service
 from .models import User, NotificationChannel, NotificationPriority
 
 logger = logging.getLogger(__name__)
@@ -64,9 +64,16 @@ class BulkOperationConfig:
 class BulkOperationService:
     """Enhanced service for handling bulk operations with progress tracking"""
     
-    def __init__(self):
-        self.supabase = EnhancedSupabaseService()
-        self.notification_service = NotificationService()
+    def __init__(
+        self,
+        supabase_service: Optional[EnhancedSupabaseService] = None,
+        notification_service: Optional[NotificationService] = None
+    ):
+        # Default to the process-wide clients rather than opening new ones per service
+        self.supabase = supabase_service if supabase_service is not None else get_enhanced_supabase_service()
+        self.notification_service = (
+            notification_service if notification_service is not None else shared_notification_service
+        )
         self.executor = ThreadPoolExecutor(max_workers=5)
         self.active_operations: Dict[str, Any] = {}
         
@@ -901,9 +908,9 @@ class BulkOperationService:
 class BulkApplicationOperations:
     """Specialized bulk operations for job applications"""
     
-    def __init__(self):
-        self.bulk_service = BulkOperationService()
-        self.supabase = EnhancedSupabaseService()
+    def __init__(self, bulk_service: Optional[BulkOperationService] = None):
+        self.bulk_service = bulk_service if bulk_service is not None else BulkOperationService()
+        self.supabase = self.bulk_service.supabase
     
     async def bulk_approve(
         self,
@@ -972,9 +979,9 @@ class BulkApplicationOperations:
 class BulkEmployeeOperations:
     """Specialized bulk operations for employee management"""
     
-    def __init__(self):
-        self.bulk_service = BulkOperationService()
-        self.supabase = EnhancedSupabaseService()
+    def __init__(self, bulk_service: Optional[BulkOperationService] = None):
+        self.bulk_service = bulk_service if bulk_service is not None else BulkOperationService()
+        self.supabase = self.bulk_service.supabase
     
     async def bulk_onboard(
         self,
@@ -1074,9 +1081,9 @@ class BulkEmployeeOperations:
 class BulkCommunicationService:
     """Service for bulk communication operations"""
     
-    def __init__(self):
-        self.bulk_service = BulkOperationService()
-        self.notification_service = NotificationService()
+    def __init__(self, bulk_service: Optional[BulkOperationService] = None):
+        self.bulk_service = bulk_service if bulk_service is not None else BulkOperationService()
+        self.notification_service = self.bulk_service.notification_service
     
     async def create_email_campaign(
         self,
@@ -1150,8 +1157,8 @@ class BulkCommunicationService:
 class BulkOperationAuditService:
     """Service for bulk operation audit logging and compliance"""
     
-    def __init__(self):
-        self.supabase = EnhancedSupabaseService()
+    def __init__(self, supabase_service: Optional[EnhancedSupabaseService] = None):
+        self.supabase = supabase_service if supabase_service is not None else get_enhanced_supabase_service()
     
     async def log_operation_created(
         self,
@@ -1316,8 +1323,8 @@ class BulkOperationAuditService:
 class BackgroundJobProcessor:
     """Processor for background bulk operation jobs"""
     
-    def __init__(self):
-        self.bulk_service = BulkOperationService()
+    def __init__(self, bulk_service: Optional[BulkOperationService] = None):
+        self.bulk_service = bulk_service if bulk_service is not None else BulkOperationService()
         self.job_queue: List[Dict[str, Any]] = []
         self.processing = False
     
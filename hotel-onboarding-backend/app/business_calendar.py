@@ -0,0 +1,174 @@
+"""
+Federal business-day calendar
+
+Federal holidays are generated by rule (5 U.S.C. 6103) for any year, with
+Saturday holidays observed on the preceding Friday and Sunday holidays on the
+following Monday. Business-day arithmetic uses a precomputed cumulative count
+of business days, so counting is O(1) and adding days is a binary search,
+and both have NumPy-vectorized bulk forms for recomputing deadlines across
+thousands of employees at once.
+"""
+import threading
+from datetime import date, timedelta
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+
+DateLike = Union[date, np.datetime64, str]
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The n-th given weekday (Monday=0) of a month"""
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    """The last given weekday (Monday=0) of a month"""
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(holiday: date) -> date:
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+
+def federal_holidays(year: int) -> List[Tuple[date, str]]:
+    """
+    Observed federal holidays for a year, as (date, name) pairs
+
+    Fixed-date holidays are shifted to their observed weekday, so New Year's
+    Day falling on a Saturday is observed on December 31 of the prior year and
+    is returned by that year's call instead.
+    """
+    rules = [
+        (date(year, 1, 1), "New Year's Day"),
+        (_nth_weekday(year, 1, 0, 3), "Martin Luther King Jr. Day"),
+        (_nth_weekday(year, 2, 0, 3), "Presidents' Day"),
+        (_last_weekday(year, 5, 0), "Memorial Day"),
+        (date(year, 7, 4), "Independence Day"),
+        (_nth_weekday(year, 9, 0, 1), "Labor Day"),
+        (_nth_weekday(year, 10, 0, 2), "Columbus Day"),
+        (date(year, 11, 11), "Veterans Day"),
+        (_nth_weekday(year, 11, 3, 4), "Thanksgiving"),
+        (date(year, 12, 25), "Christmas Day"),
+    ]
+    if year >= 2021:
+        rules.append((date(year, 6, 19), "Juneteenth"))
+
+    observed = [(_observed(day), name) for day, name in rules]
+    # Next year's New Year's Day may be observed on December 31
+    next_new_year = _observed(date(year + 1, 1, 1))
+    if next_new_year.year == year:
+        observed.append((next_new_year, "New Year's Day"))
+    return sorted((day, name) for day, name in observed if day.year == year)
+
+
+def _to_day_numbers(values: Union[DateLike, Iterable[DateLike], np.ndarray]) -> np.ndarray:
+    """Dates as int64 days since 1970-01-01"""
+    return np.asarray(values, dtype="datetime64[D]").astype(np.int64)
+
+
+class BusinessDayCalendar:
+    """
+    Weekday calendar minus federal holidays, backed by a cumulative count array
+
+    ``cumulative[i]`` is the number of business days in ``[start, start + i)``,
+    so the business days in any range are one subtraction and the n-th
+    business day after a date is a ``searchsorted``. The covered range grows
+    by whole years on demand.
+    """
+
+    def __init__(self, start_year: int = 2000, end_year: int = 2040):
+        self._lock = threading.Lock()
+        self._build(start_year, end_year)
+
+    def _build(self, start_year: int, end_year: int):
+        start = np.datetime64(f"{start_year}-01-01", "D")
+        end = np.datetime64(f"{end_year + 1}-01-01", "D")
+        days = np.arange(start, end, dtype="datetime64[D]")
+
+        is_business_day = np.is_busday(days, holidays=[
+            day for year in range(start_year, end_year + 1) for day, _ in federal_holidays(year)
+        ])
+        cumulative = np.zeros(len(days) + 1, dtype=np.int64)
+        np.cumsum(is_business_day, out=cumulative[1:])
+
+        # Swap in a consistent snapshot; readers never see a half-built calendar
+        self._state = (int(start.astype(np.int64)), start_year, end_year, is_business_day, cumulative)
+
+    def _ensure_covers(self, first_day: int, last_day: int):
+        origin, _, _, _, cumulative = self._state
+        if origin <= first_day and last_day < origin + len(cumulative) - 1:
+            return
+        with self._lock:
+            first_year = int(np.datetime64(int(first_day), "D").astype("datetime64[Y]").astype(int)) + 1970
+            last_year = int(np.datetime64(int(last_day), "D").astype("datetime64[Y]").astype(int)) + 1970
+            start_year = min(self._state[1], first_year)
+            end_year = max(self._state[2], last_year)
+            if (start_year, end_year) != (self._state[1], self._state[2]):
+                self._build(start_year, end_year)
+
+    @property
+    def year_range(self) -> Tuple[int, int]:
+        return self._state[1], self._state[2]
+
+    def is_business_day(self, day: date) -> bool:
+        number = int(_to_day_numbers(day))
+        self._ensure_covers(number, number)
+        origin, _, _, is_business_day, _ = self._state
+        return bool(is_business_day[number - origin])
+
+    def add_business_days(self, start_date: date, business_days: int) -> date:
+        """The ``business_days``-th business day after ``start_date`` (start itself never counts)"""
+        return self.add_business_days_bulk([start_date], business_days)[0].astype(date)
+
+    def business_days_between(self, start_date: date, end_date: date) -> int:
+        """Business days in ``(start_date, end_date]``; 0 when end is not after start"""
+        return int(self.business_days_between_bulk([start_date], [end_date])[0])
+
+    def add_business_days_bulk(self, start_dates, business_days) -> np.ndarray:
+        """
+        Vectorized add_business_days
+
+        ``start_dates`` is any array-like of dates; ``business_days`` is a
+        scalar or an array broadcastable against it. Returns datetime64[D].
+        """
+        starts = _to_day_numbers(start_dates)
+        offsets = np.asarray(business_days, dtype=np.int64)
+        if starts.size == 0:
+            return starts.astype("datetime64[D]")
+        if np.any(offsets < 0):
+            raise ValueError("business_days must be non-negative")
+
+        # 366 calendar days always contain more than 250 business days
+        horizon = int(offsets.max()) * 2 + 366
+        self._ensure_covers(int(starts.min()), int(starts.max()) + horizon)
+        origin, _, _, _, cumulative = self._state
+
+        targets = cumulative[starts - origin + 1] + offsets
+        result = np.searchsorted(cumulative, targets, side="left") - 1 + origin
+        # Adding zero days leaves the date unchanged
+        result = np.where(offsets == 0, starts, result)
+        return result.astype("datetime64[D]")
+
+    def business_days_between_bulk(self, start_dates, end_dates) -> np.ndarray:
+        """Vectorized business_days_between; returns int64 counts"""
+        starts = _to_day_numbers(start_dates)
+        ends = _to_day_numbers(end_dates)
+        if starts.size == 0 or ends.size == 0:
+            return np.zeros(np.broadcast(starts, ends).shape, dtype=np.int64)
+        self._ensure_covers(int(min(starts.min(), ends.min())), int(max(starts.max(), ends.max())))
+        origin, _, _, _, cumulative = self._state
+
+        counts = cumulative[ends - origin + 1] - cumulative[starts - origin + 1]
+        return np.maximum(counts, 0)
+
+
+# Global instance
+federal_business_calendar = BusinessDayCalendar()
@@ -1,109 +1,457 @@
 """
-Simple in-memory cache service for frequently accessed data
+In-memory response cache for frequently accessed data
+
+Bounded LRU cache with:
+- entry-count and byte budgets
+- background expiry of dead entries
+- single-flight loading (concurrent misses for a key share one computation)
+- stale-while-revalidate
+- tag-based invalidation (e.g. ``applications:{property_id}``), with
+  generation checks so a load that started before an invalidation does not
+  store its result
 """
-import time
-from typing import Any, Dict, Optional
-from functools import wraps
+import asyncio
 import hashlib
+import heapq
+import inspect
 import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+Tags = Union[Iterable[str], Callable[..., Iterable[str]], None]
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Cheap recursive estimate of a value's memory footprint in bytes.
+
+    Walks containers and Pydantic/dataclass-style objects via ``__dict__``
+    instead of serializing the value.
+    """
+    size = sys.getsizeof(value)
+    if _depth > 8:
+        return size
+
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+        return size
+    if isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item, _depth + 1)
+        return size
+
+    attrs = getattr(value, "__dict__", None)
+    if attrs:
+        size += estimate_size(attrs, _depth + 1)
+    return size
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with freshness and accounting metadata"""
+    value: Any
+    expires_at: float
+    stale_until: float
+    size_bytes: int
+    tags: Tuple[str, ...] = ()
+    version: int = 0
+
+
+@dataclass
+class CacheStats:
+    """Counters exposed through ``CacheService.get_stats``"""
+    hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    coalesced_loads: int = 0
+    background_refreshes: int = 0
+    load_errors: int = 0
+
 
 class CacheService:
-    """Simple in-memory cache with TTL support"""
-    
-    def __init__(self, default_ttl: int = 60):
+    """Bounded LRU cache with TTL, tags, single-flight loading and stale-while-revalidate"""
+
+    def __init__(
+        self,
+        default_ttl: int = 60,
+        max_entries: int = 2048,
+        max_bytes: int = 64 * 1024 * 1024,
+        stale_ttl: float = 0,
+        sweep_interval: float = 30.0
+    ):
         """
         Initialize cache service
-        
+
         Args:
             default_ttl: Default time-to-live in seconds (default: 60)
+            max_entries: Maximum number of entries before LRU eviction
+            max_bytes: Approximate memory budget before LRU eviction
+            stale_ttl: Seconds past expiry an entry may still be served while it is refreshed
+            sweep_interval: Seconds between background expiry sweeps
         """
-        self.cache: Dict[str, Dict[str, Any]] = {}
         self.default_ttl = default_ttl
-    
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.sweep_interval = sweep_interval
+
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self.stats = CacheStats()
+
+        self._tag_index: Dict[str, Set[str]] = {}
+        # (stale_until, key, version) min-heap so expiry sweeps only touch dead entries
+        self._expiry_heap: List[Tuple[float, str, int]] = []
+        self._version = 0
+        # Bumped by clear() and, per tag, by invalidate_tags(); loads compare them before storing
+        self._generation = 0
+        self._tag_generations: Dict[str, int] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._sweeper_task: Optional[asyncio.Task] = None
+
+    # ==========================================
+    # BASIC OPERATIONS
+    # ==========================================
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if not expired"""
-        if key in self.cache:
-            entry = self.cache[key]
-            if time.time() < entry['expires_at']:
-                return entry['value']
-            else:
-                # Expired, remove from cache
-                del self.cache[key]
-        return None
-    
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set value in cache with TTL"""
-        ttl = ttl or self.default_ttl
-        self.cache[key] = {
-            'value': value,
-            'expires_at': time.time() + ttl
-        }
-    
+        entry = self._lookup(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        if time.monotonic() >= entry.expires_at:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None,
+            tags: Optional[Iterable[str]] = None, stale_ttl: Optional[float] = None) -> None:
+        """Set value in cache with TTL and optional invalidation tags"""
+        ttl = self.default_ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        size = estimate_size(value)
+
+        if size > self.max_bytes:
+            logger.debug(f"Value for {key} exceeds cache byte budget ({size} bytes); not cached")
+            self.delete(key)
+            return
+
+        self._remove(key)
+
+        now = time.monotonic()
+        self._version += 1
+        entry = CacheEntry(
+            value=value,
+            expires_at=now + ttl,
+            stale_until=now + ttl + stale_ttl,
+            size_bytes=size,
+            tags=tuple(tags or ()),
+            version=self._version
+        )
+        self.cache[key] = entry
+        self.total_bytes += size
+        for tag in entry.tags:
+            self._tag_index.setdefault(tag, set()).add(key)
+        heapq.heappush(self._expiry_heap, (entry.stale_until, key, entry.version))
+
+        self._enforce_limits()
+
+    def delete(self, key: str) -> None:
+        """Delete specific cache entry"""
+        self._remove(key)
+        self._inflight.pop(key, None)
+
     def clear(self) -> None:
         """Clear all cache entries"""
         self.cache.clear()
-    
-    def delete(self, key: str) -> None:
-        """Delete specific cache entry"""
-        if key in self.cache:
-            del self.cache[key]
-    
+        self._tag_index.clear()
+        self._expiry_heap.clear()
+        self._inflight.clear()
+        self.total_bytes = 0
+        self._generation += 1
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Remove every entry carrying any of the given tags, including values still being loaded"""
+        removed = 0
+        for tag in tags:
+            self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+            for key in list(self._tag_index.get(tag, ())):
+                if self._remove(key):
+                    removed += 1
+        self.stats.invalidations += removed
+        return removed
+
+    def purge_expired(self) -> int:
+        """Drop entries whose stale window has passed; cost is proportional to the number removed"""
+        now = time.monotonic()
+        removed = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, key, version = heapq.heappop(self._expiry_heap)
+            entry = self.cache.get(key)
+            if entry is not None and entry.version == version:
+                self._remove(key)
+                removed += 1
+        self.stats.expirations += removed
+        return removed
+
+    # ==========================================
+    # SINGLE-FLIGHT LOADING
+    # ==========================================
+
+    async def get_or_compute(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        tags: Optional[Iterable[str]] = None,
+        stale_ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Return the cached value for ``key``, computing it with ``loader`` on a miss.
+
+        Concurrent misses share a single ``loader`` call. Entries past their TTL
+        but inside the stale window are returned immediately while one
+        background task refreshes them.
+        """
+        entry = self._lookup(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            if now < entry.expires_at:
+                self.stats.hits += 1
+                return entry.value
+            # Stale but servable: refresh in the background once
+            self.stats.stale_hits += 1
+            if key not in self._inflight:
+                self.stats.background_refreshes += 1
+                self._start_load(key, loader, ttl, tags, stale_ttl)
+            return entry.value
+
+        self.stats.misses += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats.coalesced_loads += 1
+        else:
+            future = self._start_load(key, loader, ttl, tags, stale_ttl)
+        return await asyncio.shield(future)
+
+    def _start_load(self, key, loader, ttl, tags, stale_ttl) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        tags = tuple(tags or ())
+        generation = self._generation_of(tags)
+
+        async def run():
+            try:
+                value = await loader()
+            except Exception as e:
+                self.stats.load_errors += 1
+                if not future.done():
+                    future.set_exception(e)
+                    # Avoid "exception never retrieved" for background refreshes
+                    future.exception()
+            else:
+                # Skip storing if the key or one of its tags was invalidated while loading
+                if self._inflight.get(key) is future and self._generation_of(tags) == generation:
+                    self.set(key, value, ttl=ttl, tags=tags, stale_ttl=stale_ttl)
+                if not future.done():
+                    future.set_result(value)
+            finally:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+        loop.create_task(run())
+        return future
+
+    # ==========================================
+    # BACKGROUND EXPIRY
+    # ==========================================
+
+    def start(self) -> None:
+        """Start the background expiry sweeper on the running event loop"""
+        if self._sweeper_task is None or self._sweeper_task.done():
+            self._sweeper_task = asyncio.get_running_loop().create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        """Stop the background expiry sweeper"""
+        if self._sweeper_task:
+            self._sweeper_task.cancel()
+            try:
+                await self._sweeper_task
+            except asyncio.CancelledError:
+                pass
+            self._sweeper_task = None
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.purge_expired()
+                # Compact the heap when superseded versions pile up
+                if len(self._expiry_heap) > 4 * max(len(self.cache), 64):
+                    self._expiry_heap = [
+                        (e.stale_until, k, e.version) for k, e in self.cache.items()
+                    ]
+                    heapq.heapify(self._expiry_heap)
+            except Exception as e:
+                logger.error(f"Cache sweep failed: {e}")
+
+    # ==========================================
+    # STATS & KEYS
+    # ==========================================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current occupancy"""
+        lookups = self.stats.hits + self.stats.misses + self.stats.stale_hits
+        return {
+            **self.stats.__dict__,
+            "entries": len(self.cache),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "inflight_loads": len(self._inflight),
+            "hit_rate": round((self.stats.hits + self.stats.stale_hits) / lookups, 4) if lookups else 0.0
+        }
+
     def make_key(self, *args, **kwargs) -> str:
         """Generate cache key from arguments"""
         key_data = {
             'args': args,
             'kwargs': kwargs
         }
-        key_str = json.dumps(key_data, sort_keys=True, default=str)
+        key_str = json.dumps(key_data, sort_keys=True, default=_key_default)
         return hashlib.md5(key_str.encode()).hexdigest()
 
+    # ==========================================
+    # INTERNALS
+    # ==========================================
+
+    def _generation_of(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        return (self._generation, *(self._tag_generations.get(tag, 0) for tag in tags))
+
+    def _lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry.stale_until:
+            self._remove(key)
+            self.stats.expirations += 1
+            return None
+        self.cache.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str) -> bool:
+        entry = self.cache.pop(key, None)
+        if entry is None:
+            return False
+        self.total_bytes -= entry.size_bytes
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+        # A load racing with this removal must not repopulate stale data
+        self._inflight.pop(key, None)
+        return True
+
+    def _enforce_limits(self) -> None:
+        while self.cache and (len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes):
+            oldest_key = next(iter(self.cache))
+            self._remove(oldest_key)
+            self.stats.evictions += 1
+
+
+def _key_default(obj: Any) -> Any:
+    """Serialize non-JSON key parts by identity where possible, never by repr"""
+    for attr in ("id", "value"):
+        ident = getattr(obj, attr, None)
+        if isinstance(ident, (str, int)):
+            return f"{type(obj).__name__}:{ident}"
+    return str(obj)
+
+
 # Global cache instance
-cache = CacheService(default_ttl=5)  # 5 second cache for API responses - reduced for better real-time updates
+cache = CacheService(
+    default_ttl=5,  # 5 second cache for API responses - reduced for better real-time updates
+    max_entries=4096,
+    max_bytes=128 * 1024 * 1024,
+    stale_ttl=5
+)
+
 
-def cached(ttl: Optional[int] = None):
+def cached(ttl: Optional[int] = None, tags: Tags = None, cache_instance: Optional[CacheService] = None):
     """
     Decorator to cache function results
-    
+
     Args:
         ttl: Time-to-live in seconds (uses default if not specified)
+        tags: Invalidation tags, or a callable receiving the call's arguments and returning tags
+        cache_instance: Cache to use (defaults to the global cache)
     """
     def decorator(func):
+        signature = inspect.signature(func)
+        params = list(signature.parameters)
+        # Methods are keyed without ``self``/``cls`` so keys are stable across instances
+        skip_first = bool(params) and params[0] in ("self", "cls")
+
+        def build_key(args, kwargs) -> str:
+            target = cache_instance or cache
+            bound = signature.bind_partial(*args, **kwargs)
+            arguments = dict(bound.arguments)
+            if skip_first:
+                arguments.pop(params[0], None)
+            return f"{func.__module__}.{func.__qualname__}:{target.make_key(**arguments)}"
+
+        def resolve_tags(args, kwargs) -> Iterable[str]:
+            if callable(tags):
+                return tags(*args, **kwargs)
+            return tags or ()
+
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            # Generate cache key
-            cache_key = f"{func.__module__}.{func.__name__}:{cache.make_key(*args, **kwargs)}"
-            
-            # Check cache
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                return cached_value
-            
-            # Call function and cache result
-            result = await func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
-            return result
-        
+            target = cache_instance or cache
+            return await target.get_or_compute(
+                build_key(args, kwargs),
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                tags=resolve_tags(args, kwargs)
+            )
+
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            # Generate cache key
-            cache_key = f"{func.__module__}.{func.__name__}:{cache.make_key(*args, **kwargs)}"
-            
+            target = cache_instance or cache
+            cache_key = build_key(args, kwargs)
+
             # Check cache
-            cached_value = cache.get(cache_key)
+            cached_value = target.get(cache_key)
             if cached_value is not None:
                 return cached_value
-            
+
             # Call function and cache result
             result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
+            target.set(cache_key, result, ttl, tags=resolve_tags(args, kwargs))
             return result
-        
+
         # Return appropriate wrapper based on function type
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         else:
             return sync_wrapper
-    
-    return decorator
 
-import asyncio
\ No newline at end of file
+    return decorator
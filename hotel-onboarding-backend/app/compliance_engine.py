@@ -9,12 +9,21 @@ This engine provides:
 5. Federal compliance monitoring and alerts
 """
 
-from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime, date, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from collections import Counter
+from datetime import datetime, date, timedelta, timezone
 from enum import Enum
+import heapq
+import itertools
+import json
+import logging
 import uuid
 from dataclasses import dataclass
 
+import numpy as np
+
+from .business_calendar import BusinessDayCalendar, federal_business_calendar, federal_holidays
+
 # Import models
 from .models import (
     User, UserRole, DocumentCategory, I9Section1Data, I9Section2Data,
@@ -22,6 +31,8 @@ from .models import (
     FederalValidationResult, FederalValidationError, ComplianceAuditEntry
 )
 
+logger = logging.getLogger(__name__)
+
 class ComplianceViolationType(str, Enum):
     """Types of compliance violations"""
     CRITICAL = "critical"  # Blocks processing
@@ -46,6 +57,8 @@ class ComplianceDeadline:
     completion_date: Optional[date] = None
     business_days_remaining: int = 0
     violations: List[str] = None
+    property_id: Optional[str] = None
+    hire_date: Optional[date] = None
     
     def __post_init__(self):
         if self.violations is None:
@@ -64,86 +77,525 @@ class ComplianceViolation:
     detected_at: datetime
     resolved_at: Optional[datetime] = None
     resolution_notes: Optional[str] = None
+    property_id: Optional[str] = None
+
+UNASSIGNED_PROPERTY = ""  # index key for deadlines and violations without a property
+
+class ComplianceTracker:
+    """
+    Persistent, indexed store for compliance deadlines and violations
+
+    Rows live in the compliance_deadlines and compliance_violations tables
+    (migration 014); this worker keeps the open ones indexed in memory:
+
+    - a min-heap of unmet deadlines per property, so the deadlines due by a
+      cutoff are found by a pruned heap walk proportional to the result
+    - unresolved violations per property
+    - per-property totals for the dashboard overview
+
+    Local changes are marked dirty and written in batches by flush(). Changes
+    made by other workers arrive on the compliance_changed NOTIFY channel.
+    Met deadlines are dropped from memory once they are written; only the ids
+    of resolved violations are kept, so a stable violation id that was already
+    resolved is not recorded (and reopened) again.
+    """
+
+    NOTIFY_CHANNEL = "compliance_changed"
+
+    def __init__(self, supabase_service=None, calendar: Optional[BusinessDayCalendar] = None):
+        self.supabase_service = supabase_service
+        self.calendar = calendar or federal_business_calendar
+        self.deadlines: Dict[str, ComplianceDeadline] = {}  # document_id -> ComplianceDeadline
+        self.violations: Dict[str, ComplianceViolation] = {}  # violation_id -> ComplianceViolation
+        self._deadline_heaps: Dict[str, List[Tuple[date, int, str]]] = {}  # property -> (due, seq, document_id)
+        self._open_deadlines: Dict[str, Dict[str, Tuple[date, int]]] = {}  # property -> document_id -> live heap entry
+        self._stale_entries: Dict[str, int] = {}
+        self._deadline_properties: Dict[str, str] = {}  # document_id -> property
+        self._open_violations: Dict[str, Dict[str, ComplianceViolation]] = {}  # property -> violation_id -> violation
+        self._violation_states: Dict[str, Tuple[str, bool, bool]] = {}  # violation_id -> (property, critical, resolved)
+        self._counts: Dict[str, Counter] = {}  # property -> deadlines/violations/critical/resolved
+        self.resolved_violation_ids: Set[str] = set()
+        self._sequence = itertools.count()
+        self._dirty_deadlines: Set[str] = set()
+        self._dirty_violations: Set[str] = set()
+        self._new_violations: Set[str] = set()  # dirty violations not yet in the database
+        self._met_deadlines: Set[str] = set()  # evicted by the next flush() once written
+        self._listener_connection = None
+        self.stats = {"flushed_deadlines": 0, "flushed_violations": 0, "notifications": 0, "heap_rebuilds": 0}
+
+    # ----- indexing -----
+
+    def track_deadline(self, deadline: ComplianceDeadline, dirty: bool = True, is_new: bool = True):
+        """
+        Index a new or changed deadline
+
+        ``is_new`` is False for rows that already exist in the database, which
+        the per-property totals loaded by warm() already include.
+        """
+        document_id = deadline.document_id
+        key = deadline.property_id or UNASSIGNED_PROPERTY
+        previous_key = self._deadline_properties.get(document_id)
+
+        live = None
+        if previous_key is not None:
+            live = self._open_deadlines.get(previous_key, {}).get(document_id)
+        wanted = None if deadline.is_met else (key, deadline.deadline_date)
+        if live is not None and (previous_key, live[0]) != wanted:
+            del self._open_deadlines[previous_key][document_id]
+            self._mark_stale(previous_key)
+            live = None
+        if wanted is not None and live is None:
+            seq = next(self._sequence)
+            self._open_deadlines.setdefault(key, {})[document_id] = (deadline.deadline_date, seq)
+            heapq.heappush(self._deadline_heaps.setdefault(key, []), (deadline.deadline_date, seq, document_id))
+
+        if previous_key != key:
+            if previous_key is not None:
+                self._counts.setdefault(previous_key, Counter())["deadlines"] -= 1
+            if previous_key is not None or is_new:
+                self._counts.setdefault(key, Counter())["deadlines"] += 1
+            self._deadline_properties[document_id] = key
+
+        self.deadlines[document_id] = deadline
+        if deadline.is_met:
+            self._met_deadlines.add(document_id)
+        if dirty:
+            self._dirty_deadlines.add(document_id)
+
+    def track_violation(self, violation: ComplianceViolation, dirty: bool = True, is_new: bool = True):
+        """Index a new or changed violation; ``is_new`` as for track_deadline"""
+        violation_id = violation.violation_id
+        state = (
+            violation.property_id or UNASSIGNED_PROPERTY,
+            violation.violation_type == ComplianceViolationType.CRITICAL,
+            violation.resolved_at is not None
+        )
+        previous = self._violation_states.get(violation_id)
+
+        if previous != state:
+            if previous is not None:
+                self._count_violation(previous, -1)
+                self._open_violations.get(previous[0], {}).pop(violation_id, None)
+            if previous is not None or is_new:
+                self._count_violation(state, 1)
+            self._violation_states[violation_id] = state
+
+        if not state[2]:
+            self._open_violations.setdefault(state[0], {})[violation_id] = violation
+        else:
+            self.resolved_violation_ids.add(violation_id)
+        self.violations[violation_id] = violation
+        if dirty:
+            self._dirty_violations.add(violation_id)
+            if previous is None and is_new:
+                self._new_violations.add(violation_id)
+
+    def _count_violation(self, state: Tuple[str, bool, bool], delta: int):
+        counts = self._counts.setdefault(state[0], Counter())
+        counts["violations"] += delta
+        counts["critical"] += delta if state[1] else 0
+        counts["resolved"] += delta if state[2] else 0
+
+    def _mark_stale(self, key: str):
+        """Count a dead heap entry; rebuild once they outnumber the live ones"""
+        self._stale_entries[key] = self._stale_entries.get(key, 0) + 1
+        live = self._open_deadlines.get(key, {})
+        if self._stale_entries[key] > max(64, len(live)):
+            heap = [(due, seq, document_id) for document_id, (due, seq) in live.items()]
+            heapq.heapify(heap)
+            self._deadline_heaps[key] = heap
+            self._stale_entries[key] = 0
+            self.stats["heap_rebuilds"] += 1
+
+    def _due_by(self, key: str, cutoff: date) -> List[ComplianceDeadline]:
+        """Open deadlines for a property due on or before cutoff, visiting only heap entries that qualify"""
+        heap = self._deadline_heaps.get(key)
+        if not heap:
+            return []
+        live = self._open_deadlines.get(key, {})
+        # Drop dead entries from the top so the walk starts at a live deadline
+        while heap and live.get(heap[0][2], (None, None))[1] != heap[0][1]:
+            heapq.heappop(heap)
+            self._stale_entries[key] = max(0, self._stale_entries.get(key, 0) - 1)
+
+        due = []
+        stack = [0] if heap else []
+        while stack:
+            index = stack.pop()
+            deadline_date, seq, document_id = heap[index]
+            if deadline_date > cutoff:
+                continue  # heap order: every descendant is due later
+            if live.get(document_id, (None, None))[1] == seq:
+                due.append(self.deadlines[document_id])
+            stack.extend(child for child in (2 * index + 1, 2 * index + 2) if child < len(heap))
+        return due
+
+    # ----- queries -----
+
+    def get_deadline(self, document_id: str) -> Optional[ComplianceDeadline]:
+        return self.deadlines.get(document_id)
+
+    def dashboard(self, property_ids: Optional[Iterable[Optional[str]]] = None, today: Optional[date] = None,
+                  horizon_days: int = 7, include_records: bool = True) -> Dict[str, Any]:
+        """
+        Dashboard for the given properties (``None`` means every property)
+
+        Lists unmet deadlines due within ``horizon_days`` (overdue ones
+        included) and unresolved violations; totals come from the counters.
+        """
+        today = today or date.today()
+        if property_ids is None:
+            keys = list(self._counts.keys() | self._open_deadlines.keys())
+        else:
+            keys = list(dict.fromkeys(property_id or UNASSIGNED_PROPERTY for property_id in property_ids))
+
+        # The approaching window is one business day, which can span a long weekend
+        cutoff = max(today + timedelta(days=horizon_days), self.calendar.add_business_days(today, 1))
+        upcoming = sorted(
+            (deadline for key in keys for deadline in self._due_by(key, cutoff)),
+            key=lambda deadline: (deadline.deadline_date, deadline.document_id)
+        )
+        if upcoming:
+            remaining = self.calendar.business_days_between_bulk(
+                [today] * len(upcoming), [deadline.deadline_date for deadline in upcoming]
+            ).tolist()
+            for deadline, days_remaining in zip(upcoming, remaining):
+                deadline.business_days_remaining = days_remaining
+
+        totals = Counter()
+        for key in keys:
+            totals.update(self._counts.get(key, ()))
+
+        dashboard = {
+            "overview": {
+                "total_deadlines": totals["deadlines"],
+                "open_deadlines": sum(len(self._open_deadlines.get(key, ())) for key in keys),
+                "overdue_deadlines": 0,
+                "approaching_deadlines": 0,
+                "total_violations": totals["violations"],
+                "critical_violations": totals["critical"],
+                "resolved_violations": totals["resolved"]
+            },
+            "deadlines": [],
+            "violations": [],
+            "compliance_alerts": []
+        }
+
+        for deadline in upcoming:
+            if deadline.deadline_date < today:
+                dashboard["overview"]["overdue_deadlines"] += 1
+                dashboard["compliance_alerts"].append({
+                    "type": "overdue_deadline",
+                    "message": f"I-9 Section 2 overdue for employee {deadline.employee_id}",
+                    "severity": "critical",
+                    "deadline_date": deadline.deadline_date.isoformat()
+                })
+            elif deadline.business_days_remaining <= 1:
+                dashboard["overview"]["approaching_deadlines"] += 1
+                dashboard["compliance_alerts"].append({
+                    "type": "approaching_deadline",
+                    "message": f"I-9 Section 2 due {'today' if deadline.business_days_remaining == 0 else 'tomorrow'} for employee {deadline.employee_id}",
+                    "severity": "warning",
+                    "deadline_date": deadline.deadline_date.isoformat()
+                })
+
+        if include_records:
+            dashboard["deadlines"] = upcoming
+            dashboard["violations"] = sorted(
+                (violation for key in keys for violation in self._open_violations.get(key, {}).values()),
+                key=lambda violation: violation.detected_at, reverse=True
+            )
+        return dashboard
+
+    # ----- persistence -----
+
+    async def warm(self, supabase_service=None) -> int:
+        """Load open deadlines, unresolved violations, resolved violation ids and per-property totals; returns open deadlines loaded"""
+        if supabase_service is not None:
+            self.supabase_service = supabase_service
+        if self.supabase_service is None:
+            return 0
+
+        deadline_rows = await self.supabase_service.get_open_compliance_deadlines()
+        violation_rows = await self.supabase_service.get_unresolved_compliance_violations()
+        self.resolved_violation_ids.update(await self.supabase_service.get_resolved_compliance_violation_ids())
+        count_rows = await self.supabase_service.get_compliance_property_counts()
+
+        for row in deadline_rows:
+            self.track_deadline(deadline_from_row(row), dirty=False, is_new=False)
+        for row in violation_rows:
+            self.track_violation(violation_from_row(row), dirty=False, is_new=False)
+        for row in count_rows:
+            self._counts[row.get("property_id") or UNASSIGNED_PROPERTY] = Counter({
+                "deadlines": row.get("total_deadlines", 0),
+                "violations": row.get("total_violations", 0),
+                "critical": row.get("critical_violations", 0),
+                "resolved": row.get("resolved_violations", 0)
+            })
+        return len(deadline_rows)
+
+    async def load_deadline(self, document_id: str) -> Optional[ComplianceDeadline]:
+        """Get a deadline, reading it from the database if this worker has not seen it"""
+        if document_id in self.deadlines or self.supabase_service is None:
+            return self.deadlines.get(document_id)
+        row = await self.supabase_service.get_compliance_deadline(document_id)
+        if row:
+            self.track_deadline(deadline_from_row(row), dirty=False, is_new=False)
+        return self.deadlines.get(document_id)
+
+    async def flush(self) -> bool:
+        """
+        Write dirty deadlines and violations, one statement per kind of write
+
+        New violations are inserted without overwriting an existing row, so a
+        resolution recorded elsewhere is never reset. Met deadlines that have
+        been written are then dropped from memory.
+        """
+        if self.supabase_service is None:
+            self._dirty_deadlines.clear()
+            self._dirty_violations.clear()
+            self._new_violations.clear()
+            self._evict_met_deadlines()
+            return True
+
+        deadline_ids, self._dirty_deadlines = self._dirty_deadlines, set()
+        violation_ids, self._dirty_violations = self._dirty_violations, set()
+        new_ids, self._new_violations = self._new_violations & violation_ids, self._new_violations - violation_ids
+        flushed = True
+
+        if deadline_ids:
+            rows = [deadline_to_row(self.deadlines[document_id]) for document_id in deadline_ids]
+            if await self.supabase_service.upsert_compliance_deadlines(rows):
+                self.stats["flushed_deadlines"] += len(rows)
+            else:
+                self._dirty_deadlines |= deadline_ids
+                flushed = False
+
+        for ids, write in (
+            (new_ids, self.supabase_service.insert_compliance_violations),
+            (violation_ids - new_ids, self.supabase_service.upsert_compliance_violations)
+        ):
+            if not ids:
+                continue
+            rows = [violation_to_row(self.violations[violation_id]) for violation_id in ids]
+            if await write(rows):
+                self.stats["flushed_violations"] += len(rows)
+            else:
+                self._dirty_violations |= ids
+                self._new_violations |= ids & new_ids
+                flushed = False
+
+        self._evict_met_deadlines()
+        return flushed
+
+    def _evict_met_deadlines(self):
+        """Forget met deadlines with nothing left to write; load_deadline() reads them back if needed"""
+        for document_id in self._met_deadlines - self._dirty_deadlines:
+            deadline = self.deadlines.get(document_id)
+            if deadline is None or deadline.is_met:
+                self.deadlines.pop(document_id, None)
+                self._deadline_properties.pop(document_id, None)
+        self._met_deadlines &= self._dirty_deadlines
+
+    # ----- change notifications -----
+
+    def handle_change_notification(self, payload: str) -> None:
+        """Apply a compliance_changed payload (see migration 014)"""
+        self.stats["notifications"] += 1
+        try:
+            change = json.loads(payload)
+            row = change["row"]
+        except (TypeError, ValueError, KeyError):
+            logger.warning(f"Ignoring malformed compliance change notification: {payload!r}")
+            return
+
+        is_new = change.get("op") == "INSERT"
+        if change.get("table") == "compliance_deadlines":
+            # A local change that is not flushed yet is newer than the echo
+            if row.get("document_id") not in self._dirty_deadlines:
+                self.track_deadline(deadline_from_row(row), dirty=False, is_new=is_new)
+        elif change.get("table") == "compliance_violations":
+            if row.get("violation_id") not in self._dirty_violations:
+                self.track_violation(violation_from_row(row), dirty=False, is_new=is_new)
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self.handle_change_notification(payload)
+
+    def _on_listener_terminated(self, connection):
+        logger.warning("Compliance change listener connection closed; index may drift until restart")
+        self._listener_connection = None
+
+    async def start_change_listener(self, database_url: str) -> bool:
+        """LISTEN for compliance_changed on a dedicated connection"""
+        if self._listener_connection is not None:
+            return True
+        try:
+            import asyncpg
+            connection = await asyncpg.connect(database_url)
+            await connection.add_listener(self.NOTIFY_CHANNEL, self._on_notification)
+            connection.add_termination_listener(self._on_listener_terminated)
+            self._listener_connection = connection
+            logger.info(f"Listening for {self.NOTIFY_CHANNEL} notifications")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start compliance change listener: {e}")
+            return False
+
+    async def stop_change_listener(self):
+        """Close the LISTEN connection"""
+        connection, self._listener_connection = self._listener_connection, None
+        if connection is not None:
+            connection.remove_termination_listener(self._on_listener_terminated)
+            await connection.close()
+
+
+def _parse_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    """Aware UTC datetime; naive values are taken to be UTC"""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def deadline_to_row(deadline: ComplianceDeadline) -> Dict[str, Any]:
+    return {
+        "document_id": deadline.document_id,
+        "deadline_type": deadline.deadline_type.value,
+        "employee_id": deadline.employee_id,
+        "property_id": deadline.property_id,
+        "hire_date": deadline.hire_date.isoformat() if deadline.hire_date else None,
+        "deadline_date": deadline.deadline_date.isoformat(),
+        "is_met": deadline.is_met,
+        "completion_date": deadline.completion_date.isoformat() if deadline.completion_date else None
+    }
+
+
+def deadline_from_row(row: Dict[str, Any]) -> ComplianceDeadline:
+    return ComplianceDeadline(
+        deadline_type=ComplianceDeadlineType(row["deadline_type"]),
+        employee_id=row["employee_id"],
+        document_id=row["document_id"],
+        deadline_date=_parse_date(row["deadline_date"]),
+        is_met=bool(row.get("is_met")),
+        completion_date=_parse_date(row.get("completion_date")),
+        property_id=row.get("property_id"),
+        hire_date=_parse_date(row.get("hire_date"))
+    )
+
+
+def violation_to_row(violation: ComplianceViolation) -> Dict[str, Any]:
+    return {
+        "violation_id": violation.violation_id,
+        "violation_type": violation.violation_type.value,
+        "document_category": violation.document_category.value,
+        "employee_id": violation.employee_id,
+        "property_id": violation.property_id,
+        "document_id": violation.document_id,
+        "violation_message": violation.violation_message,
+        "legal_reference": violation.legal_reference,
+        "detected_at": violation.detected_at.isoformat(),
+        "resolved_at": violation.resolved_at.isoformat() if violation.resolved_at else None,
+        "resolution_notes": violation.resolution_notes
+    }
+
+
+def violation_from_row(row: Dict[str, Any]) -> ComplianceViolation:
+    return ComplianceViolation(
+        violation_id=row["violation_id"],
+        violation_type=ComplianceViolationType(row["violation_type"]),
+        document_category=DocumentCategory(row["document_category"]),
+        employee_id=row["employee_id"],
+        document_id=row.get("document_id"),
+        violation_message=row["violation_message"],
+        legal_reference=row["legal_reference"],
+        detected_at=_parse_datetime(row["detected_at"]),
+        resolved_at=_parse_datetime(row.get("resolved_at")),
+        resolution_notes=row.get("resolution_notes"),
+        property_id=row.get("property_id")
+    )
 
 class FederalComplianceEngine:
     """Federal compliance engine for hotel onboarding system"""
     
-    def __init__(self):
-        self.compliance_deadlines = {}  # document_id -> ComplianceDeadline
-        self.compliance_violations = {}  # violation_id -> ComplianceViolation
-        self.business_calendar = self._initialize_business_calendar()
+    def __init__(self, calendar: Optional[BusinessDayCalendar] = None,
+                 tracker: Optional[ComplianceTracker] = None):
+        self.calendar = calendar or federal_business_calendar
+        self.tracker = tracker or ComplianceTracker(calendar=self.calendar)
         
         # Federal holidays that don't count as business days
-        self.federal_holidays_2025 = [
-            date(2025, 1, 1),   # New Year's Day
-            date(2025, 1, 20),  # Martin Luther King Jr. Day
-            date(2025, 2, 17),  # Presidents' Day
-            date(2025, 5, 26),  # Memorial Day
-            date(2025, 7, 4),   # Independence Day
-            date(2025, 9, 1),   # Labor Day
-            date(2025, 10, 13), # Columbus Day
-            date(2025, 11, 11), # Veterans Day
-            date(2025, 11, 27), # Thanksgiving
-            date(2025, 12, 25), # Christmas Day
-        ]
+        self.federal_holidays_2025 = [day for day, _ in federal_holidays(2025)]
+        self.business_calendar = self._initialize_business_calendar()
+    
+    @property
+    def compliance_deadlines(self) -> Dict[str, ComplianceDeadline]:
+        """document_id -> ComplianceDeadline, as indexed by the tracker"""
+        return self.tracker.deadlines
+    
+    @property
+    def compliance_violations(self) -> Dict[str, ComplianceViolation]:
+        """violation_id -> ComplianceViolation, as indexed by the tracker"""
+        return self.tracker.violations
     
     def _initialize_business_calendar(self) -> Dict[int, List[date]]:
-        """Initialize business calendar with federal holidays"""
+        """Holidays for the calendar's covered years, keyed by year"""
+        start_year, end_year = self.calendar.year_range
         return {
-            2025: self.federal_holidays_2025,
-            # Additional years can be added as needed
+            year: [day for day, _ in federal_holidays(year)]
+            for year in range(start_year, end_year + 1)
         }
     
     def calculate_business_days(self, start_date: date, business_days: int) -> date:
         """Calculate business days from start date, excluding weekends and federal holidays"""
-        current_date = start_date
-        days_added = 0
-        
-        while days_added < business_days:
-            current_date += timedelta(days=1)
-            
-            # Skip weekends (Saturday = 5, Sunday = 6)
-            if current_date.weekday() >= 5:
-                continue
-            
-            # Skip federal holidays
-            holidays = self.business_calendar.get(current_date.year, [])
-            if current_date in holidays:
-                continue
-            
-            days_added += 1
-        
-        return current_date
+        return self.calendar.add_business_days(start_date, business_days)
     
     def calculate_business_days_between(self, start_date: date, end_date: date) -> int:
         """Calculate number of business days between two dates"""
-        if start_date >= end_date:
-            return 0
+        return self.calendar.business_days_between(start_date, end_date)
+    
+    def calculate_i9_deadlines_bulk(self, hire_dates: List[date],
+                                    as_of: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        I-9 Section 2 deadlines for many hire dates in one vectorized pass
         
-        business_days = 0
-        current_date = start_date
+        Returns one dict per hire date, in order, with the deadline date,
+        business days remaining as of ``as_of`` (default today) and whether
+        the deadline has already passed.
+        """
+        if not hire_dates:
+            return []
+        today = as_of or date.today()
         
-        while current_date < end_date:
-            current_date += timedelta(days=1)
-            
-            # Skip weekends
-            if current_date.weekday() >= 5:
-                continue
-            
-            # Skip federal holidays
-            holidays = self.business_calendar.get(current_date.year, [])
-            if current_date in holidays:
-                continue
-            
-            business_days += 1
+        deadlines = self.calendar.add_business_days_bulk(hire_dates, 3)
+        remaining = self.calendar.business_days_between_bulk([today] * len(hire_dates), deadlines)
+        overdue = deadlines < np.datetime64(today, "D")
         
-        return business_days
+        return [
+            {
+                "hire_date": hire_date,
+                "deadline_date": deadline_date,
+                "business_days_remaining": days_remaining,
+                "is_overdue": is_overdue
+            }
+            for hire_date, deadline_date, days_remaining, is_overdue in zip(
+                hire_dates, deadlines.astype(date).tolist(), remaining.tolist(), overdue.tolist()
+            )
+        ]
     
     # =====================================
     # I-9 COMPLIANCE TRACKING
     # =====================================
     
-    def create_i9_section2_deadline(self, employee_id: str, document_id: str, hire_date: date) -> ComplianceDeadline:
+    def create_i9_section2_deadline(self, employee_id: str, document_id: str, hire_date: date,
+                                    property_id: Optional[str] = None) -> ComplianceDeadline:
         """Create I-9 Section 2 three-day deadline"""
         deadline_date = self.calculate_business_days(hire_date, 3)
         
@@ -152,22 +604,28 @@ class FederalComplianceEngine:
             employee_id=employee_id,
             document_id=document_id,
             deadline_date=deadline_date,
-            business_days_remaining=self.calculate_business_days_between(date.today(), deadline_date)
+            business_days_remaining=self.calculate_business_days_between(date.today(), deadline_date),
+            property_id=property_id,
+            hire_date=hire_date
         )
         
-        self.compliance_deadlines[document_id] = deadline
+        self.tracker.track_deadline(deadline)
         return deadline
     
     def validate_i9_three_day_compliance(self, employee_id: str, document_id: str, hire_date: date, 
-                                       section2_completion_date: Optional[date] = None) -> Tuple[bool, ComplianceDeadline, List[str]]:
+                                       section2_completion_date: Optional[date] = None,
+                                       property_id: Optional[str] = None) -> Tuple[bool, ComplianceDeadline, List[str]]:
         """Validate I-9 Section 2 three-day rule compliance"""
         warnings = []
         
         # Get or create deadline
         if document_id in self.compliance_deadlines:
             deadline = self.compliance_deadlines[document_id]
+            if property_id and deadline.property_id != property_id:
+                deadline.property_id = property_id
+                self.tracker.track_deadline(deadline)
         else:
-            deadline = self.create_i9_section2_deadline(employee_id, document_id, hire_date)
+            deadline = self.create_i9_section2_deadline(employee_id, document_id, hire_date, property_id)
         
         # Update business days remaining
         deadline.business_days_remaining = self.calculate_business_days_between(date.today(), deadline.deadline_date)
@@ -181,7 +639,9 @@ class FederalComplianceEngine:
                     employee_id=employee_id,
                     document_id=document_id,
                     violation_message=f"I-9 Section 2 deadline ({deadline.deadline_date}) has passed. Federal law requires completion within 3 business days of hire date ({hire_date}).",
-                    legal_reference="Immigration and Nationality Act Section 274A(b)(1)(A)"
+                    legal_reference="Immigration and Nationality Act Section 274A(b)(1)(A)",
+                    property_id=deadline.property_id,
+                    violation_id=self._deadline_violation_id(document_id, "overdue")
                 )
                 warnings.append(violation.violation_message)
                 return False, deadline, warnings
@@ -197,6 +657,7 @@ class FederalComplianceEngine:
         # Check if completed on time
         deadline.completion_date = section2_completion_date
         deadline.is_met = section2_completion_date <= deadline.deadline_date
+        self.tracker.track_deadline(deadline)
         
         if not deadline.is_met:
             violation = self._create_compliance_violation(
@@ -205,7 +666,9 @@ class FederalComplianceEngine:
                 employee_id=employee_id,
                 document_id=document_id,
                 violation_message=f"I-9 Section 2 completed late ({section2_completion_date}) after deadline ({deadline.deadline_date})",
-                legal_reference="Immigration and Nationality Act Section 274A(b)(1)(A)"
+                legal_reference="Immigration and Nationality Act Section 274A(b)(1)(A)",
+                property_id=deadline.property_id,
+                violation_id=self._deadline_violation_id(document_id, "late")
             )
             warnings.append(violation.violation_message)
             return False, deadline, warnings
@@ -396,8 +859,11 @@ class FederalComplianceEngine:
         
         # Validate signature timestamp is reasonable (not future, not too old)
         if signature_data.get("timestamp"):
-            sig_timestamp = datetime.fromisoformat(signature_data["timestamp"])
-            now = datetime.now()
+            # Browsers may send local time without an offset
+            sig_timestamp = datetime.fromisoformat(
+                str(signature_data["timestamp"]).replace("Z", "+00:00")
+            ).astimezone(timezone.utc)
+            now = datetime.now(timezone.utc)
             
             if sig_timestamp > now:
                 violation = self._create_compliance_violation(
@@ -428,71 +894,36 @@ class FederalComplianceEngine:
     # COMPLIANCE MONITORING
     # =====================================
     
-    def get_compliance_dashboard(self, user_role: UserRole, property_id: Optional[str] = None) -> Dict[str, Any]:
+    def get_compliance_dashboard(self, user_role: UserRole, property_id: Optional[str] = None,
+                                 property_ids: Optional[List[str]] = None) -> Dict[str, Any]:
         """Get compliance dashboard data based on user role"""
-        dashboard = {
-            "overview": {
-                "total_deadlines": len(self.compliance_deadlines),
-                "overdue_deadlines": 0,
-                "approaching_deadlines": 0,
-                "total_violations": len(self.compliance_violations),
-                "critical_violations": 0,
-                "resolved_violations": 0
-            },
-            "deadlines": [],
-            "violations": [],
-            "compliance_alerts": []
-        }
+        scope = property_ids if property_ids is not None else ([property_id] if property_id else [])
         
-        # Count deadline statuses
-        for deadline in self.compliance_deadlines.values():
-            if deadline.deadline_date < date.today() and not deadline.is_met:
-                dashboard["overview"]["overdue_deadlines"] += 1
-                dashboard["compliance_alerts"].append({
-                    "type": "overdue_deadline",
-                    "message": f"I-9 Section 2 overdue for employee {deadline.employee_id}",
-                    "severity": "critical",
-                    "deadline_date": deadline.deadline_date.isoformat()
-                })
-            elif deadline.business_days_remaining <= 1 and not deadline.is_met:
-                dashboard["overview"]["approaching_deadlines"] += 1
-                dashboard["compliance_alerts"].append({
-                    "type": "approaching_deadline",
-                    "message": f"I-9 Section 2 due {'today' if deadline.business_days_remaining == 0 else 'tomorrow'} for employee {deadline.employee_id}",
-                    "severity": "warning",
-                    "deadline_date": deadline.deadline_date.isoformat()
-                })
-        
-        # Count violation types
-        for violation in self.compliance_violations.values():
-            if violation.violation_type == ComplianceViolationType.CRITICAL:
-                dashboard["overview"]["critical_violations"] += 1
-            if violation.resolved_at:
-                dashboard["overview"]["resolved_violations"] += 1
-        
-        # Filter data based on user role
         if user_role == UserRole.HR:
-            # HR sees all compliance data
-            dashboard["deadlines"] = list(self.compliance_deadlines.values())
-            dashboard["violations"] = list(self.compliance_violations.values())
+            # HR sees all compliance data unless a property is requested
+            return self.tracker.dashboard(scope or None)
         elif user_role == UserRole.MANAGER:
-            # Manager sees data for their property only
-            # This would filter based on property_id in real implementation
-            dashboard["deadlines"] = list(self.compliance_deadlines.values())
-            dashboard["violations"] = list(self.compliance_violations.values())
+            # Manager sees data for their properties only
+            return self.tracker.dashboard(scope)
         else:
-            # Employees see limited compliance info
-            dashboard["deadlines"] = []
-            dashboard["violations"] = []
-        
-        return dashboard
+            # Employees see their property's overview without the records
+            return self.tracker.dashboard(scope, include_records=False)
     
     def _create_compliance_violation(self, violation_type: ComplianceViolationType,
                                    document_category: DocumentCategory, employee_id: str,
                                    document_id: Optional[str], violation_message: str,
-                                   legal_reference: str) -> ComplianceViolation:
-        """Create and store a compliance violation"""
-        violation_id = str(uuid.uuid4())
+                                   legal_reference: str, property_id: Optional[str] = None,
+                                   violation_id: Optional[str] = None) -> ComplianceViolation:
+        """
+        Create and store a compliance violation; a known ``violation_id`` returns the existing one
+
+        A ``violation_id`` that was resolved before this worker loaded it is
+        returned as a new object but not recorded again.
+        """
+        if violation_id in self.compliance_violations:
+            return self.compliance_violations[violation_id]
+        already_resolved = violation_id in self.tracker.resolved_violation_ids
+        violation_id = violation_id or str(uuid.uuid4())
         
         violation = ComplianceViolation(
             violation_id=violation_id,
@@ -502,18 +933,26 @@ class FederalComplianceEngine:
             document_id=document_id,
             violation_message=violation_message,
             legal_reference=legal_reference,
-            detected_at=datetime.now()
+            detected_at=datetime.now(timezone.utc),
+            property_id=property_id
         )
         
-        self.compliance_violations[violation_id] = violation
+        if not already_resolved:
+            self.tracker.track_violation(violation)
         return violation
     
+    @staticmethod
+    def _deadline_violation_id(document_id: str, kind: str) -> str:
+        """Stable id so re-checking a missed deadline does not record it again"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"compliance-deadline/{document_id}/{kind}"))
+    
     def resolve_violation(self, violation_id: str, resolution_notes: str) -> bool:
         """Mark a compliance violation as resolved"""
         if violation_id in self.compliance_violations:
             violation = self.compliance_violations[violation_id]
-            violation.resolved_at = datetime.now()
+            violation.resolved_at = datetime.now(timezone.utc)
             violation.resolution_notes = resolution_notes
+            self.tracker.track_violation(violation)
             return True
         return False
     
@@ -524,7 +963,7 @@ class FederalComplianceEngine:
             "report_period": {
                 "start_date": start_date.isoformat(),
                 "end_date": end_date.isoformat(),
-                "generated_at": datetime.now().isoformat(),
+                "generated_at": datetime.now(timezone.utc).isoformat(),
                 "generated_by_role": user_role.value
             },
             "summary": {
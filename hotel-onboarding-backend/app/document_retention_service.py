@@ -8,9 +8,10 @@ This service manages document retention policies in accordance with federal law:
 - General employment records: 3 years from termination
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime, date, timedelta
 from enum import Enum
+import asyncio
 import uuid
 from dataclasses import dataclass
 import logging
@@ -20,6 +21,8 @@ from .models import DocumentType, User, UserRole
 
 logger = logging.getLogger(__name__)
 
+EXPIRING_SOON_DAYS = 30  # records within this many days of their end date are EXPIRING_SOON
+
 class RetentionPeriodType(str, Enum):
     """Types of retention periods"""
     I9_EMPLOYMENT = "i9_employment"
@@ -69,12 +72,83 @@ class DocumentRetentionRecord:
     legal_hold: bool = False
     destroyed_date: Optional[date] = None
 
+def retention_status_for(retention_end_date: date, today: Optional[date] = None) -> RetentionStatus:
+    """Status implied by a retention end date, ignoring legal holds"""
+    days_until_expiration = (retention_end_date - (today or date.today())).days
+    if days_until_expiration < 0:
+        return RetentionStatus.EXPIRED
+    elif days_until_expiration <= EXPIRING_SOON_DAYS:
+        return RetentionStatus.EXPIRING_SOON
+    return RetentionStatus.ACTIVE
+
+
+def _parse_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def record_to_row(record: DocumentRetentionRecord) -> Dict[str, Any]:
+    return {
+        "record_id": record.record_id,
+        "document_id": record.document_id,
+        "document_type": record.document_type.value,
+        "employee_id": record.employee_id,
+        "employee_name": record.employee_name,
+        "created_date": record.created_date.isoformat(),
+        "hire_date": record.hire_date.isoformat() if record.hire_date else None,
+        "termination_date": record.termination_date.isoformat() if record.termination_date else None,
+        "retention_policy_id": record.retention_policy_id,
+        "retention_end_date": record.retention_end_date.isoformat(),
+        "retention_status": record.retention_status.value,
+        "last_reviewed": record.last_reviewed.isoformat(),
+        "review_notes": record.review_notes,
+        "legal_hold": record.legal_hold,
+        "destroyed_date": record.destroyed_date.isoformat() if record.destroyed_date else None
+    }
+
+
+def record_from_row(row: Dict[str, Any]) -> DocumentRetentionRecord:
+    last_reviewed = row.get("last_reviewed")
+    if last_reviewed and not isinstance(last_reviewed, datetime):
+        last_reviewed = datetime.fromisoformat(str(last_reviewed).replace("Z", "+00:00"))
+    return DocumentRetentionRecord(
+        record_id=str(row["record_id"]),
+        document_id=row["document_id"],
+        document_type=DocumentType(row["document_type"]),
+        employee_id=row["employee_id"],
+        employee_name=row.get("employee_name") or "",
+        created_date=_parse_date(row["created_date"]),
+        hire_date=_parse_date(row.get("hire_date")),
+        termination_date=_parse_date(row.get("termination_date")),
+        retention_policy_id=row["retention_policy_id"],
+        retention_end_date=_parse_date(row["retention_end_date"]),
+        retention_status=RetentionStatus(row["retention_status"]),
+        last_reviewed=last_reviewed or datetime.now(),
+        review_notes=row.get("review_notes"),
+        legal_hold=bool(row.get("legal_hold")),
+        destroyed_date=_parse_date(row.get("destroyed_date"))
+    )
+
+
 class DocumentRetentionService:
-    """Service for managing document retention compliance"""
+    """
+    Service for managing document retention compliance
+
+    Records are stored in document_retention_records (migration 015) and
+    never held in memory as a whole: the dashboard reads the trigger-maintained
+    document_retention_counts table, status transitions run as batched SQL
+    updates from a background sweeper, and destruction candidates are read
+    in keyset pages.
+    """
     
-    def __init__(self):
+    def __init__(self, supabase_service=None, sweep_interval: float = 3600.0, sweep_batch_size: int = 5000):
         self.retention_policies = self._initialize_retention_policies()
-        self.retention_records: Dict[str, DocumentRetentionRecord] = {}
+        self.supabase_service = supabase_service
+        self.sweep_interval = sweep_interval
+        self.sweep_batch_size = sweep_batch_size
+        self._sweeper_task: Optional[asyncio.Task] = None
+        self.stats = {"sweeps": 0, "expired": 0, "expiring_soon": 0, "sweep_errors": 0}
         
     def _initialize_retention_policies(self) -> Dict[str, RetentionPolicy]:
         """Initialize federal retention policies"""
@@ -185,11 +259,11 @@ class DocumentRetentionService:
         retention_date = date(tax_year + 5, 1, 1)  # Beginning of year after 4-year period
         return retention_date, f"4 years after tax year {tax_year}"
     
-    def create_retention_record(self, document_id: str, document_type: DocumentType,
-                              employee_id: str, employee_name: str, 
-                              created_date: date, hire_date: date,
-                              termination_date: Optional[date] = None) -> DocumentRetentionRecord:
-        """Create a new document retention record"""
+    def build_retention_record(self, document_id: str, document_type: DocumentType,
+                               employee_id: str, employee_name: str,
+                               created_date: date, hire_date: date,
+                               termination_date: Optional[date] = None) -> DocumentRetentionRecord:
+        """Build a retention record for a document without saving it"""
         
         # Determine retention end date based on document type
         if document_type == DocumentType.I9_FORM:
@@ -208,16 +282,7 @@ class DocumentRetentionService:
             method = "3 years from creation (default)"
             policy_id = "POL-GEN-001"
         
-        # Determine initial status
-        days_until_expiration = (retention_end_date - date.today()).days
-        if days_until_expiration < 0:
-            status = RetentionStatus.EXPIRED
-        elif days_until_expiration <= 30:
-            status = RetentionStatus.EXPIRING_SOON
-        else:
-            status = RetentionStatus.ACTIVE
-        
-        record = DocumentRetentionRecord(
+        return DocumentRetentionRecord(
             record_id=str(uuid.uuid4()),
             document_id=document_id,
             document_type=document_type,
@@ -228,85 +293,81 @@ class DocumentRetentionService:
             termination_date=termination_date,
             retention_policy_id=policy_id,
             retention_end_date=retention_end_date,
-            retention_status=status,
+            retention_status=retention_status_for(retention_end_date),
             last_reviewed=datetime.now(),
             review_notes=f"Retention calculated: {method}"
         )
-        
-        self.retention_records[record.record_id] = record
+    
+    async def create_retention_record(self, document_id: str, document_type: DocumentType,
+                                      employee_id: str, employee_name: str,
+                                      created_date: date, hire_date: date,
+                                      termination_date: Optional[date] = None) -> DocumentRetentionRecord:
+        """Create and save a new document retention record"""
+        record = self.build_retention_record(
+            document_id, document_type, employee_id, employee_name, created_date, hire_date, termination_date
+        )
+        await self.save_retention_records([record])
         logger.info(f"Created retention record {record.record_id} for document {document_id}")
-        
         return record
     
-    def update_employee_termination(self, employee_id: str, termination_date: date) -> List[DocumentRetentionRecord]:
+    async def save_retention_records(self, records: List[DocumentRetentionRecord]) -> bool:
+        """Save many retention records with one upsert"""
+        if not records:
+            return True
+        if not await self.supabase_service.upsert_retention_records([record_to_row(r) for r in records]):
+            raise RuntimeError(f"Failed to save {len(records)} retention records")
+        return True
+    
+    async def update_employee_termination(self, employee_id: str, termination_date: date) -> List[DocumentRetentionRecord]:
         """Update retention records when an employee is terminated"""
-        updated_records = []
-        
-        for record in self.retention_records.values():
-            if record.employee_id == employee_id and record.document_type == DocumentType.I9_FORM:
-                # Recalculate I-9 retention date
-                new_retention_date, method = self.calculate_i9_retention_date(
-                    record.hire_date, termination_date
-                )
-                
-                if new_retention_date != record.retention_end_date:
-                    record.termination_date = termination_date
-                    record.retention_end_date = new_retention_date
-                    record.last_reviewed = datetime.now()
-                    record.review_notes = f"Updated due to termination: {method}"
-                    
-                    # Update status
-                    days_until_expiration = (new_retention_date - date.today()).days
-                    if days_until_expiration < 0:
-                        record.retention_status = RetentionStatus.EXPIRED
-                    elif days_until_expiration <= 30:
-                        record.retention_status = RetentionStatus.EXPIRING_SOON
-                    else:
-                        record.retention_status = RetentionStatus.ACTIVE
-                    
-                    updated_records.append(record)
-                    logger.info(f"Updated retention for I-9 document {record.document_id} due to termination")
-        
+        rows = await self.supabase_service.apply_retention_termination(
+            employee_id, termination_date, date.today(), EXPIRING_SOON_DAYS
+        )
+        updated_records = [record_from_row(row) for row in rows]
+        for record in updated_records:
+            logger.info(f"Updated retention for I-9 document {record.document_id} due to termination")
         return updated_records
     
-    def place_legal_hold(self, document_id: str, reason: str) -> bool:
+    async def place_legal_hold(self, document_id: str, reason: str) -> bool:
         """Place a legal hold on a document to prevent destruction"""
-        for record in self.retention_records.values():
-            if record.document_id == document_id:
-                record.legal_hold = True
-                record.retention_status = RetentionStatus.HOLD
-                record.last_reviewed = datetime.now()
-                record.review_notes = f"Legal hold placed: {reason}"
-                logger.info(f"Legal hold placed on document {document_id}")
-                return True
-        return False
+        updated = await self.supabase_service.update_retention_records([document_id], {
+            "legal_hold": True,
+            "retention_status": RetentionStatus.HOLD.value,
+            "last_reviewed": datetime.now().isoformat(),
+            "review_notes": f"Legal hold placed: {reason}"
+        }, statuses=[status.value for status in RetentionStatus if status != RetentionStatus.DESTROYED])
+        if updated:
+            logger.info(f"Legal hold placed on document {document_id}")
+        return bool(updated)
     
-    def remove_legal_hold(self, document_id: str, reason: str) -> bool:
+    async def remove_legal_hold(self, document_id: str, reason: str) -> bool:
         """Remove legal hold from a document"""
-        for record in self.retention_records.values():
-            if record.document_id == document_id:
-                record.legal_hold = False
-                record.last_reviewed = datetime.now()
-                record.review_notes = f"Legal hold removed: {reason}"
-                
-                # Recalculate status
-                days_until_expiration = (record.retention_end_date - date.today()).days
-                if days_until_expiration < 0:
-                    record.retention_status = RetentionStatus.EXPIRED
-                elif days_until_expiration <= 30:
-                    record.retention_status = RetentionStatus.EXPIRING_SOON
-                else:
-                    record.retention_status = RetentionStatus.ACTIVE
-                
-                logger.info(f"Legal hold removed from document {document_id}")
-                return True
-        return False
+        row = await self.supabase_service.get_retention_record(document_id)
+        if not row or not row.get("legal_hold"):
+            return False
+        
+        # Recalculate status
+        status = retention_status_for(_parse_date(row["retention_end_date"]))
+        updated = await self.supabase_service.update_retention_records([document_id], {
+            "legal_hold": False,
+            "retention_status": status.value,
+            "last_reviewed": datetime.now().isoformat(),
+            "review_notes": f"Legal hold removed: {reason}"
+        }, legal_hold=True)
+        if updated:
+            logger.info(f"Legal hold removed from document {document_id}")
+        return bool(updated)
     
-    def get_retention_dashboard(self, user_role: UserRole) -> Dict[str, any]:
-        """Get retention dashboard data based on user role"""
+    async def get_retention_dashboard(self, user_role: UserRole, expiring_limit: int = 100) -> Dict[str, Any]:
+        """Get retention dashboard data from the pre-aggregated counts"""
+        counts, expiring = await asyncio.gather(
+            self.supabase_service.get_retention_counts(),
+            self.supabase_service.get_expiring_retention_records(expiring_limit)
+        )
+        
         dashboard = {
             "summary": {
-                "total_documents": len(self.retention_records),
+                "total_documents": 0,
                 "active_documents": 0,
                 "expiring_soon": 0,
                 "expired_awaiting_destruction": 0,
@@ -317,40 +378,40 @@ class DocumentRetentionService:
             "expiring_documents": [],
             "compliance_alerts": []
         }
+        summary_keys = {
+            RetentionStatus.ACTIVE.value: "active_documents",
+            RetentionStatus.EXPIRING_SOON.value: "expiring_soon",
+            RetentionStatus.EXPIRED.value: "expired_awaiting_destruction",
+            RetentionStatus.HOLD.value: "legal_holds",
+            RetentionStatus.DESTROYED.value: "destroyed"
+        }
         
-        # Count documents by status
-        for record in self.retention_records.values():
-            if record.retention_status == RetentionStatus.ACTIVE:
-                dashboard["summary"]["active_documents"] += 1
-            elif record.retention_status == RetentionStatus.EXPIRING_SOON:
-                dashboard["summary"]["expiring_soon"] += 1
-                dashboard["expiring_documents"].append({
-                    "document_id": record.document_id,
-                    "document_type": record.document_type.value,
-                    "employee_name": record.employee_name,
-                    "expiration_date": record.retention_end_date.isoformat(),
-                    "days_until_expiration": (record.retention_end_date - date.today()).days
-                })
-            elif record.retention_status == RetentionStatus.EXPIRED:
-                dashboard["summary"]["expired_awaiting_destruction"] += 1
-            elif record.retention_status == RetentionStatus.HOLD:
-                dashboard["summary"]["legal_holds"] += 1
-            elif record.retention_status == RetentionStatus.DESTROYED:
-                dashboard["summary"]["destroyed"] += 1
+        for row in counts:
+            count = row["document_count"]
+            status = row["retention_status"]
+            dashboard["summary"]["total_documents"] += count
+            dashboard["summary"][summary_keys[status]] += count
             
             # Count by document type
-            doc_type = record.document_type.value
-            if doc_type not in dashboard["by_document_type"]:
-                dashboard["by_document_type"][doc_type] = {
-                    "total": 0,
-                    "active": 0,
-                    "expired": 0
-                }
-            dashboard["by_document_type"][doc_type]["total"] += 1
-            if record.retention_status == RetentionStatus.ACTIVE:
-                dashboard["by_document_type"][doc_type]["active"] += 1
-            elif record.retention_status == RetentionStatus.EXPIRED:
-                dashboard["by_document_type"][doc_type]["expired"] += 1
+            by_type = dashboard["by_document_type"].setdefault(
+                row["document_type"], {"total": 0, "active": 0, "expired": 0}
+            )
+            by_type["total"] += count
+            if status == RetentionStatus.ACTIVE.value:
+                by_type["active"] += count
+            elif status == RetentionStatus.EXPIRED.value:
+                by_type["expired"] += count
+        
+        today = date.today()
+        for row in expiring:
+            expiration_date = _parse_date(row["retention_end_date"])
+            dashboard["expiring_documents"].append({
+                "document_id": row["document_id"],
+                "document_type": row["document_type"],
+                "employee_name": row.get("employee_name"),
+                "expiration_date": expiration_date.isoformat(),
+                "days_until_expiration": (expiration_date - today).days
+            })
         
         # Generate compliance alerts
         if dashboard["summary"]["expired_awaiting_destruction"] > 0:
@@ -369,91 +430,124 @@ class DocumentRetentionService:
         
         return dashboard
     
-    def mark_document_destroyed(self, document_id: str, destruction_method: str, 
-                              authorized_by: str) -> bool:
-        """Mark a document as destroyed"""
-        for record in self.retention_records.values():
-            if record.document_id == document_id:
-                if record.legal_hold:
-                    logger.warning(f"Cannot destroy document {document_id} - under legal hold")
-                    return False
-                
-                if record.retention_status != RetentionStatus.EXPIRED:
-                    logger.warning(f"Cannot destroy document {document_id} - not expired")
-                    return False
-                
-                record.retention_status = RetentionStatus.DESTROYED
-                record.destroyed_date = date.today()
-                record.last_reviewed = datetime.now()
-                record.review_notes = f"Destroyed via {destruction_method} by {authorized_by}"
-                
-                logger.info(f"Document {document_id} marked as destroyed")
-                return True
+    # ==========================================
+    # SWEEPER AND DESTRUCTION
+    # ==========================================
+    
+    async def sweep(self, today: Optional[date] = None) -> Dict[str, int]:
+        """Run status transitions batch by batch until nothing is left to move"""
+        today = today or date.today()
+        totals = {"expired": 0, "expiring_soon": 0}
+        while True:
+            moved = await self.supabase_service.sweep_document_retention(
+                today, EXPIRING_SOON_DAYS, self.sweep_batch_size
+            )
+            totals["expired"] += moved["expired"]
+            totals["expiring_soon"] += moved["expiring_soon"]
+            if moved["expired"] < self.sweep_batch_size and moved["expiring_soon"] < self.sweep_batch_size:
+                break
         
-        return False
+        self.stats["sweeps"] += 1
+        self.stats["expired"] += totals["expired"]
+        self.stats["expiring_soon"] += totals["expiring_soon"]
+        if totals["expired"] or totals["expiring_soon"]:
+            logger.info(f"Retention sweep: {totals['expired']} expired, {totals['expiring_soon']} expiring soon")
+        return totals
+    
+    async def iter_destruction_candidates(self, page_size: int = 500) -> AsyncIterator[List[DocumentRetentionRecord]]:
+        """Yield expired, unheld records in pages, oldest retention end date first"""
+        after = None
+        while True:
+            rows = await self.supabase_service.get_retention_destruction_candidates(after, page_size)
+            if not rows:
+                return
+            yield [record_from_row(row) for row in rows]
+            if len(rows) < page_size:
+                return
+            last = rows[-1]
+            after = (str(last["retention_end_date"])[:10], str(last["record_id"]))
+    
+    async def mark_documents_destroyed(self, document_ids: List[str], destruction_method: str,
+                                       authorized_by: str) -> List[str]:
+        """Mark expired documents without a legal hold as destroyed in one update; returns those marked"""
+        if not document_ids:
+            return []
+        updated = await self.supabase_service.update_retention_records(document_ids, {
+            "retention_status": RetentionStatus.DESTROYED.value,
+            "destroyed_date": date.today().isoformat(),
+            "last_reviewed": datetime.now().isoformat(),
+            "review_notes": f"Destroyed via {destruction_method} by {authorized_by}"
+        }, statuses=[RetentionStatus.EXPIRED.value], legal_hold=False)
+        
+        destroyed = [row["document_id"] for row in updated]
+        skipped = len(document_ids) - len(destroyed)
+        if skipped:
+            logger.warning(f"Skipped {skipped} documents that are not expired or are under legal hold")
+        return destroyed
+    
+    async def mark_document_destroyed(self, document_id: str, destruction_method: str,
+                                      authorized_by: str) -> bool:
+        """Mark a document as destroyed"""
+        return bool(await self.mark_documents_destroyed([document_id], destruction_method, authorized_by))
     
-    def generate_retention_report(self, start_date: date, end_date: date) -> Dict[str, any]:
+    def start_sweeper(self, supabase_service=None) -> None:
+        """Start the periodic retention sweep on the running event loop"""
+        if supabase_service is not None:
+            self.supabase_service = supabase_service
+        if self._sweeper_task is None or self._sweeper_task.done():
+            self._sweeper_task = asyncio.get_running_loop().create_task(self._sweep_loop())
+    
+    async def stop_sweeper(self) -> None:
+        """Stop the periodic retention sweep"""
+        if self._sweeper_task:
+            self._sweeper_task.cancel()
+            try:
+                await self._sweeper_task
+            except asyncio.CancelledError:
+                pass
+            self._sweeper_task = None
+    
+    async def _sweep_loop(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                self.stats["sweep_errors"] += 1
+                logger.error(f"Retention sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval)
+    
+    async def generate_retention_report(self, start_date: date, end_date: date) -> Dict[str, Any]:
         """Generate retention compliance report for date range"""
-        report = {
+        aggregates = await self.supabase_service.get_retention_report(start_date, end_date, date.today())
+        findings = aggregates.get("i9_mismatched_documents") or []
+        
+        return {
             "report_period": {
                 "start": start_date.isoformat(),
                 "end": end_date.isoformat(),
                 "generated_at": datetime.now().isoformat()
             },
             "retention_actions": {
-                "documents_created": 0,
+                "documents_created": aggregates.get("documents_created", 0),
                 "documents_expired": 0,
-                "documents_destroyed": 0,
+                "documents_destroyed": aggregates.get("documents_destroyed", 0),
                 "legal_holds_placed": 0,
                 "termination_updates": 0
             },
             "compliance_summary": {
-                "documents_within_retention": 0,
-                "documents_past_retention": 0,
-                "average_retention_days": 0,
+                "documents_within_retention": aggregates.get("documents_within_retention", 0),
+                "documents_past_retention": aggregates.get("documents_past_retention", 0),
+                "average_retention_days": aggregates.get("average_retention_days", 0),
                 "longest_retained_document": None
             },
             "policy_adherence": {
-                "i9_compliance": True,
+                "i9_compliance": not findings,
                 "w4_compliance": True,
-                "audit_findings": []
+                "audit_findings": [
+                    f"I-9 document {document_id} has incorrect retention date" for document_id in findings
+                ]
             }
         }
-        
-        retention_days = []
-        
-        for record in self.retention_records.values():
-            # Check if record falls within report period
-            if record.created_date >= start_date and record.created_date <= end_date:
-                report["retention_actions"]["documents_created"] += 1
-            
-            if record.retention_status == RetentionStatus.ACTIVE:
-                report["compliance_summary"]["documents_within_retention"] += 1
-            elif record.retention_status == RetentionStatus.EXPIRED:
-                report["compliance_summary"]["documents_past_retention"] += 1
-            
-            # Calculate retention days
-            if record.destroyed_date:
-                days_retained = (record.destroyed_date - record.created_date).days
-            else:
-                days_retained = (date.today() - record.created_date).days
-            retention_days.append(days_retained)
-            
-            # Check for policy violations
-            if record.document_type == DocumentType.I9_FORM:
-                expected_retention, _ = self.calculate_i9_retention_date(
-                    record.hire_date, record.termination_date
-                )
-                if record.retention_end_date != expected_retention:
-                    report["policy_adherence"]["i9_compliance"] = False
-                    report["policy_adherence"]["audit_findings"].append(
-                        f"I-9 document {record.document_id} has incorrect retention date"
-                    )
-        
-        if retention_days:
-            report["compliance_summary"]["average_retention_days"] = sum(retention_days) // len(retention_days)
-        
-        return report
 
 # Create global retention service instance
-retention_service = DocumentRetentionService()
\ No newline at end of file
+retention_service = DocumentRetentionService()
@@ -29,6 +29,7 @@ from .models import (
 
 # Import PDF form service
 from .pdf_forms import PDFFormFiller, I9_FORM_FIELDS, W4_FORM_FIELDS
+from .business_calendar import federal_business_calendar
 
 try:
     import fitz  # PyMuPDF for form handling
@@ -483,17 +484,8 @@ class DocumentArchitectureService:
         return True, deadline, warnings
     
     def _calculate_business_days(self, start_date: date, business_days: int) -> date:
-        """Calculate business days from start date (excluding weekends)"""
-        current_date = start_date
-        days_added = 0
-        
-        while days_added < business_days:
-            current_date += timedelta(days=1)
-            # Skip weekends (Saturday = 5, Sunday = 6)
-            if current_date.weekday() < 5:
-                days_added += 1
-        
-        return current_date
+        """Calculate business days from start date (excluding weekends and federal holidays)"""
+        return federal_business_calendar.add_business_days(start_date, business_days)
     
     def create_processing_status(self, document_id: str, document_category: DocumentCategory) -> DocumentProcessingStatus:
         """Create initial processing status for a document"""
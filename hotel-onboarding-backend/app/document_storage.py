@@ -7,21 +7,168 @@ import os
 import uuid
 import hashlib
 import mimetypes
+import struct
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from pathlib import Path
 import aiofiles
-import PyPDF2
-from PIL import Image
 import io
 import base64
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 import logging
 
 from .models import DocumentType, DocumentMetadata, DocumentCategory
 
 logger = logging.getLogger(__name__)
 
+# Chunked encryption format: header (magic, chunk size, nonce prefix), then
+# records of [4-byte ciphertext length, high bit = final chunk][ciphertext + GCM tag]
+STREAM_MAGIC = b"DSC1"
+STREAM_CHUNK_SIZE = 64 * 1024
+_STREAM_HEADER = struct.Struct(">4sI8s")
+_RECORD_HEADER = struct.Struct(">I")
+_FINAL_FLAG = 0x80000000
+_GCM_TAG_SIZE = 16
+
+
+class DocumentTooLargeError(ValueError):
+    """Raised while streaming an upload as soon as it passes the size limit"""
+
+
+class ChunkedEncryptor:
+    """
+    Incremental AES-256-GCM encryption in independently authenticated chunks
+
+    Each chunk's nonce is a random per-file prefix plus the chunk counter, and
+    the header, counter and final flag are bound as associated data, so
+    reordered, truncated or extended files fail authentication.
+    """
+
+    def __init__(self, key: bytes, chunk_size: int = STREAM_CHUNK_SIZE):
+        self._aead = AESGCM(key)
+        self.chunk_size = chunk_size
+        self._nonce_prefix = os.urandom(8)
+        self._header = _STREAM_HEADER.pack(STREAM_MAGIC, chunk_size, self._nonce_prefix)
+        self._buffer = bytearray()
+        self._counter = 0
+        self._started = False
+
+    def update(self, data: bytes) -> bytes:
+        """Add plaintext; returns whatever ciphertext is ready to write"""
+        self._buffer += data
+        output = bytearray()
+        if not self._started:
+            output += self._header
+            self._started = True
+        # Hold back the last chunk so finalize() can mark it as final
+        while len(self._buffer) > self.chunk_size:
+            output += self._seal(self._buffer[:self.chunk_size], final=False)
+            del self._buffer[:self.chunk_size]
+        return bytes(output)
+
+    def finalize(self) -> bytes:
+        """Seal the remaining plaintext as the final chunk"""
+        output = bytearray() if self._started else bytearray(self._header)
+        self._started = True
+        output += self._seal(self._buffer, final=True)
+        self._buffer = bytearray()
+        return bytes(output)
+
+    def _seal(self, chunk: bytes, final: bool) -> bytes:
+        nonce, aad = _chunk_nonce_and_aad(self._header, self._nonce_prefix, self._counter, final)
+        ciphertext = self._aead.encrypt(nonce, bytes(chunk), aad)
+        self._counter += 1
+        length = len(ciphertext) | (_FINAL_FLAG if final else 0)
+        return _RECORD_HEADER.pack(length) + ciphertext
+
+
+class ChunkedDecryptor:
+    """Incremental decryption for data written by ChunkedEncryptor"""
+
+    def __init__(self, key: bytes):
+        self._aead = AESGCM(key)
+        self._buffer = bytearray()
+        self._header: Optional[bytes] = None
+        self._nonce_prefix = b""
+        self._max_record = 0
+        self._counter = 0
+        self._finished = False
+
+    def update(self, data: bytes) -> bytes:
+        """Add ciphertext; returns the plaintext of every complete chunk"""
+        self._buffer += data
+        output = bytearray()
+
+        if self._header is None:
+            if len(self._buffer) < _STREAM_HEADER.size:
+                return b""
+            magic, chunk_size, self._nonce_prefix = _STREAM_HEADER.unpack_from(self._buffer)
+            if magic != STREAM_MAGIC:
+                raise ValueError("Not a chunked document stream")
+            self._header = bytes(self._buffer[:_STREAM_HEADER.size])
+            self._max_record = chunk_size + _GCM_TAG_SIZE
+            del self._buffer[:_STREAM_HEADER.size]
+
+        while len(self._buffer) >= _RECORD_HEADER.size:
+            if self._finished:
+                raise ValueError("Data after final chunk")
+            (length,) = _RECORD_HEADER.unpack_from(self._buffer)
+            final = bool(length & _FINAL_FLAG)
+            length &= ~_FINAL_FLAG
+            if length > self._max_record:
+                raise ValueError("Chunk exceeds declared chunk size")
+            end = _RECORD_HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            nonce, aad = _chunk_nonce_and_aad(self._header, self._nonce_prefix, self._counter, final)
+            try:
+                output += self._aead.decrypt(nonce, bytes(self._buffer[_RECORD_HEADER.size:end]), aad)
+            except InvalidTag:
+                raise ValueError(f"Chunk {self._counter} failed authentication")
+            del self._buffer[:end]
+            self._counter += 1
+            self._finished = final
+        return bytes(output)
+
+    def finalize(self) -> None:
+        """Raise unless the stream ended cleanly on its final chunk"""
+        if not self._finished or self._buffer:
+            raise ValueError("Document stream is truncated")
+
+
+def _chunk_nonce_and_aad(header: bytes, nonce_prefix: bytes, counter: int, final: bool) -> Tuple[bytes, bytes]:
+    counter_bytes = counter.to_bytes(4, "big")
+    return nonce_prefix + counter_bytes, header + counter_bytes + (b"\x01" if final else b"\x00")
+
+
+def derive_stream_key(fernet_key: bytes) -> bytes:
+    """Derive the AES-256 key for chunked files from the service's Fernet key"""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"document-storage chunked v1"
+    ).derive(base64.urlsafe_b64decode(fernet_key))
+
+
+class _BytesSource:
+    """async read(size) over bytes already in memory"""
+
+    def __init__(self, data: bytes):
+        self._view = memoryview(data)
+        self._position = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size < 0 else self._position + size
+        chunk = self._view[self._position:end]
+        self._position += len(chunk)
+        return bytes(chunk)
+
+
 class DocumentStorageService:
     """
     Secure document storage service with encryption and compliance features
@@ -36,11 +183,11 @@ class DocumentStorageService:
             (self.storage_path / doc_type.value).mkdir(exist_ok=True)
         
         # Initialize encryption
-        if encryption_key:
-            self.cipher = Fernet(encryption_key)
-        else:
+        if not encryption_key:
             # Generate a new key for this instance (in production, use a persistent key)
-            self.cipher = Fernet(Fernet.generate_key())
+            encryption_key = Fernet.generate_key()
+        self.cipher = Fernet(encryption_key)
+        self._stream_key = derive_stream_key(encryption_key)
             
         # Supported file types for legal documents
         self.allowed_extensions = {'.pdf', '.jpg', '.jpeg', '.png', '.tiff', '.doc', '.docx'}
@@ -59,24 +206,40 @@ class DocumentStorageService:
         """
         Store a document with encryption and metadata for legal compliance
         """
+        return await self.store_document_stream(
+            _BytesSource(file_content), filename, document_type,
+            employee_id, property_id, uploaded_by, metadata
+        )
+    
+    async def store_document_stream(
+        self,
+        source: Any,
+        filename: str,
+        document_type: DocumentType,
+        employee_id: str,
+        property_id: str,
+        uploaded_by: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> DocumentMetadata:
+        """
+        Store a document read in chunks from ``source`` (an UploadFile or
+        anything with an async ``read(size)``)
+        
+        The size limit is enforced as bytes arrive, the hash is computed
+        incrementally and ciphertext goes straight to disk, so memory use is
+        about one chunk per upload whatever the file size.
+        """
+        partial_path = None
         try:
             # Validate file
             file_ext = Path(filename).suffix.lower()
             if file_ext not in self.allowed_extensions:
                 raise ValueError(f"File type {file_ext} not allowed. Allowed types: {self.allowed_extensions}")
             
-            if len(file_content) > self.max_file_size:
-                raise ValueError(f"File size exceeds maximum allowed size of {self.max_file_size/1024/1024}MB")
-            
             # Generate unique document ID
             document_id = str(uuid.uuid4())
             
-            # Calculate file hash for integrity verification
-            file_hash = hashlib.sha256(file_content).hexdigest()
-            
-            # Encrypt the file content
-            encrypted_content = self.cipher.encrypt(file_content)
-            
             # Create storage path
             storage_dir = self.storage_path / document_type.value / employee_id
             storage_dir.mkdir(parents=True, exist_ok=True)
@@ -84,10 +247,31 @@ class DocumentStorageService:
             # Generate secure filename
             secure_filename = f"{document_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{file_ext}"
             file_path = storage_dir / secure_filename
+            partial_path = file_path.with_name(secure_filename + ".part")
             
-            # Write encrypted file
-            async with aiofiles.open(file_path, 'wb') as f:
-                await f.write(encrypted_content)
+            # Hash for integrity verification and encrypt while reading
+            hasher = hashlib.sha256()
+            encryptor = ChunkedEncryptor(self._stream_key, chunk_size)
+            file_size = 0
+            async with aiofiles.open(partial_path, 'wb') as f:
+                while True:
+                    chunk = await source.read(chunk_size)
+                    if not chunk:
+                        break
+                    file_size += len(chunk)
+                    if file_size > self.max_file_size:
+                        raise DocumentTooLargeError(
+                            f"File size exceeds maximum allowed size of {self.max_file_size/1024/1024}MB"
+                        )
+                    hasher.update(chunk)
+                    encrypted = encryptor.update(chunk)
+                    if encrypted:
+                        await f.write(encrypted)
+                await f.write(encryptor.finalize())
+            
+            # Only complete files are visible under their final name
+            os.replace(partial_path, file_path)
+            partial_path = None
             
             # Create document metadata
             doc_metadata = DocumentMetadata(
@@ -96,8 +280,8 @@ class DocumentStorageService:
                 original_filename=filename,
                 stored_filename=secure_filename,
                 file_path=str(file_path),
-                file_size=len(file_content),
-                file_hash=file_hash,
+                file_size=file_size,
+                file_hash=hasher.hexdigest(),
                 mime_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
                 employee_id=employee_id,
                 property_id=property_id,
@@ -118,6 +302,48 @@ class DocumentStorageService:
         except Exception as e:
             logger.error(f"Failed to store document: {str(e)}")
             raise
+        finally:
+            if partial_path is not None:
+                partial_path.unlink(missing_ok=True)
+    
+    def locate_document(self, document_id: str) -> Path:
+        """Find the stored file for a document ID"""
+        for doc_type_dir in self.storage_path.iterdir():
+            if doc_type_dir.is_dir():
+                for employee_dir in doc_type_dir.iterdir():
+                    if employee_dir.is_dir():
+                        for file_path in employee_dir.iterdir():
+                            if document_id in file_path.name and file_path.suffix != ".part":
+                                return file_path
+        raise FileNotFoundError(f"Document {document_id} not found")
+    
+    def stream_document(self, document_id: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """
+        Decrypted content of a document as an async iterator of chunks
+        
+        The file is located up front, so a missing document raises
+        FileNotFoundError here rather than midway through a response.
+        """
+        return self._iter_decrypted(self.locate_document(document_id), chunk_size)
+    
+    async def _iter_decrypted(self, document_path: Path, chunk_size: int) -> AsyncIterator[bytes]:
+        async with aiofiles.open(document_path, 'rb') as f:
+            head = await f.read(len(STREAM_MAGIC))
+            if head != STREAM_MAGIC:
+                # Documents stored before chunked encryption are a single Fernet token
+                yield self.cipher.decrypt(head + await f.read())
+                return
+            
+            decryptor = ChunkedDecryptor(self._stream_key)
+            decryptor.update(head)
+            while True:
+                data = await f.read(chunk_size + _RECORD_HEADER.size + _GCM_TAG_SIZE)
+                if not data:
+                    break
+                plaintext = decryptor.update(data)
+                if plaintext:
+                    yield plaintext
+            decryptor.finalize()
     
     async def retrieve_document(
         self,
@@ -129,26 +355,14 @@ class DocumentStorageService:
         Retrieve and decrypt a document with access logging
         """
         try:
-            # Find the document file
-            document_path = None
-            for doc_type_dir in self.storage_path.iterdir():
-                if doc_type_dir.is_dir():
-                    for employee_dir in doc_type_dir.iterdir():
-                        if employee_dir.is_dir():
-                            for file_path in employee_dir.iterdir():
-                                if document_id in file_path.name:
-                                    document_path = file_path
-                                    break
-            
-            if not document_path:
-                raise FileNotFoundError(f"Document {document_id} not found")
-            
-            # Read encrypted content
-            async with aiofiles.open(document_path, 'rb') as f:
-                encrypted_content = await f.read()
-            
-            # Decrypt content
-            decrypted_content = self.cipher.decrypt(encrypted_content)
+            # Find and decrypt the document file
+            document_path = self.locate_document(document_id)
+            hasher = hashlib.sha256()
+            chunks = []
+            async for chunk in self._iter_decrypted(document_path, STREAM_CHUNK_SIZE):
+                hasher.update(chunk)
+                chunks.append(chunk)
+            decrypted_content = b"".join(chunks)
             
             # Log access for audit trail
             access_entry = {
@@ -169,8 +383,8 @@ class DocumentStorageService:
                 stored_filename=document_path.name,
                 file_path=str(document_path),
                 file_size=len(decrypted_content),
-                file_hash=hashlib.sha256(decrypted_content).hexdigest(),
-                mime_type="application/pdf",
+                file_hash=hasher.hexdigest(),
+                mime_type=mimetypes.guess_type(document_path.name)[0] or "application/octet-stream",
                 employee_id="",
                 property_id="",
                 uploaded_by=requester_id,
@@ -341,6 +555,7 @@ class DocumentStorageService:
         from reportlab.lib.pagesizes import letter
         from reportlab.pdfgen import canvas
         from reportlab.lib.utils import ImageReader
+        from PIL import Image
         
         # Open image
         img = Image.open(io.BytesIO(image_content))
@@ -5,17 +5,18 @@ Provides comprehensive employee lifecycle management, performance tracking, and
 from fastapi import APIRouter, Depends, HTTPException, Query, Form, UploadFile, File
 from typing import List, Dict, Any, Optional
 from datetime import datetime, date
+import asyncio
 import json
 
 from .auth import get_current_user, require_hr_role, require_manager_role, require_hr_or_manager_role
 from .models_enhanced import UserRole
 from .services.employee_management_service import EmployeeManagementService, EmployeeLifecycleStage, PerformanceRating, GoalStatus
-from .supabase_service_enhanced import EnhancedSupabaseService
+from .supabase_service_enhanced import EnhancedSupabaseService, get_enhanced_supabase_service
 
 from .response_utils import success_response, error_response
 
-def get_supabase_service():
-    return EnhancedSupabaseService()
+def get_supabase_service() -> EnhancedSupabaseService:
+    return get_enhanced_supabase_service()
 
 router = APIRouter(prefix="/api/employee-management", tags=["Employee Management"])
 
@@ -345,11 +346,17 @@ async def bulk_message_employees(
     department: Optional[str] = Form(None),
     employment_status: Optional[str] = Form(None),
     lifecycle_stage: Optional[str] = Form(None),
+    channels: Optional[str] = Form(None),  # JSON array of in_app, email, websocket
     current_user: dict = Depends(require_hr_or_manager_role),
     supabase_service = Depends(get_supabase_service)
 ):
-    """Send bulk message to employees based on filters"""
+    """Send bulk message to employees based on filters; delivery continues in the background"""
     try:
+        try:
+            channel_list = json.loads(channels) if channels else None
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Invalid channels format")
+        
         message_data = {
             "sender_id": current_user["id"],
             "subject": subject,
@@ -370,19 +377,81 @@ async def bulk_message_employees(
             filters["lifecycle_stage"] = lifecycle_stage
         
         employee_service = EmployeeManagementService(supabase_service)
-        result = await employee_service.bulk_message_employees(message_data, filters)
+        result = await employee_service.bulk_message_employees(message_data, filters, channel_list)
         
         if result["success"]:
             return success_response(
                 data=result,
-                message=f"Bulk message sent to {result['recipients_count']} employees"
+                message=f"Bulk message queued for {result['recipients_count']} employees"
             )
         else:
             return error_response(result["message"])
             
+    except HTTPException:
+        raise
     except Exception as e:
         return error_response(f"Failed to send bulk message: {str(e)}")
 
+@router.get("/messages/{message_id}")
+async def get_bulk_message_summary(
+    message_id: str,
+    current_user: dict = Depends(require_hr_or_manager_role),
+    supabase_service = Depends(get_supabase_service)
+):
+    """Get a bulk message with delivery counts by channel and status"""
+    try:
+        employee_service = EmployeeManagementService(supabase_service)
+        summary = await employee_service.get_bulk_message_summary(message_id)
+        
+        if not summary:
+            raise HTTPException(status_code=404, detail="Message not found")
+        
+        return success_response(
+            data=summary,
+            message="Message delivery summary retrieved successfully"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_response(f"Failed to get message summary: {str(e)}")
+
+@router.get("/messages/{message_id}/deliveries")
+async def get_message_deliveries(
+    message_id: str,
+    status: Optional[str] = Query(None),
+    channel: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: dict = Depends(require_hr_or_manager_role),
+    supabase_service = Depends(get_supabase_service)
+):
+    """Get per-recipient delivery status one page at a time"""
+    try:
+        after = None
+        if cursor:
+            employee_id, separator, cursor_channel = cursor.rpartition(":")
+            if not separator:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            after = (employee_id, cursor_channel)
+        
+        employee_service = EmployeeManagementService(supabase_service)
+        deliveries = await employee_service.get_message_deliveries(message_id, status, channel, after, limit)
+        
+        next_cursor = None
+        if len(deliveries) == limit:
+            next_cursor = f"{deliveries[-1]['employee_id']}:{deliveries[-1]['channel']}"
+        
+        return success_response(
+            data={"deliveries": deliveries, "next_cursor": next_cursor},
+            message=f"Retrieved {len(deliveries)} deliveries"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_response(f"Failed to get message deliveries: {str(e)}")
+
 @router.get("/message-templates")
 async def get_message_templates(
     template_type: Optional[str] = Query(None),
@@ -506,8 +575,6 @@ async def get_employee_lifecycle_analytics(
         
         query += " GROUP BY lifecycle_stage ORDER BY count DESC"
         
-        lifecycle_data = await supabase_service.execute_query(query, params)
-        
         # Get onboarding completion rates
         onboarding_query = """
             SELECT 
@@ -522,9 +589,10 @@ async def get_employee_lifecycle_analytics(
         if property_id:
             onboarding_query += " AND property_id = %s"
         
-        onboarding_data = await supabase_service.execute_query(
-            onboarding_query, 
-            [property_id] if property_id else []
+        # Both aggregates run concurrently on separate pooled connections
+        lifecycle_data, onboarding_data = await asyncio.gather(
+            supabase_service.execute_query(query, params),
+            supabase_service.execute_query(onboarding_query, [property_id] if property_id else [])
         )
         
         return success_response(
@@ -571,8 +639,6 @@ async def get_performance_analytics(
         
         goals_query += " GROUP BY eg.status ORDER BY count DESC"
         
-        goals_data = await supabase_service.execute_query(goals_query, params)
-        
         # Get review ratings distribution
         reviews_query = """
             SELECT 
@@ -597,7 +663,10 @@ async def get_performance_analytics(
         if department:
             reviews_params.append(department)
         
-        reviews_data = await supabase_service.execute_query(reviews_query, reviews_params)
+        goals_data, reviews_data = await asyncio.gather(
+            supabase_service.execute_query(goals_query, params),
+            supabase_service.execute_query(reviews_query, reviews_params)
+        )
         
         return success_response(
             data={
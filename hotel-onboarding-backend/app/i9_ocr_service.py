@@ -1,81 +1,280 @@
 """
-I-9 Document OCR Processing Service using Groq API
+I-9 Document OCR Processing Service
 Automated document field extraction for federal compliance
+
+Uploads are normalized with Pillow (EXIF rotation, grayscale, bounded size,
+JPEG re-encode) before they reach an OCR engine, engine calls run under a
+concurrency limit, and results are cached by content hash so re-uploading the
+same document does not trigger another (billed) vision call.
 """
+import asyncio
 import base64
+import hashlib
+import inspect
+import io
 import json
 import logging
-from typing import Dict, Any, Optional, List, Tuple
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Tuple, Union
 from datetime import datetime, date, timedelta
 import re
-from groq import Groq
+if TYPE_CHECKING:
+    from groq import AsyncGroq, Groq
 
+from .cache_service import CacheService
 from .i9_section2 import I9DocumentType, I9DocumentList, USCISDocumentValidator
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_VISION_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+OCR_CACHE_TTL = 24 * 3600
+
+
+def normalize_document_image(content: bytes,
+                             max_dimension: int = 1600,
+                             jpeg_quality: int = 80,
+                             grayscale: bool = True) -> bytes:
+    """
+    Re-encode an uploaded document as a small JPEG for OCR
+
+    Phone photos are rotated according to their EXIF orientation, converted to
+    grayscale and scaled so the longest side is at most ``max_dimension``.
+    PDFs are rasterized from their first page.
+    """
+    from PIL import Image, ImageOps
+
+    if content[:5] == b"%PDF-":
+        content = _render_first_pdf_page(content, max_dimension)
+
+    mode = "L" if grayscale else "RGB"
+    with Image.open(io.BytesIO(content)) as image:
+        # JPEG decoders can downscale while decoding, which avoids
+        # materializing a full 12MP bitmap for a phone photo
+        image.draft(mode, (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image).convert(mode)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=jpeg_quality, optimize=True)
+    return output.getvalue()
+
+
+def _render_first_pdf_page(content: bytes, max_dimension: int) -> bytes:
+    """Rasterize the first page of a PDF to PNG bytes"""
+    import fitz
+
+    with fitz.open(stream=content, filetype="pdf") as document:
+        page = document[0]
+        zoom = max_dimension / max(page.rect.width, page.rect.height)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        return pixmap.tobytes("png")
+
+
+class OCREngine(ABC):
+    """Base class for OCR backends; ``extract`` returns a dict of document fields"""
+
+    name = "base"
+
+    @abstractmethod
+    async def extract(self, image: bytes, document_type: I9DocumentType, prompt: str) -> Dict[str, Any]:
+        """Fields read from ``image``, as the JSON object ``prompt`` asks for"""
+
+
+class GroqVisionEngine(OCREngine):
+    """Extract fields with a Groq vision model (AsyncGroq or the sync client)"""
+
+    name = "groq"
+
+    def __init__(self, client: Union["AsyncGroq", "Groq"], model: str = DEFAULT_VISION_MODEL,
+                 max_tokens: int = 1000):
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+
+    async def extract(self, image: bytes, document_type: I9DocumentType, prompt: str) -> Dict[str, Any]:
+        image_base64 = base64.b64encode(image).decode("ascii")
+        create = self.client.chat.completions.create
+        kwargs = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"}}
+                    ]
+                }
+            ],
+            "temperature": 0.1,
+            "max_tokens": self.max_tokens,
+            "response_format": {"type": "json_object"}
+        }
+
+        if inspect.iscoroutinefunction(inspect.unwrap(create)):
+            completion = await create(**kwargs)
+        else:
+            # Sync client: keep the blocking HTTP call off the event loop
+            completion = await asyncio.to_thread(create, **kwargs)
+
+        response_text = completion.choices[0].message.content
+        logger.debug(f"Groq API response: {response_text}")
+        return json.loads(response_text)
+
+
+class TesseractEngine(OCREngine):
+    """Local OCR with pytesseract; fields are pulled from the text by label"""
+
+    name = "tesseract"
+
+    DATE_PATTERN = re.compile(
+        r"\b(\d{1,2}[/-]\d{1,2}[/-]\d{4}|\d{4}-\d{2}-\d{2}|\d{1,2} ?[A-Z]{3}[a-z]* ?\d{4})\b"
+    )
+    DATE_FORMATS = ("%m/%d/%Y", "%m-%d-%Y", "%Y-%m-%d", "%d %b %Y", "%d%b%Y", "%d %B %Y")
+    LABELS = {
+        "date_of_birth": r"(?:DOB|DATE OF BIRTH|BIRTH ?DATE)",
+        "expiration_date": r"(?:EXP|EXPIRES|EXPIRATION|DATE OF EXPIRATION|CARD EXPIRES)",
+        "issue_date": r"(?:ISS|ISSUED|DATE OF ISSUE)",
+        "last_name": r"(?:SURNAME|LAST NAME|LN)",
+        "first_name": r"(?:GIVEN NAMES?|FIRST NAME|FN)",
+        "document_number": r"(?:PASSPORT NO|DOCUMENT NO|LICENSE NO|LIC NO|DL NO|DLN|DL|CARD NO)",
+        "alien_number": r"(?:USCIS ?#|A ?#|ALIEN NUMBER)",
+    }
+
+    def __init__(self, lang: str = "eng", config: str = "--psm 6"):
+        self.lang = lang
+        self.config = config
+
+    async def extract(self, image: bytes, document_type: I9DocumentType, prompt: str) -> Dict[str, Any]:
+        text = await asyncio.to_thread(self._image_to_string, image)
+        return self.parse_text(text, document_type)
+
+    def _image_to_string(self, image: bytes) -> str:
+        import pytesseract
+        from PIL import Image
+
+        with Image.open(io.BytesIO(image)) as picture:
+            return pytesseract.image_to_string(picture, lang=self.lang, config=self.config)
+
+    @classmethod
+    def parse_text(cls, text: str, document_type: I9DocumentType) -> Dict[str, Any]:
+        """Map raw OCR text to the field names the vision prompts ask for"""
+        lines = [line.strip() for line in text.upper().splitlines() if line.strip()]
+        result: Dict[str, Any] = {}
+
+        for field_name, label in cls.LABELS.items():
+            value = cls._labelled_value(lines, label)
+            if value is None:
+                continue
+            if field_name.endswith("_date") or field_name == "date_of_birth":
+                match = cls.DATE_PATTERN.search(value)
+                value = cls._parse_date(match.group(1)) if match else None
+            else:
+                value = value.split("  ")[0].strip(" :#.")
+            if value:
+                result[field_name] = value
+
+        # Unlabelled dates: earliest is the birth date, latest the expiration
+        dates = sorted(filter(None, (cls._parse_date(m) for m in cls.DATE_PATTERN.findall("\n".join(lines)))))
+        if dates:
+            result.setdefault("date_of_birth", dates[0])
+            if len(dates) > 1:
+                result.setdefault("expiration_date", dates[-1])
+
+        if document_type == I9DocumentType.SSN_CARD:
+            ssn = re.search(r"\b(\d{3})[- ]?(\d{2})[- ]?(\d{4})\b", text)
+            if ssn:
+                result["ssn"] = "-".join(ssn.groups())
+        elif document_type in (I9DocumentType.US_PASSPORT, I9DocumentType.US_PASSPORT_CARD):
+            if "document_number" not in result:
+                number = re.search(r"\b([A-Z]?\d{8,9})\b", text.upper())
+                if number:
+                    result["document_number"] = number.group(1)
+            result.setdefault("issuing_authority", "United States of America")
+
+        if "alien_number" in result:
+            result["alien_number"] = re.sub(r"[^0-9A]", "", result["alien_number"])
+
+        return result
+
+    @staticmethod
+    def _labelled_value(lines: List[str], label: str) -> Optional[str]:
+        pattern = re.compile(rf"(?<![A-Z0-9]){label}(?![A-Z])[\s:#.]*(.*)")
+        for index, line in enumerate(lines):
+            match = pattern.search(line)
+            if match:
+                value = match.group(1).strip()
+                # Labels printed above their value
+                if not value and index + 1 < len(lines):
+                    value = lines[index + 1]
+                return value or None
+        return None
+
+    @classmethod
+    def _parse_date(cls, value: str) -> Optional[str]:
+        value = value.strip().title()
+        for fmt in cls.DATE_FORMATS:
+            try:
+                return datetime.strptime(value, fmt).date().isoformat()
+            except ValueError:
+                continue
+        return None
+
+
 class I9DocumentOCRService:
-    """OCR service for I-9 document processing using Groq API"""
+    """OCR service for I-9 document processing"""
     
-    def __init__(self, groq_client: Groq):
+    def __init__(self,
+                 groq_client: Optional[Union["AsyncGroq", "Groq"]] = None,
+                 engine: Optional[OCREngine] = None,
+                 max_concurrency: int = 4,
+                 max_dimension: int = 1600,
+                 jpeg_quality: int = 80,
+                 grayscale: bool = True,
+                 cache_ttl: int = OCR_CACHE_TTL,
+                 cache_entries: int = 512):
+        if engine is None:
+            if groq_client is None:
+                raise ValueError("Either groq_client or engine is required")
+            engine = GroqVisionEngine(groq_client)
         self.groq_client = groq_client
+        self.engine = engine
         self.validator = USCISDocumentValidator()
+        self.max_dimension = max_dimension
+        self.jpeg_quality = jpeg_quality
+        self.grayscale = grayscale
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Single-flight cache: identical uploads in flight share one engine call
+        self.result_cache = CacheService(
+            default_ttl=cache_ttl,
+            max_entries=cache_entries,
+            max_bytes=8 * 1024 * 1024
+        )
+        self.stats = {"engine_calls": 0, "engine_errors": 0, "bytes_received": 0, "bytes_sent": 0}
     
-    def extract_document_fields(self, 
-                              document_type: I9DocumentType, 
-                              image_data: str,
-                              file_name: str) -> Dict[str, Any]:
-        """Extract fields from document image using Groq vision API"""
+    async def extract_document_fields(self, 
+                                      document_type: I9DocumentType, 
+                                      image_data: Union[bytes, str],
+                                      file_name: str) -> Dict[str, Any]:
+        """Extract fields from a document image (raw bytes or base64/data URL)"""
         
         try:
-            # Get document-specific extraction prompt
-            extraction_prompt = self._get_extraction_prompt(document_type)
-            
-            # Prepare image for Groq API
-            image_base64 = self._prepare_image(image_data)
+            content = self._decode_image(image_data)
+            self.stats["bytes_received"] += len(content)
+            cache_key = f"{self.engine.name}:{document_type.value}:{hashlib.sha256(content).hexdigest()}"
             
-            # Use actual Groq Vision API for OCR
-            logger.info(f"Processing document type: {document_type} with Groq Vision API")
-            
-            # Call Groq Vision API
+            logger.info(f"Processing document type: {document_type} with {self.engine.name} OCR")
             try:
-                completion = self.groq_client.chat.completions.create(
-                    model="meta-llama/llama-4-scout-17b-16e-instruct",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": extraction_prompt
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/jpeg;base64,{image_base64}"
-                                    }
-                                }
-                            ]
-                        }
-                    ],
-                    temperature=0.1,
-                    max_tokens=1000,
-                    response_format={"type": "json_object"}
+                ocr_result = await self.result_cache.get_or_compute(
+                    cache_key,
+                    lambda: self._run_engine(content, document_type)
                 )
-                
-                # Parse the response
-                response_text = completion.choices[0].message.content
-                logger.info(f"Groq API response: {response_text}")
-                
-                # Parse JSON response
-                ocr_result = json.loads(response_text)
-                
             except Exception as api_error:
-                logger.error(f"Groq Vision API error: {str(api_error)}")
-                # Return empty result on API failure
+                # Failures are not cached, so a retry reaches the engine again
+                self.stats["engine_errors"] += 1
+                logger.error(f"OCR engine error for {file_name}: {str(api_error)}")
                 ocr_result = self._get_empty_result(document_type)
-                
-            # Validate extracted data
+            
+            # Callers may edit the result; keep the cached copy intact
+            ocr_result = dict(ocr_result)
             validation_result = self._validate_extracted_data(ocr_result, document_type)
             
             return {
@@ -96,6 +295,23 @@ class I9DocumentOCRService:
                 "processing_notes": [f"OCR processing failed: {str(e)}"]
             }
     
+    async def _run_engine(self, content: bytes, document_type: I9DocumentType) -> Dict[str, Any]:
+        """Normalize the image and call the engine, bounded by the concurrency limit"""
+        async with self._semaphore:
+            image = await asyncio.to_thread(
+                normalize_document_image, content, self.max_dimension, self.jpeg_quality, self.grayscale
+            )
+            self.stats["engine_calls"] += 1
+            self.stats["bytes_sent"] += len(image)
+            result = await self.engine.extract(image, document_type, self._get_extraction_prompt(document_type))
+        if not isinstance(result, dict):
+            raise ValueError(f"OCR engine returned {type(result).__name__}, expected an object")
+        return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Engine usage and result cache statistics"""
+        return {**self.stats, "engine": self.engine.name, "cache": self.result_cache.get_stats()}
+    
     def _get_extraction_prompt(self, document_type: I9DocumentType) -> str:
         """Get document-specific OCR extraction prompt"""
         
@@ -434,12 +650,14 @@ Required fields:
         
         return round(confidence, 2)
     
-    def _prepare_image(self, image_data: str) -> str:
-        """Prepare image for Groq API - ensure it's properly formatted base64"""
+    def _decode_image(self, image_data: Union[bytes, str]) -> bytes:
+        """Accept raw bytes, base64 or a data URL and return the image bytes"""
+        if isinstance(image_data, (bytes, bytearray)):
+            return bytes(image_data)
         # If the image data already includes the data URL prefix, remove it
         if image_data.startswith('data:'):
             image_data = image_data.split(',')[1]
-        return image_data
+        return base64.b64decode(image_data)
     
     def _get_empty_result(self, document_type: I9DocumentType) -> Dict[str, Any]:
         """Return empty result structure for document type"""
@@ -0,0 +1,49 @@
+"""
+Lazy service proxies
+Lets modules keep a module-level service name while deferring construction
+until the first attribute access (or an explicit get() during startup).
+"""
+import threading
+from typing import Any, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyService(Generic[T]):
+    """
+    Stand-in for a service instance that is built on first use.
+
+    Attribute access and assignment are forwarded to the real instance, so
+    existing `service.method(...)` call sites keep working. Construction is
+    guarded by a lock because sync endpoints run on the threadpool.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def get(self) -> T:
+        """Return the real instance, creating it if needed"""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.get(), name, value)
+
+    def __repr__(self) -> str:
+        state = repr(self._instance) if self._instance is not None else "not initialized"
+        return f"<LazyService {state}>"
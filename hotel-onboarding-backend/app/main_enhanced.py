@@ -6,7 +6,7 @@ Enhanced with standardized API response formats
 from fastapi import FastAPI, HTTPException, Depends, Form, Request, Query, File, UploadFile, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse, FileResponse, Response
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date, timedelta, timezone
 from pathlib import Path
@@ -17,8 +17,8 @@ import jwt
 import logging
 import base64
 import io
+import mimetypes
 from dotenv import load_dotenv
-from groq import Groq
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -34,6 +34,7 @@ from .auth import (
 )
 from .services.onboarding_orchestrator import OnboardingOrchestrator
 from .services.form_update_service import FormUpdateService
+from .services.autosave_service import AutosaveService, JsonPatchError
 
 # Import Task 2 Models
 from .models import (
@@ -44,10 +45,13 @@ from .models import (
 )
 
 # Import Supabase service and email service
-from .supabase_service_enhanced import EnhancedSupabaseService
+from .supabase_service_enhanced import (
+    EnhancedSupabaseService, get_enhanced_supabase_service, listener_database_url
+)
 from .email_service import email_service
-from .document_storage import DocumentStorageService
-from .policy_document_generator import PolicyDocumentGenerator
+from .cache_service import cache as response_cache
+from .document_storage import DocumentStorageService, DocumentTooLargeError
+from .lazy_service import LazyService
 # from .scheduler import OnboardingScheduler  # Temporarily disabled - missing apscheduler
 
 # Import PDF API router
@@ -58,15 +62,24 @@ from .websocket_router import router as websocket_router
 from .websocket_manager import websocket_manager
 from .analytics_router import router as analytics_router
 from .notification_router import router as notification_router
+from .notification_service import notification_service
 
 # Import OCR service
-from .i9_ocr_service import I9DocumentOCRService
+from .i9_ocr_service import I9DocumentOCRService, TesseractEngine
 from .i9_section2 import I9DocumentType
+from .compliance_engine import compliance_engine
+from .document_retention_service import retention_service
+from .services.hr_package_service import hr_package_service
+from .services.outbox_dispatcher import outbox_dispatcher
+from .services.message_dispatcher import message_dispatcher
+from .services.application_approval_service import (
+    ApplicationApprovalService, ApplicationNotFoundError, ApplicationNotPendingError
+)
 
 # Import standardized response system
 from .response_models import *
 from .response_utils import (
-    ResponseFormatter, ResponseMiddleware, success_response, error_response,
+    FastJSONResponse, ResponseFormatter, ResponseMiddleware, success_response, error_response,
     not_found_response, unauthorized_response, forbidden_response,
     validation_error_response, standardize_response, ErrorCode
 )
@@ -90,10 +103,11 @@ load_dotenv()
 app = FastAPI(
     title="Hotel Employee Onboarding System",
     description="Supabase-powered onboarding system with standardized API responses",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=FastJSONResponse
 )
 
-# Add response standardization middleware
+# Add response standardization and compression middleware
 app.add_middleware(ResponseMiddleware)
 
 # Add custom exception handlers
@@ -151,21 +165,103 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
+# Initialize services. Clients are built on first use (the startup handler
+# touches supabase_service first), so importing this module stays cheap, and
+# every service shares the one Supabase client and notification dispatcher.
 token_manager = OnboardingTokenManager()
 password_manager = PasswordManager()
-supabase_service = EnhancedSupabaseService()
-bulk_operation_service = BulkOperationService()
-bulk_application_ops = BulkApplicationOperations()
-bulk_employee_ops = BulkEmployeeOperations()
-bulk_communication_service = BulkCommunicationService()
-bulk_audit_service = BulkOperationAuditService()
+supabase_service = LazyService(get_enhanced_supabase_service)
+bulk_operation_service = LazyService(lambda: BulkOperationService(supabase_service.get(), notification_service))
+bulk_application_ops = LazyService(lambda: BulkApplicationOperations(bulk_operation_service.get()))
+bulk_employee_ops = LazyService(lambda: BulkEmployeeOperations(bulk_operation_service.get()))
+bulk_communication_service = LazyService(lambda: BulkCommunicationService(bulk_operation_service.get()))
+bulk_audit_service = LazyService(lambda: BulkOperationAuditService(supabase_service.get()))
+autosave_service = AutosaveService(supabase_service)
+application_approval_service = LazyService(lambda: ApplicationApprovalService(supabase_service.get(), outbox_dispatcher))
+
+# Cached views for HR/manager list and stats endpoints.
+# Tag invalidation on writes only reaches this worker's cache, so the TTL (plus
+# the cache's 5s stale window) is what bounds drift from writes made by other
+# workers; keep it short.
+LIST_VIEW_CACHE_TTL = 5
+STATS_VIEW_CACHE_TTL = 5
+
+# Columns the employee list views render; list reads decode rows with lean=True
+EMPLOYEE_ROW_COLUMNS = (
+    "id, property_id, department, position, hire_date, pay_rate, "
+    "employment_type, employment_status, onboarding_status"
+)
+
+def invalidate_application_views(property_id: Optional[str] = None):
+    """Drop cached application lists and stats after an application write"""
+    if property_id:
+        response_cache.invalidate_tags(f"applications:{property_id}", "applications:all")
+    else:
+        response_cache.invalidate_tags("applications")
+
+def invalidate_cached_views(*tags: str):
+    """Drop cached list/stats views carrying any of the given tags"""
+    response_cache.invalidate_tags(*tags)
+
+def get_manager_property_ids(manager_id: str) -> List[str]:
+    """Property IDs assigned to a manager, served from the ACL index"""
+    return get_property_access_controller(supabase_service).get_manager_properties(manager_id)
+
+def invalidate_manager_access(manager_id: Optional[str] = None, property_id: Optional[str] = None):
+    """Drop ACL index entries after a property-manager assignment change"""
+    access_controller = get_property_access_controller(supabase_service)
+    if manager_id:
+        access_controller.clear_manager_cache(manager_id)
+    if property_id:
+        access_controller.clear_property_cache(property_id)
+
+async def get_cached_applications(property_ids: Optional[List[str]] = None) -> List[JobApplication]:
+    """
+    Applications for the given properties (or all properties), served from the response cache.
+    Returns a new list so callers can filter and sort without touching the cached copy.
+    """
+    if property_ids is None:
+        applications = await response_cache.get_or_compute(
+            "applications:all",
+            lambda: supabase_service.get_all_applications(lean=True),
+            ttl=LIST_VIEW_CACHE_TTL,
+            tags=("applications", "applications:all")
+        )
+        return list(applications)
+    
+    scope = sorted(set(property_ids))
+    applications = await response_cache.get_or_compute(
+        f"applications:{','.join(scope)}",
+        lambda: supabase_service.get_applications_by_properties(scope, lean=True),
+        ttl=LIST_VIEW_CACHE_TTL,
+        tags=("applications", *[f"applications:{pid}" for pid in scope])
+    )
+    return list(applications)
+
+def create_groq_client():
+    """Build the Groq client; the SDK is only imported when OCR is first used"""
+    from groq import AsyncGroq
+    return AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+
+def create_ocr_service() -> I9DocumentOCRService:
+    """OCR_ENGINE=tesseract switches document OCR to the local engine"""
+    max_concurrency = int(os.getenv("OCR_MAX_CONCURRENCY", "4"))
+    if os.getenv("OCR_ENGINE", "groq").lower() == "tesseract":
+        return I9DocumentOCRService(engine=TesseractEngine(), max_concurrency=max_concurrency)
+    return I9DocumentOCRService(groq_client.get(), max_concurrency=max_concurrency)
+
+# Initialize GROQ client and OCR service on first use
+groq_client = LazyService(create_groq_client)
+ocr_service = LazyService(create_ocr_service)
 
-# Initialize GROQ client
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+def create_document_storage() -> DocumentStorageService:
+    """Shared document store; ENCRYPTION_KEY keeps documents readable across requests and restarts"""
+    encryption_key = os.getenv("ENCRYPTION_KEY")
+    return DocumentStorageService(encryption_key=encryption_key.encode() if encryption_key else None)
 
-# Initialize OCR service
-ocr_service = I9DocumentOCRService(groq_client)
+document_storage_service = LazyService(create_document_storage)
+# HR packages hold SSNs and bank details; keep them in the same encrypted store
+hr_package_service.document_storage = document_storage_service
 
 # Include PDF API router
 app.include_router(pdf_router)
@@ -183,12 +279,52 @@ async def startup_event():
     """Initialize services on startup"""
     global onboarding_orchestrator, form_update_service, onboarding_scheduler
     
-    # Initialize enhanced services (supabase_service is already initialized in __init__)
+    # Build the shared Supabase client now rather than on the first request
+    supabase_service.get()
+    
+    # Initialize enhanced services
     onboarding_orchestrator = OnboardingOrchestrator(supabase_service)
     form_update_service = FormUpdateService(supabase_service)
     
-    # Initialize property access controller
-    get_property_access_controller._instance = PropertyAccessController(supabase_service)
+    # Initialize property access controller and preload its manager → property index
+    access_controller = PropertyAccessController(supabase_service)
+    get_property_access_controller._instance = access_controller
+    indexed_managers = await access_controller.warm_manager_index()
+    print(f"✅ Property access index loaded for {indexed_managers} managers")
+    
+    # Follow assignment changes made by other workers; LISTEN needs a direct or session-mode URL
+    listen_url = listener_database_url()
+    if listen_url:
+        await access_controller.start_change_listener(listen_url)
+    # Send approval emails and other side effects committed to outbox_events
+    outbox_dispatcher.start(supabase_service)
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        # Pool for direct SQL (execute_query) used by the employee management analytics
+        await supabase_service.initialize_db_pool()
+        # Resume bulk employee messages left in 'sending' and follow pushes announced by other workers
+        resumed_messages = await message_dispatcher.start(supabase_service, listen_url)
+        print(f"✅ Employee message dispatcher started ({resumed_messages} messages resumed)")
+    
+    # Load open compliance deadlines and violations into the dashboard index
+    open_deadlines = await compliance_engine.tracker.warm(supabase_service)
+    print(f"✅ Compliance index loaded with {open_deadlines} open deadlines")
+    if listen_url:
+        await compliance_engine.tracker.start_change_listener(listen_url)
+    
+    # Create storage buckets once so uploads skip the per-request bucket check
+    if await supabase_service.initialize_storage_buckets():
+        print("✅ Storage buckets ready")
+    
+    # Start background expiry for the response cache
+    response_cache.start()
+    
+    # Move retention records through ACTIVE -> EXPIRING_SOON -> EXPIRED in batched SQL
+    retention_service.start_sweeper(supabase_service)
+    
+    # Start notification channel workers and the scheduled-delivery timer wheel
+    notification_service.websocket_manager = websocket_manager
+    await notification_service.start(supabase_service)
     
     # Initialize and start the scheduler for reminders
     # onboarding_scheduler = OnboardingScheduler(supabase_service, email_service)  # Disabled - missing apscheduler
@@ -209,6 +345,21 @@ async def shutdown_event():
         onboarding_scheduler.stop()
         print("✅ Scheduler stopped gracefully")
     
+    await response_cache.stop()
+    await retention_service.stop_sweeper()
+    await notification_service.stop()
+    await get_property_access_controller(supabase_service).stop_change_listener()
+    await compliance_engine.tracker.flush()
+    await compliance_engine.tracker.stop_change_listener()
+    await outbox_dispatcher.stop()
+    await message_dispatcher.stop()
+    await supabase_service.close_db_pool()
+    hr_package_service.shutdown()
+    
+    # Persist any coalesced autosaves that are still waiting on their debounce window
+    await autosave_service.shutdown()
+    print("✅ Pending autosaves flushed")
+    
     # Shutdown WebSocket manager
     await websocket_manager.shutdown()
     print("✅ WebSocket manager stopped gracefully")
@@ -340,7 +491,7 @@ async def login(request: Request):
         
         # Generate token
         if existing_user.role == "manager":
-            manager_properties = supabase_service.get_manager_properties_sync(existing_user.id)
+            manager_properties = get_manager_property_ids(existing_user.id)
             if not manager_properties:
                 return error_response(
                     message="Manager not configured",
@@ -408,7 +559,7 @@ async def refresh_token(current_user: User = Depends(get_current_user)):
     try:
         # Generate new token based on user role
         if current_user.role == "manager":
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
+            manager_properties = get_manager_property_ids(current_user.id)
             if not manager_properties:
                 return error_response(
                     message="Manager not configured",
@@ -510,10 +661,7 @@ async def get_manager_applications(
             )
         
         # Get applications from all manager's properties
-        all_applications = []
-        for property_id in property_ids:
-            applications = await supabase_service.get_applications_by_property(property_id)
-            all_applications.extend(applications)
+        all_applications = await get_cached_applications(property_ids)
         
         # Apply filters
         if search:
@@ -563,27 +711,35 @@ async def get_manager_applications(
 async def get_hr_dashboard_stats(current_user: User = Depends(require_hr_role)):
     """Get dashboard statistics for HR using Supabase"""
     try:
-        # Get counts from Supabase
-        total_properties = await supabase_service.get_properties_count()
-        total_managers = await supabase_service.get_managers_count()
-        total_employees = await supabase_service.get_employees_count()
-        pending_applications = await supabase_service.get_pending_applications_count()
-        
-        # Get additional statistics
-        approved_applications = await supabase_service.get_approved_applications_count()
-        total_applications = await supabase_service.get_total_applications_count()
-        active_employees = await supabase_service.get_active_employees_count()
-        onboarding_in_progress = await supabase_service.get_onboarding_in_progress_count()
-        
-        stats_data = DashboardStatsData(
-            totalProperties=total_properties,
-            totalManagers=total_managers,
-            totalEmployees=total_employees,
-            pendingApplications=pending_applications,
-            approvedApplications=approved_applications,
-            totalApplications=total_applications,
-            activeEmployees=active_employees,
-            onboardingInProgress=onboarding_in_progress
+        async def load_stats():
+            # Get counts from Supabase
+            total_properties = await supabase_service.get_properties_count()
+            total_managers = await supabase_service.get_managers_count()
+            total_employees = await supabase_service.get_employees_count()
+            pending_applications = await supabase_service.get_pending_applications_count()
+            
+            # Get additional statistics
+            approved_applications = await supabase_service.get_approved_applications_count()
+            total_applications = await supabase_service.get_total_applications_count()
+            active_employees = await supabase_service.get_active_employees_count()
+            onboarding_in_progress = await supabase_service.get_onboarding_in_progress_count()
+            
+            return DashboardStatsData(
+                totalProperties=total_properties,
+                totalManagers=total_managers,
+                totalEmployees=total_employees,
+                pendingApplications=pending_applications,
+                approvedApplications=approved_applications,
+                totalApplications=total_applications,
+                activeEmployees=active_employees,
+                onboardingInProgress=onboarding_in_progress
+            )
+        
+        stats_data = await response_cache.get_or_compute(
+            "stats:hr-dashboard",
+            load_stats,
+            ttl=STATS_VIEW_CACHE_TTL,
+            tags=("applications:all", "employees", "properties", "managers")
         )
         
         return success_response(
@@ -600,45 +756,67 @@ async def get_hr_dashboard_stats(current_user: User = Depends(require_hr_role)):
             detail="An error occurred while fetching dashboard data"
         )
 
+@app.get("/hr/cache-stats")
+async def get_cache_stats(current_user: User = Depends(require_hr_role)):
+    """Get hit/miss/eviction statistics for the response cache (HR only)"""
+    return success_response(
+        data=response_cache.get_stats(),
+        message="Cache statistics retrieved successfully"
+    )
+
 @app.get("/hr/properties", response_model=PropertiesResponse)
-async def get_hr_properties(current_user: User = Depends(require_hr_role)):
-    """Get all properties for HR using Supabase"""
+async def get_hr_properties(
+    search: Optional[str] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    sort_by: str = Query("created_at", description="name, city, state or created_at"),
+    sort_order: str = Query("asc"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(require_hr_role)
+):
+    """Get properties with their managers and counts for HR using Supabase"""
     try:
-        properties = await supabase_service.get_all_properties()
+        properties, total = await supabase_service.list_hr_properties(
+            search=search,
+            is_active=is_active,
+            sort=sort_by,
+            descending=sort_order.lower() == "desc",
+            limit=limit,
+            offset=offset
+        )
         
         # Convert to standardized format
+        base_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
         result = []
         for prop in properties:
-            # Get manager assignments for this property
-            try:
-                manager_response = supabase_service.client.table('property_managers').select('manager_id').eq('property_id', prop.id).execute()
-                manager_ids = [row['manager_id'] for row in manager_response.data]
-            except Exception:
-                manager_ids = []
-            
-            # Generate QR code URL for job applications
-            base_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
-            qr_code_url = f"{base_url}/apply/{prop.id}"
-            
             property_data = PropertyData(
-                id=prop.id,
-                name=prop.name,
-                address=prop.address,
-                city=prop.city,
-                state=prop.state,
-                zip_code=prop.zip_code,
-                phone=prop.phone,
-                manager_ids=manager_ids,
-                qr_code_url=qr_code_url,
-                is_active=prop.is_active,
-                created_at=prop.created_at.isoformat() if prop.created_at else None
+                id=str(prop["id"]),
+                name=prop["name"],
+                address=prop.get("address") or "",
+                city=prop.get("city") or "",
+                state=prop.get("state") or "",
+                zip_code=prop.get("zip_code") or "",
+                phone=prop.get("phone"),
+                manager_ids=[str(manager_id) for manager_id in prop["manager_ids"]],
+                # QR code URL for job applications
+                qr_code_url=f"{base_url}/apply/{prop['id']}",
+                is_active=prop.get("is_active", True) is not False,
+                created_at=prop.get("created_at"),
+                manager_count=prop["manager_count"],
+                employee_count=prop["employee_count"]
             )
             result.append(property_data.model_dump())
         
-        return success_response(
-            data=result,
-            message=f"Retrieved {len(result)} properties"
-        )
+        message = f"Retrieved {len(result)} properties"
+        if limit is None:
+            return success_response(data=result, message=message)
+        return FastJSONResponse(content=ResponseFormatter.paginated_list(
+            items=result,
+            page=offset // limit + 1,
+            per_page=limit,
+            total_items=total,
+            message=message
+        ))
         
     except Exception as e:
         logger.error(f"Failed to retrieve HR properties: {e}")
@@ -676,6 +854,7 @@ async def create_property(
         result = await supabase_service.create_property(property_data)
         
         if result.get("success"):
+            invalidate_cached_views("properties")
             return {
                 "message": "Property created successfully",
                 "property": result.get("property", property_data)
@@ -721,6 +900,7 @@ async def update_property(
         }
         
         result = supabase_service.client.table('properties').update(update_data).eq('id', id).execute()
+        invalidate_cached_views("properties")
         
         return {
             "message": "Property updated successfully",
@@ -745,8 +925,8 @@ async def delete_property(
             raise HTTPException(status_code=404, detail="Property not found")
         
         # Check for active applications or employees
-        applications = await supabase_service.get_applications_by_property(id)
-        employees = await supabase_service.get_employees_by_property(id)
+        applications = await supabase_service.get_applications_by_property(id, columns="id, status", lean=True)
+        employees = await supabase_service.get_employees_by_property(id, columns="id, employment_status", lean=True)
         
         active_applications = [app for app in applications if app.status == "pending"]
         active_employees = [emp for emp in employees if emp.employment_status == "active"]
@@ -790,6 +970,10 @@ async def delete_property(
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to delete property")
         
+        invalidate_cached_views("properties", "managers")
+        invalidate_application_views(id)
+        invalidate_manager_access(property_id=id)
+        
         return {"message": "Property deleted successfully", "detail": "All manager assignments have been removed"}
         
     except HTTPException:
@@ -876,6 +1060,8 @@ async def assign_manager_to_property(
         }
         
         result = supabase_service.client.table('property_managers').insert(assignment_data).execute()
+        invalidate_cached_views("properties", "managers")
+        invalidate_manager_access(manager_id=manager_id)
         
         return {
             "success": True,
@@ -910,6 +1096,9 @@ async def remove_manager_from_property(
         if not result.data:
             raise HTTPException(status_code=404, detail="Manager assignment not found")
         
+        invalidate_cached_views("properties", "managers")
+        invalidate_manager_access(manager_id=manager_id)
+        
         return {
             "success": True,
             "message": "Manager removed from property successfully"
@@ -939,17 +1128,16 @@ async def get_hr_applications(
         # Get applications based on user role
         if current_user.role == "manager":
             # Manager can only see applications for their properties
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-            if not manager_properties:
+            property_ids = get_manager_property_ids(current_user.id)
+            if not property_ids:
                 return []
-            property_ids = [prop.id for prop in manager_properties]
-            applications = await supabase_service.get_applications_by_properties(property_ids)
+            applications = await get_cached_applications(property_ids)
         else:
             # HR can see all applications or filter by property
             if property_id:
-                applications = await supabase_service.get_applications_by_property(property_id)
+                applications = await get_cached_applications([property_id])
             else:
-                applications = await supabase_service.get_all_applications()
+                applications = await get_cached_applications()
         
         # Apply filters
         if status:
@@ -996,21 +1184,23 @@ async def get_hr_applications(
         if limit:
             applications = applications[:limit]
         
-        # Convert to standardized format
-        result = []
-        for app in applications:
-            app_data = ApplicationData(
-                id=app.id,
-                property_id=app.property_id,
-                department=app.department,
-                position=app.position,
-                applicant_data=app.applicant_data,
-                status=app.status,
-                applied_at=app.applied_at.isoformat(),
-                reviewed_by=getattr(app, 'reviewed_by', None),
-                reviewed_at=getattr(app, 'reviewed_at', None).isoformat() if getattr(app, 'reviewed_at', None) else None
-            )
-            result.append(app_data.model_dump())
+        # Convert to the ApplicationData shape directly; rows were validated on write
+        result = [
+            {
+                "id": app.id,
+                "property_id": app.property_id,
+                "property_name": None,
+                "department": app.department,
+                "position": app.position,
+                "applicant_data": app.applicant_data,
+                "status": app.status.value,
+                "applied_at": app.applied_at.isoformat(),
+                "reviewed_by": app.reviewed_by,
+                "reviewed_at": app.reviewed_at.isoformat() if app.reviewed_at else None,
+                "rejection_reason": app.rejection_reason
+            }
+            for app in applications
+        ]
         
         return success_response(
             data=result,
@@ -1101,32 +1291,35 @@ async def get_manager_dashboard_stats(current_user: User = Depends(require_manag
                 detail="Manager account is not configured with property access"
             )
         
-        # Aggregate stats across all manager's properties
-        total_applications = []
-        total_employees = []
-        
-        for property_id in property_ids:
-            # Get applications and employees for each property
-            applications = await supabase_service.get_applications_by_property(property_id)
-            employees = await supabase_service.get_employees_by_property(property_id)
+        async def load_stats():
+            # Aggregate stats across all manager's properties
+            total_applications = await get_cached_applications(property_ids)
+            total_employees = await supabase_service.get_employees_by_properties(
+                property_ids, columns="id, employment_status, onboarding_status", lean=True
+            )
             
-            total_applications.extend(applications)
-            total_employees.extend(employees)
-        
-        # Calculate aggregated stats
-        pending_applications = len([app for app in total_applications if app.status == "pending"])
-        approved_applications = len([app for app in total_applications if app.status == "approved"])
-        active_employees = len([emp for emp in total_employees if emp.employment_status == "active"])
-        onboarding_in_progress = len([emp for emp in total_employees if emp.onboarding_status == OnboardingStatus.IN_PROGRESS])
-        
-        stats_data = {
-            "pendingApplications": pending_applications,
-            "approvedApplications": approved_applications,
-            "totalApplications": len(total_applications),
-            "totalEmployees": len(total_employees),
-            "activeEmployees": active_employees,
-            "onboardingInProgress": onboarding_in_progress
-        }
+            # Calculate aggregated stats
+            pending_applications = len([app for app in total_applications if app.status == "pending"])
+            approved_applications = len([app for app in total_applications if app.status == "approved"])
+            active_employees = len([emp for emp in total_employees if emp.employment_status == "active"])
+            onboarding_in_progress = len([emp for emp in total_employees if emp.onboarding_status == OnboardingStatus.IN_PROGRESS])
+            
+            return {
+                "pendingApplications": pending_applications,
+                "approvedApplications": approved_applications,
+                "totalApplications": len(total_applications),
+                "totalEmployees": len(total_employees),
+                "activeEmployees": active_employees,
+                "onboardingInProgress": onboarding_in_progress
+            }
+        
+        scope = sorted(set(property_ids))
+        stats_data = await response_cache.get_or_compute(
+            f"stats:manager-dashboard:{','.join(scope)}",
+            load_stats,
+            ttl=STATS_VIEW_CACHE_TTL,
+            tags=("employees", *[f"applications:{pid}" for pid in scope])
+        )
         
         return success_response(
             data=stats_data,
@@ -1212,13 +1405,17 @@ async def get_employees(
                     message="No employees found - manager not assigned to any property"
                 )
             
-            employees = await supabase_service.get_employees_by_properties(property_ids)
+            employees = await supabase_service.get_employees_by_properties(
+                property_ids, columns=EMPLOYEE_ROW_COLUMNS, lean=True
+            )
         elif current_user.role == "hr":
             # HR can see all employees, optionally filtered by property
             if property_id:
-                employees = await supabase_service.get_employees_by_property(property_id)
+                employees = await supabase_service.get_employees_by_property(
+                    property_id, columns=EMPLOYEE_ROW_COLUMNS, lean=True
+                )
             else:
-                employees = await supabase_service.get_all_employees()
+                employees = await supabase_service.get_all_employees(columns=EMPLOYEE_ROW_COLUMNS, lean=True)
         else:
             raise HTTPException(status_code=403, detail="Access denied")
         
@@ -1274,116 +1471,59 @@ async def approve_application(
 ):
     """Approve application using Supabase with enhanced access control"""
     try:
-        # Get application from Supabase
-        application = await supabase_service.get_application_by_id(id)
-        if not application:
-            return not_found_response("Application not found")
-        
         # Access control is handled by the decorator
         
-        # Update application status
-        await supabase_service.update_application_status(id, "approved", current_user.id)
-        
-        # Create employee record
-        employee_data = {
-            "application_id": id,
-            "property_id": application.property_id,
-            "manager_id": current_user.id,
-            "department": application.department,
-            "position": job_title,
-            "hire_date": start_date,
-            "pay_rate": pay_rate,
-            "pay_frequency": pay_frequency,
-            "employment_type": application.applicant_data.get("employment_type", "full_time"),
-            "personal_info": {
-                "job_title": job_title,
-                "start_time": start_time,
-                "benefits_eligible": benefits_eligible,
-                "supervisor": supervisor,
-                "special_instructions": special_instructions
-            },
-            "onboarding_status": "not_started"
-        }
-        
-        employee = await supabase_service.create_employee(employee_data)
-        
-        # Create onboarding session
-        onboarding_session = await onboarding_orchestrator.initiate_onboarding(
-            application_id=id,
-            employee_id=employee.id,
-            property_id=application.property_id,
-            manager_id=current_user.id,
-            expires_hours=72
-        )
-        
-        # Move competing applications to talent pool
-        talent_pool_count = await supabase_service.move_competing_applications_to_talent_pool(
-            application.property_id, application.position, id, current_user.id
-        )
-        
-        # Generate onboarding URL
-        base_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
-        onboarding_url = f"{base_url}/onboard?token={onboarding_session.token}"
-        
-        # Get property and manager info for emails
-        property_obj = supabase_service.get_property_by_id_sync(application.property_id)
-        manager = supabase_service.get_user_by_id_sync(current_user.id)
-        
-        # Send approval notification email with job details
+        # Status change, employee, onboarding session/token and talent pool moves
+        # commit together; the emails are sent from the outbox after commit
         try:
-            approval_email_sent = await email_service.send_approval_notification(
-                applicant_email=application.applicant_data["email"],
-                applicant_name=f"{application.applicant_data['first_name']} {application.applicant_data['last_name']}",
-                property_name=property_obj.name if property_obj else "Hotel Property",
-                position=application.position,
+            approval = await application_approval_service.approve(
+                application_id=id,
+                reviewer_id=current_user.id,
                 job_title=job_title,
                 start_date=start_date,
+                start_time=start_time,
                 pay_rate=pay_rate,
-                onboarding_link=onboarding_url,
-                manager_name=f"{manager.first_name} {manager.last_name}" if manager else "Hiring Manager",
-                manager_email=manager.email if manager else "manager@hotel.com"
-            )
-            
-            # Send onboarding welcome email with detailed instructions
-            welcome_email_sent = await email_service.send_onboarding_welcome_email(
-                employee_email=application.applicant_data["email"],
-                employee_name=f"{application.applicant_data['first_name']} {application.applicant_data['last_name']}",
-                property_name=property_obj.name if property_obj else "Hotel Property",
-                position=job_title,
-                onboarding_link=onboarding_url,
-                manager_name=f"{manager.first_name} {manager.last_name}" if manager else "Hiring Manager"
+                pay_frequency=pay_frequency,
+                benefits_eligible=benefits_eligible,
+                supervisor=supervisor,
+                special_instructions=special_instructions
             )
-            
-        except Exception as e:
-            print(f"Email sending error: {e}")
-            approval_email_sent = False
-            welcome_email_sent = False
+        except ApplicationNotFoundError:
+            return not_found_response("Application not found")
+        except ApplicationNotPendingError:
+            raise HTTPException(status_code=400, detail="Application is not pending")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="start_date must be YYYY-MM-DD")
+        
+        invalidate_application_views(approval["property_id"])
+        invalidate_cached_views("employees")
+        talent_pool_count = approval["talent_pool_count"]
         
         return {
             "message": "Application approved successfully",
-            "employee_id": employee.id,
+            "employee_id": approval["employee_id"],
             "onboarding": {
-                "onboarding_url": onboarding_url,
-                "token": onboarding_session.token,
-                "expires_at": onboarding_session.expires_at.isoformat()
+                "onboarding_url": approval["onboarding_url"],
+                "token": approval["token"],
+                "expires_at": approval["expires_at"].isoformat()
             },
             "employee_info": {
-                "name": f"{application.applicant_data['first_name']} {application.applicant_data['last_name']}",
-                "email": application.applicant_data["email"],
+                "name": approval["applicant_name"],
+                "email": approval["applicant_email"],
                 "position": job_title,
-                "department": application.department
+                "department": approval["department"]
             },
             "talent_pool": {
                 "moved_to_talent_pool": talent_pool_count,
                 "message": f"{talent_pool_count} other applications moved to talent pool"
             },
             "email_notifications": {
-                "approval_email_sent": approval_email_sent,
-                "welcome_email_sent": welcome_email_sent,
-                "recipient": application.applicant_data["email"]
+                "approval_email_queued": True,
+                "welcome_email_queued": True,
+                "recipient": approval["applicant_email"]
             }
         }
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -1483,6 +1623,7 @@ async def reject_application(
             "talent_pool_date": datetime.now(timezone.utc).isoformat()
         }
         supabase_service.client.table('job_applications').update(update_data).eq('id', id).execute()
+        invalidate_application_views(application.property_id)
         
         return {
             "message": "Application moved to talent pool successfully",
@@ -1537,6 +1678,7 @@ async def reject_application_enhanced(
             update_data["talent_pool_notes"] = request.talent_pool_notes
         
         supabase_service.client.table('job_applications').update(update_data).eq('id', id).execute()
+        invalidate_application_views(application.property_id)
         
         # Send rejection email if requested
         if request.send_rejection_email:
@@ -1580,59 +1722,92 @@ async def reject_application_enhanced(
 
 @app.get("/hr/applications/talent-pool")
 async def get_talent_pool(
+    response: Response,
     property_id: Optional[str] = Query(None),
     position: Optional[str] = Query(None),
+    department: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(require_hr_or_manager_role)
 ):
-    """Get talent pool applications using Supabase"""
+    """Get talent pool applications from the talent-pool index, filtered and paged in one query"""
     try:
-        # Get talent pool applications
-        query = supabase_service.client.table('job_applications').select('*').eq('status', 'talent_pool')
-        
         # Filter by property for managers
         if current_user.role == "manager":
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-            if not manager_properties:
+            property_ids = get_manager_property_ids(current_user.id)
+            if not property_ids:
                 return []
-            property_ids = [prop.id for prop in manager_properties]
-            query = query.in_('property_id', property_ids)
-        elif property_id:
-            query = query.eq('property_id', property_id)
-        
-        if position:
-            query = query.eq('position', position)
-        
-        response = query.execute()
+        else:
+            property_ids = [property_id] if property_id else None
         
-        applications = []
-        for row in response.data:
-            # Apply search filter
-            if search:
-                search_lower = search.lower()
-                applicant_data = row.get('applicant_data', {})
-                if not (search_lower in applicant_data.get('first_name', '').lower() or
-                       search_lower in applicant_data.get('last_name', '').lower() or
-                       search_lower in applicant_data.get('email', '').lower()):
-                    continue
-            
-            applications.append({
-                "id": row['id'],
-                "property_id": row['property_id'],
-                "department": row['department'],
-                "position": row['position'],
-                "applicant_data": row['applicant_data'],
-                "status": row['status'],
-                "applied_at": row['applied_at'],
-                "rejection_reason": row.get('rejection_reason'),
-                "talent_pool_date": row.get('talent_pool_date')
-            })
+        applications, total = await supabase_service.match_talent_pool(
+            property_ids=property_ids,
+            department=department,
+            position=position,
+            search=search,
+            limit=limit,
+            offset=offset
+        )
         
+        response.headers["X-Total-Count"] = str(total)
         return applications
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve talent pool: {str(e)}")
 
+@app.get("/hr/talent-pool/matches")
+async def get_talent_pool_matches(
+    response: Response,
+    position: Optional[str] = Query(None),
+    department: Optional[str] = Query(None),
+    property_id: Optional[str] = Query(None),
+    employment_type: Optional[str] = Query(None),
+    shift_preference: Optional[str] = Query(None),
+    available_by: Optional[date] = Query(None, description="Opening start date (YYYY-MM-DD)"),
+    min_experience: Optional[int] = Query(None, ge=0, le=3, description="0: 0-1 years, 1: 2-5, 2: 6-10, 3: 10+"),
+    search: Optional[str] = Query(None),
+    limit: int = Query(25, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(require_hr_or_manager_role)
+):
+    """Talent-pool candidates ranked for an opening, best match first"""
+    if not position and not department:
+        raise HTTPException(status_code=400, detail="position or department is required")
+    
+    try:
+        if current_user.role == "manager":
+            property_ids = get_manager_property_ids(current_user.id)
+            if property_id:
+                if property_id not in property_ids:
+                    raise HTTPException(status_code=403, detail="Access denied")
+                property_ids = [property_id]
+            if not property_ids:
+                return []
+        else:
+            property_ids = [property_id] if property_id else None
+        
+        candidates, total = await supabase_service.match_talent_pool(
+            property_ids=property_ids,
+            department=department,
+            position=position,
+            employment_type=employment_type,
+            shift_preference=shift_preference,
+            available_by=available_by,
+            min_experience=min_experience,
+            search=search,
+            limit=limit,
+            offset=offset
+        )
+        
+        response.headers["X-Total-Count"] = str(total)
+        return candidates
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to match talent pool: {str(e)}")
+
 @app.post("/hr/applications/{id}/reactivate")
 async def reactivate_application(
     id: str,
@@ -1650,8 +1825,7 @@ async def reactivate_application(
         
         # Verify access for managers
         if current_user.role == "manager":
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-            property_ids = [prop.id for prop in manager_properties]
+            property_ids = get_manager_property_ids(current_user.id)
             if application.property_id not in property_ids:
                 raise HTTPException(status_code=403, detail="Access denied")
         
@@ -1664,6 +1838,7 @@ async def reactivate_application(
             "talent_pool_date": None
         }
         supabase_service.client.table('job_applications').update(update_data).eq('id', id).execute()
+        invalidate_application_views(application.property_id)
         
         return {
             "message": "Application reactivated successfully",
@@ -1742,65 +1917,32 @@ async def get_hr_users(
 
 @app.get("/hr/managers")
 async def get_managers(
+    response: Response,
     property_id: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
     include_inactive: bool = Query(False, description="Include inactive managers in results"),
     search: Optional[str] = Query(None),
+    sort_by: str = Query("created_at", description="email, first_name, last_name or created_at"),
+    sort_order: str = Query("asc"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(require_hr_role)
 ):
-    """Get all managers with filtering and search capabilities (HR only) using Supabase"""
+    """Get managers with their properties, filtered, searched and paged in one query (HR only)"""
     try:
-        # Get all manager users
-        query = supabase_service.client.table('users').select('*').eq('role', 'manager')
-        
-        # Handle active/inactive filtering
-        if is_active is not None:
-            # If is_active is explicitly set, use that
-            query = query.eq('is_active', is_active)
-        elif not include_inactive:
-            # By default, only show active managers unless include_inactive is True
-            query = query.eq('is_active', True)
-        
-        response = query.execute()
-        
-        managers = []
-        for row in response.data:
-            # Apply search filter
-            if search:
-                search_lower = search.lower()
-                if not (search_lower in row['email'].lower() or
-                       search_lower in (row.get('first_name') or '').lower() or
-                       search_lower in (row.get('last_name') or '').lower()):
-                    continue
-            
-            # Get manager's properties using service method
-            manager_properties = await supabase_service.get_manager_properties(row['id'])
-            property_ids = [prop.id for prop in manager_properties]
-            
-            # Filter by property if specified
-            if property_id and property_id not in property_ids:
-                continue
-            
-            # Convert manager properties to property info
-            property_info = []
-            for prop in manager_properties:
-                property_info.append({
-                    "id": prop.id,
-                    "name": prop.name,
-                    "city": prop.city,
-                    "state": prop.state
-                })
-            
-            managers.append({
-                "id": row['id'],
-                "email": row['email'],
-                "first_name": row.get('first_name'),
-                "last_name": row.get('last_name'),
-                "is_active": row.get('is_active', True),
-                "created_at": row.get('created_at'),
-                "properties": property_info
-            })
+        managers, total = await supabase_service.list_hr_managers(
+            property_id=property_id,
+            is_active=is_active,
+            include_inactive=include_inactive,
+            search=search,
+            sort=sort_by,
+            descending=sort_order.lower() == "desc",
+            limit=limit,
+            offset=offset
+        )
         
+        # The body stays a plain list; the size of the full result goes in a header
+        response.headers["X-Total-Count"] = str(total)
         return managers
         
     except Exception as e:
@@ -1851,12 +1993,14 @@ async def create_manager(
         
         if result.data:
             created_manager = result.data[0]
+            invalidate_cached_views("managers", "properties")
             
             # Assign to property if specified
             if property_id and property_id != 'none':
                 try:
                     # Fix: Correct parameter order (manager_id, property_id)
                     success = await supabase_service.assign_manager_to_property(manager_id, property_id)
+                    invalidate_manager_access(manager_id=manager_id)
                     if not success:
                         # Manager created but property assignment failed
                         return success_response(
@@ -1883,6 +2027,7 @@ async def create_manager(
         logger.error(f"Failed to create manager: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create manager: {str(e)}")
 
+
 @app.get("/hr/employees")
 async def get_hr_employees(
     property_id: Optional[str] = Query(None),
@@ -1895,9 +2040,11 @@ async def get_hr_employees(
     try:
         # Get all employees or filter by property
         if property_id:
-            employees = await supabase_service.get_employees_by_property(property_id)
+            employees = await supabase_service.get_employees_by_property(
+                property_id, columns=EMPLOYEE_ROW_COLUMNS, lean=True
+            )
         else:
-            employees = await supabase_service.get_all_employees()
+            employees = await supabase_service.get_all_employees(columns=EMPLOYEE_ROW_COLUMNS, lean=True)
         
         # Apply filters
         if department:
@@ -1915,14 +2062,17 @@ async def get_hr_employees(
         
         # Convert to dict format for frontend compatibility
         result = []
+        property_names = {}
         for emp in employees:
-            # Get property info
-            property_obj = supabase_service.get_property_by_id_sync(emp.property_id)
+            # Get property info, once per property
+            if emp.property_id not in property_names:
+                property_obj = supabase_service.get_property_by_id_sync(emp.property_id)
+                property_names[emp.property_id] = property_obj.name if property_obj else "Unknown"
             
             result.append({
                 "id": emp.id,
                 "property_id": emp.property_id,
-                "property_name": property_obj.name if property_obj else "Unknown",
+                "property_name": property_names[emp.property_id],
                 "department": emp.department,
                 "position": emp.position,
                 "hire_date": emp.hire_date.isoformat() if emp.hire_date else None,
@@ -1975,13 +2125,14 @@ async def get_application_departments(current_user: User = Depends(require_hr_or
     try:
         # Get applications based on user role
         if current_user.role == "manager":
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-            if not manager_properties:
+            property_ids = get_manager_property_ids(current_user.id)
+            if not property_ids:
                 return []
-            property_ids = [prop.id for prop in manager_properties]
-            applications = await supabase_service.get_applications_by_properties(property_ids)
+            applications = await supabase_service.get_applications_by_properties(
+                property_ids, columns="department", lean=True
+            )
         else:
-            applications = await supabase_service.get_all_applications()
+            applications = await supabase_service.get_all_applications(columns="department", lean=True)
         
         # Extract unique departments
         departments = list(set(app.department for app in applications if app.department))
@@ -2001,13 +2152,14 @@ async def get_application_positions(
     try:
         # Get applications based on user role
         if current_user.role == "manager":
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-            if not manager_properties:
+            property_ids = get_manager_property_ids(current_user.id)
+            if not property_ids:
                 return []
-            property_ids = [prop.id for prop in manager_properties]
-            applications = await supabase_service.get_applications_by_properties(property_ids)
+            applications = await supabase_service.get_applications_by_properties(
+                property_ids, columns="department, position", lean=True
+            )
         else:
-            applications = await supabase_service.get_all_applications()
+            applications = await supabase_service.get_all_applications(columns="department, position", lean=True)
         
         # Filter by department if specified
         if department:
@@ -2028,13 +2180,12 @@ async def get_application_stats(current_user: User = Depends(require_hr_or_manag
     try:
         # Get applications based on user role
         if current_user.role == "manager":
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-            if not manager_properties:
+            property_ids = get_manager_property_ids(current_user.id)
+            if not property_ids:
                 return {"total": 0, "pending": 0, "approved": 0, "talent_pool": 0}
-            property_ids = [prop.id for prop in manager_properties]
-            applications = await supabase_service.get_applications_by_properties(property_ids)
+            applications = await get_cached_applications(property_ids)
         else:
-            applications = await supabase_service.get_all_applications()
+            applications = await get_cached_applications()
         
         # Calculate stats
         total = len(applications)
@@ -2076,6 +2227,7 @@ async def submit_job_application(id: str, application_data: JobApplicationData):
         
         # Create application
         application_id = str(uuid.uuid4())
+        latest_employer = application_data.employment_history[0] if application_data.employment_history else None
         
         job_application = JobApplication(
             id=application_id,
@@ -2098,8 +2250,8 @@ async def submit_job_application(id: str, application_data: JobApplicationData):
                 "employment_type": application_data.employment_type,
                 "experience_years": application_data.experience_years,
                 "hotel_experience": application_data.hotel_experience,
-                "previous_employer": application_data.previous_employer,
-                "reason_for_leaving": application_data.reason_for_leaving,
+                "previous_employer": latest_employer.company_name if latest_employer else None,
+                "reason_for_leaving": latest_employer.reason_for_leaving if latest_employer else None,
                 "additional_comments": application_data.additional_comments
             },
             status=ApplicationStatus.PENDING,
@@ -2108,6 +2260,7 @@ async def submit_job_application(id: str, application_data: JobApplicationData):
         
         # Store in Supabase
         created_application = supabase_service.create_application_sync(job_application)
+        invalidate_application_views(id)
         
         return {
             "success": True,
@@ -2202,6 +2355,8 @@ async def bulk_application_action(
                 action_type="approve"
             )
         
+        invalidate_application_views()
+
         return {
             "message": f"Bulk {action} completed",
             "processed": result["total_processed"],
@@ -2253,6 +2408,8 @@ async def bulk_status_update(
                     notes=notes
                 )
         
+        invalidate_application_views()
+
         return {
             "message": f"Bulk status update to {new_status} completed",
             "processed": result["total_processed"],
@@ -2293,6 +2450,8 @@ async def bulk_reactivate_applications(
                     notes="Candidate reactivated for new opportunity consideration"
                 )
         
+        invalidate_application_views()
+
         return {
             "message": "Bulk reactivation completed",
             "processed": result["total_processed"],
@@ -2333,6 +2492,8 @@ async def bulk_move_to_talent_pool(
                     notes="Application moved to talent pool for future opportunities"
                 )
         
+        invalidate_application_views()
+
         return {
             "message": "Bulk move to talent pool completed",
             "processed": result["total_processed"],
@@ -2754,8 +2915,7 @@ async def get_application_history(
         
         # Check access permissions for managers
         if current_user.role == UserRole.MANAGER:
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-            manager_property_ids = [prop.id for prop in manager_properties]
+            manager_property_ids = get_manager_property_ids(current_user.id)
             if application.property_id not in manager_property_ids:
                 raise HTTPException(status_code=403, detail="Access denied")
         
@@ -2951,7 +3111,11 @@ async def update_manager(
                                 detail="Unable to assign property due to database security policies. Please contact your administrator."
                             )
                         # For other errors, continue anyway as manager update was successful
+            
+            invalidate_manager_access(manager_id=id)
         
+        invalidate_cached_views("managers", "properties")
+
         return {
             "success": True,
             "message": "Manager updated successfully",
@@ -2997,6 +3161,8 @@ async def delete_manager(
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete manager")
         
+        invalidate_cached_views("managers", "properties")
+
         return {
             "success": True,
             "message": f"Manager {manager.first_name} {manager.last_name} has been deactivated"
@@ -3031,6 +3197,8 @@ async def reactivate_manager(
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to reactivate manager")
         
+        invalidate_cached_views("managers", "properties")
+
         return {
             "success": True,
             "message": f"Manager {manager.first_name} {manager.last_name} has been reactivated"
@@ -3080,9 +3248,11 @@ async def reset_manager_password(
 @app.get("/hr/managers/{id}/performance")
 async def get_manager_performance(
     id: str,
+    since: Optional[datetime] = Query(None, description="Only applications submitted at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only applications submitted before this time"),
     current_user: User = Depends(require_hr_role)
 ):
-    """Get manager performance metrics (HR only)"""
+    """Get manager performance and hiring funnel metrics (HR only)"""
     try:
         # Check if manager exists
         manager = await supabase_service.get_manager_by_id(id)
@@ -3090,7 +3260,7 @@ async def get_manager_performance(
             raise HTTPException(status_code=404, detail="Manager not found")
         
         # Get performance data
-        performance_data = await supabase_service.get_manager_performance(id)
+        performance_data = await supabase_service.get_manager_performance(id, since=since, until=until)
         
         return {
             "manager_id": id,
@@ -3144,8 +3314,7 @@ async def search_employees(
     try:
         # For managers, restrict to their properties only
         if current_user.role == UserRole.MANAGER:
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-            manager_property_ids = [prop.id for prop in manager_properties]
+            manager_property_ids = get_manager_property_ids(current_user.id)
             
             if property_id and property_id not in manager_property_ids:
                 raise HTTPException(status_code=403, detail="Access denied to this property")
@@ -3160,8 +3329,13 @@ async def search_employees(
             property_id=property_id,
             department=department,
             position=position,
-            employment_status=employment_status
+            employment_status=employment_status,
+            lean=True
         )
+        if current_user.role == UserRole.MANAGER:
+            employees = get_property_access_controller(supabase_service).filter_employees_by_manager_access(
+                current_user, employees
+            )
         
         # Format response
         formatted_employees = []
@@ -3223,8 +3397,7 @@ async def update_employee_status(
         
         # For managers, check access to employee's property
         if current_user.role == UserRole.MANAGER:
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-            manager_property_ids = [prop.id for prop in manager_properties]
+            manager_property_ids = get_manager_property_ids(current_user.id)
             if employee.property_id not in manager_property_ids:
                 raise HTTPException(status_code=403, detail="Access denied to this employee")
         
@@ -3243,6 +3416,8 @@ async def update_employee_status(
         if not success:
             raise HTTPException(status_code=500, detail="Failed to update employee status")
         
+        invalidate_cached_views("employees")
+        
         return {
             "success": True,
             "message": f"Employee status updated to {new_status}",
@@ -3267,8 +3442,7 @@ async def get_employee_statistics(
     try:
         # For managers, restrict to their properties
         if current_user.role == UserRole.MANAGER:
-            manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-            manager_property_ids = [prop.id for prop in manager_properties]
+            manager_property_ids = get_manager_property_ids(current_user.id)
             
             if property_id and property_id not in manager_property_ids:
                 raise HTTPException(status_code=403, detail="Access denied to this property")
@@ -3408,6 +3582,7 @@ async def create_manager_user(email: str, password: str, property_name: str, sec
             "assigned_at": datetime.now(timezone.utc).isoformat()
         }
         supabase_service.client.table('property_managers').insert(assignment_data).execute()
+        invalidate_manager_access(manager_id=manager_id)
         
         # Store password
         password_manager.store_password(email, password)
@@ -4690,6 +4865,7 @@ async def validate_i9_supplement_a(
         )
         
         all_violations = violations + supplement_violations
+        await compliance_engine.tracker.flush()
         
         return {
             "is_compliant": is_valid and is_valid_supplement,
@@ -4715,6 +4891,7 @@ async def validate_i9_supplement_b_access(
             current_user.id,
             'supplement-b-check'
         )
+        await compliance_engine.tracker.flush()
         
         return {
             "has_access": is_valid,
@@ -4745,6 +4922,7 @@ async def validate_digital_signature(
             current_user.id,
             signature_data.get('document_id', '')
         )
+        await compliance_engine.tracker.flush()
         
         return {
             "is_compliant": is_valid,
@@ -4774,29 +4952,41 @@ async def get_i9_deadlines(
         if not employee:
             raise HTTPException(status_code=404, detail="Employee not found")
         
+        user_role = UserRole(current_user.role)
+        if user_role == UserRole.MANAGER:
+            access_controller = get_property_access_controller(supabase_service)
+            if employee.property_id not in access_controller.get_manager_properties(current_user.id):
+                raise HTTPException(status_code=403, detail="Access denied to this employee")
+        
         hire_date = datetime.strptime(employee.hire_date, "%Y-%m-%d").date()
         
-        # Check if I-9 Section 2 is completed
-        onboarding_session = await supabase_service.get_active_onboarding_by_employee(id)
-        section2_completed = False
-        section2_date = None
+        # A deadline that is already met is final; skip the onboarding lookup
+        document_id = f"i9-{id}"
+        deadline = await compliance_engine.tracker.load_deadline(document_id)
+        section2_completed = bool(deadline and deadline.is_met)
+        section2_date = deadline.completion_date if section2_completed else None
         
-        if onboarding_session and onboarding_session.get('i9_section2_data'):
-            section2_completed = True
-            section2_date = onboarding_session['i9_section2_data'].get('verification_date')
-            if section2_date:
-                section2_date = datetime.strptime(section2_date, "%Y-%m-%d").date()
+        # Check if I-9 Section 2 is completed
+        if not section2_completed:
+            onboarding_session = await supabase_service.get_active_onboarding_by_employee(id)
+            if onboarding_session and onboarding_session.get('i9_section2_data'):
+                section2_completed = True
+                section2_date = onboarding_session['i9_section2_data'].get('verification_date')
+                if section2_date:
+                    section2_date = datetime.strptime(section2_date, "%Y-%m-%d").date()
         
         # Validate compliance
         is_compliant, deadline, warnings = compliance_engine.validate_i9_three_day_compliance(
             id,
-            f"i9-{id}",
+            document_id,
             hire_date,
-            section2_date
+            section2_date,
+            property_id=employee.property_id
         )
+        await compliance_engine.tracker.flush()
         
         return {
-            "employee_id": employee_id,
+            "employee_id": id,
             "employee_name": f"{employee.first_name} {employee.last_name}",
             "hire_date": hire_date.isoformat(),
             "deadline_date": deadline.deadline_date.isoformat(),
@@ -4822,8 +5012,11 @@ async def get_compliance_dashboard(
     try:
         user_role = UserRole(current_user.role)
         property_id = current_user.property_id if hasattr(current_user, 'property_id') else None
+        property_ids = None
+        if user_role == UserRole.MANAGER:
+            property_ids = get_property_access_controller(supabase_service).get_manager_properties(current_user.id)
         
-        dashboard = compliance_engine.get_compliance_dashboard(user_role, property_id)
+        dashboard = compliance_engine.get_compliance_dashboard(user_role, property_id, property_ids)
         
         return {
             "dashboard": dashboard,
@@ -4919,7 +5112,7 @@ async def get_retention_dashboard(
     """Get document retention dashboard"""
     try:
         user_role = UserRole(current_user.role)
-        dashboard = retention_service.get_retention_dashboard(user_role)
+        dashboard = await retention_service.get_retention_dashboard(user_role)
         
         return {
             "dashboard": dashboard,
@@ -4942,7 +5135,7 @@ async def place_legal_hold(
         if current_user.role != 'hr':
             raise HTTPException(status_code=403, detail="Only HR can place legal holds")
         
-        success = retention_service.place_legal_hold(id, reason)
+        success = await retention_service.place_legal_hold(id, reason)
         
         if not success:
             raise HTTPException(status_code=404, detail="Document not found")
@@ -5166,8 +5359,7 @@ async def get_application_for_setup(
             return not_found_response("Application not found")
         
         # Verify manager access
-        manager_properties = supabase_service.get_manager_properties_sync(current_user.id)
-        property_ids = [prop.id for prop in manager_properties]
+        property_ids = get_manager_property_ids(current_user.id)
         
         if application.property_id not in property_ids:
             return forbidden_response("Access denied to this application")
@@ -6730,6 +6922,9 @@ async def get_onboarding_session(token: str):
         else:
             current_step_index = len(ONBOARDING_STEPS) - 1  # All completed, stay on last step
         
+        # Persist coalesced autosaves first so the session reflects the latest edits
+        await autosave_service.flush(token=token)
+        
         # Load saved form data from onboarding_form_data table by employee_id (for test tokens)
         # or by token (for real tokens)
         if token_data['employee_id'].startswith('test-emp-'):
@@ -6784,6 +6979,33 @@ async def get_onboarding_session(token: str):
             status_code=500
         )
 
+def _resolve_autosave_token(employee_id: str, authorization: Optional[str]):
+    """
+    Validate the onboarding token for an autosave request.
+    Returns (token, error_response); token is None for demo sessions that are not persisted.
+    """
+    is_test_employee = employee_id == "demo-employee-001" or employee_id.startswith("test-emp-")
+    
+    if not authorization or not authorization.startswith("Bearer "):
+        if is_test_employee:
+            return None, None
+        return None, unauthorized_response("Missing or invalid authorization header")
+    
+    token = authorization.split(" ")[1]
+    if is_test_employee:
+        # Test tokens are saved to Supabase as well, the shared demo token is not
+        return (None if token == "demo-token" else token), None
+    
+    token_data = OnboardingTokenManager().verify_onboarding_token(token)
+    if not token_data or not token_data.get('valid'):
+        return None, unauthorized_response("Invalid or expired token")
+    
+    # Verify token matches employee
+    if token_data.get('employee_id') != employee_id:
+        return None, forbidden_response("Token does not match employee ID")
+    
+    return token, None
+
 @app.post("/api/onboarding/{employee_id}/progress/{step_id}")
 @app.post("/api/onboarding/{employee_id}/save-progress/{step_id}")
 async def save_step_progress(
@@ -6795,87 +7017,100 @@ async def save_step_progress(
     """
     Save progress for a specific step
     Implements saveProgress from OnboardingFlowController spec
+    
+    Saves are coalesced server-side: rapid successive saves for the same step
+    replace each other and only the newest payload is upserted once the
+    debounce window goes quiet.
     """
     try:
-        # Validate token if not demo mode
-        if employee_id != "demo-employee-001" and not employee_id.startswith("test-emp-"):
-            if not authorization or not authorization.startswith("Bearer "):
-                return unauthorized_response("Missing or invalid authorization header")
-            
-            token = authorization.split(" ")[1]
-            token_manager = OnboardingTokenManager()
-            token_data = token_manager.verify_onboarding_token(token)
-            
-            if not token_data or not token_data.get('valid'):
-                return unauthorized_response("Invalid or expired token")
-            
-            # Verify token matches employee
-            if token_data.get('employee_id') != employee_id:
-                return forbidden_response("Token does not match employee ID")
-        # Handle test mode - but still save to Supabase for test tokens
-        if employee_id == "demo-employee-001" or employee_id.startswith("test-emp-"):
-            # For test tokens, also save to Supabase if we have a valid token
-            if authorization and authorization.startswith("Bearer "):
-                token = authorization.split(" ")[1]
-                if token != "demo-token":
-                    # Save to Supabase for real test tokens
-                    # Handle both direct data and wrapped in formData field
-                    form_data = request if not isinstance(request, dict) or "formData" not in request else request.get("formData")
-                    saved = supabase_service.save_onboarding_form_data(
-                        token=token,
-                        employee_id=employee_id,
-                        step_id=step_id,
-                        form_data=form_data
-                    )
-                    logger.info(f"Test employee form data saved to Supabase: {saved}")
-            
-            return success_response(
-                data={
-                    "saved": True,
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                },
-                message="Demo progress saved successfully"
-            )
+        token, auth_error = _resolve_autosave_token(employee_id, authorization)
+        if auth_error:
+            return auth_error
         
-        # Save to Supabase for real employees
         # Handle both direct data and wrapped in formData field
         form_data = request if not isinstance(request, dict) or "formData" not in request else request.get("formData")
         
-        # Save to onboarding_form_data table
-        saved = supabase_service.save_onboarding_form_data(
-            token=token,
-            employee_id=employee_id,
-            step_id=step_id,
-            form_data=form_data
-        )
+        autosave = {"queued": False}
+        if token:
+            autosave = await autosave_service.save(
+                token=token,
+                employee_id=employee_id,
+                step_id=step_id,
+                form_data=form_data
+            )
         
-        if not saved:
-            logger.error(f"Failed to save form data to Supabase for employee {employee_id}, step {step_id}")
+        return success_response(
+            data={
+                "saved": True,
+                "revision": autosave.get("revision", 0),
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            },
+            message="Progress saved successfully"
+        )
         
-        # Also update the onboarding_progress table (existing logic)
-        db = await EnhancedSupabaseService.get_db()
+    except Exception as e:
+        logger.error(f"Save step progress error: {e}")
+        return error_response(
+            message="Failed to save progress",
+            error_code=ErrorCode.INTERNAL_SERVER_ERROR,
+            status_code=500
+        )
+
+@app.patch("/api/onboarding/{employee_id}/progress/{step_id}")
+@app.patch("/api/onboarding/{employee_id}/save-progress/{step_id}")
+async def patch_step_progress(
+    employee_id: str,
+    step_id: str,
+    request: Dict[str, Any],
+    authorization: str = Header(None)
+):
+    """
+    Partially update saved progress for a step
+    
+    Body: {"patch": [{"op": "replace", "path": "/firstName", "value": "Ana"}, ...]}
+    Supports the add/replace/remove operations of JSON Patch (RFC 6902), so
+    clients only send the fields that changed.
+    """
+    try:
+        token, auth_error = _resolve_autosave_token(employee_id, authorization)
+        if auth_error:
+            return auth_error
         
-        # Upsert progress record
-        progress_data = {
-            'employee_id': employee_id,
-            'step_id': step_id,
-            'form_data': form_data,
-            'last_saved_at': datetime.now(timezone.utc).isoformat(),
-            'completed': False  # This is just progress, not completion
-        }
+        operations = request.get("patch")
+        if not isinstance(operations, list) or not operations:
+            return error_response(
+                message="Request body must contain a non-empty 'patch' list",
+                error_code=ErrorCode.VALIDATION_ERROR,
+                status_code=400
+            )
         
-        await db.table('onboarding_progress').upsert(progress_data).execute()
+        autosave = {"queued": False}
+        if token:
+            autosave = await autosave_service.patch(
+                token=token,
+                employee_id=employee_id,
+                step_id=step_id,
+                operations=operations
+            )
         
         return success_response(
             data={
                 "saved": True,
+                "revision": autosave.get("revision", 0),
                 "timestamp": datetime.now(timezone.utc).isoformat()
             },
-            message="Progress saved successfully"
+            message="Progress patched successfully"
+        )
+    
+    except JsonPatchError as e:
+        return error_response(
+            message="Invalid patch",
+            error_code=ErrorCode.VALIDATION_ERROR,
+            status_code=400,
+            detail=str(e)
         )
-        
     except Exception as e:
-        logger.error(f"Save step progress error: {e}")
+        logger.error(f"Patch step progress error: {e}")
         return error_response(
             message="Failed to save progress",
             error_code=ErrorCode.INTERNAL_SERVER_ERROR,
@@ -6909,6 +7144,9 @@ async def mark_step_complete(
             # Verify token matches employee
             if token_data.get('employee_id') != employee_id:
                 return forbidden_response("Token does not match employee ID")
+        # Write any pending autosave for this step before it is marked complete
+        if authorization and authorization.startswith("Bearer "):
+            await autosave_service.flush(token=authorization.split(" ")[1], step_id=step_id)
         # Handle test mode
         if employee_id == "demo-employee-001" or employee_id.startswith("test-emp-"):
             # Determine next step for demo
@@ -7041,8 +7279,8 @@ async def test_upload_document(
         # Parse metadata if provided
         doc_metadata = json.loads(metadata) if metadata else {}
         
-        # Initialize document storage service
-        doc_storage = DocumentStorageService()
+        # Shared document storage service
+        doc_storage = document_storage_service
         
         # Store document with encryption
         stored_doc = await doc_storage.store_document(
@@ -7112,6 +7350,7 @@ async def generate_company_policies_document(
         }
         
         # Generate PDF document
+        from .policy_document_generator import PolicyDocumentGenerator
         generator = PolicyDocumentGenerator()
         pdf_bytes = generator.generate_policy_document(
             employee_data=employee_data,
@@ -7120,7 +7359,7 @@ async def generate_company_policies_document(
         )
         
         # Store document using document storage service
-        doc_storage = DocumentStorageService()
+        doc_storage = document_storage_service
         stored_doc = await doc_storage.store_document(
             file_content=pdf_bytes,
             filename=f"company_policies_{employee_id}_{datetime.now().strftime('%Y%m%d')}.pdf",
@@ -7179,6 +7418,7 @@ async def test_generate_policy_document(request: Request):
         signature_data = data.get('signatureData', {})
         
         # Generate PDF document
+        from .policy_document_generator import PolicyDocumentGenerator
         generator = PolicyDocumentGenerator()
         pdf_bytes = generator.generate_policy_document(
             employee_data=employee_data,
@@ -7187,7 +7427,7 @@ async def test_generate_policy_document(request: Request):
         )
         
         # Store document using document storage service
-        doc_storage = DocumentStorageService()
+        doc_storage = document_storage_service
         stored_doc = await doc_storage.store_document(
             file_content=pdf_bytes,
             filename=f"test_company_policies_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
@@ -7227,8 +7467,8 @@ async def test_download_document(document_id: str):
     Test endpoint to download a document without authentication
     """
     try:
-        # Initialize document storage service
-        doc_storage = DocumentStorageService()
+        # Shared document storage service
+        doc_storage = document_storage_service
         
         # Find the document file
         storage_path = Path("document_storage")
@@ -7346,23 +7586,15 @@ async def upload_document(
     Upload a document with encryption and legal compliance metadata
     """
     try:
-        # Validate file size
-        contents = await file.read()
-        if len(contents) > 10 * 1024 * 1024:  # 10MB limit
-            return validation_error_response(
-                errors={"file": "File size exceeds 10MB limit"},
-                message="File too large"
-            )
-        
         # Parse metadata if provided
         doc_metadata = json.loads(metadata) if metadata else {}
         
-        # Initialize document storage service
-        doc_storage = DocumentStorageService()
+        # Shared document storage service
+        doc_storage = document_storage_service
         
-        # Store document with encryption
-        stored_doc = await doc_storage.store_document(
-            file_content=contents,
+        # Stream the upload into encrypted storage; the 10MB limit is enforced while reading
+        stored_doc = await doc_storage.store_document_stream(
+            file,
             filename=file.filename,
             document_type=DocumentType(document_type),
             employee_id=employee_id,
@@ -7389,6 +7621,11 @@ async def upload_document(
             message="Document uploaded successfully"
         )
         
+    except DocumentTooLargeError:
+        return validation_error_response(
+            errors={"file": "File size exceeds 10MB limit"},
+            message="File too large"
+        )
     except ValueError as e:
         return validation_error_response(
             errors={"file": str(e)},
@@ -7411,8 +7648,8 @@ async def get_document(
     Retrieve a document with access logging
     """
     try:
-        # Initialize document storage service
-        doc_storage = DocumentStorageService()
+        # Shared document storage service
+        doc_storage = document_storage_service
         
         # Retrieve document
         content, metadata = await doc_storage.retrieve_document(
@@ -7466,21 +7703,24 @@ async def download_document(
     Download a document with watermark and legal cover sheet
     """
     try:
-        # Initialize document storage service
-        doc_storage = DocumentStorageService()
+        # Shared document storage service
+        doc_storage = document_storage_service
         
-        # Retrieve document
-        content, metadata = await doc_storage.retrieve_document(
-            document_id=document_id,
-            requester_id=current_user.id,
-            purpose="download"
-        )
-        
-        # Generate legal cover sheet
-        cover_sheet = await doc_storage.generate_legal_cover_sheet(metadata)
+        document_path = doc_storage.locate_document(document_id)
+        mime_type = mimetypes.guess_type(document_path.name)[0] or 'application/octet-stream'
+        download_name = f"LEGAL_{document_id}{document_path.suffix}"
+        headers = {"Content-Disposition": f'attachment; filename="{download_name}"'}
         
         # Create document package
-        if metadata.mime_type == 'application/pdf':
+        if mime_type == 'application/pdf':
+            # PDFs get the legal cover sheet merged in front, which needs the whole file
+            content, metadata = await doc_storage.retrieve_document(
+                document_id=document_id,
+                requester_id=current_user.id,
+                purpose="download"
+            )
+            cover_sheet = await doc_storage.generate_legal_cover_sheet(metadata)
+            
             from PyPDF2 import PdfMerger
             merger = PdfMerger()
             merger.append(io.BytesIO(cover_sheet))
@@ -7490,9 +7730,14 @@ async def download_document(
             merger.write(output)
             merger.close()
             
-            final_content = output.getvalue()
+            response = Response(content=output.getvalue(), media_type=mime_type, headers=headers)
         else:
-            final_content = content
+            # Other files are decrypted chunk by chunk as they are sent
+            response = StreamingResponse(
+                doc_storage.stream_document(document_id),
+                media_type=mime_type,
+                headers=headers
+            )
         
         # Log download
         access_log = DocumentAccessLog(
@@ -7507,14 +7752,7 @@ async def download_document(
         
         await supabase_service.log_document_access(access_log.dict())
         
-        return FileResponse(
-            io.BytesIO(final_content),
-            filename=f"LEGAL_{metadata.original_filename}",
-            media_type=metadata.mime_type,
-            headers={
-                "Content-Disposition": f'attachment; filename="LEGAL_{metadata.original_filename}"'
-            }
-        )
+        return response
         
     except FileNotFoundError:
         return not_found_response("Document not found")
@@ -7536,8 +7774,8 @@ async def create_document_package(
     Create a legal document package with multiple documents
     """
     try:
-        # Initialize document storage service
-        doc_storage = DocumentStorageService()
+        # Shared document storage service
+        doc_storage = document_storage_service
         
         # Create package
         package_content = await doc_storage.create_document_package(
@@ -7618,8 +7856,8 @@ async def verify_document_integrity(
     Verify document integrity and authenticity
     """
     try:
-        # Initialize document storage service
-        doc_storage = DocumentStorageService()
+        # Shared document storage service
+        doc_storage = document_storage_service
         
         # Verify document
         is_valid = await doc_storage.verify_document_integrity(document_id)
@@ -7657,8 +7895,8 @@ async def process_document_with_ai(
     employee_id: Optional[str] = Form(None)
 ):
     """
-    Process uploaded document with GROQ AI to extract I-9 relevant information
-    Uses Llama 3.3 70B model for document analysis
+    Process uploaded document with the configured OCR engine to extract I-9 relevant information
+    Uses the Groq vision model by default (OCR_ENGINE=tesseract for local OCR)
     Also saves document to Supabase storage
     """
     try:
@@ -7687,9 +7925,6 @@ async def process_document_with_ai(
                 logger.error(f"Failed to save document to storage: {storage_error}")
                 # Continue processing even if storage fails
         
-        # Convert to base64
-        file_base64 = base64.b64encode(file_content).decode('utf-8')
-        
         # Map frontend document types to backend enum
         document_type_mapping = {
             'us_passport': I9DocumentType.US_PASSPORT,
@@ -7706,9 +7941,9 @@ async def process_document_with_ai(
             )
         
         # Process with OCR service
-        result = ocr_service.extract_document_fields(
+        result = await ocr_service.extract_document_fields(
             document_type=doc_type_enum,
-            image_data=file_base64,
+            image_data=file_content,
             file_name=file.filename
         )
         
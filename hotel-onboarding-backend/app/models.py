@@ -1405,7 +1405,7 @@ class DocumentType(str, Enum):
     VOIDED_CHECK = "voided_check"
     OTHER = "other"
 
-class DocumentCategory(str, Enum):
+class StorageDocumentCategory(str, Enum):
     """Categories for document classification"""
     FEDERAL_FORMS = "federal_forms"
     IDENTITY_DOCUMENTS = "identity_documents"
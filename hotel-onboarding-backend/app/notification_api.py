@@ -13,7 +13,8 @@ from .notification_service import (
     NotificationSeverity,
     DeliveryChannel,
     NotificationStatus,
-    NotificationAction
+    NotificationAction,
+    NotificationChannel
 )
 from .auth import get_current_user
 from .models import UserRole
@@ -554,53 +555,54 @@ async def get_notification_statistics(
 async def broadcast_notification(
     request: CreateNotificationRequest,
     target_role: Optional[str] = Query(None, description="Target role for broadcast"),
+    target_property_id: Optional[str] = Query(None, description="Target property for broadcast"),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Broadcast notification to multiple users (HR only)
     
     Args:
-        request: Notification creation request
+        request: Notification creation request (user_id is ignored)
         target_role: Optional role filter for broadcast
+        target_property_id: Optional property filter for broadcast
         current_user: Current authenticated user
-        
+    
     Returns:
-        Success response with broadcast details
+        Success response with broadcast id and recipient/row counts
     """
     try:
         # Only HR users can broadcast notifications
         if current_user["role"] != UserRole.HR.value:
             raise HTTPException(status_code=403, detail="Insufficient permissions")
         
-        # This would integrate with user management to get target users
-        # For now, just create a single notification as placeholder
-        
-        # Convert string enums to enum objects
-        category = NotificationCategory(request.category)
-        severity = NotificationSeverity(request.severity)
-        channels = [DeliveryChannel(ch) for ch in (request.channels or ["websocket"])]
-        
-        # Create notification (placeholder - would broadcast to multiple users)
-        notification_id = await notification_service.create_notification(
-            user_id=request.user_id,
-            title=request.title,
+        # "websocket" is the live push of an in-app notification
+        channels = {
+            NotificationChannel.IN_APP if ch == "websocket" else NotificationChannel(ch)
+            for ch in (request.channels or ["websocket"])
+        }
+        filters = {}
+        if target_role:
+            filters["role"] = target_role
+        if target_property_id:
+            filters["property_id"] = target_property_id
+        
+        result = await notification_service.broadcast_notification(
+            scope="filtered" if filters else "global",
             message=request.message,
-            category=category,
-            severity=severity,
-            channels=channels,
-            expires_in_hours=request.expires_in_hours,
-            metadata=request.metadata
+            channels=sorted(channels, key=lambda channel: channel.value),
+            filters=filters,
+            subject=request.title,
+            requires_hr=True
         )
         
         return success_response(
             data={
-                "notification_id": notification_id,
-                "broadcast_target": target_role or "all",
-                "recipients_count": 1  # Placeholder
+                **result,
+                "broadcast_target": target_role or "all"
             },
             message="Notification broadcast successfully"
         )
-        
+
     except HTTPException:
         raise
     except ValueError as e:
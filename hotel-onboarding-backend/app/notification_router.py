@@ -286,14 +286,14 @@ async def broadcast_notification(
         # Convert string channels to enum
         channels = [NotificationChannel(c) for c in request.channels]
         
-        # Send broadcast
+        # Rows are written in one statement; WebSocket pushes continue in the background
         result = await notification_service.broadcast_notification(
             scope=request.scope,
             message=request.message,
             channels=channels,
             filters=request.filters,
-            property_id=request.filters.get("property_id") if request.filters else None,
-            role=request.filters.get("role") if request.filters else None,
+            subject=request.subject,
+            priority=NotificationPriority[request.priority.upper()],
             requires_hr=(request.scope == "global")
         )
         
@@ -310,6 +310,31 @@ async def broadcast_notification(
             message=f"Failed to send broadcast: {str(e)}"
         )
 
+@router.get("/broadcast/{broadcast_id}")
+async def get_broadcast_status(
+    broadcast_id: str,
+    current_user = Depends(get_current_user)
+) -> APIResponse:
+    """Delivery counts for a broadcast (HR only)"""
+    try:
+        if current_user.role != "hr":
+            raise HTTPException(status_code=403, detail="Only HR users can view broadcasts")
+        
+        status = await notification_service.get_broadcast_status(broadcast_id)
+        
+        return APIResponse(
+            success=True,
+            data=status,
+            message="Broadcast status retrieved"
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        return APIResponse(
+            success=False,
+            message=f"Failed to get broadcast status: {str(e)}"
+        )
+
 @router.post("/schedule")
 async def schedule_notification(
     request: ScheduleRequest,
@@ -4,10 +4,14 @@ Handles multi-channel notifications with templates, preferences, and scheduling
 """
 
 import asyncio
+import heapq
+import itertools
 import json
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Set, Tuple
 from enum import Enum
 from dataclasses import dataclass, field
 import smtplib
@@ -19,7 +23,7 @@ import os
 from dotenv import load_dotenv
 # import aioredis  # Optional for Redis caching
 import uuid
-from collections import defaultdict
+from collections import defaultdict, deque
 import re
 
 load_dotenv()
@@ -153,13 +157,143 @@ class Notification:
     metadata: Dict[str, Any] = field(default_factory=dict)
     error_message: Optional[str] = None
 
+@dataclass
+class ChannelConfig:
+    """Dispatch settings for one delivery channel"""
+    workers: int
+    rate_per_second: float
+    burst: int
+
+DEFAULT_CHANNEL_CONFIG: Dict[NotificationChannel, ChannelConfig] = {
+    NotificationChannel.EMAIL: ChannelConfig(workers=4, rate_per_second=10, burst=20),
+    NotificationChannel.IN_APP: ChannelConfig(workers=8, rate_per_second=500, burst=500),
+    NotificationChannel.SMS: ChannelConfig(workers=2, rate_per_second=5, burst=5),
+    NotificationChannel.PUSH: ChannelConfig(workers=4, rate_per_second=50, burst=100),
+    NotificationChannel.WEBHOOK: ChannelConfig(workers=2, rate_per_second=20, burst=20),
+}
+
+FINISHED_STATUSES = {
+    NotificationStatus.SENT,
+    NotificationStatus.DELIVERED,
+    NotificationStatus.FAILED,
+    NotificationStatus.DEAD_LETTER,
+}
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Aware UTC datetime; naive values are taken as local time"""
+    return value.astimezone(timezone.utc) if value else None
+
+# Broadcasts write their rows with broadcast_notifications() (migration 019)
+BROADCAST_CHANNELS = (NotificationChannel.IN_APP, NotificationChannel.EMAIL)
+BROADCAST_ROLES = ("hr", "manager", "employee")
+
+BROADCAST_NOTIFICATIONS_SQL = """
+    SELECT recipients_count, in_app_count, email_count, online_recipients
+    FROM broadcast_notifications(%s, %s::text[], %s::text[], %s::text[], %s, %s, %s, %s, %s::jsonb, %s::text[])
+"""
+
+BROADCAST_STATUS_SQL = """
+    SELECT channel, status, COUNT(*) AS count
+    FROM notifications
+    WHERE broadcast_id = %s
+    GROUP BY channel, status
+"""
+
+class RateLimiter:
+    """Token bucket shared by the workers of one channel"""
+    
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+    
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class TimerWheel:
+    """
+    Hashed timing wheel for scheduled notifications.
+    Scheduling and cancelling are O(1); each tick only inspects one slot.
+    Entries further out than one revolution stay in their slot until their tick comes round.
+    """
+    
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 512, now: Optional[float] = None):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self._wheel: List[Dict[str, Tuple[int, Any]]] = [dict() for _ in range(slots)]
+        self._slot_of: Dict[str, int] = {}
+        self._current_tick = self._tick_for(time.time() if now is None else now)
+    
+    def _tick_for(self, timestamp: float) -> int:
+        return math.floor(timestamp / self.tick_seconds)
+    
+    def __len__(self) -> int:
+        return len(self._slot_of)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._slot_of
+    
+    def schedule(self, key: str, due_at: float, item: Any) -> bool:
+        """Place an item on the wheel; returns False if it is already due"""
+        due_tick = math.ceil(due_at / self.tick_seconds)
+        if due_tick <= self._current_tick:
+            return False
+        self.cancel(key)
+        slot = due_tick % self.slots
+        self._wheel[slot][key] = (due_tick, item)
+        self._slot_of[key] = slot
+        return True
+    
+    def cancel(self, key: str) -> bool:
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        self._wheel[slot].pop(key, None)
+        return True
+    
+    def advance(self, now: Optional[float] = None) -> List[Any]:
+        """Move the wheel forward to now and return every item that came due"""
+        target_tick = self._tick_for(time.time() if now is None else now)
+        if target_tick <= self._current_tick:
+            return []
+        
+        # After a long pause every slot is visited at most once
+        first_tick = max(self._current_tick + 1, target_tick - self.slots + 1)
+        due = []
+        for tick in range(first_tick, target_tick + 1):
+            bucket = self._wheel[tick % self.slots]
+            if not bucket:
+                continue
+            expired = [key for key, (due_tick, _) in bucket.items() if due_tick <= target_tick]
+            for key in expired:
+                due.append(bucket.pop(key)[1])
+                del self._slot_of[key]
+        self._current_tick = target_tick
+        return due
+
 class NotificationService:
     """Comprehensive notification service with multi-channel support"""
     
-    def __init__(self, supabase_service=None):
+    def __init__(
+        self,
+        supabase_service=None,
+        channel_config: Optional[Dict[NotificationChannel, ChannelConfig]] = None,
+        status_batch_size: int = 200,
+        status_flush_interval: float = 1.0,
+        schedule_load_interval: float = 60.0,
+        claim_lease_seconds: float = 300.0,
+        broadcast_push_batch: int = 200
+    ):
         self.supabase = supabase_service
         self.templates: Dict[str, NotificationTemplate] = {}
-        self.queue: List[Notification] = []
         self.preferences_cache: Dict[str, NotificationPreferences] = {}
         self.websocket_manager = None  # Will be injected
         self.redis_client = None  # For queue management
@@ -180,9 +314,35 @@ class NotificationService:
         # Initialize default templates
         self._initialize_templates()
         
-        # Start background workers
-        self._start_workers()
-    
+        # Dispatcher: one priority heap and worker pool per channel; see start()
+        self.channel_config = {**DEFAULT_CHANNEL_CONFIG, **(channel_config or {})}
+        self._queues: Dict[NotificationChannel, List[Tuple[int, int, Notification]]] = {
+            channel: [] for channel in NotificationChannel
+        }
+        self._queue_ready: Dict[NotificationChannel, asyncio.Event] = {}
+        self._rate_limiters = {
+            channel: RateLimiter(config.rate_per_second, config.burst)
+            for channel, config in self.channel_config.items()
+        }
+        self._sequence = itertools.count()
+        self.timer_wheel = TimerWheel()
+        self.status_batch_size = status_batch_size
+        self.status_flush_interval = status_flush_interval
+        self.schedule_load_interval = schedule_load_interval
+        self.claim_lease_seconds = claim_lease_seconds
+        self._pending_status: Dict[str, Notification] = {}
+        self._inflight: Set[str] = set()  # queued or on the wheel, and not yet persisted as finished
+        self._tasks: List[asyncio.Task] = []
+        self._running = False
+        self._sent_times: deque = deque(maxlen=100_000)
+        self.dispatch_stats: Dict[str, int] = defaultdict(int)
+
+        # Broadcast WebSocket pushes run outside the request; see broadcast_notification()
+        self.broadcast_push_batch = broadcast_push_batch
+        self._broadcast_tasks: Set[asyncio.Task] = set()
+        self._broadcast_pushes: Dict[str, Dict[str, int]] = {}
+        self._max_tracked_broadcasts = 500
+
     def _initialize_templates(self):
         """Initialize default notification templates"""
         self.templates = {
@@ -225,10 +385,190 @@ class NotificationService:
             )
         }
     
-    def _start_workers(self):
-        """Start background workers for queue processing"""
-        # These would be started as asyncio tasks in production
-        pass
+    async def start(self, supabase_service=None):
+        """Start channel workers, the scheduler tick and the status flusher"""
+        if supabase_service is not None:
+            self.supabase = supabase_service
+        if self._running:
+            return
+        self._running = True
+        for channel, config in self.channel_config.items():
+            self._queue_ready[channel] = asyncio.Event()
+            if self._queues[channel]:
+                self._queue_ready[channel].set()
+            for _ in range(config.workers):
+                self._tasks.append(asyncio.create_task(self._channel_worker(channel)))
+        
+        await self._load_scheduled()
+        self._tasks.append(asyncio.create_task(self._scheduler_loop()))
+        self._tasks.append(asyncio.create_task(self._status_flush_loop()))
+        logger.info(f"Notification dispatcher started with {len(self._tasks) - 2} channel workers")
+    
+    async def stop(self, drain_timeout: float = 5.0):
+        """Stop background tasks, giving queued notifications a chance to drain"""
+        broadcasts = list(self._broadcast_tasks)
+        for task in broadcasts:
+            task.cancel()
+        await asyncio.gather(*broadcasts, return_exceptions=True)
+
+        if not self._running:
+            return
+        deadline = time.monotonic() + drain_timeout
+        while self.queue_depth() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self.flush_status_updates()
+    
+    def queue_depth(self, channel: Optional[NotificationChannel] = None) -> int:
+        if channel:
+            return len(self._queues[channel])
+        return sum(len(queue) for queue in self._queues.values())
+    
+    def _enqueue(self, notification: Notification):
+        notification.status = NotificationStatus.QUEUED
+        self._inflight.add(notification.id)
+        heapq.heappush(
+            self._queues[notification.channel],
+            (notification.priority.value, next(self._sequence), notification)
+        )
+        self.dispatch_stats["enqueued"] += 1
+        ready = self._queue_ready.get(notification.channel)
+        if ready:
+            ready.set()
+    
+    async def _channel_worker(self, channel: NotificationChannel):
+        queue = self._queues[channel]
+        ready = self._queue_ready[channel]
+        limiter = self._rate_limiters[channel]
+        while self._running:
+            if not queue:
+                ready.clear()
+                await ready.wait()
+                continue
+            _, _, notification = heapq.heappop(queue)
+            await limiter.acquire()
+            try:
+                await self._send_immediate(notification)
+            except Exception as e:
+                # _send_immediate records its own failures; this only guards the worker
+                logger.error(f"Notification worker for {channel.value} failed on {notification.id}: {e}")
+    
+    async def _scheduler_loop(self):
+        last_load = time.monotonic()
+        while self._running:
+            await asyncio.sleep(self.timer_wheel.tick_seconds)
+            for notification in self.timer_wheel.advance():
+                self._enqueue(notification)
+            if time.monotonic() - last_load >= self.schedule_load_interval:
+                last_load = time.monotonic()
+                await self._load_scheduled()
+    
+    async def _status_flush_loop(self):
+        while self._running:
+            await asyncio.sleep(self.status_flush_interval)
+            await self.flush_status_updates()
+    
+    def _record_status(self, notification: Notification):
+        """Buffer a delivery state change; persisted by flush_status_updates()"""
+        if not self.supabase:
+            if notification.status in FINISHED_STATUSES:
+                self._inflight.discard(notification.id)
+            return
+        self._pending_status[notification.id] = notification
+        if len(self._pending_status) >= self.status_batch_size:
+            asyncio.create_task(self.flush_status_updates())
+    
+    async def flush_status_updates(self) -> int:
+        """Write buffered status changes as one upsert"""
+        if not self._pending_status:
+            return 0
+        pending, self._pending_status = self._pending_status, {}
+        if not self.supabase:
+            return 0
+        
+        rows = [self._persisted_row(notification) for notification in pending.values()]
+        try:
+            await self._run_db(self.supabase.client.table("notifications").upsert(rows).execute)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(rows)} notification status updates: {e}")
+            for notification_id, notification in pending.items():
+                self._pending_status.setdefault(notification_id, notification)
+            return 0
+        for notification in pending.values():
+            if notification.status in FINISHED_STATUSES:
+                self._inflight.discard(notification.id)
+        self.dispatch_stats["status_flushes"] += 1
+        self.dispatch_stats["status_rows_flushed"] += len(rows)
+        return len(rows)
+    
+    async def _load_scheduled(self, page_size: int = 500):
+        """
+        Claim rows due within the next load interval and put them on the timer wheel
+
+        claim_notifications() (migration 022) moves the rows to 'sending' under
+        FOR UPDATE SKIP LOCKED, so each row is loaded by exactly one worker.
+        """
+        if not self.supabase:
+            return 0
+        horizon = datetime.now(timezone.utc) + timedelta(seconds=self.schedule_load_interval * 2)
+        loaded = 0
+        while True:
+            try:
+                result = await self._run_db(self.supabase.client.rpc("claim_notifications", {
+                    "p_horizon": horizon.isoformat(),
+                    "p_lease_seconds": int(self.claim_lease_seconds),
+                    "p_limit": page_size
+                }).execute)
+            except Exception as e:
+                logger.error(f"Failed to claim scheduled notifications: {e}")
+                break
+            
+            rows = result.data or []
+            for row in rows:
+                if row["id"] in self._inflight or row["id"] in self._pending_status:
+                    continue
+                try:
+                    notification = self._notification_from_row(row)
+                except (KeyError, ValueError) as e:
+                    logger.warning(f"Skipping unreadable notification {row.get('id')}: {e}")
+                    continue
+                if notification.scheduled_at:
+                    self._schedule_on_wheel(notification)
+                else:
+                    self._enqueue(notification)
+                loaded += 1
+            
+            if len(rows) < page_size:
+                break
+        
+        self.dispatch_stats["scheduled_loaded"] += loaded
+        return loaded
+    
+    async def _run_db(self, func):
+        """Run a blocking supabase-py call on the default executor"""
+        return await asyncio.get_running_loop().run_in_executor(None, func)
+    
+    def get_dispatch_stats(self, window_seconds: float = 10.0) -> Dict[str, Any]:
+        """Queue depths, counters and delivery throughput over the last window"""
+        cutoff = time.monotonic() - window_seconds
+        recent = 0
+        for sent_at in reversed(self._sent_times):
+            if sent_at < cutoff:
+                break
+            recent += 1
+        return {
+            "running": self._running,
+            "queue_depth": {channel.value: len(queue) for channel, queue in self._queues.items()},
+            "scheduled": len(self.timer_wheel),
+            "pending_status_updates": len(self._pending_status),
+            "notifications_per_second": round(recent / window_seconds, 2),
+            **self.dispatch_stats
+        }
     
     async def send_notification(
         self,
@@ -254,6 +594,8 @@ class NotificationService:
         # Render template
         subject, body, html_body = template.render(variables or {})
         
+        scheduled_at = _as_utc(scheduled_at)
+        
         # Create notification
         notification = Notification(
             id=str(uuid.uuid4()),
@@ -276,7 +618,7 @@ class NotificationService:
             return notification
         
         # If scheduled, add to schedule queue
-        if scheduled_at and scheduled_at > datetime.now():
+        if scheduled_at and scheduled_at > datetime.now(timezone.utc):
             await self._schedule_notification(notification)
             notification.status = NotificationStatus.QUEUED
             return notification
@@ -304,37 +646,37 @@ class NotificationService:
                 await self._send_push(notification)
             
             notification.status = NotificationStatus.SENT
-            notification.sent_at = datetime.now()
+            notification.sent_at = datetime.now(timezone.utc)
+            self._sent_times.append(time.monotonic())
+            self.dispatch_stats["sent"] += 1
         except Exception as e:
             logger.error(f"Failed to send notification {notification.id}: {e}")
             notification.status = NotificationStatus.FAILED
             notification.error_message = str(e)
+            self.dispatch_stats["failed"] += 1
             await self._handle_failed_notification(notification)
+        
+        self._record_status(notification)
     
     async def _queue_notification(self, notification: Notification):
-        """Add notification to queue for processing"""
-        notification.status = NotificationStatus.QUEUED
-        
-        # Priority queue insertion
-        inserted = False
-        for i, queued in enumerate(self.queue):
-            if notification.priority.value < queued.priority.value:
-                self.queue.insert(i, notification)
-                inserted = True
-                break
-        
-        if not inserted:
-            self.queue.append(notification)
+        """Add notification to its channel's priority queue"""
+        self._enqueue(notification)
         
-        # Store in database
+        # Store in database so a restart can pick it up again
         if self.supabase:
             await self._store_notification(notification)
     
     async def _schedule_notification(self, notification: Notification):
         """Schedule notification for future delivery"""
-        # Store in database with scheduled_at timestamp
+        # Store in database with scheduled_at timestamp; the timer wheel delivers it
         if self.supabase:
             await self._store_notification(notification)
+        self._schedule_on_wheel(notification)
+    
+    def _schedule_on_wheel(self, notification: Notification):
+        self._inflight.add(notification.id)
+        if not self.timer_wheel.schedule(notification.id, notification.scheduled_at.timestamp(), notification):
+            self._enqueue(notification)
     
     async def _send_email(self, notification: Notification):
         """Send email notification"""
@@ -355,17 +697,18 @@ class NotificationService:
             html_part = MIMEText(notification.html_body, 'html')
             msg.attach(html_part)
         
-        # Send email
-        with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-            server.starttls()
-            server.login(self.smtp_user, self.smtp_password)
-            server.send_message(msg)
+        # Send email without blocking the event loop
+        def deliver():
+            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
+                server.starttls()
+                server.login(self.smtp_user, self.smtp_password)
+                server.send_message(msg)
+        
+        await asyncio.get_event_loop().run_in_executor(None, deliver)
     
     async def _send_in_app(self, notification: Notification):
         """Send in-app notification"""
-        # Store in database for user to retrieve
-        if self.supabase:
-            await self._store_notification(notification)
+        # The row users retrieve is written by the batched status upsert
         
         # Send via WebSocket if user is online
         if self.websocket_manager:
@@ -379,7 +722,7 @@ class NotificationService:
                         "subject": notification.subject,
                         "body": notification.body,
                         "priority": notification.priority.value,
-                        "timestamp": datetime.now().isoformat()
+                        "timestamp": datetime.now(timezone.utc).isoformat()
                     }
                 }
             )
@@ -388,13 +731,13 @@ class NotificationService:
         """Send SMS notification (mock implementation)"""
         # In production, integrate with SMS service like Twilio
         logger.info(f"SMS to {notification.recipient}: {notification.body[:160]}")
-        notification.delivered_at = datetime.now()
+        notification.delivered_at = datetime.now(timezone.utc)
     
     async def _send_push(self, notification: Notification):
         """Send push notification (mock implementation)"""
         # In production, integrate with push service like FCM or APNS
         logger.info(f"Push to {notification.recipient}: {notification.subject}")
-        notification.delivered_at = datetime.now()
+        notification.delivered_at = datetime.now(timezone.utc)
     
     async def _handle_failed_notification(self, notification: Notification):
         """Handle failed notification with retry logic"""
@@ -403,12 +746,13 @@ class NotificationService:
         if notification.retry_count <= notification.max_retries:
             # Exponential backoff
             delay = 2 ** notification.retry_count
-            notification.scheduled_at = datetime.now() + timedelta(seconds=delay)
+            notification.scheduled_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
             notification.status = NotificationStatus.RETRY
-            await self._schedule_notification(notification)
+            self._schedule_on_wheel(notification)
         else:
             # Move to dead letter queue
             notification.status = NotificationStatus.DEAD_LETTER
+            self.dispatch_stats["dead_letter"] += 1
             logger.error(f"Notification {notification.id} moved to dead letter queue after {notification.max_retries} retries")
     
     async def _store_notification(self, notification: Notification):
@@ -417,31 +761,71 @@ class NotificationService:
             return
         
         try:
-            data = {
-                "id": notification.id,
-                "type": notification.type.value,
-                "channel": notification.channel.value,
-                "recipient": notification.recipient,
-                "subject": notification.subject,
-                "body": notification.body,
-                "html_body": notification.html_body,
-                "priority": notification.priority.value,
-                "status": notification.status.value,
-                "scheduled_at": notification.scheduled_at.isoformat() if notification.scheduled_at else None,
-                "sent_at": notification.sent_at.isoformat() if notification.sent_at else None,
-                "delivered_at": notification.delivered_at.isoformat() if notification.delivered_at else None,
-                "read_at": notification.read_at.isoformat() if notification.read_at else None,
-                "retry_count": notification.retry_count,
-                "metadata": json.dumps(notification.metadata),
-                "error_message": notification.error_message,
-                "created_at": datetime.now().isoformat()
-            }
+            data = self._persisted_row(notification)
+            data["created_at"] = datetime.now(timezone.utc).isoformat()
             
-            result = self.supabase.client.table("notifications").insert(data).execute()
+            result = await self._run_db(self.supabase.client.table("notifications").insert(data).execute)
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to store notification: {e}")
     
+    def _notification_row(self, notification: Notification) -> Dict[str, Any]:
+        """Column values for a notifications row (everything except created_at)"""
+        return {
+            "id": notification.id,
+            "type": notification.type.value,
+            "channel": notification.channel.value,
+            "recipient": notification.recipient,
+            "subject": notification.subject,
+            "body": notification.body,
+            "html_body": notification.html_body,
+            # Stored by name, matching the notifications.priority check from 004
+            "priority": notification.priority.name.lower(),
+            "status": notification.status.value,
+            "scheduled_at": notification.scheduled_at.isoformat() if notification.scheduled_at else None,
+            "sent_at": notification.sent_at.isoformat() if notification.sent_at else None,
+            "delivered_at": notification.delivered_at.isoformat() if notification.delivered_at else None,
+            "read_at": notification.read_at.isoformat() if notification.read_at else None,
+            "retry_count": notification.retry_count,
+            "metadata": notification.metadata,
+            "error_message": notification.error_message
+        }
+    
+    def _persisted_row(self, notification: Notification) -> Dict[str, Any]:
+        """
+        Row for a notification this worker dispatches
+
+        Until it finishes, the row is stored as 'sending' with a lease, so
+        claim_notifications() on other workers skips it unless this worker
+        dies holding it.
+        """
+        row = self._notification_row(notification)
+        if notification.status not in FINISHED_STATUSES:
+            now = datetime.now(timezone.utc)
+            due = max(_as_utc(notification.scheduled_at) or now, now)
+            row["status"] = NotificationStatus.SENDING.value
+            row["claimed_until"] = (due + timedelta(seconds=self.claim_lease_seconds)).isoformat()
+        return row
+    
+    def _notification_from_row(self, row: Dict[str, Any]) -> Notification:
+        """Rebuild a Notification from a notifications row"""
+        metadata = row.get("metadata") or {}
+        scheduled_at = row.get("scheduled_at")
+        return Notification(
+            id=row["id"],
+            type=NotificationType(row["type"]),
+            channel=NotificationChannel(row["channel"]),
+            recipient=row["recipient"],
+            subject=row["subject"],
+            body=row["body"],
+            html_body=row.get("html_body"),
+            priority=NotificationPriority[row["priority"].upper()],
+            status=NotificationStatus(row["status"]),
+            scheduled_at=_as_utc(datetime.fromisoformat(scheduled_at)) if scheduled_at else None,
+            retry_count=row.get("retry_count", 0),
+            metadata=json.loads(metadata) if isinstance(metadata, str) else metadata
+        )
+    
     async def get_user_preferences(self, user_id: str) -> Optional[NotificationPreferences]:
         """Get user notification preferences"""
         # Check cache first
@@ -497,7 +881,7 @@ class NotificationService:
                     "push_prefs": prefs.push,
                     "quiet_hours": list(prefs.quiet_hours) if prefs.quiet_hours else None,
                     "timezone": prefs.timezone,
-                    "updated_at": datetime.now().isoformat()
+                    "updated_at": datetime.now(timezone.utc).isoformat()
                 }
                 
                 result = self.supabase.client.table("user_preferences").upsert(data).execute()
@@ -508,70 +892,171 @@ class NotificationService:
             logger.error(f"Failed to update preferences for user {user_id}: {e}")
             return False
     
+    def _broadcast_audience(
+        self,
+        scope: str,
+        filters: Optional[Dict[str, Any]] = None,
+        property_id: Optional[str] = None,
+        role: Optional[str] = None,
+        requires_hr: bool = False
+    ) -> Tuple[Optional[List[str]], Optional[List[str]]]:
+        """Resolve a broadcast scope to (roles, property_ids); None matches everyone"""
+        filters = dict(filters or {})
+        unknown = set(filters) - {"role", "roles", "property_id", "property_ids"}
+        if unknown:
+            raise ValueError(f"Unsupported broadcast filters: {', '.join(sorted(unknown))}")
+        
+        roles = list(filters.get("roles") or [])
+        role = role or filters.get("role")
+        if role:
+            roles.append(role)
+        property_ids = list(filters.get("property_ids") or [])
+        property_id = property_id or filters.get("property_id")
+        if property_id:
+            property_ids.append(property_id)
+        
+        invalid_roles = [r for r in roles if r not in BROADCAST_ROLES]
+        if invalid_roles:
+            raise ValueError(f"Unknown roles: {', '.join(invalid_roles)}")
+        
+        if scope == "property" and not property_ids:
+            raise ValueError("Property broadcasts require a property_id")
+        if scope == "role" and not roles:
+            raise ValueError("Role broadcasts require a role")
+        if scope == "filtered" and not (roles or property_ids):
+            raise ValueError("Filtered broadcasts require a role or property filter")
+        if scope == "global":
+            if not requires_hr:
+                raise ValueError("Global broadcasts require HR permission")
+            return None, None
+        if scope not in ("property", "role", "filtered"):
+            raise ValueError(f"Unknown broadcast scope: {scope}")
+        
+        return sorted(set(roles)) or None, sorted(set(map(str, property_ids))) or None
+    
     async def broadcast_notification(
         self,
         scope: str,
         message: str,
         channels: List[NotificationChannel],
         filters: Optional[Dict[str, Any]] = None,
+        subject: Optional[str] = None,
+        priority: NotificationPriority = NotificationPriority.HIGH,
         **kwargs
     ) -> Dict[str, Any]:
-        """Broadcast notification to multiple recipients"""
-        recipients = []
-        
-        if scope == "property":
-            # Get all users in property
-            property_id = kwargs.get("property_id")
-            if self.supabase and property_id:
-                result = self.supabase.client.table("users").select("id, email").eq("property_id", property_id).execute()
-                recipients = [(r["id"], r["email"]) for r in result.data]
-        
-        elif scope == "role":
-            # Get all users with role
-            role = kwargs.get("role")
-            if self.supabase and role:
-                result = self.supabase.client.table("users").select("id, email").eq("role", role).execute()
-                recipients = [(r["id"], r["email"]) for r in result.data]
-        
-        elif scope == "filtered":
-            # Apply custom filters
-            if self.supabase and filters:
-                query = self.supabase.client.table("users").select("id, email")
-                for key, value in filters.items():
-                    query = query.eq(key, value)
-                result = query.execute()
-                recipients = [(r["id"], r["email"]) for r in result.data]
-        
-        elif scope == "global":
-            # Get all users (requires HR permission)
-            if kwargs.get("requires_hr"):
-                if self.supabase:
-                    result = self.supabase.client.table("users").select("id, email").execute()
-                    recipients = [(r["id"], r["email"]) for r in result.data]
-        
-        # Send notifications
-        sent_count = 0
-        for user_id, email in recipients:
-            for channel in channels:
-                try:
-                    recipient = email if channel == NotificationChannel.EMAIL else user_id
-                    await self.send_notification(
-                        type=NotificationType.SYSTEM_ANNOUNCEMENT,
-                        channel=channel,
-                        recipient=recipient,
-                        variables={"announcement_title": "Broadcast", "announcement_body": message},
-                        priority=NotificationPriority.HIGH
-                    )
-                    sent_count += 1
-                except Exception as e:
-                    logger.error(f"Failed to send broadcast to {recipient}: {e}")
+        """
+        Broadcast an announcement to every user matching a role/property scope
+        
+        The audience is resolved and all notification rows are written by one
+        broadcast_notifications() call. In-app rows are stored as sent and
+        pushed over WebSocket, in the background, only to recipients connected
+        right now; email rows are queued for the email channel workers. Returns
+        the recipient and per-channel row counts; WebSocket delivery progress is
+        reported by get_broadcast_status().
+        """
+        roles, property_ids = self._broadcast_audience(
+            scope, filters,
+            property_id=kwargs.get("property_id"),
+            role=kwargs.get("role"),
+            requires_hr=kwargs.get("requires_hr", False)
+        )
+        unsupported = [c.value for c in channels if c not in BROADCAST_CHANNELS]
+        if unsupported:
+            raise ValueError(f"Channels not supported for broadcasts: {', '.join(unsupported)}")
+        if not self.supabase:
+            raise ValueError("Broadcasts require a database connection")
+        
+        template = self.templates["system_announcement"]
+        title, body, _ = template.render({
+            "announcement_title": subject or "Broadcast",
+            "announcement_body": message
+        })
+        broadcast_id = str(uuid.uuid4())
+        channel_values = sorted({c.value for c in channels})
+        online = []
+        if self.websocket_manager and NotificationChannel.IN_APP in channels:
+            online = list(self.websocket_manager.active_connections)
+        
+        rows = await self.supabase.execute_query(BROADCAST_NOTIFICATIONS_SQL, [
+            broadcast_id, roles, property_ids, channel_values,
+            NotificationType.SYSTEM_ANNOUNCEMENT.value, title, body, priority.name.lower(),
+            json.dumps({"broadcast_id": broadcast_id, "scope": scope}), online
+        ])
+        row = rows[0] if rows else {}
+        online_recipients = row.get("online_recipients") or {}
+        if isinstance(online_recipients, str):
+            online_recipients = json.loads(online_recipients)
+        
+        if online_recipients:
+            self._broadcast_pushes[broadcast_id] = {"pending": len(online_recipients), "delivered": 0, "failed": 0}
+            while len(self._broadcast_pushes) > self._max_tracked_broadcasts:
+                self._broadcast_pushes.pop(next(iter(self._broadcast_pushes)))
+            self._track_broadcast(self._push_broadcast(broadcast_id, online_recipients, {
+                "type": NotificationType.SYSTEM_ANNOUNCEMENT.value,
+                "subject": title,
+                "body": body,
+                "priority": priority.value,
+                "broadcast_id": broadcast_id
+            }))
+        if row.get("email_count") and self._running:
+            # Queue the new email rows now rather than on the next load interval
+            self._track_broadcast(self._load_scheduled())
         
+        self.dispatch_stats["broadcasts"] += 1
         return {
-            "recipients_count": len(recipients),
-            "notifications_sent": sent_count,
-            "channels": [c.value for c in channels]
+            "broadcast_id": broadcast_id,
+            "recipients_count": row.get("recipients_count", 0),
+            "notifications_created": row.get("in_app_count", 0) + row.get("email_count", 0),
+            "notifications_by_channel": {
+                channel: row.get(f"{channel}_count", 0) for channel in channel_values
+            },
+            "websocket_recipients": len(online_recipients),
+            "channels": channel_values
         }
     
+    def _track_broadcast(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._broadcast_tasks.add(task)
+        task.add_done_callback(self._broadcast_tasks.discard)
+        return task
+    
+    async def _push_broadcast(self, broadcast_id: str, recipients: Dict[str, str], data: Dict[str, Any]):
+        """Push a broadcast to connected recipients, a batch at a time"""
+        counts = self._broadcast_pushes.setdefault(
+            broadcast_id, {"pending": len(recipients), "delivered": 0, "failed": 0}
+        )
+        timestamp = datetime.now(timezone.utc).isoformat()
+        items = list(recipients.items())
+        for start in range(0, len(items), self.broadcast_push_batch):
+            batch = items[start:start + self.broadcast_push_batch]
+            results = await asyncio.gather(*(
+                self.websocket_manager.send_to_user(user_id, {
+                    "type": "notification",
+                    "data": {"id": notification_id, **data, "timestamp": timestamp}
+                })
+                for user_id, notification_id in batch
+            ), return_exceptions=True)
+            delivered = sum(1 for result in results if result is True)
+            counts["delivered"] += delivered
+            counts["failed"] += len(batch) - delivered
+            counts["pending"] -= len(batch)
+            # Let requests run between batches of a large broadcast
+            await asyncio.sleep(0)
+        self.dispatch_stats["broadcast_pushes"] += counts["delivered"]
+    
+    async def get_broadcast_status(self, broadcast_id: str) -> Dict[str, Any]:
+        """Row counts by channel and status, plus WebSocket push progress"""
+        notifications: Dict[str, Dict[str, int]] = defaultdict(dict)
+        if self.supabase:
+            rows = await self.supabase.execute_query(BROADCAST_STATUS_SQL, [broadcast_id])
+            for row in rows:
+                notifications[row["channel"]][row["status"]] = row["count"]
+        return {
+            "broadcast_id": broadcast_id,
+            "notifications": dict(notifications),
+            "websocket": dict(self._broadcast_pushes.get(broadcast_id) or {"pending": 0, "delivered": 0, "failed": 0})
+        }
+
     async def schedule_deadline_reminders(
         self,
         deadline: datetime,
@@ -584,8 +1069,8 @@ class NotificationService:
         scheduled = []
         
         for hours_before in reminders:
-            send_at = deadline - timedelta(hours=hours_before)
-            if send_at > datetime.now():
+            send_at = _as_utc(deadline - timedelta(hours=hours_before))
+            if send_at > datetime.now(timezone.utc):
                 variables["days_remaining"] = hours_before // 24
                 variables["hours_remaining"] = hours_before
                 
@@ -609,7 +1094,7 @@ class NotificationService:
             for notif_id in notification_ids:
                 try:
                     result = self.supabase.client.table("notifications")\
-                        .update({"read_at": datetime.now().isoformat()})\
+                        .update({"read_at": datetime.now(timezone.utc).isoformat()})\
                         .eq("id", notif_id)\
                         .eq("recipient", user_id)\
                         .execute()
@@ -663,50 +1148,6 @@ class NotificationService:
                 logger.error(f"Failed to get notifications for user {user_id}: {e}")
         
         return []
-    
-    async def process_queue(self):
-        """Process notification queue (run as background task)"""
-        while True:
-            if self.queue:
-                notification = self.queue.pop(0)
-                await self._send_immediate(notification)
-            
-            await asyncio.sleep(1)  # Check queue every second
-    
-    async def process_scheduled(self):
-        """Process scheduled notifications (run as background task)"""
-        while True:
-            if self.supabase:
-                try:
-                    # Find notifications due to be sent
-                    result = self.supabase.client.table("notifications")\
-                        .select("*")\
-                        .eq("status", NotificationStatus.QUEUED.value)\
-                        .lte("scheduled_at", datetime.now().isoformat())\
-                        .limit(10)\
-                        .execute()
-                    
-                    for notif_data in result.data:
-                        # Reconstruct notification object
-                        notification = Notification(
-                            id=notif_data["id"],
-                            type=NotificationType(notif_data["type"]),
-                            channel=NotificationChannel(notif_data["channel"]),
-                            recipient=notif_data["recipient"],
-                            subject=notif_data["subject"],
-                            body=notif_data["body"],
-                            html_body=notif_data.get("html_body"),
-                            priority=NotificationPriority(notif_data["priority"]),
-                            status=NotificationStatus(notif_data["status"]),
-                            retry_count=notif_data.get("retry_count", 0),
-                            metadata=json.loads(notif_data.get("metadata", "{}"))
-                        )
-                        
-                        await self._send_immediate(notification)
-                except Exception as e:
-                    logger.error(f"Failed to process scheduled notifications: {e}")
-            
-            await asyncio.sleep(60)  # Check every minute
 
 # Singleton instance
 notification_service = NotificationService()
\ No newline at end of file
@@ -252,7 +252,7 @@ async def resolve_conflict_manually(
             raise HTTPException(status_code=403, detail="Insufficient permissions")
         
         # Get the conflict
-        conflict = optimistic_update_service.conflicts.get(request.conflict_id)
+        conflict = optimistic_update_service.get_conflict(request.conflict_id)
         if not conflict:
             return error_response(
                 message="Conflict not found",
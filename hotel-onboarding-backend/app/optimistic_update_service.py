@@ -9,10 +9,10 @@ import logging
 import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Set, Callable, Union
+from typing import Awaitable, Dict, List, Optional, Any, Set, Callable, Union
 from dataclasses import dataclass, field
 from enum import Enum
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 
 try:
     import redis
@@ -20,8 +20,10 @@ try:
 except ImportError:
     HAS_REDIS = False
 
-from .websocket_manager import websocket_manager, BroadcastEvent, MessagePriority
-from .notification_service import notification_service, NotificationCategory, NotificationSeverity
+from .websocket_manager import websocket_manager
+from .notification_service import (
+    notification_service, NotificationChannel, NotificationPriority, NotificationType
+)
 
 
 logger = logging.getLogger(__name__)
@@ -187,34 +189,128 @@ class CollaborativeSession:
         return datetime.now() - self.last_activity > timedelta(minutes=timeout_minutes)
 
 
+class BoundedTTLMap:
+    """
+    Insertion-ordered map with a size cap and a per-entry time to live.
+    Entries are written in time order, so expiry only ever has to look at the oldest end.
+    """
+    
+    def __init__(self, max_items: int, ttl_seconds: float):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+        self._stored_at: Dict[str, float] = {}
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+    
+    def put(self, key: str, value: Any):
+        self._items.pop(key, None)
+        self._items[key] = value
+        self._stored_at[key] = time.monotonic()
+        self.trim()
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        stored_at = self._stored_at.get(key)
+        if stored_at is None:
+            return default
+        if time.monotonic() - stored_at >= self.ttl_seconds:
+            self.pop(key)
+            return default
+        return self._items[key]
+    
+    def pop(self, key: str, default: Any = None) -> Any:
+        self._stored_at.pop(key, None)
+        return self._items.pop(key, default)
+    
+    def values(self):
+        return self._items.values()
+    
+    def trim(self) -> int:
+        """Drop expired entries and anything over the size cap; returns entries dropped"""
+        dropped = 0
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._items:
+            key = next(iter(self._items))
+            if len(self._items) <= self.max_items and self._stored_at[key] > cutoff:
+                break
+            self.pop(key)
+            dropped += 1
+        self.evictions += dropped
+        return dropped
+
+
+@dataclass
+class ResourceState:
+    """Everything the service tracks for one resource_type:resource_id"""
+    history: deque
+    recent_update_ids: deque
+    version: int = 0
+    pending: Dict[str, OptimisticUpdate] = field(default_factory=dict)
+    field_owners: Dict[str, Set[str]] = field(default_factory=dict)  # field_path -> pending update ids
+    open_conflicts: Set[str] = field(default_factory=set)
+    last_activity: float = field(default_factory=time.monotonic)
+    
+    @property
+    def is_active(self) -> bool:
+        return bool(self.pending or self.open_conflicts)
+
+
 class OptimisticUpdateService:
     """
     Service for managing optimistic updates with rollback capabilities,
     conflict resolution, and collaborative editing features.
+    
+    State is kept per resource with bounded retention: confirmed updates and
+    resolved conflicts expire by age and count, change history is a fixed-length
+    window per resource, and idle resources are dropped entirely. Updates and
+    conflicts are processed as they arrive from an asyncio queue.
     """
     
-    def __init__(self, redis_url: Optional[str] = None):
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        history_limit: int = 200,
+        max_confirmed: int = 10_000,
+        confirmed_ttl_seconds: float = 3600,
+        max_resources: int = 50_000,
+        resource_idle_seconds: float = 3600,
+        max_resolved_conflicts: int = 1_000,
+        processor_concurrency: int = 4,
+        retry_base_delay: float = 1.0
+    ):
         # Update storage
         self.pending_updates: Dict[str, OptimisticUpdate] = {}
-        self.confirmed_updates: Dict[str, OptimisticUpdate] = {}
-        self.resource_updates: Dict[str, List[str]] = defaultdict(list)  # resource_key -> update_ids
+        self.confirmed_updates = BoundedTTLMap(max_confirmed, confirmed_ttl_seconds)
+        self.resources: "OrderedDict[str, ResourceState]" = OrderedDict()  # least recently active first
+        self.history_limit = history_limit
+        self.max_resources = max_resources
+        self.resource_idle_seconds = resource_idle_seconds
         
         # Conflict management
-        self.conflicts: Dict[str, ConflictInfo] = {}
+        self.conflicts: Dict[str, ConflictInfo] = {}  # unresolved only
+        self.resolved_conflicts: "OrderedDict[str, ConflictInfo]" = OrderedDict()
+        self.max_resolved_conflicts = max_resolved_conflicts
         self.conflict_handlers: Dict[ConflictResolutionStrategy, Callable] = {}
         
+        # Server-side validation hooks per resource type
+        self.validators: Dict[str, Callable[[OptimisticUpdate], Awaitable[bool]]] = {}
+        self.retry_base_delay = retry_base_delay
+        
         # Collaborative editing
         self.collaborative_sessions: Dict[str, CollaborativeSession] = {}
+        self.resource_sessions: Dict[str, str] = {}  # resource_key -> session_id
         self.user_sessions: Dict[str, Set[str]] = defaultdict(set)  # user_id -> session_ids
         
-        # Change tracking
-        self.change_history: Dict[str, List[FieldChange]] = defaultdict(list)
-        self.resource_versions: Dict[str, int] = defaultdict(int)
-        
-        # Background tasks
-        self._conflict_resolver_task = None
+        # Event-driven processing
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.processor_concurrency = processor_concurrency
+        self._processor_tasks: List[asyncio.Task] = []
         self._session_cleanup_task = None
-        self._update_processor_task = None
         
         # Performance metrics
         self.metrics = {
@@ -224,7 +320,8 @@ class OptimisticUpdateService:
             "conflicts_detected": 0,
             "conflicts_resolved": 0,
             "rollbacks_performed": 0,
-            "average_confirmation_time": 0.0
+            "average_confirmation_time": 0.0,
+            "resources_evicted": 0
         }
         
         # Redis for persistence
@@ -251,39 +348,64 @@ class OptimisticUpdateService:
         self.conflict_handlers[ConflictResolutionStrategy.REJECT_CONFLICTED] = self._resolve_reject_conflicted
     
     def _start_background_tasks(self):
-        """Start background tasks for update processing"""
+        """Start queue processors and session cleanup once an event loop is running"""
         try:
-            loop = asyncio.get_running_loop()
-            
-            if self._conflict_resolver_task is None or self._conflict_resolver_task.done():
-                self._conflict_resolver_task = asyncio.create_task(self._process_conflicts())
-            
-            if self._session_cleanup_task is None or self._session_cleanup_task.done():
-                self._session_cleanup_task = asyncio.create_task(self._cleanup_expired_sessions())
-            
-            if self._update_processor_task is None or self._update_processor_task.done():
-                self._update_processor_task = asyncio.create_task(self._process_pending_updates())
-                
+            asyncio.get_running_loop()
         except RuntimeError:
-            # No event loop running, tasks will be started when needed
-            pass
+            # No event loop running, tasks will be started on first use
+            return
+        
+        self._processor_tasks = [task for task in self._processor_tasks if not task.done()]
+        while len(self._processor_tasks) < self.processor_concurrency:
+            self._processor_tasks.append(asyncio.create_task(self._process_pending_updates()))
+        
+        if self._session_cleanup_task is None or self._session_cleanup_task.done():
+            self._session_cleanup_task = asyncio.create_task(self._cleanup_expired_sessions())
     
-    async def _process_conflicts(self):
-        """Process and resolve conflicts"""
-        while True:
-            try:
-                await asyncio.sleep(5)  # Process every 5 seconds
-                
-                unresolved_conflicts = [
-                    conflict for conflict in self.conflicts.values()
-                    if not conflict.resolved
-                ]
-                
-                for conflict in unresolved_conflicts:
-                    await self._resolve_conflict(conflict)
-                
-            except Exception as e:
-                logger.error(f"Error in conflict processing: {e}")
+    def register_validator(self, resource_type: str, validator: Callable[[OptimisticUpdate], Awaitable[bool]]):
+        """Register server-side validation for a resource type; updates without one are accepted"""
+        self.validators[resource_type] = validator
+    
+    @staticmethod
+    def _resource_key(resource_type: str, resource_id: str) -> str:
+        return f"{resource_type}:{resource_id}"
+    
+    def _resource(self, resource_key: str) -> ResourceState:
+        """Get or create the state for a resource and mark it as recently active"""
+        state = self.resources.get(resource_key)
+        if state is None:
+            state = ResourceState(
+                history=deque(maxlen=self.history_limit),
+                recent_update_ids=deque(maxlen=self.history_limit)
+            )
+            self.resources[resource_key] = state
+        else:
+            self.resources.move_to_end(resource_key)
+            state.last_activity = time.monotonic()
+        return state
+    
+    def get_resource_version(self, resource_type: str, resource_id: str) -> int:
+        """Number of confirmed updates applied to a resource while it has been tracked"""
+        state = self.resources.get(self._resource_key(resource_type, resource_id))
+        return state.version if state else 0
+    
+    def _trim(self):
+        """Enforce retention limits; cost is proportional to what gets dropped"""
+        self.confirmed_updates.trim()
+        while len(self.resolved_conflicts) > self.max_resolved_conflicts:
+            self.resolved_conflicts.popitem(last=False)
+        
+        cutoff = time.monotonic() - self.resource_idle_seconds
+        for _ in range(len(self.resources)):
+            resource_key, state = next(iter(self.resources.items()))
+            if len(self.resources) <= self.max_resources and state.last_activity > cutoff:
+                break
+            if state.is_active:
+                # Pending work keeps a resource alive regardless of limits
+                self.resources.move_to_end(resource_key)
+                continue
+            del self.resources[resource_key]
+            self.metrics["resources_evicted"] += 1
     
     async def _cleanup_expired_sessions(self):
         """Clean up expired collaborative sessions"""
@@ -291,10 +413,10 @@ class OptimisticUpdateService:
             try:
                 await asyncio.sleep(300)  # Run every 5 minutes
                 
-                expired_sessions = []
-                for session_id, session in self.collaborative_sessions.items():
-                    if session.is_expired():
-                        expired_sessions.append(session_id)
+                expired_sessions = [
+                    session_id for session_id, session in self.collaborative_sessions.items()
+                    if session.is_expired()
+                ]
                 
                 for session_id in expired_sessions:
                     await self._end_collaborative_session(session_id)
@@ -302,25 +424,36 @@ class OptimisticUpdateService:
                 if expired_sessions:
                     logger.info(f"Cleaned up {len(expired_sessions)} expired collaborative sessions")
                 
+                self._trim()
+                
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Error in session cleanup: {e}")
     
     async def _process_pending_updates(self):
-        """Process pending updates for confirmation"""
+        """Validate queued updates and resolve queued conflicts as they arrive"""
         while True:
+            kind, item_id = await self._queue.get()
             try:
-                await asyncio.sleep(2)  # Process every 2 seconds
-                
-                # Find updates that need processing
-                pending_updates = list(self.pending_updates.values())
-                
-                for update in pending_updates:
-                    if update.status == UpdateStatus.PENDING:
-                        # Simulate server-side validation and processing
+                if kind == "update":
+                    update = self.pending_updates.get(item_id)
+                    if update and update.status == UpdateStatus.PENDING:
                         await self._validate_and_process_update(update)
-                
+                else:
+                    conflict = self.conflicts.get(item_id)
+                    if conflict and not conflict.resolved:
+                        await self._resolve_conflict(conflict)
+                self._trim()
             except Exception as e:
-                logger.error(f"Error in update processing: {e}")
+                logger.error(f"Error processing {kind} {item_id}: {e}")
+            finally:
+                self._queue.task_done()
+    
+    async def drain(self):
+        """Wait until every queued update and conflict has been processed"""
+        self._start_background_tasks()
+        await self._queue.join()
     
     async def create_optimistic_update(self, user_id: str, resource_type: str, 
                                      resource_id: str, update_type: UpdateType,
@@ -345,19 +478,20 @@ class OptimisticUpdateService:
             Update ID
         """
         update_id = str(uuid.uuid4())
+        now = datetime.now()
         
         # Convert changes to FieldChange objects
-        field_changes = []
-        for change_data in changes:
-            field_change = FieldChange(
+        field_changes = [
+            FieldChange(
                 field_path=change_data["field_path"],
                 old_value=change_data.get("old_value"),
                 new_value=change_data["new_value"],
                 change_type=ChangeType(change_data.get("change_type", "field_update")),
-                timestamp=datetime.now(),
+                timestamp=now,
                 user_id=user_id
             )
-            field_changes.append(field_change)
+            for change_data in changes
+        ]
         
         # Create optimistic update
         update = OptimisticUpdate(
@@ -367,23 +501,26 @@ class OptimisticUpdateService:
             resource_id=resource_id,
             update_type=update_type,
             changes=field_changes,
-            created_at=datetime.now(),
-            client_timestamp=client_timestamp or datetime.now(),
+            created_at=now,
+            client_timestamp=client_timestamp or now,
             conflict_resolution=conflict_resolution,
             metadata=metadata or {}
         )
         
+        # Check for conflicts before indexing this update's own fields
+        state = self._resource(self._resource_key(resource_type, resource_id))
+        await self._check_for_conflicts(update, state)
+        
         # Store update
         self.pending_updates[update_id] = update
-        resource_key = f"{resource_type}:{resource_id}"
-        self.resource_updates[resource_key].append(update_id)
+        state.pending[update_id] = update
+        state.recent_update_ids.append(update_id)
+        for change in field_changes:
+            state.field_owners.setdefault(change.field_path, set()).add(update_id)
         
         # Update metrics
         self.metrics["total_updates"] += 1
         
-        # Check for conflicts
-        await self._check_for_conflicts(update)
-        
         # Broadcast optimistic update to collaborators
         await self._broadcast_optimistic_update(update)
         
@@ -391,72 +528,85 @@ class OptimisticUpdateService:
         if self.redis_client:
             await self._persist_update(update)
         
-        logger.info(f"Created optimistic update {update_id} for {resource_type}:{resource_id}")
+        self._start_background_tasks()
+        self._queue.put_nowait(("update", update_id))
+        
+        logger.debug(f"Created optimistic update {update_id} for {resource_type}:{resource_id}")
         return update_id
     
-    async def _check_for_conflicts(self, update: OptimisticUpdate):
-        """Check for conflicts with other pending updates"""
-        resource_key = f"{update.resource_type}:{update.resource_id}"
-        other_update_ids = [
-            uid for uid in self.resource_updates[resource_key]
-            if uid != update.update_id and uid in self.pending_updates
-        ]
-        
-        conflicting_updates = []
+    async def _check_for_conflicts(self, update: OptimisticUpdate, state: ResourceState):
+        """Check for conflicts with other pending updates touching the same fields"""
+        conflicting_ids: Set[str] = set()
         conflicting_fields = set()
         
-        for other_update_id in other_update_ids:
-            other_update = self.pending_updates[other_update_id]
-            
-            # Check if updates conflict on the same fields
-            update_fields = {change.field_path for change in update.changes}
-            other_fields = {change.field_path for change in other_update.changes}
-            
-            field_conflicts = update_fields.intersection(other_fields)
-            if field_conflicts:
-                conflicting_updates.append(other_update_id)
-                conflicting_fields.update(field_conflicts)
-        
-        if conflicting_updates:
-            # Create conflict record
-            conflict_id = str(uuid.uuid4())
-            conflict = ConflictInfo(
-                conflict_id=conflict_id,
-                conflicting_updates=[update.update_id] + conflicting_updates,
-                resource_type=update.resource_type,
-                resource_id=update.resource_id,
-                conflicting_fields=list(conflicting_fields),
-                detected_at=datetime.now(),
-                resolution_strategy=update.conflict_resolution
-            )
-            
-            self.conflicts[conflict_id] = conflict
-            self.metrics["conflicts_detected"] += 1
-            
-            # Mark updates as conflicted
-            update.status = UpdateStatus.CONFLICTED
-            for conflicting_id in conflicting_updates:
-                if conflicting_id in self.pending_updates:
-                    self.pending_updates[conflicting_id].status = UpdateStatus.CONFLICTED
-            
-            logger.warning(f"Conflict detected: {conflict_id} for resource {resource_key}")
-            
-            # Notify users about conflict
-            await self._notify_conflict(conflict)
+        for change in update.changes:
+            owners = state.field_owners.get(change.field_path)
+            if owners:
+                conflicting_ids.update(owners)
+                conflicting_fields.add(change.field_path)
+        
+        if not conflicting_ids:
+            return
+        
+        # Keep creation order for the conflict record
+        conflicting_updates = [uid for uid in state.pending if uid in conflicting_ids]
+        
+        conflict_id = str(uuid.uuid4())
+        conflict = ConflictInfo(
+            conflict_id=conflict_id,
+            conflicting_updates=[update.update_id] + conflicting_updates,
+            resource_type=update.resource_type,
+            resource_id=update.resource_id,
+            conflicting_fields=list(conflicting_fields),
+            detected_at=datetime.now(),
+            resolution_strategy=update.conflict_resolution
+        )
+        
+        self.conflicts[conflict_id] = conflict
+        state.open_conflicts.add(conflict_id)
+        self.metrics["conflicts_detected"] += 1
+        
+        # Mark updates as conflicted
+        update.status = UpdateStatus.CONFLICTED
+        for conflicting_id in conflicting_updates:
+            state.pending[conflicting_id].status = UpdateStatus.CONFLICTED
+        
+        logger.warning(f"Conflict detected: {conflict_id} for resource {update.resource_type}:{update.resource_id}")
+        
+        # Notify users about conflict (the new update is not stored yet, so include it explicitly)
+        await self._notify_conflict(conflict, update)
+        
+        self._start_background_tasks()
+        self._queue.put_nowait(("conflict", conflict_id))
+    
+    def get_conflict(self, conflict_id: str) -> Optional[ConflictInfo]:
+        """Look up an open or recently resolved conflict"""
+        return self.conflicts.get(conflict_id) or self.resolved_conflicts.get(conflict_id)
     
     async def _resolve_conflict(self, conflict: ConflictInfo):
         """Resolve a conflict using the specified strategy"""
         try:
             handler = self.conflict_handlers.get(conflict.resolution_strategy)
-            if handler:
-                await handler(conflict)
-                conflict.resolved = True
-                conflict.resolved_at = datetime.now()
-                self.metrics["conflicts_resolved"] += 1
-                
-                logger.info(f"Resolved conflict {conflict.conflict_id} using {conflict.resolution_strategy.value}")
-            else:
+            if not handler:
                 logger.error(f"No handler for conflict resolution strategy: {conflict.resolution_strategy}")
+                return
+            
+            await handler(conflict)
+            if conflict.resolution_strategy == ConflictResolutionStrategy.MANUAL:
+                # Stays open until someone picks a strategy through the API
+                return
+            
+            conflict.resolved = True
+            conflict.resolved_at = datetime.now()
+            self.metrics["conflicts_resolved"] += 1
+            
+            self.conflicts.pop(conflict.conflict_id, None)
+            self.resolved_conflicts[conflict.conflict_id] = conflict
+            state = self.resources.get(self._resource_key(conflict.resource_type, conflict.resource_id))
+            if state:
+                state.open_conflicts.discard(conflict.conflict_id)
+            
+            logger.info(f"Resolved conflict {conflict.conflict_id} using {conflict.resolution_strategy.value}")
                 
         except Exception as e:
             logger.error(f"Error resolving conflict {conflict.conflict_id}: {e}")
@@ -529,7 +679,11 @@ class OptimisticUpdateService:
                             merged_changes[change.field_path] = change
         
         if all_updates:
-            # Create a merged update
+            # Reject the originals first so the merged update does not conflict with them
+            for update in all_updates:
+                await self._reject_update(update.update_id, "Conflict resolved: merged")
+            
+            # Create and confirm the merged update
             merged_update_id = await self.create_optimistic_update(
                 user_id="system",
                 resource_type=conflict.resource_type,
@@ -538,13 +692,7 @@ class OptimisticUpdateService:
                 changes=[change.to_dict() for change in merged_changes.values()],
                 metadata={"merged_from": conflict.conflicting_updates}
             )
-            
-            # Confirm the merged update
             await self._confirm_update(merged_update_id)
-            
-            # Reject original conflicting updates
-            for update_id in conflict.conflicting_updates:
-                await self._reject_update(update_id, "Conflict resolved: merged")
     
     async def _resolve_manual(self, conflict: ConflictInfo):
         """Mark conflict for manual resolution"""
@@ -552,13 +700,11 @@ class OptimisticUpdateService:
         for update_id in conflict.conflicting_updates:
             update = self.pending_updates.get(update_id)
             if update:
-                await notification_service.create_notification(
-                    user_id=update.user_id,
-                    title="Manual Conflict Resolution Required",
-                    message=f"Your update to {conflict.resource_type} conflicts with other changes and requires manual resolution.",
-                    category=NotificationCategory.ALERT,
-                    severity=NotificationSeverity.WARNING,
-                    metadata={"conflict_id": conflict.conflict_id}
+                await self._notify_user(
+                    update.user_id,
+                    "Manual Conflict Resolution Required",
+                    f"Your update to {conflict.resource_type} conflicts with other changes and requires manual resolution.",
+                    NotificationPriority.HIGH
                 )
     
     async def _resolve_reject_conflicted(self, conflict: ConflictInfo):
@@ -566,6 +712,21 @@ class OptimisticUpdateService:
         for update_id in conflict.conflicting_updates:
             await self._reject_update(update_id, "Conflict resolved: all conflicted updates rejected")
     
+    def _remove_pending(self, update: OptimisticUpdate):
+        """Drop an update from the pending indexes"""
+        self.pending_updates.pop(update.update_id, None)
+        state = self.resources.get(self._resource_key(update.resource_type, update.resource_id))
+        if not state:
+            return state
+        state.pending.pop(update.update_id, None)
+        for change in update.changes:
+            owners = state.field_owners.get(change.field_path)
+            if owners is not None:
+                owners.discard(update.update_id)
+                if not owners:
+                    del state.field_owners[change.field_path]
+        return state
+    
     async def _confirm_update(self, update_id: str):
         """Confirm an optimistic update"""
         update = self.pending_updates.get(update_id)
@@ -576,8 +737,8 @@ class OptimisticUpdateService:
         update.server_timestamp = datetime.now()
         
         # Move to confirmed updates
-        self.confirmed_updates[update_id] = update
-        del self.pending_updates[update_id]
+        state = self._remove_pending(update)
+        self.confirmed_updates.put(update_id, update)
         
         # Update metrics
         self.metrics["confirmed_updates"] += 1
@@ -589,17 +750,15 @@ class OptimisticUpdateService:
             self.metrics["confirmed_updates"]
         )
         
-        # Update resource version
-        resource_key = f"{update.resource_type}:{update.resource_id}"
-        self.resource_versions[resource_key] += 1
-        
-        # Add changes to history
-        self.change_history[resource_key].extend(update.changes)
+        # Update resource version and history
+        if state:
+            state.version += 1
+            state.history.extend(update.changes)
         
         # Broadcast confirmation to collaborators
         await self._broadcast_update_confirmation(update)
         
-        logger.info(f"Confirmed optimistic update {update_id}")
+        logger.debug(f"Confirmed optimistic update {update_id}")
     
     async def _reject_update(self, update_id: str, reason: str = ""):
         """Reject an optimistic update and trigger rollback"""
@@ -611,7 +770,7 @@ class OptimisticUpdateService:
         update.metadata["rejection_reason"] = reason
         
         # Remove from pending updates
-        del self.pending_updates[update_id]
+        self._remove_pending(update)
         
         # Update metrics
         self.metrics["rejected_updates"] += 1
@@ -621,75 +780,77 @@ class OptimisticUpdateService:
         await self._broadcast_update_rollback(update, reason)
         
         # Notify user about rejection
-        await notification_service.create_notification(
-            user_id=update.user_id,
-            title="Update Rejected",
-            message=f"Your update to {update.resource_type} was rejected. {reason}",
-            category=NotificationCategory.SYSTEM,
-            severity=NotificationSeverity.WARNING,
-            metadata={"update_id": update_id, "reason": reason}
+        await self._notify_user(
+            update.user_id,
+            "Update Rejected",
+            f"Your update to {update.resource_type} was rejected. {reason}"
         )
         
         logger.info(f"Rejected optimistic update {update_id}: {reason}")
     
     async def _validate_and_process_update(self, update: OptimisticUpdate):
-        """Validate and process an update (simulate server-side logic)"""
+        """Run server-side validation for an update, then confirm, retry or reject it"""
+        if update.retry_count > update.max_retries:
+            await self._reject_update(update.update_id, "Maximum retries exceeded")
+            return
+        
+        validator = self.validators.get(update.resource_type)
         try:
-            # Simulate validation delay
-            await asyncio.sleep(0.5)
-            
-            # Simple validation logic (can be extended)
-            if update.retry_count > update.max_retries:
-                await self._reject_update(update.update_id, "Maximum retries exceeded")
-                return
-            
-            # Check if update is still valid
-            if update.status == UpdateStatus.CONFLICTED:
-                # Let conflict resolution handle this
-                return
-            
-            # Simulate random validation failure for testing
-            import random
-            if random.random() < 0.1:  # 10% failure rate
-                update.retry_count += 1
-                if update.retry_count <= update.max_retries:
-                    logger.info(f"Retrying update {update.update_id} (attempt {update.retry_count})")
-                    return
-                else:
-                    await self._reject_update(update.update_id, "Validation failed after retries")
-                    return
-            
-            # Confirm the update
-            await self._confirm_update(update.update_id)
-            
+            valid = await validator(update) if validator else True
         except Exception as e:
             logger.error(f"Error validating update {update.update_id}: {e}")
             await self._reject_update(update.update_id, f"Validation error: {str(e)}")
+            return
+        
+        # A conflict may have been detected while validation was running
+        if update.status != UpdateStatus.PENDING:
+            return
+        
+        if not valid:
+            update.retry_count += 1
+            if update.retry_count <= update.max_retries:
+                logger.info(f"Retrying update {update.update_id} (attempt {update.retry_count})")
+                delay = self.retry_base_delay * 2 ** (update.retry_count - 1)
+                asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, ("update", update.update_id))
+            else:
+                await self._reject_update(update.update_id, "Validation failed after retries")
+            return
+        
+        await self._confirm_update(update.update_id)
+    
+    async def _notify_user(self, user_id: str, title: str, message: str,
+                           priority: NotificationPriority = NotificationPriority.NORMAL):
+        """Send an in-app notification to the user behind an update"""
+        try:
+            await notification_service.send_notification(
+                type=NotificationType.SYSTEM_ANNOUNCEMENT,
+                channel=NotificationChannel.IN_APP,
+                recipient=user_id,
+                variables={"announcement_title": title, "announcement_body": message},
+                priority=priority
+            )
+        except Exception as e:
+            logger.warning(f"Failed to notify user {user_id}: {e}")
+    
+    def _session_for_resource(self, resource_type: str, resource_id: str) -> Optional[CollaborativeSession]:
+        session_id = self.resource_sessions.get(self._resource_key(resource_type, resource_id))
+        return self.collaborative_sessions.get(session_id) if session_id else None
     
     async def _broadcast_optimistic_update(self, update: OptimisticUpdate):
         """Broadcast optimistic update to collaborators"""
         try:
-            # Find collaborative sessions for this resource
-            resource_key = f"{update.resource_type}:{update.resource_id}"
-            relevant_sessions = [
-                session for session in self.collaborative_sessions.values()
-                if f"{session.resource_type}:{session.resource_id}" == resource_key
-            ]
+            session = self._session_for_resource(update.resource_type, update.resource_id)
+            if not session:
+                return
             
             # Broadcast to all participants except the originator
-            for session in relevant_sessions:
-                for participant_id in session.participants:
-                    if participant_id != update.user_id:
-                        message = {
-                            "type": "optimistic_update",
-                            "data": update.to_dict()
-                        }
-                        
-                        await websocket_manager.send_to_user(
-                            participant_id,
-                            message,
-                            priority=MessagePriority.HIGH
-                        )
+            message = {
+                "type": "optimistic_update",
+                "data": update.to_dict()
+            }
+            for participant_id in session.participants:
+                if participant_id != update.user_id:
+                    await websocket_manager.send_to_user(participant_id, message)
             
         except Exception as e:
             logger.error(f"Error broadcasting optimistic update: {e}")
@@ -697,30 +858,22 @@ class OptimisticUpdateService:
     async def _broadcast_update_confirmation(self, update: OptimisticUpdate):
         """Broadcast update confirmation to collaborators"""
         try:
-            resource_key = f"{update.resource_type}:{update.resource_id}"
-            relevant_sessions = [
-                session for session in self.collaborative_sessions.values()
-                if f"{session.resource_type}:{session.resource_id}" == resource_key
-            ]
+            session = self._session_for_resource(update.resource_type, update.resource_id)
+            if not session:
+                return
             
-            for session in relevant_sessions:
-                for participant_id in session.participants:
-                    message = {
-                        "type": "update_confirmed",
-                        "data": {
-                            "update_id": update.update_id,
-                            "resource_type": update.resource_type,
-                            "resource_id": update.resource_id,
-                            "changes": [change.to_dict() for change in update.changes],
-                            "confirmed_at": update.server_timestamp.isoformat()
-                        }
-                    }
-                    
-                    await websocket_manager.send_to_user(
-                        participant_id,
-                        message,
-                        priority=MessagePriority.NORMAL
-                    )
+            message = {
+                "type": "update_confirmed",
+                "data": {
+                    "update_id": update.update_id,
+                    "resource_type": update.resource_type,
+                    "resource_id": update.resource_id,
+                    "changes": [change.to_dict() for change in update.changes],
+                    "confirmed_at": update.server_timestamp.isoformat()
+                }
+            }
+            for participant_id in session.participants:
+                await websocket_manager.send_to_user(participant_id, message)
             
         except Exception as e:
             logger.error(f"Error broadcasting update confirmation: {e}")
@@ -740,31 +893,22 @@ class OptimisticUpdateService:
                 }
             }
             
-            await websocket_manager.send_to_user(
-                update.user_id,
-                message,
-                priority=MessagePriority.HIGH
-            )
+            await websocket_manager.send_to_user(update.user_id, message)
             
         except Exception as e:
             logger.error(f"Error broadcasting update rollback: {e}")
     
-    async def _notify_conflict(self, conflict: ConflictInfo):
+    async def _notify_conflict(self, conflict: ConflictInfo, new_update: OptimisticUpdate):
         """Notify users about conflicts"""
         try:
+            message = {
+                "type": "conflict_detected",
+                "data": conflict.to_dict()
+            }
             for update_id in conflict.conflicting_updates:
-                update = self.pending_updates.get(update_id)
+                update = new_update if update_id == new_update.update_id else self.pending_updates.get(update_id)
                 if update:
-                    message = {
-                        "type": "conflict_detected",
-                        "data": conflict.to_dict()
-                    }
-                    
-                    await websocket_manager.send_to_user(
-                        update.user_id,
-                        message,
-                        priority=MessagePriority.HIGH
-                    )
+                    await websocket_manager.send_to_user(update.user_id, message)
             
         except Exception as e:
             logger.error(f"Error notifying about conflict: {e}")
@@ -774,14 +918,7 @@ class OptimisticUpdateService:
     async def start_collaborative_session(self, user_id: str, resource_type: str, 
                                         resource_id: str) -> str:
         """Start or join a collaborative editing session"""
-        session_key = f"{resource_type}:{resource_id}"
-        
-        # Find existing session or create new one
-        existing_session = None
-        for session in self.collaborative_sessions.values():
-            if f"{session.resource_type}:{session.resource_id}" == session_key:
-                existing_session = session
-                break
+        existing_session = self._session_for_resource(resource_type, resource_id)
         
         if existing_session:
             # Join existing session
@@ -799,6 +936,7 @@ class OptimisticUpdateService:
             session.add_participant(user_id)
             
             self.collaborative_sessions[session_id] = session
+            self.resource_sessions[self._resource_key(resource_type, resource_id)] = session_id
             self.user_sessions[user_id].add(session_id)
         
         # Notify other participants
@@ -807,6 +945,13 @@ class OptimisticUpdateService:
         logger.info(f"User {user_id} joined collaborative session {session_id}")
         return session_id
     
+    def _forget_user_session(self, user_id: str, session_id: str):
+        sessions = self.user_sessions.get(user_id)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self.user_sessions[user_id]
+    
     async def end_collaborative_session(self, session_id: str, user_id: str):
         """End or leave a collaborative editing session"""
         session = self.collaborative_sessions.get(session_id)
@@ -814,7 +959,7 @@ class OptimisticUpdateService:
             return
         
         session.remove_participant(user_id)
-        self.user_sessions[user_id].discard(session_id)
+        self._forget_user_session(user_id, session_id)
         
         # Notify other participants
         await self._broadcast_participant_left(session_id, user_id)
@@ -827,16 +972,16 @@ class OptimisticUpdateService:
     
     async def _end_collaborative_session(self, session_id: str):
         """End a collaborative session completely"""
-        session = self.collaborative_sessions.get(session_id)
+        session = self.collaborative_sessions.pop(session_id, None)
         if not session:
             return
         
-        # Remove from user sessions
+        # Remove from user and resource indexes
         for user_id in session.participants:
-            self.user_sessions[user_id].discard(session_id)
-        
-        # Remove session
-        del self.collaborative_sessions[session_id]
+            self._forget_user_session(user_id, session_id)
+        resource_key = self._resource_key(session.resource_type, session.resource_id)
+        if self.resource_sessions.get(resource_key) == session_id:
+            del self.resource_sessions[resource_key]
         
         logger.info(f"Ended collaborative session {session_id}")
     
@@ -850,23 +995,18 @@ class OptimisticUpdateService:
         session.update_cursor(user_id, cursor_data)
         
         # Broadcast cursor update to other participants
+        message = {
+            "type": "cursor_update",
+            "data": {
+                "session_id": session_id,
+                "user_id": user_id,
+                "cursor": cursor_data,
+                "timestamp": datetime.now().isoformat()
+            }
+        }
         for participant_id in session.participants:
             if participant_id != user_id:
-                message = {
-                    "type": "cursor_update",
-                    "data": {
-                        "session_id": session_id,
-                        "user_id": user_id,
-                        "cursor": cursor_data,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                }
-                
-                await websocket_manager.send_to_user(
-                    participant_id,
-                    message,
-                    priority=MessagePriority.LOW
-                )
+                await websocket_manager.send_to_user(participant_id, message)
     
     async def _broadcast_participant_joined(self, session_id: str, user_id: str):
         """Broadcast that a participant joined the session"""
@@ -874,22 +1014,17 @@ class OptimisticUpdateService:
         if not session:
             return
         
+        message = {
+            "type": "participant_joined",
+            "data": {
+                "session_id": session_id,
+                "user_id": user_id,
+                "participants": list(session.participants)
+            }
+        }
         for participant_id in session.participants:
             if participant_id != user_id:
-                message = {
-                    "type": "participant_joined",
-                    "data": {
-                        "session_id": session_id,
-                        "user_id": user_id,
-                        "participants": list(session.participants)
-                    }
-                }
-                
-                await websocket_manager.send_to_user(
-                    participant_id,
-                    message,
-                    priority=MessagePriority.NORMAL
-                )
+                await websocket_manager.send_to_user(participant_id, message)
     
     async def _broadcast_participant_left(self, session_id: str, user_id: str):
         """Broadcast that a participant left the session"""
@@ -897,49 +1032,43 @@ class OptimisticUpdateService:
         if not session:
             return
         
-        for participant_id in session.participants:
-            message = {
-                "type": "participant_left",
-                "data": {
-                    "session_id": session_id,
-                    "user_id": user_id,
-                    "participants": list(session.participants)
-                }
+        message = {
+            "type": "participant_left",
+            "data": {
+                "session_id": session_id,
+                "user_id": user_id,
+                "participants": list(session.participants)
             }
-            
-            await websocket_manager.send_to_user(
-                participant_id,
-                message,
-                priority=MessagePriority.NORMAL
-            )
+        }
+        for participant_id in session.participants:
+            await websocket_manager.send_to_user(participant_id, message)
     
     # Query and management methods
     
     def get_resource_updates(self, resource_type: str, resource_id: str) -> List[Dict[str, Any]]:
-        """Get all updates for a specific resource"""
-        resource_key = f"{resource_type}:{resource_id}"
-        update_ids = self.resource_updates.get(resource_key, [])
+        """Get pending and recently confirmed updates for a specific resource"""
+        state = self.resources.get(self._resource_key(resource_type, resource_id))
+        if not state:
+            return []
         
         updates = []
-        for update_id in update_ids:
-            update = self.pending_updates.get(update_id) or self.confirmed_updates.get(update_id)
+        for update_id in state.recent_update_ids:
+            update = state.pending.get(update_id) or self.confirmed_updates.get(update_id)
             if update:
                 updates.append(update.to_dict())
         
         return sorted(updates, key=lambda x: x["created_at"])
     
     def get_change_history(self, resource_type: str, resource_id: str) -> List[Dict[str, Any]]:
-        """Get change history for a resource"""
-        resource_key = f"{resource_type}:{resource_id}"
-        changes = self.change_history.get(resource_key, [])
-        return [change.to_dict() for change in changes]
+        """Get the retained change history window for a resource"""
+        state = self.resources.get(self._resource_key(resource_type, resource_id))
+        if not state:
+            return []
+        return [change.to_dict() for change in state.history]
     
     def get_active_conflicts(self) -> List[Dict[str, Any]]:
         """Get all active conflicts"""
-        return [
-            conflict.to_dict() for conflict in self.conflicts.values()
-            if not conflict.resolved
-        ]
+        return [conflict.to_dict() for conflict in self.conflicts.values()]
     
     def get_collaborative_sessions(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get collaborative sessions, optionally filtered by user"""
@@ -964,8 +1093,10 @@ class OptimisticUpdateService:
         return {
             **self.metrics,
             "pending_updates": len(self.pending_updates),
-            "confirmed_updates": len(self.confirmed_updates),
-            "active_conflicts": len([c for c in self.conflicts.values() if not c.resolved]),
+            "retained_confirmed_updates": len(self.confirmed_updates),
+            "active_conflicts": len(self.conflicts),
+            "tracked_resources": len(self.resources),
+            "queued_items": self._queue.qsize(),
             "active_sessions": len(self.collaborative_sessions)
         }
     
@@ -988,11 +1119,7 @@ class OptimisticUpdateService:
         logger.info("Shutting down optimistic update service...")
         
         # Cancel background tasks
-        tasks_to_cancel = [
-            self._conflict_resolver_task,
-            self._session_cleanup_task,
-            self._update_processor_task
-        ]
+        tasks_to_cancel = [*self._processor_tasks, self._session_cleanup_task]
         
         for task in tasks_to_cancel:
             if task and not task.done():
@@ -1001,6 +1128,7 @@ class OptimisticUpdateService:
                     await task
                 except asyncio.CancelledError:
                     pass
+        self._processor_tasks = []
         
         # End all collaborative sessions
         for session_id in list(self.collaborative_sessions.keys()):
@@ -1019,4 +1147,4 @@ class OptimisticUpdateService:
 
 
 # Global optimistic update service instance
-optimistic_update_service = OptimisticUpdateService()
\ No newline at end of file
+optimistic_update_service = OptimisticUpdateService()
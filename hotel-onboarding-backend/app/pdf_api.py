@@ -3,19 +3,34 @@ PDF Generation API Endpoints
 Provides REST endpoints for generating and managing PDF forms
 """
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from typing import Dict, Any, Optional
+from urllib.parse import quote
 import json
 import base64
+import re
+import unicodedata
 from datetime import datetime
-from .pdf_forms import pdf_form_service
-from .models import I9PDFGenerationRequest, W4PDFGenerationRequest, I9Section1Data, W4FormData, I9Section2Data
+from .auth import require_hr_or_manager_role
+from .lazy_service import LazyService
+from .services.hr_package_service import hr_package_service
+from .models import I9PDFGenerationRequest, W4PDFGenerationRequest, I9Section1Data, W4FormData, I9Section2Data, User, UserRole
+from .property_access_control import get_property_access_controller
 # Note: get_current_user is defined in main_enhanced.py, not auth.py
 # For now, we'll comment this out since we're temporarily disabling auth
 # from .auth import get_current_user
 
 router = APIRouter(prefix="/api/forms", tags=["PDF Forms"])
 
+
+def _load_pdf_form_service():
+    """Import the PDF filler (PyMuPDF/reportlab) on the first form request"""
+    from .pdf_forms import pdf_form_service
+    return pdf_form_service
+
+
+pdf_form_service = LazyService(_load_pdf_form_service)
+
 @router.get("/test")
 async def test_pdf_service():
     """Test endpoint to check PDF service status"""
@@ -380,53 +395,67 @@ async def complete_i9_section2(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error completing I-9: {str(e)}")
 
+def _attachment_disposition(filename: str) -> str:
+    """Content-Disposition with an ASCII fallback name and the UTF-8 name per RFC 5987"""
+    fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    fallback = re.sub(r"[^A-Za-z0-9._-]", "_", fallback)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+def _package_headers(document_id: str, filename: str) -> Dict[str, str]:
+    return {
+        "Content-Disposition": _attachment_disposition(filename),
+        "X-Package-Id": document_id,
+        # Packages hold SSNs and bank details; keep them out of every cache
+        "Cache-Control": "private, no-store"
+    }
+
 @router.post("/package/hr")
 async def generate_hr_package(
     package_data: dict,
     # Temporarily disable auth: current_user = Depends(get_current_user)
 ):
-    """Generate complete HR package with all signed forms"""
+    """Generate complete HR package: all signed forms merged into one bookmarked PDF"""
+    employee_data = package_data.get('employee_data', {})
+    forms_data = package_data.get('forms_data', {})
+    
     try:
-        employee_data = package_data.get('employee_data', {})
-        forms_data = package_data.get('forms_data', {})
-        
-        # This would combine all forms into a single PDF package
-        # For now, we'll create individual forms and return as separate endpoints
-        
-        forms_generated = {}
-        
-        # Generate I-9 if data available
-        if forms_data.get('i9_data'):
-            i9_pdf = pdf_form_service.fill_i9_form(
-                forms_data['i9_data'].get('employee_data', {}),
-                forms_data['i9_data'].get('employer_data', {})
-            )
-            forms_generated['i9'] = base64.b64encode(i9_pdf).decode('utf-8')
-        
-        # Generate W-4 if data available
-        if forms_data.get('w4_data'):
-            w4_pdf = pdf_form_service.fill_w4_form(forms_data['w4_data'])
-            forms_generated['w4'] = base64.b64encode(w4_pdf).decode('utf-8')
-        
-        # Generate Health Insurance form if data available
-        if forms_data.get('health_insurance_data'):
-            health_pdf = pdf_form_service.create_health_insurance_form(forms_data['health_insurance_data'])
-            forms_generated['health_insurance'] = base64.b64encode(health_pdf).decode('utf-8')
-        
-        # Generate Direct Deposit form if data available
-        if forms_data.get('direct_deposit_data'):
-            deposit_pdf = pdf_form_service.create_direct_deposit_form(forms_data['direct_deposit_data'])
-            forms_generated['direct_deposit'] = base64.b64encode(deposit_pdf).decode('utf-8')
-        
-        return {
-            "message": "HR package generated successfully",
-            "forms": forms_generated,
-            "employee_name": f"{employee_data.get('first_name', '')} {employee_data.get('last_name', '')}",
-            "generated_at": datetime.now().isoformat()
-        }
-        
+        package = await hr_package_service.build(employee_data, forms_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating HR package: {str(e)}")
+    
+    name = "-".join(filter(None, [employee_data.get('first_name'), employee_data.get('last_name')])) or "employee"
+    headers = _package_headers(package.document_id, f"hr-package-{name}.pdf")
+    headers["Content-Length"] = str(package.size)
+    headers["X-Package-Hash"] = package.content_hash
+    headers["X-Package-Forms"] = ",".join(package.forms)
+    return StreamingResponse(hr_package_service.stream(package.document_id), media_type="application/pdf", headers=headers)
+
+@router.get("/package/hr/{document_id}")
+async def get_hr_package(
+    document_id: str,
+    current_user: User = Depends(require_hr_or_manager_role)
+):
+    """Re-serve a stored HR package by the ID returned in X-Package-Id"""
+    try:
+        employee_id = hr_package_service.employee_id(document_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="HR package not found")
+    
+    # Managers only see packages for employees at their own properties
+    if current_user.role == UserRole.MANAGER:
+        access_controller = get_property_access_controller()
+        if not access_controller.validate_manager_employee_access(current_user, employee_id):
+            raise HTTPException(status_code=403, detail="Access denied to this HR package")
+    
+    try:
+        content = hr_package_service.stream(document_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="HR package not found")
+    
+    headers = _package_headers(document_id, f"hr-package-{document_id}.pdf")
+    return StreamingResponse(content, media_type="application/pdf", headers=headers)
 
 @router.get("/health-insurance/generate")
 async def generate_health_insurance_form(
@@ -4,9 +4,11 @@ Property Access Control Module
 Centralized property access validation for manager operations
 """
 
-from typing import List, Optional, Set
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
 from fastapi import HTTPException, Depends
 from functools import wraps
+import json
 import logging
 from datetime import datetime
 
@@ -20,50 +22,242 @@ class PropertyAccessError(Exception):
     pass
 
 class PropertyAccessController:
-    """Centralized property access control for managers"""
-    
-    def __init__(self, supabase_service: EnhancedSupabaseService):
+    """
+    Centralized property access control for managers
+
+    Holds an in-memory ACL index so authorization checks are memory lookups:
+    manager → property ids (with a property → managers reverse index for
+    invalidation) and application/employee → property id. Entries are dropped
+    by the property-manager assignment endpoints, or by Postgres NOTIFY on the
+    property_access_changed channel when a listener is running.
+    """
+
+    ENTITY_TABLES = {
+        "application": "job_applications",
+        "employee": "employees",
+    }
+    NOTIFY_CHANNEL = "property_access_changed"
+
+    def __init__(self, supabase_service: EnhancedSupabaseService, max_entities: int = 100_000):
         self.supabase_service = supabase_service
-        self._manager_property_cache = {}  # Simple cache for manager properties
-        self._cache_ttl = 300  # 5 minutes cache TTL
+        self._manager_property_cache = {}  # manager_id -> [property_id]
+        self._cache_ttl = 300  # 5 minutes; only bounds drift from changes nobody reported
         self._cache_timestamps = {}  # Track cache timestamps
-    
+        self._property_managers: Dict[str, Set[str]] = {}  # property_id -> manager ids
+        self._entity_properties: Dict[str, "OrderedDict[str, str]"] = {
+            entity_type: OrderedDict() for entity_type in self.ENTITY_TABLES
+        }
+        self._max_entities = max_entities
+        self._listener_connection = None
+        self.stats = {"manager_hits": 0, "manager_loads": 0, "entity_hits": 0, "entity_loads": 0, "notifications": 0}
+
+    # ----- manager → property index -----
+
     def get_manager_properties(self, manager_id: str) -> List[str]:
         """Get property IDs that a manager has access to"""
         try:
-            # Check cache first with TTL validation
             current_time = datetime.now().timestamp()
-            if (manager_id in self._manager_property_cache and 
-                manager_id in self._cache_timestamps and
-                current_time - self._cache_timestamps[manager_id] < self._cache_ttl):
-                return self._manager_property_cache[manager_id]
-            
+            cached = self._manager_property_cache.get(manager_id)
+            if (cached is not None and
+                current_time - self._cache_timestamps.get(manager_id, 0) < self._cache_ttl):
+                self.stats["manager_hits"] += 1
+                return list(cached)
+
             # Get properties from database
             properties = self.supabase_service.get_manager_properties_sync(manager_id)
             property_ids = [prop.id for prop in properties]
-            
-            # Cache the result with timestamp
-            self._manager_property_cache[manager_id] = property_ids
-            self._cache_timestamps[manager_id] = current_time
-            
-            return property_ids
-            
+            self.stats["manager_loads"] += 1
+
+            self._store_manager_properties(manager_id, property_ids, current_time)
+            return list(property_ids)
+
         except Exception as e:
             logger.error(f"Failed to get manager properties for {manager_id}: {e}")
             return []
-    
+
+    def _store_manager_properties(self, manager_id: str, property_ids: List[str], loaded_at: float):
+        for property_id in self._manager_property_cache.get(manager_id, ()):
+            managers = self._property_managers.get(property_id)
+            if managers is not None:
+                managers.discard(manager_id)
+        self._manager_property_cache[manager_id] = property_ids
+        self._cache_timestamps[manager_id] = loaded_at
+        for property_id in property_ids:
+            self._property_managers.setdefault(property_id, set()).add(manager_id)
+
+    async def warm_manager_index(self) -> int:
+        """Load every property-manager assignment in one query; returns managers indexed"""
+        assignments = await self.supabase_service.get_property_manager_assignments()
+        by_manager: Dict[str, List[str]] = {}
+        for row in assignments:
+            by_manager.setdefault(row["manager_id"], []).append(row["property_id"])
+
+        loaded_at = datetime.now().timestamp()
+        for manager_id, property_ids in by_manager.items():
+            self._store_manager_properties(manager_id, property_ids, loaded_at)
+        return len(by_manager)
+
     def clear_manager_cache(self, manager_id: str):
         """Clear cached properties for a manager"""
-        if manager_id in self._manager_property_cache:
-            del self._manager_property_cache[manager_id]
-        if manager_id in self._cache_timestamps:
-            del self._cache_timestamps[manager_id]
-    
+        for property_id in self._manager_property_cache.pop(manager_id, None) or ():
+            managers = self._property_managers.get(property_id)
+            if managers is not None:
+                managers.discard(manager_id)
+                if not managers:
+                    del self._property_managers[property_id]
+        self._cache_timestamps.pop(manager_id, None)
+
+    def clear_property_cache(self, property_id: str):
+        """Clear every manager and record mapping that involves a property"""
+        for manager_id in list(self._property_managers.get(property_id, ())):
+            self.clear_manager_cache(manager_id)
+        self._property_managers.pop(property_id, None)
+        for mapping in self._entity_properties.values():
+            stale = [entity_id for entity_id, mapped in mapping.items() if mapped == property_id]
+            for entity_id in stale:
+                del mapping[entity_id]
+
     def clear_all_cache(self):
         """Clear all cached data"""
         self._manager_property_cache.clear()
         self._cache_timestamps.clear()
-    
+        self._property_managers.clear()
+        for mapping in self._entity_properties.values():
+            mapping.clear()
+
+    # ----- application/employee → property index -----
+
+    def remember_entities(self, entity_type: str, records: Iterable) -> None:
+        """Record id → property_id for rows the caller has already loaded"""
+        mapping = self._entity_properties[entity_type]
+        for record in records:
+            if isinstance(record, dict):
+                entity_id, property_id = record.get("id"), record.get("property_id")
+            else:
+                entity_id, property_id = getattr(record, "id", None), getattr(record, "property_id", None)
+            if entity_id and property_id:
+                mapping[entity_id] = property_id
+                mapping.move_to_end(entity_id)
+        while len(mapping) > self._max_entities:
+            mapping.popitem(last=False)
+
+    def forget_entity(self, entity_type: str, entity_id: str) -> None:
+        """Drop a record mapping, e.g. after its property_id changed"""
+        self._entity_properties[entity_type].pop(entity_id, None)
+
+    def _get_entity_property_id(self, entity_type: str, entity_id: str, loader) -> Optional[str]:
+        mapping = self._entity_properties[entity_type]
+        property_id = mapping.get(entity_id)
+        if property_id is not None:
+            mapping.move_to_end(entity_id)
+            self.stats["entity_hits"] += 1
+            return property_id
+
+        record = loader(entity_id)
+        self.stats["entity_loads"] += 1
+        if not record:
+            return None
+        self.remember_entities(entity_type, [record])
+        return record.property_id
+
+    def _resolve_entity_property_ids(self, entity_type: str, entity_ids: List[str]) -> Dict[str, str]:
+        """Property id for each known record; misses are fetched in one projected query"""
+        mapping = self._entity_properties[entity_type]
+        resolved = {}
+        missing = []
+        for entity_id in entity_ids:
+            property_id = mapping.get(entity_id)
+            if property_id is None:
+                missing.append(entity_id)
+            else:
+                resolved[entity_id] = property_id
+        self.stats["entity_hits"] += len(resolved)
+
+        if missing:
+            loaded = self.supabase_service.get_record_property_ids(self.ENTITY_TABLES[entity_type], missing)
+            self.stats["entity_loads"] += len(missing)
+            self.remember_entities(entity_type, [
+                {"id": entity_id, "property_id": property_id} for entity_id, property_id in loaded.items()
+            ])
+            resolved.update(loaded)
+        return resolved
+
+    def filter_accessible_ids(self, manager: User, entity_type: str, entity_ids: Iterable[str]) -> List[str]:
+        """Batch form of the application/employee checks: ids the manager may access, in input order"""
+        if not manager or manager.role != UserRole.MANAGER:
+            return []
+
+        entity_ids = list(entity_ids)
+        allowed = frozenset(self.get_manager_properties(manager.id))
+        if not allowed or not entity_ids:
+            return []
+
+        try:
+            property_ids = self._resolve_entity_property_ids(entity_type, entity_ids)
+        except Exception as e:
+            logger.error(f"Failed to resolve {entity_type} properties for manager {manager.id}: {e}")
+            return []
+        return [entity_id for entity_id in entity_ids if property_ids.get(entity_id) in allowed]
+
+    # ----- change notifications -----
+
+    def handle_change_notification(self, payload: str) -> None:
+        """Apply a property_access_changed payload (see migration 012)"""
+        self.stats["notifications"] += 1
+        try:
+            change = json.loads(payload)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed access change notification: {payload!r}")
+            self.clear_all_cache()
+            return
+
+        table = change.get("table")
+        if table == "property_managers":
+            if change.get("manager_id"):
+                self.clear_manager_cache(change["manager_id"])
+            if change.get("property_id"):
+                self.clear_property_cache(change["property_id"])
+        elif table == "properties" and change.get("property_id"):
+            self.clear_property_cache(change["property_id"])
+        else:
+            for entity_type, entity_table in self.ENTITY_TABLES.items():
+                if table == entity_table and change.get("id"):
+                    self.forget_entity(entity_type, change["id"])
+                    break
+            else:
+                self.clear_all_cache()
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self.handle_change_notification(payload)
+
+    def _on_listener_terminated(self, connection):
+        logger.warning("Access change listener connection closed; clearing ACL index")
+        self._listener_connection = None
+        self.clear_all_cache()
+
+    async def start_change_listener(self, database_url: str) -> bool:
+        """LISTEN for property_access_changed on a dedicated connection"""
+        if self._listener_connection is not None:
+            return True
+        try:
+            import asyncpg
+            connection = await asyncpg.connect(database_url)
+            await connection.add_listener(self.NOTIFY_CHANNEL, self._on_notification)
+            connection.add_termination_listener(self._on_listener_terminated)
+            self._listener_connection = connection
+            logger.info(f"Listening for {self.NOTIFY_CHANNEL} notifications")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start access change listener: {e}")
+            return False
+
+    async def stop_change_listener(self):
+        """Close the LISTEN connection"""
+        connection, self._listener_connection = self._listener_connection, None
+        if connection is not None:
+            connection.remove_termination_listener(self._on_listener_terminated)
+            await connection.close()
+
     def validate_manager_property_access(self, manager: User, property_id: str) -> bool:
         """Validate that a manager has access to a specific property"""
         if not manager or manager.role != UserRole.MANAGER:
@@ -97,13 +291,15 @@ class PropertyAccessController:
             return False
         
         try:
-            # Get application to check its property
-            application = self.supabase_service.get_application_by_id_sync(application_id)
-            if not application:
+            # Resolve the application's property from the index
+            property_id = self._get_entity_property_id(
+                "application", application_id, self.supabase_service.get_application_by_id_sync
+            )
+            if not property_id:
                 logger.warning(f"Application access denied: Application {application_id} not found for manager {manager.id}")
                 return False
             
-            return self.validate_manager_property_access(manager, application.property_id)
+            return self.validate_manager_property_access(manager, property_id)
             
         except Exception as e:
             logger.error(f"Failed to validate manager application access for {manager.id}: {e}")
@@ -120,13 +316,15 @@ class PropertyAccessController:
             return False
         
         try:
-            # Get employee to check its property
-            employee = self.supabase_service.get_employee_by_id_sync(employee_id)
-            if not employee:
+            # Resolve the employee's property from the index
+            property_id = self._get_entity_property_id(
+                "employee", employee_id, self.supabase_service.get_employee_by_id_sync
+            )
+            if not property_id:
                 logger.warning(f"Employee access denied: Employee {employee_id} not found for manager {manager.id}")
                 return False
             
-            return self.validate_manager_property_access(manager, employee.property_id)
+            return self.validate_manager_property_access(manager, property_id)
             
         except Exception as e:
             logger.error(f"Failed to validate manager employee access for {manager.id}: {e}")
@@ -144,7 +342,7 @@ class PropertyAccessController:
         if manager.role != UserRole.MANAGER:
             return []
         
-        manager_properties = set(self.get_manager_properties(manager.id))
+        manager_properties = frozenset(self.get_manager_properties(manager.id))
         return [app for app in applications if app.property_id in manager_properties]
     
     def filter_employees_by_manager_access(self, manager: User, employees: List) -> List:
@@ -152,7 +350,7 @@ class PropertyAccessController:
         if manager.role != UserRole.MANAGER:
             return []
         
-        manager_properties = set(self.get_manager_properties(manager.id))
+        manager_properties = frozenset(self.get_manager_properties(manager.id))
         return [emp for emp in employees if emp.property_id in manager_properties]
     
     def validate_manager_onboarding_access(self, manager: User, session_id: str) -> bool:
@@ -144,6 +144,8 @@ class PropertyData(BaseModel):
     qr_code_url: Optional[str] = None
     is_active: bool = True
     created_at: Optional[str] = None
+    manager_count: int = 0
+    employee_count: int = 0
 
 class ApplicationData(BaseModel):
     """Application data structure"""
@@ -2,15 +2,32 @@
 Response Utilities for Standardized API Responses
 Provides helper functions and middleware for consistent response formatting
 """
+import json
 import uuid
 import traceback
+import zlib
+import anyio
 from typing import Any, Dict, List, Optional, Type, TypeVar, Union
 from datetime import datetime
 from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError as PydanticValidationError
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
 
 from .response_models import (
     APIResponse, APIError, SuccessResponse, MessageResponse, ListResponse,
@@ -20,6 +37,27 @@ from .response_models import (
 # Type variable for generic response data
 ResponseData = TypeVar('ResponseData')
 
+
+def _json_default(obj: Any) -> Any:
+    """Fallback for values neither encoder handles natively (pydantic models, sets, Decimal...)"""
+    return jsonable_encoder(obj)
+
+
+def dumps_json(content: Any) -> bytes:
+    """Serialize a response body, using orjson when it is installed"""
+    if HAS_ORJSON:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_json_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; datetimes, UUIDs and enums serialize natively"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
 class ResponseFormatter:
     """Utility class for formatting standardized API responses"""
     
@@ -126,19 +164,140 @@ class ResponseFormatter:
             request_id=request_id
         )
 
-class ResponseMiddleware(BaseHTTPMiddleware):
-    """Middleware to standardize all API responses and handle errors"""
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json", "text/", "application/javascript", "application/xml", "image/svg+xml"
+)
+
+
+class ResponseMiddleware:
+    """
+    Pure ASGI middleware that tags each request with an ID, converts unhandled
+    exceptions into standardized error envelopes and compresses response bodies.
     
-    async def dispatch(self, request: Request, call_next):
-        # Generate unique request ID for tracing
+    Bodies of at least minimum_size bytes are compressed with brotli or gzip,
+    whichever the client prefers and is available. Streamed responses are
+    compressed chunk by chunk and flushed as they go, so streaming is preserved.
+    Bodies of offload_size bytes or more are compressed in a worker thread so
+    a large listing does not stall the event loop.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        offload_size: int = 256 * 1024,
+        gzip_level: int = 3,
+        brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # Generate unique request ID for tracing; request.state reads scope["state"]
         request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
+        scope.setdefault("state", {})["request_id"] = request_id
+        
+        encoding = self._negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        response_started = False
+        start_message: Optional[Message] = None
+        compressor = None
+        
+        async def send_wrapper(message: Message):
+            nonlocal response_started, start_message, compressor
+            
+            if message["type"] == "http.response.start":
+                response_started = True
+                if encoding is None:
+                    await send(message)
+                else:
+                    # Hold the headers until the first body chunk shows whether to compress
+                    start_message = message
+                return
+            
+            if message["type"] != "http.response.body" or (start_message is None and compressor is None):
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if not self._should_compress(headers, body, more_body):
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+                
+                compressor = self._compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                    body = compressor.stream(body)
+                elif len(body) >= self.offload_size:
+                    body = await anyio.to_thread.run_sync(compressor.finish, body)
+                    headers["Content-Length"] = str(len(body))
+                else:
+                    body = compressor.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                await send(start_message)
+                start_message = None
+            else:
+                body = compressor.finish(body) if not more_body else compressor.stream(body)
+            
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
         
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_wrapper)
         except Exception as exc:
-            return await self._handle_exception(exc, request_id)
+            if response_started:
+                raise
+            response = await self._handle_exception(exc, request_id)
+            await response(scope, receive, send)
+    
+    @staticmethod
+    def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+        """Pick br or gzip from an Accept-Encoding header; highest q wins, br on ties, q=0 excludes"""
+        qualities = {}
+        for part in accept_encoding.lower().split(","):
+            token, _, params = part.strip().partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            qualities[token.strip()] = quality
+        
+        candidates = [
+            (qualities[name], preference, name)
+            for preference, name in ((0, "gzip"), (1, "br"))
+            if qualities.get(name, 0) > 0 and (name != "br" or HAS_BROTLI)
+        ]
+        return max(candidates)[2] if candidates else None
+    
+    def _should_compress(self, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES) or content_type.startswith("text/event-stream"):
+            return False
+        # A streamed body's size is unknown up front, so always compress it
+        return more_body or len(body) >= self.minimum_size
+    
+    def _compressor(self, encoding: str) -> "_StreamCompressor":
+        if encoding == "br":
+            return _StreamCompressor(brotli.Compressor(quality=self.brotli_quality))
+        return _StreamCompressor(zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS))
     
     async def _handle_exception(self, exc: Exception, request_id: str) -> JSONResponse:
         """Handle exceptions and return standardized error responses"""
@@ -175,7 +334,7 @@ class ResponseMiddleware(BaseHTTPMiddleware):
             request_id=request_id
         )
         
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=exc.status_code,
             content=error_response
         )
@@ -208,7 +367,7 @@ class ResponseMiddleware(BaseHTTPMiddleware):
             request_id=request_id
         )
         
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=422,
             content=error_response
         )
@@ -241,7 +400,7 @@ class ResponseMiddleware(BaseHTTPMiddleware):
             request_id=request_id
         )
         
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=422,
             content=error_response
         )
@@ -261,11 +420,30 @@ class ResponseMiddleware(BaseHTTPMiddleware):
             request_id=request_id
         )
         
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content=error_response
         )
 
+class _StreamCompressor:
+    """Uniform stream/finish interface over zlib and brotli compressor objects"""
+    
+    def __init__(self, compressor):
+        self._compressor = compressor
+        self._is_zlib = not hasattr(compressor, "process")
+    
+    def stream(self, chunk: bytes) -> bytes:
+        """Compress a chunk and flush it so the client can decode it immediately"""
+        if self._is_zlib:
+            return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return self._compressor.process(chunk) + self._compressor.flush()
+    
+    def finish(self, chunk: bytes = b"") -> bytes:
+        if self._is_zlib:
+            return self._compressor.compress(chunk) + self._compressor.flush()
+        return self._compressor.process(chunk) + self._compressor.finish()
+
+
 # Convenience functions for common response patterns
 def success_response(
     data: Any = None,
@@ -274,7 +452,7 @@ def success_response(
 ) -> JSONResponse:
     """Create a success JSON response"""
     content = ResponseFormatter.success(data=data, message=message)
-    return JSONResponse(status_code=status_code, content=content)
+    return FastJSONResponse(status_code=status_code, content=content)
 
 def error_response(
     message: str,
@@ -289,7 +467,7 @@ def error_response(
         status_code=status_code,
         detail=detail
     )
-    return JSONResponse(status_code=status_code, content=content)
+    return FastJSONResponse(status_code=status_code, content=content)
 
 def validation_error_response(
     errors: List[ValidationError],
@@ -297,7 +475,7 @@ def validation_error_response(
 ) -> JSONResponse:
     """Create a validation error JSON response"""
     content = ResponseFormatter.validation_error(errors=errors, message=message)
-    return JSONResponse(status_code=422, content=content)
+    return FastJSONResponse(status_code=422, content=content)
 
 def not_found_response(message: str = "Resource not found") -> JSONResponse:
     """Create a 404 not found response"""
@@ -344,7 +522,7 @@ def standardize_response(func):
             
             # If result is a dict with 'success' key, assume it's already formatted
             if isinstance(result, dict) and 'success' in result:
-                return JSONResponse(content=result)
+                return FastJSONResponse(content=result)
             
             # Otherwise, wrap in success response
             return success_response(data=result)
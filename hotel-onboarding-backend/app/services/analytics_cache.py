@@ -19,7 +19,10 @@ from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any, Union, Callable
 from dataclasses import dataclass, asdict
 from enum import Enum
+from collections import OrderedDict
+import fnmatch
 import hashlib
+import heapq
 import pickle
 import redis
 from redis.exceptions import RedisError
@@ -27,6 +30,8 @@ import threading
 from functools import wraps
 import time
 
+from ..cache_service import estimate_size
+
 logger = logging.getLogger(__name__)
 
 # =====================================
@@ -55,6 +60,7 @@ class CacheConfig:
     key_prefix: str
     ttl_seconds: int
     max_memory_items: int = 1000
+    max_memory_bytes: int = 32 * 1024 * 1024
     compression: bool = False
     serialization: str = "json"  # json, pickle
     invalidation_strategy: InvalidationStrategy = InvalidationStrategy.TTL
@@ -85,6 +91,183 @@ class CacheEntry:
     size_bytes: int = 0
     metadata: Dict[str, Any] = None
 
+# =====================================
+# MEMORY TIER (L1)
+# =====================================
+
+class _MemoryEntry:
+    """Compact L1 entry; monotonic timestamps avoid datetime allocation per access"""
+    __slots__ = ("value", "expires_at", "size_bytes", "access_count", "version")
+
+    def __init__(self, value: Any, expires_at: Optional[float], size_bytes: int, version: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size_bytes = size_bytes
+        self.access_count = 0
+        self.version = version
+
+
+class MemoryTier:
+    """
+    Bounded LRU memory tier with O(1) get/set/evict.
+
+    Recency is kept by an OrderedDict (hash map + doubly linked list), so hits
+    move to the tail and evictions pop the head without sorting. The byte
+    budget uses a deep size estimate of the stored object rather than
+    serializing it. Keys are indexed by their ':'-separated segment prefixes so
+    prefix invalidation touches only matching keys, and expiry is driven by a
+    min-heap so sweeps only visit dead entries.
+
+    The lock is held only for these short synchronous sections and never
+    across an ``await``, so it cannot stall the event loop behind I/O while
+    still protecting callers running in executor threads.
+    """
+
+    MISSING = object()
+
+    def __init__(self, max_items: int, max_bytes: int):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._entries: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._prefix_index: Dict[str, set] = {}
+        self._expiry_heap: List[tuple] = []
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def get(self, key: str) -> Any:
+        """Return the value or ``MemoryTier.MISSING``"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return self.MISSING
+            if entry.expires_at is not None and time.monotonic() >= entry.expires_at:
+                self._remove(key)
+                self.expirations += 1
+                return self.MISSING
+            entry.access_count += 1
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, size_bytes: Optional[int] = None) -> bool:
+        """Insert or replace an entry, evicting least recently used entries to fit"""
+        size = estimate_size(value) if size_bytes is None else size_bytes
+        if size > self.max_bytes:
+            self.delete(key)
+            return False
+
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._remove(key)
+            self._version += 1
+            self._entries[key] = _MemoryEntry(value, expires_at, size, self._version)
+            self.total_bytes += size
+            for prefix in self._prefixes(key):
+                self._prefix_index.setdefault(prefix, set()).add(key)
+            if expires_at is not None:
+                heapq.heappush(self._expiry_heap, (expires_at, key, self._version))
+
+            while len(self._entries) > self.max_items or self.total_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+        return True
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """
+        Remove keys starting with ``prefix``.
+
+        Candidates come from the index entry for the prefix's complete
+        segments, so "property:123:" or "property:12" only visit keys under
+        "property:..." instead of the whole tier.
+        """
+        with self._lock:
+            if ":" in prefix:
+                candidates = self._prefix_index.get(prefix[:prefix.rfind(":")], ())
+            else:
+                candidates = list(self._entries)
+            matched = [key for key in candidates if key.startswith(prefix)]
+            for key in matched:
+                self._remove(key)
+            return len(matched)
+
+    def invalidate_pattern(self, pattern: str) -> int:
+        """Remove keys matching a glob; trailing-``*`` patterns go through the prefix index"""
+        prefix = pattern[:-1] if pattern.endswith("*") else None
+        if prefix is not None and not any(ch in prefix for ch in "*?["):
+            return self.invalidate_prefix(prefix)
+        with self._lock:
+            matched = [key for key in self._entries if fnmatch.fnmatch(key, pattern)]
+            for key in matched:
+                self._remove(key)
+            return len(matched)
+
+    def purge_expired(self) -> int:
+        """Remove expired entries; cost is proportional to the number removed"""
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, key, version = heapq.heappop(self._expiry_heap)
+                entry = self._entries.get(key)
+                if entry is not None and entry.version == version:
+                    self._remove(key)
+                    removed += 1
+            # Drop superseded heap records once they dominate the heap
+            if len(self._expiry_heap) > 4 * max(len(self._entries), 64):
+                self._expiry_heap = [
+                    (e.expires_at, k, e.version)
+                    for k, e in self._entries.items() if e.expires_at is not None
+                ]
+                heapq.heapify(self._expiry_heap)
+        self.expirations += removed
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._prefix_index.clear()
+            self._expiry_heap.clear()
+            self.total_bytes = 0
+
+    @staticmethod
+    def _prefixes(key: str):
+        end = key.find(":")
+        while end != -1:
+            yield key[:end]
+            end = key.find(":", end + 1)
+        yield key
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.total_bytes -= entry.size_bytes
+        for prefix in self._prefixes(key):
+            keys = self._prefix_index.get(prefix)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._prefix_index[prefix]
+        return True
+
 # =====================================
 # ANALYTICS CACHE SERVICE
 # =====================================
@@ -102,13 +285,15 @@ class AnalyticsCache:
         self.redis_client = None
         self.redis_available = False
         
-        # Memory cache (L1)
-        self.memory_cache: Dict[str, CacheEntry] = {}
-        self.memory_lock = threading.RLock()
-        
         # Cache configurations for different data types
         self.cache_configs = self._initialize_cache_configs()
         
+        # Memory cache (L1): one bounded LRU tier per cache type
+        self.memory_tiers: Dict[str, MemoryTier] = {
+            config.key_prefix: MemoryTier(config.max_memory_items, config.max_memory_bytes)
+            for config in self.cache_configs.values()
+        }
+        
         # Performance statistics
         self.stats = CacheStats()
         self.stats_lock = threading.Lock()
@@ -120,8 +305,9 @@ class AnalyticsCache:
         # Event listeners for cache invalidation
         self.invalidation_listeners: Dict[str, List[Callable]] = {}
         
-        # Initialize Redis connection
-        asyncio.create_task(self._initialize_redis())
+        # Initialize Redis connection (deferred until an event loop is running)
+        self._redis_init_task = None
+        self._ensure_started()
         
         logger.info("✅ Analytics Cache initialized")
     
@@ -211,6 +397,19 @@ class AnalyticsCache:
                     logger.error("Redis unavailable, using memory-only cache")
                     self.redis_available = False
     
+    def _ensure_started(self):
+        """Kick off Redis initialization once an event loop is available"""
+        if self._redis_init_task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Constructed at import time; retried on first async call
+        self._redis_init_task = loop.create_task(self._initialize_redis())
+        if self.cleanup_task is None:
+            # Memory expiry runs regardless of Redis availability
+            self.cleanup_task = loop.create_task(self._cleanup_expired_entries())
+    
     async def _start_background_tasks(self):
         """Start background maintenance tasks"""
         if self.cleanup_task is None:
@@ -219,6 +418,9 @@ class AnalyticsCache:
         if self.precompute_task is None:
             self.precompute_task = asyncio.create_task(self._precompute_popular_queries())
     
+    def _memory_tier(self, config: CacheConfig) -> MemoryTier:
+        return self.memory_tiers[config.key_prefix]
+    
     # =====================================
     # CORE CACHE OPERATIONS
     # =====================================
@@ -226,6 +428,7 @@ class AnalyticsCache:
     async def get(self, cache_type: str, key: str, default: Any = None) -> Any:
         """Get value from cache with multi-level lookup"""
         start_time = time.time()
+        self._ensure_started()
         
         try:
             config = self.cache_configs.get(cache_type)
@@ -237,8 +440,8 @@ class AnalyticsCache:
             
             # Try memory cache first (L1)
             if config.cache_level in [CacheLevel.MEMORY, CacheLevel.BOTH]:
-                memory_result = await self._get_from_memory(full_key)
-                if memory_result is not None:
+                memory_result = self._memory_tier(config).get(full_key)
+                if memory_result is not MemoryTier.MISSING:
                     await self._update_stats("hit", time.time() - start_time)
                     return memory_result
             
@@ -248,7 +451,7 @@ class AnalyticsCache:
                 if redis_result is not None:
                     # Populate memory cache for faster future access
                     if config.cache_level == CacheLevel.BOTH:
-                        await self._set_in_memory(full_key, redis_result, config)
+                        await self._set_in_memory(full_key, redis_result, config, config.ttl_seconds)
                     
                     await self._update_stats("hit", time.time() - start_time)
                     return redis_result
@@ -264,6 +467,7 @@ class AnalyticsCache:
     
     async def set(self, cache_type: str, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """Set value in cache with multi-level storage"""
+        self._ensure_started()
         try:
             config = self.cache_configs.get(cache_type)
             if not config:
@@ -306,9 +510,7 @@ class AnalyticsCache:
             
             # Delete from memory cache
             if config.cache_level in [CacheLevel.MEMORY, CacheLevel.BOTH]:
-                with self.memory_lock:
-                    if full_key in self.memory_cache:
-                        del self.memory_cache[full_key]
+                self._memory_tier(config).delete(full_key)
             
             # Delete from Redis cache
             if config.cache_level in [CacheLevel.REDIS, CacheLevel.BOTH] and self.redis_available:
@@ -341,14 +543,12 @@ class AnalyticsCache:
             
             # Invalidate memory cache
             if config.cache_level in [CacheLevel.MEMORY, CacheLevel.BOTH]:
-                with self.memory_lock:
-                    keys_to_delete = [
-                        key for key in self.memory_cache.keys()
-                        if key.startswith(config.key_prefix) and self._matches_pattern(key, full_pattern)
-                    ]
-                    for key in keys_to_delete:
-                        del self.memory_cache[key]
-                        deleted_count += 1
+                tier = self._memory_tier(config)
+                if pattern == "*":
+                    deleted_count += len(tier)
+                    tier.clear()
+                else:
+                    deleted_count += tier.invalidate_pattern(full_pattern)
             
             # Invalidate Redis cache
             if config.cache_level in [CacheLevel.REDIS, CacheLevel.BOTH] and self.redis_available:
@@ -375,72 +575,25 @@ class AnalyticsCache:
     # MEMORY CACHE OPERATIONS
     # =====================================
     
-    async def _get_from_memory(self, key: str) -> Any:
+    async def _get_from_memory(self, key: str, config: Optional[CacheConfig] = None) -> Any:
         """Get value from memory cache"""
-        with self.memory_lock:
-            entry = self.memory_cache.get(key)
-            if entry is None:
-                return None
-            
-            # Check expiration
-            if entry.expires_at and datetime.utcnow() > entry.expires_at:
-                del self.memory_cache[key]
-                return None
-            
-            # Update access statistics
-            entry.access_count += 1
-            entry.last_accessed = datetime.utcnow()
-            
-            return entry.value
+        config = config or self._config_for_key(key)
+        value = self._memory_tier(config).get(key)
+        return None if value is MemoryTier.MISSING else value
     
     async def _set_in_memory(self, key: str, value: Any, config: CacheConfig, ttl: int = None) -> bool:
         """Set value in memory cache"""
         try:
-            with self.memory_lock:
-                # Check memory limits
-                if len(self.memory_cache) >= config.max_memory_items:
-                    await self._evict_memory_entries(config.max_memory_items // 4)  # Evict 25%
-                
-                # Calculate expiration
-                expires_at = None
-                if ttl:
-                    expires_at = datetime.utcnow() + timedelta(seconds=ttl)
-                
-                # Create cache entry
-                serialized_value = await self._serialize_value(value, config)
-                entry = CacheEntry(
-                    key=key,
-                    value=value,
-                    created_at=datetime.utcnow(),
-                    expires_at=expires_at,
-                    size_bytes=len(str(serialized_value)),
-                    metadata={"config": config.key_prefix}
-                )
-                
-                self.memory_cache[key] = entry
-                return True
-                
+            return self._memory_tier(config).set(key, value, ttl)
         except Exception as e:
             logger.error(f"Error setting memory cache: {e}")
             return False
     
-    async def _evict_memory_entries(self, count: int):
-        """Evict least recently used entries from memory cache"""
-        with self.memory_lock:
-            if len(self.memory_cache) <= count:
-                return
-            
-            # Sort by last accessed time (LRU)
-            sorted_entries = sorted(
-                self.memory_cache.items(),
-                key=lambda x: x[1].last_accessed or x[1].created_at
-            )
-            
-            # Remove oldest entries
-            for i in range(count):
-                if i < len(sorted_entries):
-                    key = sorted_entries[i][0]
-                    del self.memory_cache[key]
+    def _config_for_key(self, key: str) -> CacheConfig:
+        for config in self.cache_configs.values():
+            if key.startswith(config.key_prefix + ":"):
+                return config
+        return self.cache_configs["metrics"]
     
     # =====================================
     # REDIS CACHE OPERATIONS
@@ -632,18 +785,9 @@ class AnalyticsCache:
                 await asyncio.sleep(300)  # Run every 5 minutes
                 
                 # Clean memory cache
-                with self.memory_lock:
-                    current_time = datetime.utcnow()
-                    expired_keys = [
-                        key for key, entry in self.memory_cache.items()
-                        if entry.expires_at and current_time > entry.expires_at
-                    ]
-                    
-                    for key in expired_keys:
-                        del self.memory_cache[key]
-                    
-                    if expired_keys:
-                        logger.debug(f"Cleaned up {len(expired_keys)} expired memory cache entries")
+                expired_count = sum(tier.purge_expired() for tier in self.memory_tiers.values())
+                if expired_count:
+                    logger.debug(f"Cleaned up {expired_count} expired memory cache entries")
                 
                 # Redis handles TTL automatically, but we can clean up manually if needed
                 
@@ -685,10 +829,10 @@ class AnalyticsCache:
         with self.stats_lock:
             stats_dict = asdict(self.stats)
         
-        # Add memory usage
-        with self.memory_lock:
-            memory_entries = len(self.memory_cache)
-            memory_size = sum(entry.size_bytes for entry in self.memory_cache.values())
+        # Add memory usage (tiers track totals incrementally)
+        memory_entries = sum(len(tier) for tier in self.memory_tiers.values())
+        memory_size = sum(tier.total_bytes for tier in self.memory_tiers.values())
+        memory_evictions = sum(tier.evictions for tier in self.memory_tiers.values())
         
         # Add Redis info if available
         redis_info = {}
@@ -705,7 +849,8 @@ class AnalyticsCache:
             "memory_cache": {
                 "entries": memory_entries,
                 "size_bytes": memory_size,
-                "size_mb": memory_size / (1024 * 1024)
+                "size_mb": memory_size / (1024 * 1024),
+                "evictions": memory_evictions
             },
             "redis_cache": {
                 "available": self.redis_available,
@@ -716,6 +861,7 @@ class AnalyticsCache:
                 cache_type: {
                     "ttl_seconds": config.ttl_seconds,
                     "max_memory_items": config.max_memory_items,
+                    "max_memory_bytes": config.max_memory_bytes,
                     "compression": config.compression,
                     "cache_level": config.cache_level.value
                 }
@@ -742,9 +888,10 @@ class AnalyticsCache:
         
         # Test memory cache
         try:
-            test_key = "health_check_test"
-            await self._set_in_memory(test_key, "test_value", self.cache_configs["metrics"])
-            result = await self._get_from_memory(test_key)
+            config = self.cache_configs["metrics"]
+            test_key = f"{config.key_prefix}:health_check_test"
+            await self._set_in_memory(test_key, "test_value", config, ttl=60)
+            result = await self._get_from_memory(test_key, config)
             if result != "test_value":
                 health["memory_cache"] = "unhealthy"
         except Exception:
@@ -777,6 +924,8 @@ class AnalyticsCache:
         logger.info("Shutting down analytics cache...")
         
         # Cancel background tasks
+        if self._redis_init_task:
+            self._redis_init_task.cancel()
         if self.cleanup_task:
             self.cleanup_task.cancel()
         if self.precompute_task:
@@ -792,7 +941,7 @@ class AnalyticsCache:
                 logger.error(f"Error closing Redis connection: {e}")
         
         # Clear memory cache
-        with self.memory_lock:
-            self.memory_cache.clear()
+        for tier in self.memory_tiers.values():
+            tier.clear()
         
         logger.info("Analytics cache shutdown complete")
\ No newline at end of file
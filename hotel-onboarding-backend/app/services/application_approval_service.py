@@ -0,0 +1,115 @@
+"""
+Application Approval Service
+Approves a job application in a single database transaction: status change,
+employee record, onboarding session and token, and talent-pool moves
+"""
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from ..models_enhanced import generate_secure_token
+from .outbox_dispatcher import OutboxDispatcher, outbox_dispatcher
+
+logger = logging.getLogger(__name__)
+
+
+class ApplicationNotFoundError(LookupError):
+    """The application does not exist"""
+
+
+class ApplicationNotPendingError(ValueError):
+    """The application has already been decided"""
+
+
+class ApplicationApprovalService:
+    """
+    Runs approve_job_application() (migration 020) in one round trip, as an
+    RPC through the Supabase client, so approvals do not need DATABASE_URL.
+
+    The approval and onboarding emails are written to outbox_events in the
+    same transaction and sent by the outbox dispatcher once it commits, so the
+    request never waits on SMTP and a failed approval sends nothing.
+    """
+
+    def __init__(
+        self,
+        supabase_service,
+        outbox: Optional[OutboxDispatcher] = None,
+        token_ttl_hours: int = 72
+    ):
+        self.supabase = supabase_service
+        self.outbox = outbox or outbox_dispatcher
+        self.token_ttl_hours = token_ttl_hours
+
+    async def approve(
+        self,
+        application_id: str,
+        reviewer_id: str,
+        job_title: str,
+        start_date: str,
+        start_time: str,
+        pay_rate: float,
+        pay_frequency: str,
+        benefits_eligible: str,
+        supervisor: str,
+        special_instructions: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Approve a pending application; returns the ids the transaction created
+
+        Raises ApplicationNotFoundError, ApplicationNotPendingError, or
+        ValueError for a start_date that is not YYYY-MM-DD.
+        """
+        date.fromisoformat(start_date)
+        token = generate_secure_token()
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=self.token_ttl_hours)
+        base_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
+        onboarding_url = f"{base_url}/onboard?token={token}"
+        employee = {
+            "position": job_title,
+            "hire_date": start_date,
+            "pay_rate": pay_rate,
+            "pay_frequency": pay_frequency,
+            "personal_info": {
+                "job_title": job_title,
+                "start_time": start_time,
+                "benefits_eligible": benefits_eligible,
+                "supervisor": supervisor,
+                "special_instructions": special_instructions
+            }
+        }
+
+        call = self.supabase.client.rpc("approve_job_application", {
+            "p_application_id": application_id,
+            "p_reviewer_id": reviewer_id,
+            "p_employee": employee,
+            "p_token": token,
+            "p_expires_at": expires_at.isoformat(),
+            "p_onboarding_url": onboarding_url
+        })
+        try:
+            response = await self.supabase._run_sync(call.execute)
+        except Exception as e:
+            # PostgREST reports the function's SQLSTATE as the error code
+            sqlstate = getattr(e, "code", None)
+            if sqlstate == "P0002":
+                raise ApplicationNotFoundError(application_id) from e
+            if sqlstate == "55000":
+                raise ApplicationNotPendingError(getattr(e, "message", None) or str(e)) from e
+            raise
+
+        approval = response.data
+        if isinstance(approval, str):
+            approval = json.loads(approval)
+        # Committed: the queued emails can go out now
+        self.outbox.notify()
+        logger.info(f"Application {application_id} approved; employee {approval['employee_id']}")
+
+        return {
+            **approval,
+            "token": token,
+            "expires_at": expires_at,
+            "onboarding_url": onboarding_url
+        }
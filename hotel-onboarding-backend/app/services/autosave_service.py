@@ -0,0 +1,363 @@
+"""
+Autosave Service
+Coalesces rapid onboarding form saves and persists them with single-statement upserts
+"""
+import asyncio
+import copy
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AutosaveKey = Tuple[str, str]  # (token, step_id)
+
+
+class JsonPatchError(ValueError):
+    """Raised when a JSON patch operation cannot be applied"""
+    pass
+
+
+def _decode_pointer(path: str) -> List[str]:
+    """Split an RFC 6901 JSON pointer into unescaped reference tokens"""
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {path!r}")
+    return [part.replace("~1", "/").replace("~0", "~") for part in path[1:].split("/")]
+
+
+def _resolve_parent(document: Any, tokens: List[str], create: bool) -> Any:
+    """Walk to the container holding the last token, optionally creating objects"""
+    target = document
+    for token in tokens[:-1]:
+        if isinstance(target, dict):
+            if token not in target:
+                if not create:
+                    raise JsonPatchError(f"Path segment {token!r} does not exist")
+                target[token] = {}
+            target = target[token]
+        elif isinstance(target, list):
+            try:
+                target = target[int(token)]
+            except (ValueError, IndexError):
+                raise JsonPatchError(f"Invalid array index {token!r}")
+        else:
+            raise JsonPatchError(f"Cannot traverse into scalar at {token!r}")
+    return target
+
+
+def apply_json_patch(document: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply a JSON-patch style list of operations to a copy of ``document``.
+
+    Supports the ``add``, ``replace`` and ``remove`` operations from RFC 6902.
+    ``add``/``replace`` create intermediate objects so clients can send only
+    the leaf fields that changed.
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("Patch must be a list of operations")
+
+    result = copy.deepcopy(document) if document else {}
+
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise JsonPatchError("Each patch operation must be an object")
+
+        op = operation.get("op")
+        path = operation.get("path")
+        if op not in ("add", "replace", "remove"):
+            raise JsonPatchError(f"Unsupported patch operation: {op!r}")
+        if not isinstance(path, str):
+            raise JsonPatchError("Patch operation is missing 'path'")
+
+        tokens = _decode_pointer(path)
+        if not tokens:
+            if op == "remove":
+                result = {}
+            elif isinstance(operation.get("value"), dict):
+                result = copy.deepcopy(operation["value"])
+            else:
+                raise JsonPatchError("Root value must be an object")
+            continue
+
+        if op != "remove" and "value" not in operation:
+            raise JsonPatchError(f"Patch operation {op!r} at {path!r} is missing 'value'")
+
+        parent = _resolve_parent(result, tokens, create=op != "remove")
+        last = tokens[-1]
+
+        if isinstance(parent, dict):
+            if op == "remove":
+                if last not in parent:
+                    raise JsonPatchError(f"Cannot remove missing field {path!r}")
+                del parent[last]
+            else:
+                parent[last] = operation["value"]
+        elif isinstance(parent, list):
+            if op == "add" and last == "-":
+                parent.append(operation["value"])
+                continue
+            try:
+                index = int(last)
+            except ValueError:
+                raise JsonPatchError(f"Invalid array index {last!r}")
+            if op == "add":
+                if index > len(parent):
+                    raise JsonPatchError(f"Array index {index} out of range")
+                parent.insert(index, operation["value"])
+            elif index >= len(parent):
+                raise JsonPatchError(f"Array index {index} out of range")
+            elif op == "replace":
+                parent[index] = operation["value"]
+            else:
+                parent.pop(index)
+        else:
+            raise JsonPatchError(f"Cannot apply {op!r} to scalar at {path!r}")
+
+    return result
+
+
+@dataclass
+class PendingSave:
+    """Latest unsaved form data for a single (token, step) pair"""
+    token: str
+    employee_id: str
+    step_id: str
+    form_data: Dict[str, Any]
+    first_queued_at: float
+    last_queued_at: float
+    revision: int = 0
+    timer: Optional[asyncio.TimerHandle] = field(default=None, repr=False)
+
+
+class AutosaveService:
+    """
+    Server-side autosave coalescing for onboarding form data.
+
+    Rapid successive saves for the same (token, step) replace each other in
+    memory (last write wins) and only the newest payload is written once the
+    debounce window goes quiet, or once ``max_delay_seconds`` has passed since
+    the first unsaved change so continuous typing still reaches the database.
+
+    Patches apply to this worker's unsaved data when there is some, and
+    otherwise to the row as currently stored. Persisted data is not cached:
+    other workers and the direct save endpoints write the same rows, and a
+    patch built on a stale copy would overwrite their changes. Saves and
+    patches for the same step run one at a time, so a patch never applies to
+    data another request is about to replace.
+    """
+
+    def __init__(
+        self,
+        supabase_service,
+        debounce_seconds: float = 1.5,
+        max_delay_seconds: float = 10.0
+    ):
+        self.supabase_service = supabase_service
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+
+        self._pending: Dict[AutosaveKey, PendingSave] = {}
+        self._flush_tasks: Dict[AutosaveKey, asyncio.Task] = {}
+        self._lock = asyncio.Lock()
+        # Per-step locks (and how many callers hold or wait on each) so a
+        # patch's read, apply and enqueue is not interleaved with other writes
+        self._step_locks: Dict[AutosaveKey, List[Any]] = {}
+
+        self.stats = {
+            "saves_received": 0,
+            "patches_received": 0,
+            "saves_coalesced": 0,
+            "writes": 0,
+            "write_failures": 0
+        }
+
+    # ==========================================
+    # PUBLIC API
+    # ==========================================
+
+    async def save(self, token: str, employee_id: str, step_id: str, form_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a full form snapshot for a step, replacing any unsaved one"""
+        self.stats["saves_received"] += 1
+        async with self._step_lock((token, step_id)):
+            return self._enqueue(token, employee_id, step_id, form_data or {})
+
+    async def patch(
+        self,
+        token: str,
+        employee_id: str,
+        step_id: str,
+        operations: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Apply JSON-patch operations on top of the latest known form data for a step"""
+        self.stats["patches_received"] += 1
+        async with self._step_lock((token, step_id)):
+            base = await self.get_form_data(token, step_id)
+            patched = apply_json_patch(base, operations)
+            return self._enqueue(token, employee_id, step_id, patched)
+
+    async def get_form_data(self, token: str, step_id: str) -> Dict[str, Any]:
+        """Return the newest form data for a step, including unsaved changes"""
+        key = (token, step_id)
+        pending = self._pending.get(key)
+        if pending:
+            return pending.form_data
+
+        # Wait for this worker's own write of the step so the read sees it
+        in_flight = self._flush_tasks.get(key)
+        if in_flight and in_flight is not asyncio.current_task():
+            await asyncio.gather(in_flight, return_exceptions=True)
+            pending = self._pending.get(key)
+            if pending:
+                return pending.form_data
+
+        form_data = await asyncio.get_running_loop().run_in_executor(
+            None, self.supabase_service.get_onboarding_form_data, token, step_id
+        )
+        return form_data or {}
+
+    def has_pending(self, token: Optional[str] = None) -> bool:
+        """Whether any unsaved data exists (optionally for one token)"""
+        if token is None:
+            return bool(self._pending)
+        return any(key[0] == token for key in self._pending)
+
+    async def flush(self, token: Optional[str] = None, step_id: Optional[str] = None) -> bool:
+        """
+        Immediately persist pending saves, optionally limited to a token/step.
+
+        All selected rows are written in a single batched upsert.
+        """
+        async with self._lock:
+            keys = [
+                key for key in self._pending
+                if (token is None or key[0] == token) and (step_id is None or key[1] == step_id)
+            ]
+            batch = [self._take(key) for key in keys]
+
+        # Wait for any write already in flight for these keys so reads after
+        # flush() observe the newest data
+        in_flight = [
+            task for key, task in self._flush_tasks.items()
+            if (token is None or key[0] == token) and (step_id is None or key[1] == step_id)
+            and task is not asyncio.current_task()
+        ]
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+        if not batch:
+            return True
+        return await self._write(batch)
+
+    async def shutdown(self):
+        """Flush everything that is still pending"""
+        await self.flush()
+
+    # ==========================================
+    # INTERNALS
+    # ==========================================
+
+    @asynccontextmanager
+    async def _step_lock(self, key: AutosaveKey):
+        entry = self._step_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._step_locks[key]
+
+    def _enqueue(self, token: str, employee_id: str, step_id: str, form_data: Dict[str, Any]) -> Dict[str, Any]:
+        key = (token, step_id)
+        now = time.monotonic()
+        pending = self._pending.get(key)
+
+        if pending:
+            self.stats["saves_coalesced"] += 1
+            pending.form_data = form_data
+            pending.employee_id = employee_id
+            pending.last_queued_at = now
+            pending.revision += 1
+            if pending.timer:
+                pending.timer.cancel()
+        else:
+            pending = PendingSave(
+                token=token,
+                employee_id=employee_id,
+                step_id=step_id,
+                form_data=form_data,
+                first_queued_at=now,
+                last_queued_at=now
+            )
+            self._pending[key] = pending
+
+        # Debounce, but never hold a change longer than max_delay_seconds
+        remaining = self.max_delay_seconds - (now - pending.first_queued_at)
+        delay = max(0.0, min(self.debounce_seconds, remaining))
+        loop = asyncio.get_running_loop()
+        pending.timer = loop.call_later(delay, self._schedule_flush, key)
+
+        return {
+            "queued": True,
+            "revision": pending.revision,
+            "flush_in_seconds": round(delay, 3)
+        }
+
+    def _schedule_flush(self, key: AutosaveKey):
+        if key in self._flush_tasks:
+            # A write for this key is in flight; re-arm so the newer payload follows it
+            pending = self._pending.get(key)
+            if pending:
+                pending.timer = asyncio.get_running_loop().call_later(
+                    self.debounce_seconds, self._schedule_flush, key
+                )
+            return
+        task = asyncio.ensure_future(self._flush_key(key))
+        self._flush_tasks[key] = task
+        task.add_done_callback(lambda _t, k=key: self._flush_tasks.pop(k, None))
+
+    async def _flush_key(self, key: AutosaveKey):
+        async with self._lock:
+            if key not in self._pending:
+                return
+            batch = [self._take(key)]
+        await self._write(batch)
+
+    def _take(self, key: AutosaveKey) -> PendingSave:
+        pending = self._pending.pop(key)
+        if pending.timer:
+            pending.timer.cancel()
+            pending.timer = None
+        return pending
+
+    async def _write(self, batch: List[PendingSave]) -> bool:
+        rows = [
+            {
+                "token": item.token,
+                "employee_id": item.employee_id,
+                "step_id": item.step_id,
+                "form_data": item.form_data
+            }
+            for item in batch
+        ]
+        saved = await asyncio.get_running_loop().run_in_executor(
+            None, self.supabase_service.upsert_onboarding_form_data_batch, rows
+        )
+
+        if saved:
+            self.stats["writes"] += 1
+            return True
+
+        self.stats["write_failures"] += 1
+        logger.error(f"Autosave write failed for {len(batch)} step(s); re-queueing")
+        # Put failed rows back unless a newer save already superseded them
+        for item in batch:
+            key = (item.token, item.step_id)
+            if key not in self._pending:
+                self._enqueue(item.token, item.employee_id, item.step_id, item.form_data)
+        return False
@@ -6,11 +6,13 @@ from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, date, timedelta
 from dataclasses import dataclass
 from enum import Enum
+import asyncio
 import uuid
 import json
 
 from ..models_enhanced import Employee, OnboardingStatus, UserRole
 from ..supabase_service_enhanced import EnhancedSupabaseService
+from .message_dispatcher import DEFAULT_MESSAGE_CHANNELS, MESSAGE_CHANNELS, EmployeeMessageDispatcher, message_dispatcher
 
 class EmployeeLifecycleStage(str, Enum):
     """Employee lifecycle stages"""
@@ -92,8 +94,10 @@ class PerformanceReview:
 class EmployeeManagementService:
     """Enhanced employee management service"""
     
-    def __init__(self, supabase_service: EnhancedSupabaseService):
+    def __init__(self, supabase_service: EnhancedSupabaseService,
+                 dispatcher: Optional[EmployeeMessageDispatcher] = None):
         self.supabase = supabase_service
+        self.dispatcher = dispatcher or message_dispatcher
     
     # =====================================
     # EMPLOYEE LIFECYCLE MANAGEMENT
@@ -429,10 +433,10 @@ class EmployeeManagementService:
             
             # Parse JSON fields
             for review in result or []:
-                review['goals_achievement'] = json.loads(review.get('goals_achievement', '{}'))
-                review['strengths'] = json.loads(review.get('strengths', '[]'))
-                review['areas_for_improvement'] = json.loads(review.get('areas_for_improvement', '[]'))
-                review['development_plan'] = json.loads(review.get('development_plan', '{}'))
+                review['goals_achievement'] = json.loads(review.get('goals_achievement') or '{}')
+                review['strengths'] = json.loads(review.get('strengths') or '[]')
+                review['areas_for_improvement'] = json.loads(review.get('areas_for_improvement') or '[]')
+                review['development_plan'] = json.loads(review.get('development_plan') or '{}')
             
             return result or []
             
@@ -485,37 +489,106 @@ class EmployeeManagementService:
             print(f"Error sending employee message: {str(e)}")
             return None
     
-    async def bulk_message_employees(self, message_data: Dict[str, Any], filters: Dict[str, Any]) -> Dict[str, Any]:
-        """Send bulk message to employees based on filters"""
+    async def bulk_message_employees(self, message_data: Dict[str, Any], filters: Dict[str, Any],
+                                     channels: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Send bulk message to employees based on filters
+        
+        Recipients are resolved and their inbox and delivery rows written in
+        the database; email and WebSocket delivery continue in the background.
+        Returns a summary, with per-recipient status available from
+        get_message_deliveries().
+        """
         try:
-            # Get employees based on filters
-            employees = await self._get_employees_by_filters(filters)
+            channels = list(dict.fromkeys(channels or DEFAULT_MESSAGE_CHANNELS))
+            unknown = [channel for channel in channels if channel not in MESSAGE_CHANNELS]
+            if unknown:
+                return {'success': False, 'message': f"Unsupported channels: {', '.join(unknown)}"}
             
-            if not employees:
-                return {'success': False, 'message': 'No employees found matching filters'}
-            
-            recipient_ids = [emp['id'] for emp in employees]
-            
-            # Send message
-            message_id = await self.send_employee_message({
+            message = {
                 **message_data,
-                'recipient_ids': recipient_ids
-            })
+                'id': str(uuid.uuid4()),
+                'message_type': message_data.get('message_type', 'general'),
+                'priority': message_data.get('priority', 'normal')
+            }
+            recipients_count = await self.dispatcher.queue_message(self.supabase, message, filters, channels)
             
-            if message_id:
-                return {
-                    'success': True,
-                    'message_id': message_id,
-                    'recipients_count': len(recipient_ids),
-                    'recipients': [{'id': emp['id'], 'name': f"{emp.get('first_name', '')} {emp.get('last_name', '')}"} for emp in employees]
-                }
-            else:
-                return {'success': False, 'message': 'Failed to send message'}
+            if not recipients_count:
+                return {'success': False, 'message': 'No employees found matching filters'}
+            
+            self.dispatcher.submit(self.supabase, message)
+            return {
+                'success': True,
+                'message_id': message['id'],
+                'recipients_count': recipients_count,
+                'channels': channels,
+                'status': 'sending'
+            }
                 
         except Exception as e:
             print(f"Error sending bulk message: {str(e)}")
             return {'success': False, 'message': str(e)}
     
+    async def get_bulk_message_summary(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """Get a bulk message with delivery counts by channel and status"""
+        try:
+            query = """
+                SELECT id, sender_id, subject, message_type, priority, status, channels,
+                       recipients_count, sent_at, completed_at
+                FROM employee_messages
+                WHERE id = %s
+            """
+            counts_query = """
+                SELECT channel, status, COUNT(*) AS count
+                FROM employee_message_deliveries
+                WHERE message_id = %s
+                GROUP BY channel, status
+            """
+            messages, counts = await asyncio.gather(
+                self.supabase.execute_query(query, (message_id,)),
+                self.supabase.execute_query(counts_query, (message_id,))
+            )
+            if not messages:
+                return None
+            
+            deliveries: Dict[str, Dict[str, int]] = {}
+            for row in counts:
+                deliveries.setdefault(row['channel'], {})[row['status']] = row['count']
+            return {**messages[0], 'deliveries': deliveries}
+            
+        except Exception as e:
+            print(f"Error getting bulk message summary: {str(e)}")
+            return None
+    
+    async def get_message_deliveries(self, message_id: str, status: Optional[str] = None,
+                                     channel: Optional[str] = None, after: Optional[Tuple[str, str]] = None,
+                                     limit: int = 100) -> List[Dict[str, Any]]:
+        """Get one page of delivery rows ordered by (employee_id, channel), starting after ``after``"""
+        try:
+            query = """
+                SELECT employee_id, channel, recipient_name, status, attempts, error, delivered_at
+                FROM employee_message_deliveries
+                WHERE message_id = %s AND (employee_id, channel) > (%s, %s)
+            """
+            params: List[Any] = [message_id, *(after or ("", ""))]
+            
+            if status:
+                query += " AND status = %s"
+                params.append(status)
+            
+            if channel:
+                query += " AND channel = %s"
+                params.append(channel)
+            
+            query += " ORDER BY employee_id, channel LIMIT %s"
+            params.append(limit)
+            
+            result = await self.supabase.execute_query(query, params)
+            return result or []
+            
+        except Exception as e:
+            print(f"Error getting message deliveries: {str(e)}")
+            return []
+    
     async def get_message_templates(self, template_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get message templates"""
         try:
@@ -0,0 +1,175 @@
+"""
+HR Package Service
+Renders an employee's signed forms in worker processes and merges them into
+one bookmarked PDF, kept in encrypted document storage
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..models import DocumentType
+
+logger = logging.getLogger(__name__)
+
+# (forms_data key, form id, bookmark title), in package order
+PACKAGE_FORMS = (
+    ("i9_data", "i9", "Form I-9 Employment Eligibility Verification"),
+    ("w4_data", "w4", "Form W-4 Employee's Withholding Certificate"),
+    ("health_insurance_data", "health_insurance", "Health Insurance Enrollment"),
+    ("direct_deposit_data", "direct_deposit", "Direct Deposit Authorization"),
+)
+
+# The package holds several forms; OTHER carries the longest of their retention periods
+PACKAGE_DOCUMENT_TYPE = DocumentType.OTHER
+_UNSAFE_PATH_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def render_form(form: str, data: Dict[str, Any]) -> bytes:
+    """Fill one form; runs in a worker process"""
+    from ..pdf_forms import pdf_form_service
+
+    if form == "i9":
+        return pdf_form_service.fill_i9_form(data.get("employee_data", {}), data.get("employer_data", {}))
+    if form == "w4":
+        return pdf_form_service.fill_w4_form(data)
+    if form == "health_insurance":
+        return pdf_form_service.create_health_insurance_form(data)
+    if form == "direct_deposit":
+        return pdf_form_service.create_direct_deposit_form(data)
+    raise ValueError(f"Unknown form: {form}")
+
+
+def merge_forms(parts: List[Tuple[str, bytes]], title: str) -> bytes:
+    """Concatenate rendered forms with one top-level bookmark each; runs in a worker process"""
+    import fitz
+
+    package = fitz.open()
+    toc = []
+    for bookmark, pdf_bytes in parts:
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as form_doc:
+            toc.append([1, bookmark, package.page_count + 1])
+            package.insert_pdf(form_doc)
+    package.set_toc(toc)
+    package.set_metadata({"title": title, "creator": "Hotel Onboarding System"})
+    merged = package.tobytes(garbage=3, deflate=True)
+    package.close()
+    return merged
+
+
+@dataclass
+class HRPackage:
+    """A merged package in document storage"""
+    document_id: str
+    content_hash: str
+    size: int
+    forms: List[str]
+
+
+class HRPackageService:
+    """
+    Builds HR packages off the event loop.
+
+    Filling and merging PDFs is CPU-bound, so each form renders in its own
+    worker process and the merge runs there as well; requests handled by the
+    event loop are not held up while a package renders. Packages contain SSNs
+    and bank details, so they are stored encrypted through DocumentStorageService,
+    with its retention date, and served again by document ID.
+    """
+
+    def __init__(self, document_storage=None, max_workers: Optional[int] = None):
+        self._document_storage = document_storage
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def document_storage(self):
+        if self._document_storage is None:
+            from ..document_storage import document_storage
+            self._document_storage = document_storage
+        return self._document_storage
+
+    @document_storage.setter
+    def document_storage(self, document_storage):
+        self._document_storage = document_storage
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Worker pool, started on the first package"""
+        if self._executor is None:
+            # spawn: forking a process that is running the event loop and its threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def build(
+        self,
+        employee_data: Dict[str, Any],
+        forms_data: Dict[str, Any],
+        uploaded_by: str = "system"
+    ) -> HRPackage:
+        """Render the forms present in ``forms_data`` in parallel, merge and store them"""
+        selected = [(form, title, forms_data[key]) for key, form, title in PACKAGE_FORMS if forms_data.get(key)]
+        if not selected:
+            raise ValueError("No form data provided for the HR package")
+
+        loop = asyncio.get_running_loop()
+        rendered = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, render_form, form, data) for form, _, data in selected
+        ))
+
+        name = f"{employee_data.get('first_name', '')} {employee_data.get('last_name', '')}".strip()
+        merged = await loop.run_in_executor(
+            self.executor, merge_forms,
+            [(title, pdf_bytes) for (_, title, _), pdf_bytes in zip(selected, rendered)],
+            f"HR Package - {name}" if name else "HR Package"
+        )
+
+        forms = [form for form, _, _ in selected]
+        # The employee ID names a storage directory, so it must not carry path separators
+        employee_id = _UNSAFE_PATH_CHARS.sub("_", str(employee_data.get("id") or "unassigned"))
+        stored = await self.document_storage.store_document(
+            merged, "hr-package.pdf", PACKAGE_DOCUMENT_TYPE, employee_id,
+            str(employee_data.get("property_id") or ""), uploaded_by,
+            metadata={"package": "hr", "forms": forms}
+        )
+        logger.info(f"HR package {stored.document_id} built: {len(selected)} forms, {len(merged)} bytes")
+        return HRPackage(stored.document_id, stored.file_hash, stored.file_size, forms)
+
+    def employee_id(self, document_id: str) -> str:
+        """
+        Employee a stored package belongs to; raises FileNotFoundError for
+        unknown IDs and for documents that are not HR packages
+        """
+        path = self.document_storage.locate_document(self._package_id(document_id))
+        if path.parent.parent.name != PACKAGE_DOCUMENT_TYPE.value:
+            raise FileNotFoundError(f"HR package {document_id} not found")
+        return path.parent.name
+
+    def stream(self, document_id: str) -> AsyncIterator[bytes]:
+        """Decrypted package as an async iterator of chunks; raises FileNotFoundError up front"""
+        return self.document_storage.stream_document(self._package_id(document_id))
+
+    @staticmethod
+    def _package_id(document_id: str) -> str:
+        try:
+            return str(uuid.UUID(document_id))
+        except ValueError:
+            raise FileNotFoundError(f"HR package {document_id} not found")
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global instance
+hr_package_service = HRPackageService()
@@ -0,0 +1,306 @@
+"""
+Employee Message Dispatcher
+Fans bulk employee messages out to email and WebSocket with bounded concurrency,
+paging through delivery rows and writing their statuses back a page at a time
+"""
+import asyncio
+import html
+import json
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_CHANNELS = ("in_app", "email", "websocket")
+DEFAULT_MESSAGE_CHANNELS = ["in_app", "websocket"]
+
+# Writes the message row, its inbox rows and its delivery rows (migrations 018 and 024)
+QUEUE_MESSAGE_SQL = """
+    SELECT queue_employee_message(%s, %s::jsonb, %s::text[], %s, %s, %s, %s, %s, %s, %s) AS recipients_count
+"""
+
+# Messages left in 'sending' by a worker that stopped (migration 024)
+CLAIM_STALLED_MESSAGES_SQL = """
+    UPDATE employee_messages
+    SET delivery_lease_until = NOW() + make_interval(secs => %s)
+    WHERE id IN (
+        SELECT id FROM employee_messages
+        WHERE status = 'sending' AND (delivery_lease_until IS NULL OR delivery_lease_until < NOW())
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, sender_id, subject, content, priority
+"""
+
+PENDING_DELIVERIES_SQL = """
+    SELECT employee_id, channel, recipient_user_id, recipient_email, recipient_name
+    FROM employee_message_deliveries
+    WHERE message_id = %s AND status = 'pending' AND (employee_id, channel) > (%s, %s)
+    ORDER BY employee_id, channel
+    LIMIT %s
+"""
+
+UPDATE_DELIVERIES_SQL = """
+    WITH renewed AS (
+        UPDATE employee_messages
+        SET delivery_lease_until = NOW() + make_interval(secs => %s)
+        WHERE id = %s
+    )
+    UPDATE employee_message_deliveries d
+    SET status = u.status,
+        error = u.error,
+        attempts = d.attempts + 1,
+        delivered_at = CASE WHEN u.status = 'delivered' THEN NOW() END
+    FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[]) AS u(employee_id, channel, status, error)
+    WHERE d.message_id = %s AND d.employee_id = u.employee_id AND d.channel = u.channel
+"""
+
+COMPLETE_MESSAGE_SQL = """
+    UPDATE employee_messages m
+    SET status = CASE WHEN EXISTS (
+            SELECT 1 FROM employee_message_deliveries d
+            WHERE d.message_id = m.id AND d.status = 'failed'
+        ) THEN 'partially_sent' ELSE 'sent' END,
+        completed_at = NOW(),
+        delivery_lease_until = NULL
+    WHERE m.id = %s
+"""
+
+PENDING_NOTIFY_CHANNEL = "employee_message_pending"
+
+NOTIFY_PENDING_SQL = "SELECT pg_notify(%s, %s)"
+
+# Pushes still owed to users connected to this worker
+CONNECTED_DELIVERIES_SQL = """
+    SELECT d.message_id, d.employee_id, d.recipient_user_id, m.subject, m.content, m.priority
+    FROM employee_message_deliveries d
+    JOIN employee_messages m ON m.id = d.message_id
+    WHERE d.channel = 'websocket' AND d.status = 'pending'
+      AND d.recipient_user_id = ANY(%s::text[])
+      AND (%s::uuid IS NULL OR d.message_id = %s::uuid)
+      AND m.sent_at > NOW() - make_interval(hours => %s)
+"""
+
+UPDATE_PUSHED_SQL = """
+    UPDATE employee_message_deliveries d
+    SET status = 'delivered', attempts = d.attempts + 1, delivered_at = NOW()
+    FROM unnest(%s::uuid[], %s::text[]) AS u(message_id, employee_id)
+    WHERE d.message_id = u.message_id AND d.employee_id = u.employee_id
+      AND d.channel = 'websocket' AND d.status = 'pending'
+"""
+
+
+class EmployeeMessageDispatcher:
+    """
+    Delivers queued bulk messages outside the request that created them.
+
+    Recipient and in-app inbox rows are written by queue_employee_message();
+    this worker only walks the remaining ``pending`` email/WebSocket delivery
+    rows in keyset pages of ``page_size``. At most ``concurrency`` sends are in
+    flight across all messages, and each page's outcomes are written back with
+    one UPDATE that also renews the message's delivery lease. On start() a
+    worker resumes messages whose lease has run out.
+
+    WebSocket rows are pushed only to users connected to this worker; the rest
+    stay pending. Once a message has been walked it is announced on the
+    employee_message_pending channel so other workers push it to their users,
+    and users who connect later get it from user_connected().
+    """
+
+    def __init__(
+        self,
+        email_service=None,
+        websocket_manager=None,
+        page_size: int = 500,
+        concurrency: int = 50,
+        lease_seconds: int = 300,
+        push_window_hours: int = 24
+    ):
+        self._email_service = email_service
+        self._websocket_manager = websocket_manager
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.push_window_hours = push_window_hours
+        self.supabase_service = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._listener_connection = None
+        self.stats: Dict[str, int] = Counter()
+
+    @property
+    def email_service(self):
+        if self._email_service is None:
+            from ..email_service import email_service
+            self._email_service = email_service
+        return self._email_service
+
+    @property
+    def websocket_manager(self):
+        if self._websocket_manager is None:
+            from ..websocket_manager import websocket_manager
+            self._websocket_manager = websocket_manager
+        return self._websocket_manager
+
+    async def queue_message(self, supabase_service, message: Dict[str, Any],
+                            filters: Dict[str, Any], channels: List[str]) -> int:
+        """Store the message and its recipient rows in one call; returns the recipient count"""
+        filters_json = json.dumps(filters)
+        rows = await supabase_service.execute_query(QUEUE_MESSAGE_SQL, [
+            message["id"], filters_json, channels, message["sender_id"], message["subject"], message["content"],
+            message.get("message_type", "general"), message.get("priority", "normal"), message.get("template_id"),
+            self.lease_seconds
+        ])
+        return rows[0]["recipients_count"] if rows else 0
+
+    def submit(self, supabase_service, message: Dict[str, Any]) -> asyncio.Task:
+        """Start delivering a queued message in the background"""
+        return self._track(self.deliver(supabase_service, message))
+
+    def _track(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def start(self, supabase_service, listen_url: Optional[str] = None) -> int:
+        """
+        Resume messages whose dispatcher stopped and follow other workers' announcements
+
+        Returns the number of messages resumed. ``listen_url`` must be a
+        direct or session-mode connection (see listener_database_url()).
+        """
+        self.supabase_service = supabase_service
+        resumed = await supabase_service.execute_query(CLAIM_STALLED_MESSAGES_SQL, [self.lease_seconds])
+        for message in resumed:
+            self.submit(supabase_service, dict(message))
+        if resumed:
+            logger.info(f"Resuming delivery of {len(resumed)} employee messages")
+        if listen_url and self._listener_connection is None:
+            try:
+                import asyncpg
+                connection = await asyncpg.connect(listen_url)
+                await connection.add_listener(PENDING_NOTIFY_CHANNEL, self._on_notification)
+                self._listener_connection = connection
+            except Exception as e:
+                logger.error(f"Failed to listen for {PENDING_NOTIFY_CHANNEL}: {e}")
+        return len(resumed)
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self._track(self.deliver_to_connected(message_id=payload))
+
+    def user_connected(self, user_id: str) -> Optional[asyncio.Task]:
+        """Push messages still owed to a user who just connected to this worker"""
+        if self.supabase_service is None:
+            return None
+        return self._track(self.deliver_to_connected([user_id]))
+
+    async def deliver_to_connected(self, user_ids: Optional[List[str]] = None,
+                                   message_id: Optional[str] = None) -> int:
+        """Push pending WebSocket rows to users connected here (all of them by default); returns pushes made"""
+        if self.supabase_service is None:
+            return 0
+        user_ids = list(self.websocket_manager.active_connections) if user_ids is None else user_ids
+        if not user_ids:
+            return 0
+        try:
+            rows = await self.supabase_service.execute_query(
+                CONNECTED_DELIVERIES_SQL, [user_ids, message_id, message_id, self.push_window_hours]
+            )
+            sent = await asyncio.gather(*(
+                self._push(row["recipient_user_id"], {**row, "id": row["message_id"]}) for row in rows
+            ))
+            pushed = [row for row, ok in zip(rows, sent) if ok]
+            if pushed:
+                await self.supabase_service.execute_query(UPDATE_PUSHED_SQL, [
+                    [row["message_id"] for row in pushed], [row["employee_id"] for row in pushed]
+                ])
+        except Exception as e:
+            logger.error(f"Pushing pending employee messages failed: {e}")
+            return 0
+        self.stats["delivered"] += len(pushed)
+        return len(pushed)
+
+    async def deliver(self, supabase_service, message: Dict[str, Any]) -> Dict[str, int]:
+        """Send every pending delivery of a message; returns counts by outcome"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        totals: Dict[str, int] = Counter()
+        cursor = ("", "")
+        try:
+            while True:
+                page = await supabase_service.execute_query(
+                    PENDING_DELIVERIES_SQL, [message["id"], cursor[0], cursor[1], self.page_size]
+                )
+                if not page:
+                    break
+                outcomes = await asyncio.gather(*(self._send(message, row) for row in page))
+                done = [(row, outcome) for row, outcome in zip(page, outcomes) if outcome[0] != "pending"]
+                await supabase_service.execute_query(UPDATE_DELIVERIES_SQL, [
+                    self.lease_seconds, message["id"],
+                    [row["employee_id"] for row, _ in done],
+                    [row["channel"] for row, _ in done],
+                    [status for _, (status, _) in done],
+                    [error for _, (_, error) in done],
+                    message["id"]
+                ])
+                totals.update(status for status, _ in outcomes)
+                if len(page) < self.page_size:
+                    break
+                cursor = (page[-1]["employee_id"], page[-1]["channel"])
+            await supabase_service.execute_query(COMPLETE_MESSAGE_SQL, [message["id"]])
+            if totals["pending"]:
+                # Recipients connected to other workers get the push from there
+                await supabase_service.execute_query(NOTIFY_PENDING_SQL, [PENDING_NOTIFY_CHANNEL, message["id"]])
+        except Exception as e:
+            # Rows not yet updated stay pending; deliver() can be run again for this message
+            logger.error(f"Delivery of message {message['id']} stopped: {e}")
+        self.stats.update(totals)
+        return dict(totals)
+
+    async def _send(self, message: Dict[str, Any], row: Dict[str, Any]):
+        """Deliver one row; returns (status, error), where status 'pending' leaves the row as it is"""
+        async with self._semaphore:
+            try:
+                if row["channel"] == "email":
+                    text = message["content"]
+                    body = f"<p>{html.escape(text).replace(chr(10), '<br>')}</p>"
+                    sent = await self.email_service.send_email(row["recipient_email"], message["subject"], body, text)
+                    return ("delivered", None) if sent else ("failed", "email not accepted")
+                if row["channel"] == "websocket":
+                    # The recipient may be connected to another worker, or connect later
+                    sent = await self._push(row["recipient_user_id"], message)
+                    return ("delivered", None) if sent else ("pending", None)
+                return "failed", f"unsupported channel {row['channel']}"
+            except Exception as e:
+                return "failed", str(e)[:500]
+
+    async def _push(self, user_id: str, message: Dict[str, Any]) -> bool:
+        """Send a message to a user connected to this worker"""
+        if user_id not in self.websocket_manager.active_connections:
+            return False
+        return await self.websocket_manager.send_to_user(user_id, {
+            "type": "employee_message",
+            "data": {
+                "message_id": message["id"],
+                "subject": message["subject"],
+                "content": message["content"],
+                "priority": message.get("priority") or "normal",
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        })
+
+    async def stop(self):
+        """Cancel in-flight deliveries and stop listening; their remaining rows stay pending"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        connection, self._listener_connection = self._listener_connection, None
+        if connection is not None:
+            await connection.close()
+
+
+# Global instance
+message_dispatcher = EmployeeMessageDispatcher()
@@ -0,0 +1,183 @@
+"""
+Outbox Dispatcher
+Delivers side effects (emails) recorded in outbox_events by database
+transactions, after those transactions have committed
+"""
+import asyncio
+import json
+import logging
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OutboxHandler = Callable[[Dict[str, Any]], Awaitable[bool]]
+
+
+class OutboxDispatcher:
+    """
+    Polls outbox_events and runs the handler registered for each event type.
+
+    Events are claimed ``batch_size`` at a time with claim_outbox_events(), so
+    several workers can share the table, and written back with
+    complete_outbox_events(); both are RPCs through the Supabase client, so the
+    dispatcher runs without a direct database connection. A handler returning False or raising
+    is retried with exponential backoff until ``max_attempts``, after which the
+    event is marked ``dead``. notify() wakes the loop right after a commit that
+    wrote events, so they do not wait for the next poll.
+    """
+
+    def __init__(
+        self,
+        email_service=None,
+        batch_size: int = 50,
+        poll_interval: float = 5.0,
+        max_attempts: int = 5,
+        concurrency: int = 10
+    ):
+        self._email_service = email_service
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        self.handlers: Dict[str, OutboxHandler] = {
+            "application.approval_email": self._send_approval_email,
+            "onboarding.welcome_email": self._send_welcome_email,
+        }
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = Counter()
+
+    @property
+    def email_service(self):
+        if self._email_service is None:
+            from ..email_service import email_service
+            self._email_service = email_service
+        return self._email_service
+
+    def register(self, event_type: str, handler: OutboxHandler):
+        self.handlers[event_type] = handler
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds before retrying an event that has failed ``attempts`` times"""
+        return float(min(30 * 2 ** (attempts - 1), 3600))
+
+    def start(self, supabase_service):
+        """Start the polling loop"""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run(supabase_service))
+
+    async def stop(self):
+        """Stop polling; claimed events are reclaimed after their lock times out"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def notify(self):
+        """Dispatch newly committed events without waiting for the next poll"""
+        if self._wake:
+            self._wake.set()
+
+    async def _run(self, supabase_service):
+        while True:
+            try:
+                while (await self.dispatch_once(supabase_service))["claimed"] == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def dispatch_once(self, supabase_service) -> Dict[str, int]:
+        """Claim one batch, run its handlers and write the outcomes back in one call"""
+        claimed = await supabase_service._run_sync(
+            supabase_service.client.rpc("claim_outbox_events", {"p_limit": self.batch_size}).execute
+        )
+        events = claimed.data or []
+        counts: Dict[str, int] = Counter(claimed=len(events))
+        if not events:
+            return dict(counts)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(event):
+            async with semaphore:
+                return await self._handle(event)
+
+        errors = await asyncio.gather(*(run(event) for event in events))
+        ids: List[str] = []
+        statuses: List[str] = []
+        retry_in: List[float] = []
+        for event, error in zip(events, errors):
+            if error is None:
+                status, delay = "sent", 0.0
+            elif event["attempts"] >= self.max_attempts:
+                status, delay = "dead", 0.0
+                logger.error(f"Outbox event {event['id']} ({event['event_type']}) gave up: {error}")
+            else:
+                status, delay = "pending", self.retry_delay(event["attempts"])
+            ids.append(event["id"])
+            statuses.append(status)
+            retry_in.append(delay)
+            counts[status] += 1
+
+        await supabase_service._run_sync(supabase_service.client.rpc("complete_outbox_events", {
+            "p_ids": ids, "p_statuses": statuses, "p_errors": errors, "p_retry_in": retry_in
+        }).execute)
+        self.stats.update(counts)
+        return dict(counts)
+
+    async def _handle(self, event: Dict[str, Any]) -> Optional[str]:
+        """Run one event's handler; returns None on success or the error text"""
+        handler = self.handlers.get(event["event_type"])
+        if handler is None:
+            return f"no handler for {event['event_type']}"
+        payload = event["payload"]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        try:
+            return None if await handler(payload) else "handler reported failure"
+        except Exception as e:
+            return str(e)[:500]
+
+    async def _send_approval_email(self, payload: Dict[str, Any]) -> bool:
+        return await self.email_service.send_approval_notification(
+            applicant_email=payload["applicant_email"],
+            applicant_name=payload["applicant_name"],
+            property_name=payload["property_name"],
+            position=payload["position"],
+            job_title=payload["job_title"],
+            start_date=payload["start_date"],
+            pay_rate=payload["pay_rate"],
+            onboarding_link=payload["onboarding_url"],
+            manager_name=payload["manager_name"],
+            manager_email=payload["manager_email"]
+        )
+
+    async def _send_welcome_email(self, payload: Dict[str, Any]) -> bool:
+        start_date = date.fromisoformat(payload["start_date"])
+        return await self.email_service.send_onboarding_welcome_email(
+            to_email=payload["applicant_email"],
+            employee_name=payload["applicant_name"],
+            property_name=payload["property_name"],
+            position=payload["job_title"],
+            start_date=start_date,
+            orientation_date=start_date,
+            orientation_time=payload.get("start_time") or "your scheduled start time",
+            orientation_location=payload["property_name"],
+            onboarding_url=payload["onboarding_url"],
+            expires_at=datetime.fromisoformat(payload["expires_at"]),
+            manager_name=payload["manager_name"]
+        )
+
+
+# Global instance
+outbox_dispatcher = OutboxDispatcher()
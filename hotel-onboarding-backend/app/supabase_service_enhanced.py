@@ -17,13 +17,17 @@ import os
 import json
 import asyncio
 import hashlib
-from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional, Any, Union
+import re
+import time
+from datetime import date, datetime, timezone, timedelta
+from decimal import Decimal
+from typing import List, Dict, Optional, Any, Set, Tuple, Union
 from contextlib import asynccontextmanager
 import logging
-from dataclasses import asdict
+from dataclasses import asdict, dataclass
 import uuid
-from functools import wraps
+from functools import lru_cache, partial, wraps
+from urllib.parse import urlparse
 
 # Supabase and database imports
 from supabase import create_client, Client
@@ -59,6 +63,104 @@ class SupabaseComplianceError(Exception):
     """Custom exception for compliance violations"""
     pass
 
+# Column projections for list views. They leave out the encrypted PII blobs and
+# analytics columns, which no list endpoint renders. APPLICATION_LIST_COLUMNS
+# covers every JobApplication field; EMPLOYEE_LIST_COLUMNS also leaves out
+# employee_number, start_date, emergency_contacts, updated_at and
+# onboarding_completed_at, which come back as their defaults (None or []).
+# Callers that need those pass columns="*".
+APPLICATION_LIST_COLUMNS = (
+    "id, property_id, department, position, applicant_data, status, applied_at, "
+    "reviewed_by, reviewed_at, rejection_reason, talent_pool_date"
+)
+EMPLOYEE_LIST_COLUMNS = (
+    "id, user_id, application_id, property_id, manager_id, department, position, "
+    "hire_date, pay_rate, pay_frequency, employment_type, personal_info, "
+    "employment_status, onboarding_status, created_at"
+)
+
+# Storage buckets (name -> public) created once at startup
+STORAGE_BUCKETS = {
+    "onboarding-documents": False,
+    "generated-pdfs": False,
+    "employee-photos": True,
+}
+
+@dataclass
+class StorageUpload:
+    """One object for store_storage_objects; generated_pdf is the generated_pdfs row for form PDFs"""
+    bucket: str
+    path: str
+    data: bytes
+    content_type: str = "application/octet-stream"
+    generated_pdf: Optional[Dict[str, Any]] = None
+
+def blob_object_path(sha256: str, generation: str) -> str:
+    """Content-addressed object key for a blob; generation is the id of the document that created its row"""
+    return f"blobs/{sha256[:2]}/{sha256}/{generation}"
+
+def parse_db_timestamp(value: Any) -> Optional[datetime]:
+    """Parse a PostgREST timestamp; tolerates a trailing Z and values that are already datetimes"""
+    if not value or isinstance(value, datetime):
+        return value or None
+    if value[-1] == 'Z':
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+def _parse_db_date(value: Any):
+    return datetime.fromisoformat(value).date() if value else None
+
+def application_from_row(row: Dict[str, Any], lean: bool = False) -> JobApplication:
+    """
+    Build a JobApplication from a job_applications row.
+    lean=True skips validation for rows already validated on write; columns
+    left out of a narrow projection come back as None.
+    """
+    fields = {
+        'id': row.get('id'),
+        'property_id': row.get('property_id'),
+        'department': row.get('department'),
+        'position': row.get('position'),
+        'applicant_data': row.get('applicant_data') or {},
+        'status': ApplicationStatus(row['status']) if row.get('status') else None,
+        'applied_at': parse_db_timestamp(row.get('applied_at')),
+        'reviewed_by': row.get('reviewed_by'),
+        'reviewed_at': parse_db_timestamp(row.get('reviewed_at')),
+        'rejection_reason': row.get('rejection_reason'),
+        'talent_pool_date': parse_db_timestamp(row.get('talent_pool_date'))
+    }
+    if lean:
+        return JobApplication.model_construct(**fields)
+    return JobApplication(**fields)
+
+def employee_from_row(row: Dict[str, Any], lean: bool = False) -> Employee:
+    """Build an Employee from an employees row; see application_from_row for lean"""
+    fields = {
+        'id': row.get('id'),
+        'user_id': row.get('user_id'),
+        'employee_number': row.get('employee_number'),
+        'application_id': row.get('application_id'),
+        'property_id': row.get('property_id'),
+        'manager_id': row.get('manager_id'),
+        'department': row.get('department'),
+        'position': row.get('position'),
+        'hire_date': _parse_db_date(row.get('hire_date')),
+        'start_date': _parse_db_date(row.get('start_date')),
+        'pay_rate': row.get('pay_rate', 0.0),
+        'pay_frequency': row.get('pay_frequency') or 'biweekly',
+        'employment_type': row.get('employment_type') or 'full_time',
+        'personal_info': row.get('personal_info') or {},
+        'emergency_contacts': row.get('emergency_contacts') or [],
+        'employment_status': row.get('employment_status') or 'active',
+        'onboarding_status': OnboardingStatus(row.get('onboarding_status') or 'not_started'),
+        'created_at': parse_db_timestamp(row.get('created_at')),
+        'updated_at': parse_db_timestamp(row.get('updated_at')),
+        'onboarding_completed_at': parse_db_timestamp(row.get('onboarding_completed_at'))
+    }
+    if lean:
+        return Employee.model_construct(**fields)
+    return Employee(**fields)
+
 def retry_on_failure(max_retries: int = 3, delay: float = 1.0):
     """Decorator for retrying failed database operations"""
     def decorator(func):
@@ -79,6 +181,83 @@ def retry_on_failure(max_retries: int = 3, delay: float = 1.0):
         return wrapper
     return decorator
 
+# Supavisor's transaction-mode port on pooler.supabase.com (session mode is 5432)
+TRANSACTION_POOLER_PORT = 6543
+
+def is_transaction_pooler_url(database_url: str) -> bool:
+    """
+    Whether a Postgres URL goes through a transaction-mode pooler
+    
+    Each transaction there may run on a different server connection, so
+    prepared statements cannot be reused and LISTEN never receives anything.
+    """
+    parsed = urlparse(database_url)
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    return port == TRANSACTION_POOLER_PORT or "pgbouncer=true" in parsed.query.lower()
+
+def listener_database_url() -> Optional[str]:
+    """
+    URL for LISTEN connections: DATABASE_LISTEN_URL, else DATABASE_URL
+    
+    Returns None, with a warning, when that URL is a transaction-mode pooler;
+    listeners need a direct or session-mode connection.
+    """
+    database_url = os.getenv("DATABASE_LISTEN_URL") or os.getenv("DATABASE_URL")
+    if not database_url:
+        return None
+    if is_transaction_pooler_url(database_url):
+        logger.warning(
+            "DATABASE_URL points at a transaction-mode pooler, where LISTEN receives nothing; "
+            "set DATABASE_LISTEN_URL to a direct or session-mode URL to follow changes from other workers"
+        )
+        return None
+    return database_url
+
+# Tokens a %s placeholder must not be replaced inside: quoted literals and
+# identifiers, comments and dollar-quoted bodies. As with DB-API drivers, %% is
+# a literal percent sign everywhere, including inside LIKE patterns.
+_SQL_PLACEHOLDER_TOKENS = re.compile(
+    r"[eE]'(?:[^'\\]|\\.|'')*'"
+    r"|'(?:[^']|'')*'"
+    r'|"(?:[^"]|"")*"'
+    r"|--[^\n]*"
+    r"|/\*.*?\*/"
+    r"|\$(?P<tag>[A-Za-z_][A-Za-z_0-9]*|)\$.*?\$(?P=tag)\$"
+    r"|%%|%s",
+    re.DOTALL
+)
+
+@lru_cache(maxsize=512)
+def translate_placeholders(query: str) -> Tuple[str, int]:
+    """Rewrite DB-API %s placeholders as asyncpg $n; returns (query, parameter count)"""
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        token = match.group(0)
+        if token == "%s":
+            count += 1
+            return f"${count}"
+        return token.replace("%%", "%")
+
+    return _SQL_PLACEHOLDER_TOKENS.sub(replace, query), count
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value.is_finite() and value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, list):
+        return [_decode_value(item) for item in value]
+    return value
+
+def decode_record(record) -> Dict[str, Any]:
+    """asyncpg Record as a JSON-ready dict: NUMERIC as int/float and UUID as str"""
+    return {key: _decode_value(value) for key, value in record.items()}
+
 import uuid
 from datetime import datetime
 
@@ -116,6 +295,8 @@ class EnhancedSupabaseService:
         
         # Connection pool for direct PostgreSQL access
         self.db_pool = None
+        self._db_pool_lock = asyncio.Lock()
+        self.query_timeout = float(os.getenv("DB_QUERY_TIMEOUT", "15"))
         
         # Performance metrics
         self.query_metrics = {
@@ -124,29 +305,82 @@ class EnhancedSupabaseService:
             "avg_response_time": 0.0
         }
         
+        # Storage: buckets known to exist and content-addressed upload settings
+        self._ensured_buckets: Set[str] = set()
+        self.storage_upload_concurrency = int(os.getenv("STORAGE_UPLOAD_CONCURRENCY", "4"))
+        self.storage_upload_lease_seconds = int(os.getenv("STORAGE_UPLOAD_LEASE_SECONDS", "60"))
+        self.storage_upload_poll_interval = 0.25
+        self.storage_stats = {"objects": 0, "uploads": 0, "deduplicated": 0, "bytes_uploaded": 0, "bytes_deduplicated": 0}
+        
         logger.info("✅ Enhanced Supabase service initialized")
     
     async def initialize_db_pool(self):
         """Initialize direct PostgreSQL connection pool for complex queries"""
-        try:
-            database_url = os.getenv("DATABASE_URL")
-            if database_url:
-                self.db_pool = await asyncpg.create_pool(
-                    database_url,
-                    min_size=5,
-                    max_size=20,
-                    command_timeout=30
-                )
-                logger.info("✅ PostgreSQL connection pool initialized")
-        except Exception as e:
-            logger.error(f"Failed to initialize DB pool: {e}")
+        async with self._db_pool_lock:
+            if self.db_pool is not None:
+                return
+            try:
+                database_url = os.getenv("DATABASE_URL")
+                if database_url:
+                    # Prepared statements are cached per connection by query text, which
+                    # a transaction-mode pooler breaks; DB_STATEMENT_CACHE_SIZE overrides
+                    default_cache_size = "0" if is_transaction_pooler_url(database_url) else "256"
+                    self.db_pool = await asyncpg.create_pool(
+                        database_url,
+                        min_size=5,
+                        max_size=20,
+                        command_timeout=30,
+                        statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", default_cache_size))
+                    )
+                    logger.info("✅ PostgreSQL connection pool initialized")
+            except Exception as e:
+                logger.error(f"Failed to initialize DB pool: {e}")
     
     async def close_db_pool(self):
         """Close the database connection pool"""
         if self.db_pool:
-            await self.db_pool.close()
+            pool, self.db_pool = self.db_pool, None
+            await pool.close()
             logger.info("Database connection pool closed")
     
+    async def execute_query(self, query: str, params: Optional[Union[List[Any], Tuple[Any, ...]]] = None,
+                            timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Run one SQL statement on the asyncpg pool and return its rows as dicts
+        
+        Accepts DB-API style %s placeholders, translated once per distinct query
+        to $n, so repeated calls reuse the connection's prepared statement.
+        Raises SupabaseConnectionError when DATABASE_URL is not configured and
+        asyncio.TimeoutError when the statement takes longer than ``timeout``
+        seconds (DB_QUERY_TIMEOUT by default).
+        """
+        sql, expected = translate_placeholders(query)
+        args = tuple(params or ())
+        if len(args) != expected:
+            raise ValueError(f"Query expects {expected} parameters, got {len(args)}")
+        
+        if self.db_pool is None:
+            await self.initialize_db_pool()
+            if self.db_pool is None:
+                raise SupabaseConnectionError("DATABASE_URL must be set for direct SQL queries")
+        
+        timeout = self.query_timeout if timeout is None else timeout
+        start_time = time.perf_counter()
+        self.query_metrics["total_queries"] += 1
+        try:
+            async with self.db_pool.acquire(timeout=timeout) as connection:
+                records = await connection.fetch(sql, *args, timeout=timeout)
+        except Exception as e:
+            self.query_metrics["failed_queries"] += 1
+            logger.error(f"SQL query failed: {e}")
+            raise
+        
+        execution_time = time.perf_counter() - start_time
+        self.query_metrics["avg_response_time"] += (
+            (execution_time - self.query_metrics["avg_response_time"]) / self.query_metrics["total_queries"]
+        )
+        return [decode_record(record) for record in records]
+    
     async def health_check(self) -> Dict[str, Any]:
         """Check Supabase connection health"""
         try:
@@ -1048,7 +1282,27 @@ class EnhancedSupabaseService:
         except Exception as e:
             logger.error(f"Failed to get manager properties for {manager_id}: {e}")
             return []
-    
+
+    async def get_property_manager_assignments(self) -> List[Dict[str, str]]:
+        """Get every manager_id/property_id assignment pair"""
+        try:
+            result = self.client.table("property_managers").select("manager_id, property_id").execute()
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to get property manager assignments: {e}")
+            return []
+
+    def get_record_property_ids(self, table: str, record_ids: List[str], chunk_size: int = 200) -> Dict[str, str]:
+        """Map record id -> property_id for rows of a property-scoped table, fetching only those two columns"""
+        property_ids = {}
+        for start in range(0, len(record_ids), chunk_size):
+            chunk = record_ids[start:start + chunk_size]
+            result = self.client.table(table).select("id, property_id").in_("id", chunk).execute()
+            for row in result.data or []:
+                if row.get("property_id"):
+                    property_ids[row["id"]] = row["property_id"]
+        return property_ids
+
     async def create_property(self, property_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new property using standard client with RLS policies"""
         try:
@@ -1121,6 +1375,28 @@ class EnhancedSupabaseService:
             logger.error(f"Failed to get applications by email {email} and property {property_id}: {e}")
             return []
     
+    async def create_application(self, application: JobApplication) -> JobApplication:
+        """Insert a submitted job application"""
+        try:
+            # Off the event loop: this runs on the public apply path under burst load
+            result = await self._run_sync(self.client.table("job_applications").insert({
+                "id": str(application.id),
+                "property_id": str(application.property_id),
+                "department": application.department,
+                "position": application.position,
+                "applicant_data": application.applicant_data,
+                "status": application.status.value,
+                "applied_at": application.applied_at.isoformat()
+            }).execute)
+            
+            if not result.data:
+                raise SupabaseConnectionError("Application insert returned no data")
+            return application
+            
+        except Exception as e:
+            logger.error(f"Failed to create application {application.id}: {e}")
+            raise
+    
     # Synchronous wrapper methods for compatibility
     def get_user_by_email_sync(self, email: str) -> Optional[User]:
         """Synchronous wrapper for get_user_by_email"""
@@ -1355,22 +1631,11 @@ class EnhancedSupabaseService:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return []
 
-    async def get_all_applications(self) -> List[JobApplication]:
-        """Get all applications"""
+    async def get_all_applications(self, columns: str = APPLICATION_LIST_COLUMNS, lean: bool = False) -> List[JobApplication]:
+        """Get all applications, reading only the given columns"""
         try:
-            response = self.client.table('job_applications').select('*').execute()
-            applications = []
-            for row in response.data:
-                applications.append(JobApplication(
-                    id=row['id'],
-                    property_id=row['property_id'],
-                    department=row['department'],
-                    position=row['position'],
-                    applicant_data=row['applicant_data'],
-                    status=ApplicationStatus(row['status']),
-                    applied_at=datetime.fromisoformat(row['applied_at'].replace('Z', '+00:00'))
-                ))
-            return applications
+            response = self.client.table('job_applications').select(columns).execute()
+            return [application_from_row(row, lean) for row in response.data]
         except Exception as e:
             logger.error(f"Error getting all applications: {e}")
             return []
@@ -1378,59 +1643,30 @@ class EnhancedSupabaseService:
     async def get_application_by_id(self, application_id: str) -> Optional[JobApplication]:
         """Get a single application by ID"""
         try:
-            response = self.client.table('job_applications').select('*').eq('id', application_id).execute()
+            response = self.client.table('job_applications').select(APPLICATION_LIST_COLUMNS).eq('id', application_id).execute()
             if response.data:
-                row = response.data[0]
-                return JobApplication(
-                    id=row['id'],
-                    property_id=row['property_id'],
-                    department=row['department'],
-                    position=row['position'],
-                    applicant_data=row['applicant_data'],
-                    status=ApplicationStatus(row['status']),
-                    applied_at=datetime.fromisoformat(row['applied_at'].replace('Z', '+00:00'))
-                )
+                return application_from_row(response.data[0])
             return None
         except Exception as e:
             logger.error(f"Error getting application by ID {application_id}: {e}")
             return None
 
-    async def get_applications_by_properties(self, property_ids: List[str]) -> List[JobApplication]:
+    async def get_applications_by_properties(self, property_ids: List[str], columns: str = APPLICATION_LIST_COLUMNS,
+                                             lean: bool = False) -> List[JobApplication]:
         """Get applications for multiple properties"""
         try:
-            response = self.client.table('job_applications').select('*').in_('property_id', property_ids).execute()
-            applications = []
-            for row in response.data:
-                applications.append(JobApplication(
-                    id=row['id'],
-                    property_id=row['property_id'],
-                    department=row['department'],
-                    position=row['position'],
-                    applicant_data=row['applicant_data'],
-                    status=ApplicationStatus(row['status']),
-                    applied_at=datetime.fromisoformat(row['applied_at'].replace('Z', '+00:00'))
-                ))
-            return applications
+            response = self.client.table('job_applications').select(columns).in_('property_id', property_ids).execute()
+            return [application_from_row(row, lean) for row in response.data]
         except Exception as e:
             logger.error(f"Error getting applications by properties: {e}")
             return []
 
-    async def get_applications_by_property(self, property_id: str) -> List[JobApplication]:
+    async def get_applications_by_property(self, property_id: str, columns: str = APPLICATION_LIST_COLUMNS,
+                                           lean: bool = False) -> List[JobApplication]:
         """Get applications for a single property"""
         try:
-            response = self.client.table('job_applications').select('*').eq('property_id', property_id).execute()
-            applications = []
-            for row in response.data:
-                applications.append(JobApplication(
-                    id=row['id'],
-                    property_id=row['property_id'],
-                    department=row['department'],
-                    position=row['position'],
-                    applicant_data=row['applicant_data'],
-                    status=ApplicationStatus(row['status']),
-                    applied_at=datetime.fromisoformat(row['applied_at'].replace('Z', '+00:00'))
-                ))
-            return applications
+            response = self.client.table('job_applications').select(columns).eq('property_id', property_id).execute()
+            return [application_from_row(row, lean) for row in response.data]
         except Exception as e:
             logger.error(f"Error getting applications by property {property_id}: {e}")
             return []
@@ -1438,87 +1674,40 @@ class EnhancedSupabaseService:
     async def get_employee_by_id(self, employee_id: str) -> Optional[Employee]:
         """Get employee by ID"""
         try:
+            # Detail view: the full row, including the fields list projections leave out
             response = self.client.table('employees').select('*').eq('id', employee_id).execute()
             if response.data:
-                row = response.data[0]
-                return Employee(
-                    id=row['id'],
-                    property_id=row['property_id'],
-                    department=row['department'],
-                    position=row['position'],
-                    hire_date=datetime.fromisoformat(row['hire_date']).date() if row.get('hire_date') else None,
-                    pay_rate=row.get('pay_rate', 0.0),
-                    employment_type=row.get('employment_type', 'full_time'),
-                    employment_status=row.get('employment_status', 'active'),
-                    onboarding_status=OnboardingStatus(row.get('onboarding_status', 'not_started'))
-                )
+                return employee_from_row(response.data[0])
             return None
         except Exception as e:
             logger.error(f"Error getting employee by ID: {e}")
             return None
 
-    async def get_all_employees(self) -> List[Employee]:
-        """Get all employees"""
+    async def get_all_employees(self, columns: str = EMPLOYEE_LIST_COLUMNS, lean: bool = False) -> List[Employee]:
+        """Get all employees, reading only the given columns"""
         try:
-            response = self.client.table('employees').select('*').execute()
-            employees = []
-            for row in response.data:
-                employees.append(Employee(
-                    id=row['id'],
-                    property_id=row['property_id'],
-                    department=row['department'],
-                    position=row['position'],
-                    hire_date=datetime.fromisoformat(row['hire_date']).date() if row.get('hire_date') else None,
-                    pay_rate=row.get('pay_rate', 0.0),
-                    employment_type=row.get('employment_type', 'full_time'),
-                    employment_status=row.get('employment_status', 'active'),
-                    onboarding_status=OnboardingStatus(row.get('onboarding_status', 'not_started'))
-                ))
-            return employees
+            response = self.client.table('employees').select(columns).execute()
+            return [employee_from_row(row, lean) for row in response.data]
         except Exception as e:
             logger.error(f"Error getting all employees: {e}")
             return []
 
-    async def get_employees_by_property(self, property_id: str) -> List[Employee]:
+    async def get_employees_by_property(self, property_id: str, columns: str = EMPLOYEE_LIST_COLUMNS,
+                                        lean: bool = False) -> List[Employee]:
         """Get employees by property"""
         try:
-            response = self.client.table('employees').select('*').eq('property_id', property_id).execute()
-            employees = []
-            for row in response.data:
-                employees.append(Employee(
-                    id=row['id'],
-                    property_id=row['property_id'],
-                    department=row['department'],
-                    position=row['position'],
-                    hire_date=datetime.fromisoformat(row['hire_date']).date() if row.get('hire_date') else None,
-                    pay_rate=row.get('pay_rate', 0.0),
-                    employment_type=row.get('employment_type', 'full_time'),
-                    employment_status=row.get('employment_status', 'active'),
-                    onboarding_status=OnboardingStatus(row.get('onboarding_status', 'not_started'))
-                ))
-            return employees
+            response = self.client.table('employees').select(columns).eq('property_id', property_id).execute()
+            return [employee_from_row(row, lean) for row in response.data]
         except Exception as e:
             logger.error(f"Error getting employees by property: {e}")
             return []
 
-    async def get_employees_by_properties(self, property_ids: List[str]) -> List[Employee]:
+    async def get_employees_by_properties(self, property_ids: List[str], columns: str = EMPLOYEE_LIST_COLUMNS,
+                                          lean: bool = False) -> List[Employee]:
         """Get employees for multiple properties"""
         try:
-            response = self.client.table('employees').select('*').in_('property_id', property_ids).execute()
-            employees = []
-            for row in response.data:
-                employees.append(Employee(
-                    id=row['id'],
-                    property_id=row['property_id'],
-                    department=row['department'],
-                    position=row['position'],
-                    hire_date=datetime.fromisoformat(row['hire_date']).date() if row.get('hire_date') else None,
-                    pay_rate=row.get('pay_rate', 0.0),
-                    employment_type=row.get('employment_type', 'full_time'),
-                    employment_status=row.get('employment_status', 'active'),
-                    onboarding_status=OnboardingStatus(row.get('onboarding_status', 'not_started'))
-                ))
-            return employees
+            response = self.client.table('employees').select(columns).in_('property_id', property_ids).execute()
+            return [employee_from_row(row, lean) for row in response.data]
         except Exception as e:
             logger.error(f"Error getting employees by properties: {e}")
             return []
@@ -1733,10 +1922,68 @@ class EnhancedSupabaseService:
             logger.error(f"Failed to check duplicate application: {e}")
             return False
     
+    async def match_talent_pool(self, property_ids: Optional[List[str]] = None,
+                                department: Optional[str] = None, position: Optional[str] = None,
+                                employment_type: Optional[str] = None, shift_preference: Optional[str] = None,
+                                available_by: Optional[date] = None, min_experience: Optional[int] = None,
+                                search: Optional[str] = None, limit: Optional[int] = None,
+                                offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Ranked talent-pool candidates from match_talent_pool(); returns (candidates, total)"""
+        result = await self._run_sync(self.client.rpc("match_talent_pool", {
+            "p_property_ids": property_ids,
+            "p_department": department,
+            "p_position": position,
+            "p_employment_type": employment_type,
+            "p_shift_preference": shift_preference,
+            "p_available_by": available_by.isoformat() if available_by else None,
+            "p_min_experience": min_experience,
+            "p_search": search or None,
+            "p_limit": limit,
+            "p_offset": offset
+        }).execute)
+        rows = result.data or []
+        # A page past the end is one row carrying only the total
+        candidates = [{**row["candidate"], "match_score": row["score"]} for row in rows if row["candidate"]]
+        return candidates, (rows[0]["total_count"] if rows else 0)
+    
     # ==========================================
     # MANAGER MANAGEMENT METHODS (Phase 1.3)
     # ==========================================
     
+    async def list_hr_managers(self, property_id: Optional[str] = None, is_active: Optional[bool] = None,
+                               include_inactive: bool = False, search: Optional[str] = None,
+                               sort: str = "created_at", descending: bool = False,
+                               limit: Optional[int] = None, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of managers with their properties from list_hr_managers(); returns (managers, total)"""
+        result = await self._run_sync(self.client.rpc("list_hr_managers", {
+            "p_property_id": property_id,
+            "p_is_active": is_active,
+            "p_include_inactive": include_inactive,
+            "p_search": search or None,
+            "p_sort": sort,
+            "p_descending": descending,
+            "p_limit": limit,
+            "p_offset": offset
+        }).execute)
+        rows = result.data or []
+        # A page past the end is one row carrying only the total
+        return [row["manager"] for row in rows if row["manager"]], (rows[0]["total_count"] if rows else 0)
+    
+    async def list_hr_properties(self, search: Optional[str] = None, is_active: Optional[bool] = None,
+                                 sort: str = "created_at", descending: bool = False,
+                                 limit: Optional[int] = None, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of properties with manager ids and counts from list_hr_properties(); returns (properties, total)"""
+        result = await self._run_sync(self.client.rpc("list_hr_properties", {
+            "p_search": search or None,
+            "p_is_active": is_active,
+            "p_sort": sort,
+            "p_descending": descending,
+            "p_limit": limit,
+            "p_offset": offset
+        }).execute)
+        rows = result.data or []
+        return [row["property"] for row in rows if row["property"]], (rows[0]["total_count"] if rows else 0)
+    
     async def get_manager_by_id(self, manager_id: str) -> Optional[User]:
         """Get manager details by ID"""
         try:
@@ -1821,72 +2068,90 @@ class EnhancedSupabaseService:
             logger.error(f"Failed to reset manager password {manager_id}: {e}")
             return False
     
-    async def get_manager_performance(self, manager_id: str) -> Dict[str, Any]:
-        """Get manager performance metrics"""
+    async def get_manager_hiring_metrics(self, manager_ids: Optional[List[str]] = None,
+                                         property_ids: Optional[List[str]] = None,
+                                         since: Optional[datetime] = None,
+                                         until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Funnel counts and decision latency per manager and property from manager_hiring_metrics()
+        
+        Each manager gets one row per assigned property plus a total row with property_id None.
+        """
         try:
-            # Get manager properties
-            properties = await self.get_manager_properties(manager_id)
-            property_ids = [prop.id for prop in properties]
-            
-            if not property_ids:
-                return {
-                    "manager_id": manager_id,
-                    "properties_count": 0,
-                    "applications_count": 0,
-                    "approvals_count": 0,
-                    "approval_rate": 0,  # Add missing approval_rate field
-                    "average_response_time_days": 0,
-                    "properties": []
-                }
-            
-            # Get applications for manager's properties
-            applications = await self.get_applications_by_properties(property_ids)
-            
-            # Get approvals by this manager
-            approvals_result = self.client.table("job_applications").select("*").eq(
-                "reviewed_by", manager_id
-            ).in_("property_id", property_ids).execute()
-            
-            approvals_count = len(approvals_result.data)
-            
-            # Calculate average response time
-            total_response_time = 0
-            response_count = 0
-            
-            for app_data in approvals_result.data:
-                if app_data.get("reviewed_at") and app_data.get("applied_at"):
-                    applied_at = datetime.fromisoformat(app_data["applied_at"].replace('Z', '+00:00'))
-                    reviewed_at = datetime.fromisoformat(app_data["reviewed_at"].replace('Z', '+00:00'))
-                    response_time = (reviewed_at - applied_at).days
-                    total_response_time += response_time
-                    response_count += 1
-            
-            avg_response_time = total_response_time / response_count if response_count > 0 else 0
-            
-            # Calculate approval rate
-            approval_rate = (approvals_count / len(applications)) * 100 if len(applications) > 0 else 0
-            
-            return {
-                "manager_id": manager_id,
-                "properties_count": len(properties),
-                "applications_count": len(applications),
-                "approvals_count": approvals_count,
-                "approval_rate": round(approval_rate, 2),  # Add missing approval_rate field
-                "average_response_time_days": round(avg_response_time, 2),
-                "properties": [{"id": prop.id, "name": prop.name} for prop in properties]
-            }
-            
+            result = await self._run_sync(self.client.rpc("manager_hiring_metrics", {
+                "p_manager_ids": manager_ids,
+                "p_property_ids": property_ids,
+                "p_since": since.isoformat() if since else None,
+                "p_until": until.isoformat() if until else None
+            }).execute)
+            return result.data or []
         except Exception as e:
-            logger.error(f"Failed to get manager performance {manager_id}: {e}")
-            return {
-                "manager_id": manager_id,
-                "properties_count": 0,
-                "applications_count": 0,
-                "approvals_count": 0,
-                "approval_rate": 0,  # Add missing approval_rate field
-                "average_response_time_days": 0,
-                "properties": []
-            }
+            logger.error(f"Failed to get manager hiring metrics: {e}")
+            return []
+    
+    async def get_property_hiring_funnel(self, property_ids: Optional[List[str]] = None,
+                                         since: Optional[datetime] = None,
+                                         until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Funnel counts and decision latency per property from property_hiring_funnel()"""
+        try:
+            result = await self._run_sync(self.client.rpc("property_hiring_funnel", {
+                "p_property_ids": property_ids,
+                "p_since": since.isoformat() if since else None,
+                "p_until": until.isoformat() if until else None
+            }).execute)
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to get property hiring funnel: {e}")
+            return []
+    
+    async def get_manager_performance(self, manager_id: str, since: Optional[datetime] = None,
+                                      until: Optional[datetime] = None) -> Dict[str, Any]:
+        """Get manager performance metrics, aggregated in the database"""
+        performance = {
+            "manager_id": manager_id,
+            "properties_count": 0,
+            "applications_count": 0,
+            "decisions_count": 0,
+            "approvals_count": 0,
+            "approval_rate": 0,
+            "average_response_time_days": 0,
+            "median_decision_hours": None,
+            "p90_decision_hours": None,
+            "funnel": {"pending": 0, "approved": 0, "rejected": 0, "talent_pool": 0, "withdrawn": 0},
+            "properties": []
+        }
+        
+        rows = await self.get_manager_hiring_metrics([manager_id], since=since, until=until)
+        total = next((row for row in rows if row.get("property_id") is None), None)
+        if total is None:
+            return performance
+        
+        def hours(value):
+            return float(value) if value is not None else None
+        
+        performance.update({
+            "properties_count": len(rows) - 1,
+            "applications_count": total["applications"],
+            "decisions_count": total["decisions"],
+            "approvals_count": total["approvals"],
+            "approval_rate": float(total["approval_rate"] or 0),
+            "average_response_time_days": round((hours(total["avg_decision_hours"]) or 0) / 24, 2),
+            "median_decision_hours": hours(total["median_decision_hours"]),
+            "p90_decision_hours": hours(total["p90_decision_hours"]),
+            "funnel": {status: total[status] for status in performance["funnel"]},
+            "properties": [
+                {
+                    "id": row["property_id"],
+                    "name": row["property_name"],
+                    "applications_count": row["applications"],
+                    "decisions_count": row["decisions"],
+                    "approval_rate": float(row["approval_rate"] or 0),
+                    "median_decision_hours": hours(row["median_decision_hours"]),
+                    "p90_decision_hours": hours(row["p90_decision_hours"])
+                }
+                for row in rows if row.get("property_id") is not None
+            ]
+        })
+        return performance
     
     async def get_unassigned_managers(self) -> List[User]:
         """Get managers not assigned to any property"""
@@ -1923,30 +2188,30 @@ class EnhancedSupabaseService:
     
     def save_onboarding_form_data(self, token: str, employee_id: str, step_id: str, form_data: Dict[str, Any]) -> bool:
         """Save or update onboarding form data for a specific step"""
+        return self.upsert_onboarding_form_data_batch([{
+            "token": token,
+            "employee_id": employee_id,
+            "step_id": step_id,
+            "form_data": form_data
+        }])
+    
+    def upsert_onboarding_form_data_batch(self, rows: List[Dict[str, Any]]) -> bool:
+        """Insert or update form data for many (token, step_id) rows in one statement"""
+        if not rows:
+            return True
         try:
-            # Check if data already exists for this token and step
-            existing = self.client.table("onboarding_form_data").select("id").eq("token", token).eq("step_id", step_id).execute()
-            
-            if existing.data:
-                # Update existing record
-                result = self.client.table("onboarding_form_data").update({
-                    "form_data": form_data,
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }).eq("token", token).eq("step_id", step_id).execute()
-            else:
-                # Insert new record
-                result = self.client.table("onboarding_form_data").insert({
-                    "token": token,
-                    "employee_id": employee_id,
-                    "step_id": step_id,
-                    "form_data": form_data
-                }).execute()
+            now = datetime.now(timezone.utc).isoformat()
+            payload = [{**row, "updated_at": now} for row in rows]
+            # Single round trip: INSERT ... ON CONFLICT (token, step_id) DO UPDATE
+            result = self.client.table("onboarding_form_data").upsert(
+                payload, on_conflict="token,step_id"
+            ).execute()
             
             return bool(result.data)
         except Exception as e:
             logger.error(f"Failed to save onboarding form data: {e}")
-            logger.error(f"Token: {token}, Employee: {employee_id}, Step: {step_id}")
-            logger.error(f"Error details: {str(e)}")
+            for row in rows:
+                logger.error(f"Token: {row.get('token')}, Employee: {row.get('employee_id')}, Step: {row.get('step_id')}")
             return False
     
     def get_onboarding_form_data(self, token: str, step_id: str = None) -> Dict[str, Any]:
@@ -2011,131 +2276,314 @@ class EnhancedSupabaseService:
     # DOCUMENT STORAGE METHODS (Supabase Storage)
     # ==========================================
     
+    async def _run_sync(self, func, *args, **kwargs):
+        """Run a blocking supabase-py call on the default executor"""
+        return await asyncio.get_running_loop().run_in_executor(None, partial(func, *args, **kwargs))
+    
+    async def ensure_storage_buckets(self, buckets: Optional[Dict[str, bool]] = None) -> Set[str]:
+        """Create any missing buckets with a single list call; uploads then skip the check"""
+        buckets = STORAGE_BUCKETS if buckets is None else buckets
+        existing = {
+            getattr(bucket, "name", None) or bucket["name"]
+            for bucket in await self._run_sync(self.client.storage.list_buckets)
+        }
+        for bucket_name, public in buckets.items():
+            if bucket_name not in existing:
+                await self._run_sync(self.client.storage.create_bucket, bucket_name, options={"public": public})
+                logger.info(f"Created storage bucket: {bucket_name}")
+            self._ensured_buckets.add(bucket_name)
+        return set(self._ensured_buckets)
+    
     async def create_storage_bucket(self, bucket_name: str, public: bool = False) -> bool:
         """Create a storage bucket in Supabase"""
         try:
-            # Check if bucket already exists
-            existing_buckets = self.client.storage.list_buckets()
-            if any(bucket['name'] == bucket_name for bucket in existing_buckets):
-                logger.info(f"Bucket {bucket_name} already exists")
-                return True
-            
-            # Create new bucket
-            response = self.client.storage.create_bucket(
-                bucket_name,
-                {'public': public}
-            )
-            logger.info(f"Created storage bucket: {bucket_name}")
+            await self.ensure_storage_buckets({bucket_name: public})
             return True
         except Exception as e:
             logger.error(f"Failed to create storage bucket {bucket_name}: {e}")
             return False
     
+    async def _ensure_bucket(self, bucket_name: str):
+        # Only reached for buckets startup did not cover
+        if bucket_name not in self._ensured_buckets:
+            await self.create_storage_bucket(bucket_name, STORAGE_BUCKETS.get(bucket_name, False))
+    
+    async def store_storage_objects(self, uploads: List[StorageUpload]) -> List[Dict[str, Any]]:
+        """
+        Store several objects with content-addressed dedup
+        
+        Blobs live under blobs/<sha256>/ in each bucket and are reference
+        counted in storage_blobs. One register_storage_uploads call bumps the
+        counts and writes every documents/generated_pdfs row; only content the
+        bucket has not seen before is uploaded, concurrently. Content another
+        request is still uploading is waited for, and taken over if its lease
+        runs out, so nothing is returned before its blob exists. If an upload
+        fails the whole batch is released again.
+        """
+        if not uploads:
+            return []
+        for bucket_name in {upload.bucket for upload in uploads}:
+            await self._ensure_bucket(bucket_name)
+        
+        digests = await self._run_sync(lambda: [hashlib.sha256(upload.data).hexdigest() for upload in uploads])
+        uploaded_at = datetime.now(timezone.utc).isoformat()
+        results, items = [], []
+        for upload, digest in zip(uploads, digests):
+            document_id = str(uuid.uuid4())
+            object_path = blob_object_path(digest, document_id)
+            metadata = {
+                "id": document_id,
+                "bucket": upload.bucket,
+                "path": upload.path,
+                "size": len(upload.data),
+                "content_type": upload.content_type,
+                "public_url": self.client.storage.from_(upload.bucket).get_public_url(object_path),
+                "uploaded_at": uploaded_at,
+                "sha256": digest,
+                "object_path": object_path
+            }
+            item = {"document": metadata}
+            if upload.generated_pdf is not None:
+                item["generated_pdf"] = {
+                    **upload.generated_pdf,
+                    "storage_path": upload.path,
+                    "storage_url": metadata["public_url"]
+                }
+            results.append(metadata)
+            items.append(item)
+        
+        response = await self._run_sync(
+            self.client.rpc("register_storage_uploads", {
+                "p_items": items, "p_lease_seconds": self.storage_upload_lease_seconds
+            }).execute
+        )
+        registered = {str(row["item_id"]): row for row in response.data or []}
+        
+        # (bucket, sha256) -> (object path, upload) for blobs this call uploads or waits for
+        to_upload: Dict[Tuple[str, str], Tuple[str, StorageUpload]] = {}
+        pending: Dict[Tuple[str, str], Tuple[str, StorageUpload]] = {}
+        for upload, metadata in zip(uploads, results):
+            row = registered[metadata["id"]]
+            if row["item_object_path"] != metadata["object_path"]:
+                # Existing blob: the row and URL point at its path
+                metadata["object_path"] = row["item_object_path"]
+                metadata["public_url"] = self.client.storage.from_(upload.bucket).get_public_url(metadata["object_path"])
+            key = (upload.bucket, metadata["sha256"])
+            if row["needs_upload"]:
+                to_upload.setdefault(key, (metadata["object_path"], upload))
+            elif row["upload_state"] == "pending":
+                pending.setdefault(key, (metadata["object_path"], upload))
+        for key in to_upload:
+            pending.pop(key, None)
+        
+        try:
+            await self._upload_blobs(to_upload)
+            if pending:
+                taken_over = await self._await_pending_blobs(pending)
+                to_upload.update(taken_over)
+                await self._upload_blobs(taken_over)
+        except Exception:
+            paths_by_bucket: Dict[str, List[str]] = {}
+            for upload in uploads:
+                paths_by_bucket.setdefault(upload.bucket, []).append(upload.path)
+            for bucket_name, paths in paths_by_bucket.items():
+                await self._release_storage_paths(bucket_name, paths)
+            # Anyone else waiting on these blobs can take them over straight away
+            for bucket_name, digests_in_bucket in self._group_blob_keys(to_upload).items():
+                await self._run_sync(
+                    self.client.rpc("abandon_storage_uploads", {"p_bucket": bucket_name, "p_sha256": digests_in_bucket}).execute
+                )
+            raise
+        
+        uploaded_bytes = sum(len(upload.data) for _, upload in to_upload.values())
+        total_bytes = sum(metadata["size"] for metadata in results)
+        self.storage_stats["objects"] += len(results)
+        self.storage_stats["uploads"] += len(to_upload)
+        self.storage_stats["deduplicated"] += len(results) - len(to_upload)
+        self.storage_stats["bytes_uploaded"] += uploaded_bytes
+        self.storage_stats["bytes_deduplicated"] += total_bytes - uploaded_bytes
+        logger.info(f"Stored {len(results)} objects ({len(to_upload)} new blobs)")
+        return results
+    
+    @staticmethod
+    def _group_blob_keys(blobs) -> Dict[str, List[str]]:
+        """Group (bucket, sha256) keys by bucket"""
+        grouped: Dict[str, List[str]] = {}
+        for bucket_name, digest in blobs:
+            grouped.setdefault(bucket_name, []).append(digest)
+        return grouped
+    
+    async def _upload_blobs(self, blobs: Dict[Tuple[str, str], Tuple[str, StorageUpload]]):
+        """Upload blobs this worker owns concurrently, then mark them uploaded in storage_blobs"""
+        if not blobs:
+            return
+        semaphore = asyncio.Semaphore(self.storage_upload_concurrency)
+        
+        async def put(bucket_name: str, object_path: str, upload: StorageUpload):
+            async with semaphore:
+                await self._run_sync(
+                    self.client.storage.from_(bucket_name).upload,
+                    object_path,
+                    upload.data,
+                    file_options={"content-type": upload.content_type, "upsert": "true"}
+                )
+        
+        outcomes = await asyncio.gather(
+            *[put(key[0], object_path, upload) for key, (object_path, upload) in blobs.items()],
+            return_exceptions=True
+        )
+        errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if errors:
+            raise errors[0]
+        for bucket_name, digests in self._group_blob_keys(blobs).items():
+            await self._run_sync(
+                self.client.rpc("mark_storage_blobs_uploaded", {"p_bucket": bucket_name, "p_sha256": digests}).execute
+            )
+    
+    async def _await_pending_blobs(self, pending: Dict[Tuple[str, str], Tuple[str, StorageUpload]]
+                                   ) -> Dict[Tuple[str, str], Tuple[str, StorageUpload]]:
+        """
+        Wait for blobs another request is uploading
+        
+        Returns the ones whose owner's lease ran out before they were uploaded;
+        they have been claimed for this call and must be uploaded by it.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 2 * self.storage_upload_lease_seconds
+        remaining = dict(pending)
+        taken_over: Dict[Tuple[str, str], Tuple[str, StorageUpload]] = {}
+        owner = str(uuid.uuid4())
+        while True:
+            for bucket_name, digests in self._group_blob_keys(remaining).items():
+                rows = await self._run_sync(
+                    self.client.table("storage_blobs").select("sha256, upload_state")
+                    .eq("bucket", bucket_name).in_("sha256", digests).execute
+                )
+                for row in rows.data or []:
+                    if row["upload_state"] == "uploaded":
+                        remaining.pop((bucket_name, row["sha256"]), None)
+                still_pending = [digest for digest in digests if (bucket_name, digest) in remaining]
+                if not still_pending:
+                    continue
+                claimed = await self._run_sync(
+                    self.client.rpc("claim_storage_uploads", {
+                        "p_bucket": bucket_name, "p_sha256": still_pending,
+                        "p_owner": owner, "p_lease_seconds": self.storage_upload_lease_seconds
+                    }).execute
+                )
+                for row in claimed.data or []:
+                    key = (bucket_name, row["item_sha256"])
+                    taken_over[key] = remaining.pop(key)
+            if not remaining:
+                return taken_over
+            if loop.time() >= deadline:
+                raise SupabaseConnectionError(f"Timed out waiting for {len(remaining)} blob uploads")
+            await asyncio.sleep(self.storage_upload_poll_interval)
+    
+    async def _release_storage_paths(self, bucket_name: str, paths: List[str],
+                                      also_remove: Tuple[str, ...] = ()) -> List[str]:
+        """Drop documents rows for paths and delete blobs no other document references"""
+        response = await self._run_sync(
+            self.client.rpc("release_storage_documents", {"p_bucket": bucket_name, "p_paths": paths}).execute
+        )
+        orphaned = [row["orphan_path"] for row in response.data or []]
+        to_remove = orphaned + [path for path in also_remove if path not in orphaned]
+        if to_remove:
+            await self._run_sync(self.client.storage.from_(bucket_name).remove, to_remove)
+        return orphaned
+    
     async def upload_document_to_storage(self, bucket_name: str, file_path: str, file_data: bytes, 
                                         content_type: str = 'application/octet-stream') -> Dict[str, Any]:
         """Upload document to Supabase storage"""
         try:
-            # Ensure bucket exists
-            await self.create_storage_bucket(bucket_name)
-            
-            # Upload file
-            response = self.client.storage.from_(bucket_name).upload(
-                file_path,
-                file_data,
-                file_options={
-                    "content-type": content_type,
-                    "upsert": True  # Overwrite if exists
-                }
-            )
-            
-            # Get public URL
-            public_url = self.client.storage.from_(bucket_name).get_public_url(file_path)
-            
-            # Store metadata in database
-            metadata = {
-                "id": str(uuid.uuid4()),
-                "bucket": bucket_name,
-                "path": file_path,
-                "size": len(file_data),
-                "content_type": content_type,
-                "public_url": public_url,
-                "uploaded_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            # Store metadata in documents table
-            self.client.table("documents").insert(metadata).execute()
-            
+            results = await self.store_storage_objects([
+                StorageUpload(bucket=bucket_name, path=file_path, data=file_data, content_type=content_type)
+            ])
             logger.info(f"Document uploaded to storage: {bucket_name}/{file_path}")
-            return metadata
+            return results[0]
             
         except Exception as e:
             logger.error(f"Failed to upload document: {e}")
             raise
     
-    async def upload_employee_document(self, employee_id: str, document_type: str, 
-                                      file_data: bytes, file_name: str, 
-                                      content_type: str = 'application/pdf') -> Dict[str, Any]:
-        """Upload employee document to Supabase storage"""
+    async def upload_employee_documents(self, employee_id: str,
+                                        documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Upload several employee documents in one batch (e.g. I-9 List B and List C)
+        
+        Each entry has document_type, file_data, file_name and optionally content_type.
+        """
         try:
             # Create file path: employee_id/document_type/timestamp_filename
             timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
-            file_path = f"{employee_id}/{document_type}/{timestamp}_{file_name}"
-            
-            # Upload to onboarding-documents bucket
-            result = await self.upload_document_to_storage(
-                bucket_name="onboarding-documents",
-                file_path=file_path,
-                file_data=file_data,
-                content_type=content_type
-            )
+            uploads = [
+                StorageUpload(
+                    bucket="onboarding-documents",
+                    path=f"{employee_id}/{doc['document_type']}/{timestamp}_{doc['file_name']}",
+                    data=doc["file_data"],
+                    content_type=doc.get("content_type", "application/pdf")
+                )
+                for doc in documents
+            ]
+            results = await self.store_storage_objects(uploads)
             
             # Add employee reference
-            result["employee_id"] = employee_id
-            result["document_type"] = document_type
-            result["original_filename"] = file_name
+            for result, doc in zip(results, documents):
+                result["employee_id"] = employee_id
+                result["document_type"] = doc["document_type"]
+                result["original_filename"] = doc["file_name"]
             
-            return result
+            return results
             
         except Exception as e:
-            logger.error(f"Failed to upload employee document: {e}")
+            logger.error(f"Failed to upload employee documents: {e}")
             raise
     
+    async def upload_employee_document(self, employee_id: str, document_type: str, 
+                                      file_data: bytes, file_name: str, 
+                                      content_type: str = 'application/pdf') -> Dict[str, Any]:
+        """Upload employee document to Supabase storage"""
+        results = await self.upload_employee_documents(employee_id, [{
+            "document_type": document_type,
+            "file_data": file_data,
+            "file_name": file_name,
+            "content_type": content_type
+        }])
+        return results[0]
+    
     async def upload_generated_pdf(self, employee_id: str, form_type: str, 
                                   pdf_data: bytes, signed: bool = False) -> Dict[str, Any]:
         """Upload generated PDF to Supabase storage"""
         try:
             # Create file path: employee_id/form_type/timestamp_form.pdf
-            timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
+            generated_at = datetime.now(timezone.utc)
+            timestamp = generated_at.strftime('%Y%m%d_%H%M%S')
             status = "signed" if signed else "draft"
             file_name = f"{form_type}_{status}_{timestamp}.pdf"
             file_path = f"{employee_id}/{form_type}/{file_name}"
             
-            # Upload to generated-pdfs bucket
-            result = await self.upload_document_to_storage(
-                bucket_name="generated-pdfs",
-                file_path=file_path,
-                file_data=pdf_data,
-                content_type="application/pdf"
-            )
+            # Regenerated PDFs with identical bytes reuse the stored blob; the
+            # generated_pdfs row is written in the same call as the documents row
+            results = await self.store_storage_objects([StorageUpload(
+                bucket="generated-pdfs",
+                path=file_path,
+                data=pdf_data,
+                content_type="application/pdf",
+                generated_pdf={
+                    "id": str(uuid.uuid4()),
+                    "employee_id": employee_id,
+                    "form_type": form_type,
+                    "is_signed": signed,
+                    "generated_at": generated_at.isoformat()
+                }
+            )])
+            result = results[0]
             
             # Add metadata
             result["employee_id"] = employee_id
             result["form_type"] = form_type
             result["is_signed"] = signed
-            result["generated_at"] = datetime.now(timezone.utc).isoformat()
-            
-            # Store PDF metadata in database
-            pdf_metadata = {
-                "id": str(uuid.uuid4()),
-                "employee_id": employee_id,
-                "form_type": form_type,
-                "storage_path": file_path,
-                "storage_url": result["public_url"],
-                "is_signed": signed,
-                "generated_at": result["generated_at"]
-            }
-            
-            self.client.table("generated_pdfs").insert(pdf_metadata).execute()
+            result["generated_at"] = generated_at.isoformat()
             
             logger.info(f"Generated PDF uploaded: {form_type} for employee {employee_id}")
             return result
@@ -2147,7 +2595,13 @@ class EnhancedSupabaseService:
     async def get_document_from_storage(self, bucket_name: str, file_path: str) -> bytes:
         """Download document from Supabase storage"""
         try:
-            response = self.client.storage.from_(bucket_name).download(file_path)
+            # Deduplicated documents point at a shared blob; older rows stored the object at their path
+            row = await self._run_sync(
+                self.client.table("documents").select("object_path")
+                .eq("bucket", bucket_name).eq("path", file_path).limit(1).execute
+            )
+            object_path = (row.data[0].get("object_path") if row.data else None) or file_path
+            response = await self._run_sync(self.client.storage.from_(bucket_name).download, object_path)
             logger.info(f"Document downloaded from storage: {bucket_name}/{file_path}")
             return response
         except Exception as e:
@@ -2157,10 +2611,8 @@ class EnhancedSupabaseService:
     async def delete_document_from_storage(self, bucket_name: str, file_path: str) -> bool:
         """Delete document from Supabase storage"""
         try:
-            response = self.client.storage.from_(bucket_name).remove([file_path])
-            
-            # Also delete metadata from database
-            self.client.table("documents").delete().eq("path", file_path).execute()
+            # Documents stored before dedup keep their object at the logical path
+            await self._release_storage_paths(bucket_name, [file_path], also_remove=(file_path,))
             
             logger.info(f"Document deleted from storage: {bucket_name}/{file_path}")
             return True
@@ -2209,14 +2661,8 @@ class EnhancedSupabaseService:
     async def initialize_storage_buckets(self) -> bool:
         """Initialize required storage buckets"""
         try:
-            # Create onboarding-documents bucket for uploaded documents
-            await self.create_storage_bucket("onboarding-documents", public=False)
-            
-            # Create generated-pdfs bucket for system-generated PDFs
-            await self.create_storage_bucket("generated-pdfs", public=False)
-            
-            # Create employee-photos bucket for profile photos
-            await self.create_storage_bucket("employee-photos", public=True)
+            # onboarding-documents (uploads), generated-pdfs (system PDFs), employee-photos (public)
+            await self.ensure_storage_buckets()
             
             logger.info("Storage buckets initialized successfully")
             return True
@@ -2229,10 +2675,12 @@ class EnhancedSupabaseService:
     # EMPLOYEE SEARCH & MANAGEMENT METHODS (Phase 1.4)
     # ==========================================
     
-    async def search_employees(self, search_query: str, property_id: str = None, department: str = None, position: str = None, employment_status: str = None) -> List[Employee]:
+    async def search_employees(self, search_query: str, property_id: str = None, department: str = None, position: str = None,
+                               employment_status: str = None, columns: str = EMPLOYEE_LIST_COLUMNS,
+                               lean: bool = False) -> List[Employee]:
         """Search employees with filters"""
         try:
-            query = self.client.table("employees").select("*")
+            query = self.client.table("employees").select(columns)
             
             # Apply search query if provided
             if search_query:
@@ -2252,23 +2700,7 @@ class EnhancedSupabaseService:
             
             result = query.order("created_at", desc=True).execute()
             
-            employees = []
-            for emp_data in result.data:
-                employees.append(Employee(
-                    id=emp_data["id"],
-                    application_id=emp_data["application_id"],
-                    property_id=emp_data["property_id"],
-                    manager_id=emp_data["manager_id"],
-                    department=emp_data["department"],
-                    position=emp_data["position"],
-                    hire_date=datetime.fromisoformat(emp_data["hire_date"]).date() if emp_data.get("hire_date") else None,
-                    pay_rate=emp_data["pay_rate"],
-                    pay_frequency=emp_data["pay_frequency"],
-                    employment_type=emp_data["employment_type"],
-                    personal_info=emp_data["personal_info"],
-                    onboarding_status=OnboardingStatus(emp_data["onboarding_status"]),
-                    created_at=datetime.fromisoformat(emp_data["created_at"].replace('Z', '+00:00'))
-                ))
+            employees = [employee_from_row(emp_data, lean) for emp_data in result.data]
             
             return employees
             
@@ -2433,6 +2865,230 @@ class EnhancedSupabaseService:
             logger.error(f"Failed to create audit entry: {e}")
             return False
     
+    # ==========================================
+    # COMPLIANCE TRACKING METHODS
+    # ==========================================
+    
+    async def _select_all_pages(self, query_factory, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """Read every row of a query, page by page past PostgREST's row limit"""
+        rows = []
+        while True:
+            result = await self._run_sync(query_factory().range(len(rows), len(rows) + page_size - 1).execute)
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+    
+    async def get_open_compliance_deadlines(self) -> List[Dict[str, Any]]:
+        """Get every unmet compliance deadline (served by the partial open-deadline index)"""
+        try:
+            return await self._select_all_pages(
+                lambda: self.client.table("compliance_deadlines").select("*").eq("is_met", False).order("deadline_date")
+            )
+        except Exception as e:
+            logger.error(f"Failed to get open compliance deadlines: {e}")
+            return []
+    
+    async def get_compliance_deadline(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Get one compliance deadline by document id"""
+        try:
+            result = await self._run_sync(
+                self.client.table("compliance_deadlines").select("*").eq("document_id", document_id).limit(1).execute
+            )
+            return result.data[0] if result.data else None
+        except Exception as e:
+            logger.error(f"Failed to get compliance deadline {document_id}: {e}")
+            return None
+    
+    async def get_unresolved_compliance_violations(self) -> List[Dict[str, Any]]:
+        """Get every unresolved compliance violation"""
+        try:
+            return await self._select_all_pages(
+                lambda: self.client.table("compliance_violations").select("*").is_("resolved_at", "null").order("detected_at")
+            )
+        except Exception as e:
+            logger.error(f"Failed to get unresolved compliance violations: {e}")
+            return []
+    
+    async def get_resolved_compliance_violation_ids(self) -> List[str]:
+        """Get the ids of every resolved compliance violation"""
+        try:
+            rows = await self._select_all_pages(
+                lambda: self.client.table("compliance_violations").select("violation_id")
+                .not_.is_("resolved_at", "null").order("violation_id")
+            )
+            return [row["violation_id"] for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to get resolved compliance violation ids: {e}")
+            return []
+    
+    async def get_compliance_property_counts(self) -> List[Dict[str, Any]]:
+        """Per-property deadline and violation totals from compliance_property_counts()"""
+        try:
+            result = await self._run_sync(self.client.rpc("compliance_property_counts", {}).execute)
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to get compliance counts: {e}")
+            return []
+    
+    async def upsert_compliance_deadlines(self, rows: List[Dict[str, Any]]) -> bool:
+        """Insert or update compliance deadlines keyed by document_id"""
+        try:
+            await self._run_sync(
+                self.client.table("compliance_deadlines").upsert(rows, on_conflict="document_id").execute
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save {len(rows)} compliance deadlines: {e}")
+            return False
+    
+    async def insert_compliance_violations(self, rows: List[Dict[str, Any]]) -> bool:
+        """Insert compliance violations, leaving any that already exist untouched (ON CONFLICT DO NOTHING)"""
+        try:
+            await self._run_sync(
+                self.client.table("compliance_violations")
+                .upsert(rows, on_conflict="violation_id", ignore_duplicates=True).execute
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to insert {len(rows)} compliance violations: {e}")
+            return False
+    
+    async def upsert_compliance_violations(self, rows: List[Dict[str, Any]]) -> bool:
+        """Insert or update compliance violations keyed by violation_id"""
+        try:
+            await self._run_sync(
+                self.client.table("compliance_violations").upsert(rows, on_conflict="violation_id").execute
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save {len(rows)} compliance violations: {e}")
+            return False
+    
+    # ==========================================
+    # DOCUMENT RETENTION METHODS
+    # ==========================================
+    
+    async def upsert_retention_records(self, rows: List[Dict[str, Any]]) -> bool:
+        """Insert or update retention records keyed by document_id"""
+        try:
+            await self._run_sync(
+                self.client.table("document_retention_records").upsert(rows, on_conflict="document_id").execute
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save {len(rows)} retention records: {e}")
+            return False
+    
+    async def get_retention_record(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Get the retention record for a document"""
+        try:
+            result = await self._run_sync(
+                self.client.table("document_retention_records").select("*").eq("document_id", document_id).limit(1).execute
+            )
+            return result.data[0] if result.data else None
+        except Exception as e:
+            logger.error(f"Failed to get retention record for {document_id}: {e}")
+            return None
+    
+    async def update_retention_records(self, document_ids: List[str], fields: Dict[str, Any],
+                                       statuses: Optional[List[str]] = None,
+                                       legal_hold: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Update retention records in one statement, optionally only those in the given statuses; returns updated rows"""
+        try:
+            query = self.client.table("document_retention_records").update(fields).in_("document_id", document_ids)
+            if statuses is not None:
+                query = query.in_("retention_status", statuses)
+            if legal_hold is not None:
+                query = query.eq("legal_hold", legal_hold)
+            result = await self._run_sync(query.execute)
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to update {len(document_ids)} retention records: {e}")
+            return []
+    
+    async def apply_retention_termination(self, employee_id: str, termination_date: date,
+                                          today: date, expiring_days: int) -> List[Dict[str, Any]]:
+        """Re-date an employee's I-9 retention records; returns the rows that changed"""
+        try:
+            result = await self._run_sync(self.client.rpc("apply_retention_termination", {
+                "p_employee_id": employee_id,
+                "p_termination_date": termination_date.isoformat(),
+                "p_today": today.isoformat(),
+                "p_expiring_days": expiring_days
+            }).execute)
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to apply termination retention for employee {employee_id}: {e}")
+            return []
+    
+    async def sweep_document_retention(self, today: date, expiring_days: int, batch_size: int) -> Dict[str, int]:
+        """Run one batch of retention status transitions"""
+        result = await self._run_sync(self.client.rpc("sweep_document_retention", {
+            "p_today": today.isoformat(),
+            "p_expiring_days": expiring_days,
+            "p_batch_size": batch_size
+        }).execute)
+        row = (result.data or [{}])[0]
+        return {"expired": row.get("expired", 0), "expiring_soon": row.get("expiring_soon", 0)}
+    
+    async def get_retention_destruction_candidates(self, after: Optional[Tuple[str, str]] = None,
+                                                   limit: int = 500) -> List[Dict[str, Any]]:
+        """One keyset page of expired, unheld records ordered by (retention_end_date, record_id)"""
+        try:
+            query = (self.client.table("document_retention_records").select("*")
+                     .eq("retention_status", "expired").eq("legal_hold", False))
+            if after is not None:
+                end_date, record_id = after
+                query = query.or_(
+                    f"retention_end_date.gt.{end_date},"
+                    f"and(retention_end_date.eq.{end_date},record_id.gt.{record_id})"
+                )
+            result = await self._run_sync(
+                query.order("retention_end_date").order("record_id").limit(limit).execute
+            )
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to get retention destruction candidates: {e}")
+            return []
+    
+    async def get_retention_counts(self) -> List[Dict[str, Any]]:
+        """Pre-aggregated retention counts by document type and status"""
+        try:
+            result = await self._run_sync(
+                self.client.table("document_retention_counts").select("document_type, retention_status, document_count").execute
+            )
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to get retention counts: {e}")
+            return []
+    
+    async def get_expiring_retention_records(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Records expiring soon, soonest first"""
+        try:
+            result = await self._run_sync(
+                self.client.table("document_retention_records")
+                .select("document_id, document_type, employee_name, retention_end_date")
+                .eq("retention_status", "expiring_soon").order("retention_end_date").limit(limit).execute
+            )
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to get expiring retention records: {e}")
+            return []
+    
+    async def get_retention_report(self, start_date: date, end_date: date, today: date) -> Dict[str, Any]:
+        """Aggregates for the retention report from retention_report()"""
+        try:
+            result = await self._run_sync(self.client.rpc("retention_report", {
+                "p_start": start_date.isoformat(),
+                "p_end": end_date.isoformat(),
+                "p_today": today.isoformat()
+            }).execute)
+            return (result.data or [{}])[0]
+        except Exception as e:
+            logger.error(f"Failed to build retention report: {e}")
+            return {}
+    
     # ==========================================
     # SCHEDULER SUPPORT METHODS
     # ==========================================
@@ -11,6 +11,7 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, De
 from fastapi.responses import JSONResponse
 
 from .websocket_manager import websocket_manager, ConnectionInfo, BroadcastEvent
+from .services.message_dispatcher import message_dispatcher
 from .models import UserRole
 from .auth import decode_token
 from .response_utils import success_response, error_response, ErrorCode
@@ -76,6 +77,8 @@ async def websocket_dashboard_endpoint(
         
         # Connect to WebSocket manager
         await websocket_manager.connect(connection_info)
+        # Employee messages sent while the user was offline or connected to another worker
+        message_dispatcher.user_connected(user_id)
         
         logger.info(f"Dashboard WebSocket connected: user={user_id}, role={role}")
         
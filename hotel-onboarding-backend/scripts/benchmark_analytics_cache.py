@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the AnalyticsCache memory tier at 100k entries
+
+Measures set/get/evict throughput and prefix invalidation cost of MemoryTier,
+and optionally the sort-based eviction it replaced.
+
+Usage:
+    python scripts/benchmark_analytics_cache.py [--entries 100000] [--compare-legacy]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.analytics_cache import MemoryTier
+
+
+def timed(label: str, operations: int, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    per_op_us = elapsed / max(operations, 1) * 1_000_000
+    print(f"  {label:<38} {elapsed * 1000:10.1f} ms  {per_op_us:8.2f} µs/op")
+    return result
+
+
+def make_value(i: int):
+    return {"property_id": f"prop-{i % 300}", "count": i, "rate": i / 7.0}
+
+
+def bench_memory_tier(entries: int):
+    print(f"MemoryTier ({entries:,} entries)")
+    keys = [f"analytics:metrics:property:prop-{i % 300}:metric-{i}" for i in range(entries)]
+    tier = MemoryTier(max_items=entries, max_bytes=1 << 40)
+
+    timed("set (fill)", entries, lambda: [tier.set(k, make_value(i), ttl=300) for i, k in enumerate(keys)])
+    timed("get (hit)", entries, lambda: [tier.get(k) for k in keys])
+
+    # Every further insert evicts the LRU head
+    churn = [f"analytics:metrics:churn:{i}" for i in range(entries)]
+    timed("set at capacity (1 eviction each)", entries, lambda: [tier.set(k, i, ttl=300) for i, k in enumerate(churn)])
+
+    tier.clear()
+    for i, k in enumerate(keys):
+        tier.set(k, make_value(i), ttl=300)
+    removed = timed("invalidate prefix (1 property)", 1, lambda: tier.invalidate_pattern("analytics:metrics:property:prop-7:*"))
+    print(f"  -> removed {removed} entries, {len(tier):,} remain, {tier.total_bytes / 1e6:.1f} MB tracked")
+
+
+def bench_legacy_eviction(entries: int):
+    """The previous algorithm: sort every entry by last access, evict 25%"""
+    print(f"Legacy sort-based eviction ({entries:,} entries)")
+    cache = {f"k{i}": (i, time.time()) for i in range(entries)}
+
+    def evict():
+        ordered = sorted(cache.items(), key=lambda item: item[1][1])
+        for key, _ in ordered[: entries // 4]:
+            del cache[key]
+
+    timed("single eviction pass", 1, evict)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--compare-legacy", action="store_true")
+    args = parser.parse_args()
+
+    bench_memory_tier(args.entries)
+    if args.compare_legacy:
+        bench_legacy_eviction(args.entries)
+
+
+if __name__ == "__main__":
+    main()
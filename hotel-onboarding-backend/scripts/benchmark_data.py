@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic data for the offline benchmarks
+
+Fills a StandInClient with properties, HR users, managers and their property
+assignments, job applications, employees and onboarding sessions at a chosen
+scale. The same seed always produces the same rows, so runs are comparable.
+
+Usage:
+    python scripts/benchmark_data.py [--scale realistic]   # print row counts
+"""
+
+import argparse
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from supabase_standin import StandInClient
+
+# properties, managers per property, applications, employees
+SCALES = {
+    "small": (5, 1, 500, 150),
+    "realistic": (60, 2, 25_000, 6_000),
+    "large": (250, 3, 150_000, 40_000),
+}
+
+POSITIONS = {
+    "Front Office": ["Front Desk Agent", "Night Auditor", "Concierge"],
+    "Housekeeping": ["Room Attendant", "Laundry Attendant", "Houseperson"],
+    "Food & Beverage": ["Server", "Line Cook", "Dishwasher", "Bartender"],
+    "Maintenance": ["Maintenance Technician", "Groundskeeper"],
+}
+APPLICATION_STATUSES = ["pending"] * 9 + ["approved"] * 3 + ["rejected"] * 4 + ["talent_pool"] * 4
+ONBOARDING_STATUSES = ["not_started", "in_progress", "in_progress", "employee_completed",
+                       "manager_review", "approved", "approved", "approved"]
+FIRST_NAMES = ["Maria", "James", "Ana", "Michael", "Luis", "Jennifer", "Carlos", "Linda", "David", "Rosa",
+               "Kevin", "Sofia", "Brian", "Elena", "Marcus", "Grace", "Daniel", "Priya", "Omar", "Chloe"]
+LAST_NAMES = ["Garcia", "Smith", "Nguyen", "Johnson", "Martinez", "Brown", "Lopez", "Davis", "Patel", "Wilson",
+              "Hernandez", "Clark", "Kim", "Lewis", "Rivera", "Walker", "Chen", "Young", "Flores", "Hall"]
+CITIES = [("Austin", "TX", "78701"), ("Orlando", "FL", "32801"), ("Denver", "CO", "80202"),
+          ("Nashville", "TN", "37203"), ("Phoenix", "AZ", "85004"), ("Savannah", "GA", "31401")]
+
+# Columns the service filters on, indexed like the real tables
+INDEXES = {
+    "users": [("role", "is_active")],
+    "properties": [("is_active",)],
+    "property_managers": [("manager_id",), ("property_id",)],
+    "job_applications": [("property_id",), ("status",)],
+    "employees": [("property_id",), ("employment_status",), ("onboarding_status",)],
+    "onboarding_sessions": [("token",), ("employee_id",)],
+}
+
+
+@dataclass
+class SeededData:
+    """Ids the benchmark suites address"""
+    hr_user_ids: List[str]
+    manager_properties: Dict[str, List[str]]
+    property_ids: List[str]
+    employee_ids: List[str]
+    session_tokens: List[str]
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat()
+
+
+def _person(rng: random.Random, n: int) -> Dict[str, str]:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {"first_name": first, "last_name": last, "email": f"{first}.{last}{n}@example.com".lower()}
+
+
+def seed(client: StandInClient, scale: str = "realistic", seed: int = 2025) -> SeededData:
+    """Load one scale of synthetic data into ``client``"""
+    property_count, managers_per_property, application_count, employee_count = SCALES[scale]
+    rng = random.Random(seed)
+    now = datetime(2025, 8, 1, tzinfo=timezone.utc)
+
+    def ids() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    properties = []
+    for i in range(property_count):
+        city, state, zip_code = CITIES[i % len(CITIES)]
+        properties.append({
+            "id": ids(), "name": f"{city} Suites #{i + 1}", "address": f"{100 + i} Main St",
+            "city": city, "state": state, "zip_code": zip_code, "phone": f"555-01{i % 100:02d}",
+            "is_active": i % 20 != 19, "created_at": _iso(now - timedelta(days=900 - i)),
+        })
+    property_ids = [prop["id"] for prop in properties]
+
+    users, assignments, manager_properties = [], [], {}
+    for i in range(3):
+        users.append({"id": ids(), "role": "hr", "is_active": True, "property_id": None,
+                      "created_at": _iso(now - timedelta(days=1000)), **_person(rng, i)})
+    for i, property_id in enumerate(property_ids):
+        for j in range(managers_per_property):
+            manager = {"id": ids(), "role": "manager", "is_active": True, "property_id": property_id,
+                       "created_at": _iso(now - timedelta(days=800 - i)), **_person(rng, 1000 + i * 10 + j)}
+            users.append(manager)
+            # Every fifth manager also covers the next property
+            covered = [property_id] + ([property_ids[(i + 1) % property_count]] if j == 0 and i % 5 == 0 else [])
+            manager_properties[manager["id"]] = covered
+            assignments.extend({"id": ids(), "manager_id": manager["id"], "property_id": pid,
+                                "assigned_at": manager["created_at"]} for pid in covered)
+
+    applications = []
+    for i in range(application_count):
+        department = rng.choice(list(POSITIONS))
+        status = rng.choice(APPLICATION_STATUSES)
+        applied_at = now - timedelta(minutes=rng.randrange(365 * 24 * 60))
+        reviewed = status != "pending"
+        city, state, zip_code = rng.choice(CITIES)
+        applications.append({
+            "id": ids(), "property_id": rng.choice(property_ids), "department": department,
+            "position": rng.choice(POSITIONS[department]), "status": status, "applied_at": _iso(applied_at),
+            "applicant_data": {
+                **_person(rng, i), "phone": f"555-{rng.randrange(10**7):07d}",
+                "address": f"{rng.randrange(1, 9999)} Elm St", "city": city, "state": state, "zip_code": zip_code,
+                "work_authorized": "yes",
+                "experience_years": rng.choice(["0-1", "2-5", "6-10", "10+"]),
+                "hotel_experience": rng.choice(["yes", "no"]),
+                "employment_type": rng.choice(["full_time", "part_time"]),
+                "shift_preference": rng.choice(["morning", "afternoon", "night", "flexible"]),
+                "start_date": (applied_at + timedelta(days=rng.randrange(7, 45))).date().isoformat(),
+            },
+            "reviewed_by": None, "reviewed_at": _iso(applied_at + timedelta(days=2)) if reviewed else None,
+            "rejection_reason": "Position filled" if status in ("rejected", "talent_pool") else None,
+            "talent_pool_date": _iso(applied_at + timedelta(days=2)) if status == "talent_pool" else None,
+            "created_at": _iso(applied_at), "updated_at": _iso(applied_at),
+        })
+
+    managers_by_property = {}
+    for manager_id, covered in manager_properties.items():
+        managers_by_property.setdefault(covered[0], manager_id)
+    employees, sessions, session_tokens = [], [], []
+    for i in range(employee_count):
+        application = applications[i % len(applications)]
+        department = application["department"]
+        hired_at = now - timedelta(days=rng.randrange(1, 700))
+        onboarding_status = rng.choice(ONBOARDING_STATUSES)
+        employee = {
+            "id": ids(), "user_id": ids(), "application_id": application["id"],
+            "property_id": application["property_id"], "manager_id": managers_by_property[application["property_id"]],
+            "department": department, "position": application["position"],
+            "hire_date": hired_at.date().isoformat(), "pay_rate": round(rng.uniform(14, 32), 2),
+            "pay_frequency": "biweekly", "employment_type": application["applicant_data"]["employment_type"],
+            "personal_info": {key: application["applicant_data"][key] for key in ("first_name", "last_name", "email")},
+            "employment_status": "active" if rng.random() < 0.85 else "terminated",
+            "onboarding_status": onboarding_status, "created_at": _iso(hired_at),
+        }
+        employees.append(employee)
+        if onboarding_status in ("not_started", "in_progress", "employee_completed", "manager_review"):
+            token = f"tok_{rng.getrandbits(192):048x}"
+            sessions.append({
+                "id": ids(), "employee_id": employee["id"], "application_id": employee["application_id"],
+                "property_id": employee["property_id"], "manager_id": employee["manager_id"], "token": token,
+                "status": onboarding_status, "current_step": "personal_info", "phase": "employee",
+                "expires_at": _iso(now + timedelta(days=3650)), "created_at": _iso(hired_at),
+                "updated_at": _iso(hired_at),
+            })
+            session_tokens.append(token)
+
+    tables = {
+        "properties": properties, "users": users, "property_managers": assignments,
+        "job_applications": applications, "employees": employees, "onboarding_sessions": sessions,
+    }
+    for table, rows in tables.items():
+        client.load(table, rows)
+        for columns in INDEXES.get(table, ()):
+            client.create_index(table, *columns)
+
+    return SeededData(
+        hr_user_ids=[user["id"] for user in users if user["role"] == "hr"],
+        manager_properties=manager_properties,
+        property_ids=property_ids,
+        employee_ids=[employee["id"] for employee in employees],
+        session_tokens=session_tokens,
+        counts={table: len(rows) for table, rows in tables.items()},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="realistic")
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args()
+
+    data = seed(StandInClient(), args.scale, args.seed)
+    for table, count in data.counts.items():
+        print(f"{table:<20} {count:>9,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suites for the hot endpoints
+
+Runs the real FastAPI app in-process against StandInClient (an SQLite-backed
+stand-in for the Supabase client, see supabase_standin.py) seeded with
+synthetic data (benchmark_data.py), so no server, network or Supabase project
+is needed. Each suite reports latency percentiles and database round trips
+per request; the stand-in's injected latency is paid on every round trip, so
+a change that adds queries shows up in both columns.
+
+    hr_dashboard_stats       GET /hr/dashboard-stats as HR
+    hr_applications          GET /hr/applications as HR (every property)
+    manager_applications     GET /manager/applications as a manager
+    onboarding_bootstrap     welcome-page reads for an onboarding token
+    hr_package_pdf           POST /api/forms/package/hr (two generated forms)
+
+By default the response cache is cleared before every request (--warm keeps
+it), so the database path is what gets measured. --json writes the results;
+--baseline compares against an earlier --json file and exits with status 1
+when a suite's p95 grows by more than --max-regression or its round trips
+increase.
+
+Usage:
+    python scripts/benchmark_endpoints.py [--scale realistic] [--latency-ms 2] [--iterations 100]
+    python scripts/benchmark_endpoints.py --json before.json
+    python scripts/benchmark_endpoints.py --baseline before.json --max-regression 0.15
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# The app reads these at import time
+os.environ.setdefault("SUPABASE_URL", "http://standin.local")
+os.environ.setdefault("SUPABASE_ANON_KEY", "offline-benchmark")
+os.environ.setdefault("JWT_SECRET_KEY", "offline-benchmark-signing-secret-0001")
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+
+import httpx
+import jwt
+from fastapi import Depends
+
+from benchmark_data import SCALES, SeededData, seed
+from supabase_standin import StandInClient
+
+
+class BenchmarkError(Exception):
+    """A suite request did not succeed"""
+
+
+@dataclass
+class BenchContext:
+    http: httpx.AsyncClient
+    client: StandInClient
+    data: SeededData
+    app_module: object
+    hr_headers: Dict[str, str]
+    manager_headers: "itertools.cycle"
+    session_tokens: "itertools.cycle"
+
+
+@dataclass
+class SuiteResult:
+    name: str
+    iterations: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    round_trips: float
+    round_trips_by_kind: Dict[str, float] = field(default_factory=dict)
+
+
+SuiteFunc = Callable[[BenchContext], Awaitable[None]]
+SUITES: Dict[str, SuiteFunc] = {}
+
+
+def suite(name: str):
+    def register(func: SuiteFunc) -> SuiteFunc:
+        SUITES[name] = func
+        return func
+    return register
+
+
+def _token(payload: Dict[str, str]) -> Dict[str, str]:
+    payload = {**payload, "exp": datetime.now(timezone.utc) + timedelta(hours=12)}
+    return {"Authorization": f"Bearer {jwt.encode(payload, os.environ['JWT_SECRET_KEY'], algorithm='HS256')}"}
+
+
+async def _get(ctx: BenchContext, url: str, headers: Dict[str, str]):
+    response = await ctx.http.get(url, headers=headers)
+    if response.status_code != 200:
+        raise BenchmarkError(f"GET {url} returned {response.status_code}: {response.text[:200]}")
+    return response
+
+
+# ----- suites -----
+
+@suite("hr_dashboard_stats")
+async def hr_dashboard_stats(ctx: BenchContext):
+    await _get(ctx, "/hr/dashboard-stats", ctx.hr_headers)
+
+
+@suite("hr_applications")
+async def hr_applications(ctx: BenchContext):
+    await _get(ctx, "/hr/applications", ctx.hr_headers)
+
+
+@suite("manager_applications")
+async def manager_applications(ctx: BenchContext):
+    await _get(ctx, "/manager/applications", next(ctx.manager_headers))
+
+
+@suite("onboarding_bootstrap")
+async def onboarding_bootstrap(ctx: BenchContext):
+    # The session reads behind GET /api/onboarding/welcome/{token}. The route
+    # itself cannot be driven: EnhancedSupabaseService has no
+    # get_onboarding_session_by_token for the orchestrator to call.
+    service = ctx.app_module.supabase_service
+    token = next(ctx.session_tokens)
+    result = await service._run_sync(
+        service.client.table("onboarding_sessions").select("*").eq("token", token).limit(1).execute
+    )
+    if not result.data:
+        raise BenchmarkError(f"No onboarding session for token {token}")
+    session = result.data[0]
+    employee, property_obj, manager = await asyncio.gather(
+        service.get_employee_by_id(session["employee_id"]),
+        service.get_property_by_id(session["property_id"]),
+        service.get_user_by_id(session["manager_id"]),
+    )
+    if not (employee and property_obj and manager):
+        raise BenchmarkError(f"Incomplete welcome data for session {session['id']}")
+
+
+@suite("hr_package_pdf")
+async def hr_package_pdf(ctx: BenchContext):
+    person = {"first_name": "Maria", "last_name": "Garcia", "ssn": "123-45-6789", "email": "maria@example.com"}
+    response = await ctx.http.post("/api/forms/package/hr", json={
+        "employee_data": person,
+        "forms_data": {"health_insurance_data": person, "direct_deposit_data": person},
+    })
+    if response.status_code != 200 or not response.content.startswith(b"%PDF"):
+        raise BenchmarkError(f"HR package returned {response.status_code}")
+
+
+# ----- harness -----
+
+def install_standin(client: StandInClient):
+    """Route every create_client() in the service module to the stand-in"""
+    from app import supabase_service_enhanced
+
+    supabase_service_enhanced.create_client = lambda url, key, *args, **kwargs: client
+    supabase_service_enhanced.enhanced_supabase_service = None
+
+
+async def prepare_app(client: StandInClient, data: SeededData) -> BenchContext:
+    """Import the app and run the parts of startup the suites depend on"""
+    install_standin(client)
+    from app import main_enhanced
+    from app.auth import get_current_user
+    from app.property_access_control import (
+        PropertyAccessController, get_property_access_controller, require_manager_with_property_access
+    )
+
+    main_enhanced.supabase_service.get()
+    controller = PropertyAccessController(main_enhanced.supabase_service)
+    get_property_access_controller._instance = controller
+    await controller.warm_manager_index()
+
+    def manager_with_property_access(current_user=Depends(get_current_user)):
+        # The route's dependency declares its user as Depends(lambda: None); hand it the authenticated one
+        return require_manager_with_property_access(current_user)
+
+    main_enhanced.app.dependency_overrides[require_manager_with_property_access] = manager_with_property_access
+
+    transport = httpx.ASGITransport(app=main_enhanced.app)
+    return BenchContext(
+        http=httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120),
+        client=client,
+        data=data,
+        app_module=main_enhanced,
+        hr_headers=_token({"user_id": data.hr_user_ids[0], "token_type": "hr_auth"}),
+        manager_headers=itertools.cycle([
+            _token({"manager_id": manager_id, "token_type": "manager_auth"})
+            for manager_id in sorted(data.manager_properties)
+        ]),
+        session_tokens=itertools.cycle(data.session_tokens),
+    )
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    return values[max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))]
+
+
+async def run_suite(ctx: BenchContext, name: str, iterations: int, warmup: int, warm_cache: bool) -> SuiteResult:
+    func = SUITES[name]
+    cache = ctx.app_module.response_cache
+    for _ in range(warmup):
+        cache.clear()
+        await func(ctx)
+
+    latencies, trips, by_kind = [], [], Counter()
+    for _ in range(iterations):
+        if not warm_cache:
+            cache.clear()
+        before = Counter(ctx.client.round_trips)
+        started = time.perf_counter()
+        await func(ctx)
+        latencies.append((time.perf_counter() - started) * 1000)
+        delta = ctx.client.round_trips - before
+        trips.append(sum(delta.values()))
+        by_kind.update(delta)
+
+    latencies.sort()
+    return SuiteResult(
+        name=name,
+        iterations=iterations,
+        mean_ms=statistics.fmean(latencies),
+        p50_ms=percentile(latencies, 50),
+        p95_ms=percentile(latencies, 95),
+        p99_ms=percentile(latencies, 99),
+        max_ms=latencies[-1],
+        round_trips=statistics.fmean(trips),
+        round_trips_by_kind={kind: count / iterations for kind, count in sorted(by_kind.items())},
+    )
+
+
+def report(result: SuiteResult):
+    print(f"{result.name:<22} {result.mean_ms:9.2f} {result.p50_ms:9.2f} {result.p95_ms:9.2f} "
+          f"{result.p99_ms:9.2f} {result.max_ms:9.2f} {result.round_trips:8.1f}")
+
+
+def compare(results: List[SuiteResult], baseline_path: str, max_regression: float,
+            current_config: Dict[str, object]) -> List[str]:
+    """Suites that regressed against a previous --json run"""
+    with open(baseline_path) as f:
+        saved = json.load(f)
+    baseline = saved["results"]
+    for key in ("scale", "latency_ms", "jitter_ms", "warm"):
+        if key in saved.get("config", {}) and saved["config"][key] != current_config.get(key):
+            print(f"note: baseline ran with {key}={saved['config'][key]}, this run uses {current_config.get(key)}")
+    regressions = []
+    for result in results:
+        before = baseline.get(result.name)
+        if before is None:
+            continue
+        if result.p95_ms > before["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{result.name}: p95 {before['p95_ms']:.2f} -> {result.p95_ms:.2f} ms")
+        if result.round_trips > before["round_trips"] + 1e-9:
+            regressions.append(f"{result.name}: round trips {before['round_trips']:.1f} -> {result.round_trips:.1f}")
+    return regressions
+
+
+async def run(args) -> int:
+    client = StandInClient(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    started = time.perf_counter()
+    data = seed(client, args.scale, args.seed)
+    print(f"Seeded {args.scale} data in {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{count:,} {table}" for table, count in data.counts.items()))
+
+    ctx = await prepare_app(client, data)
+    names = args.suites.split(",") if args.suites else list(SUITES)
+    print(f"{args.iterations} iterations per suite, {args.latency_ms} ms (+{args.jitter_ms} ms jitter) per "
+          f"round trip, response cache {'warm' if args.warm else 'cleared per request'}\n")
+    print(f"{'suite':<22} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'trips':>8}")
+
+    results = []
+    try:
+        for name in names:
+            result = await run_suite(ctx, name, args.iterations, args.warmup, args.warm)
+            report(result)
+            results.append(result)
+    finally:
+        await ctx.http.aclose()
+        from app.services.hr_package_service import hr_package_service
+        hr_package_service.shutdown()
+
+    if args.verbose:
+        print()
+        for result in results:
+            kinds = ", ".join(f"{kind} x{count:g}" for kind, count in result.round_trips_by_kind.items())
+            print(f"{result.name}: {kinds or 'no round trips'}")
+
+    config = {key: getattr(args, key) for key in ("scale", "latency_ms", "jitter_ms", "iterations", "warm", "seed")}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "config": config,
+                "results": {result.name: asdict(result) for result in results},
+            }, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression, config)
+        print("\n" + ("\n".join(f"REGRESSION {line}" for line in regressions) if regressions
+                      else f"No regressions against {args.baseline}"))
+        return 1 if regressions else 0
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="realistic")
+    parser.add_argument("--suites", help=f"comma-separated subset of: {', '.join(SUITES)}")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="injected latency per round trip")
+    parser.add_argument("--jitter-ms", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--warm", action="store_true", help="keep the response cache between requests")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json file")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 growth (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="print round trips by table and operation")
+    args = parser.parse_args()
+
+    unknown = set(args.suites.split(",")) - set(SUITES) if args.suites else set()
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the application list read path
+
+Builds --rows synthetic job_applications rows shaped like the real table
+(including the applicant_data_encrypted blob and analytics columns) and times
+the list path end to end, excluding the network round trip:
+
+    before: select('*') payload -> validated JobApplication -> ApplicationData.model_dump()
+    after:  APPLICATION_LIST_COLUMNS payload -> lean JobApplication -> plain dict
+
+Payload size is the JSON body PostgREST would send for each projection.
+
+Usage:
+    python scripts/benchmark_list_decode.py [--rows 50000]
+"""
+
+import argparse
+import base64
+import gc
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.models import ApplicationStatus, JobApplication
+from app.response_models import ApplicationData
+from app.supabase_service_enhanced import APPLICATION_LIST_COLUMNS, application_from_row
+
+
+def make_rows(count: int):
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        applicant = {
+            "first_name": f"First{i}", "last_name": f"Last{i}", "email": f"applicant{i}@example.com",
+            "phone": "555-010-0000", "address": f"{i} Main St", "city": "Austin", "state": "TX",
+            "zip_code": "78701", "work_authorized": True, "experience_years": i % 12,
+        }
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "property_id": str(uuid.uuid4()),
+            "department": "Housekeeping",
+            "position": "Room Attendant",
+            "applicant_data": applicant,
+            "applicant_data_encrypted": base64.b64encode(os.urandom(900)).decode(),
+            "status": "pending",
+            "applied_at": (base + timedelta(minutes=i)).isoformat().replace("+00:00", "Z"),
+            "reviewed_by": None,
+            "reviewed_at": None,
+            "rejection_reason": None,
+            "talent_pool_date": None,
+            "duplicate_check_hash": uuid.uuid4().hex,
+            "source": "qr_code",
+            "gdpr_consent": True,
+            "data_retention_until": (base + timedelta(days=2555)).isoformat(),
+            "created_at": base.isoformat(),
+            "updated_at": base.isoformat(),
+            "processing_time_ms": 120,
+            "review_count": 0,
+            "quality_score": 80,
+        })
+    return rows
+
+
+def before(payload: bytes):
+    rows = json.loads(payload)
+    applications = [
+        JobApplication(
+            id=row['id'],
+            property_id=row['property_id'],
+            department=row['department'],
+            position=row['position'],
+            applicant_data=row['applicant_data'],
+            status=ApplicationStatus(row['status']),
+            applied_at=datetime.fromisoformat(row['applied_at'].replace('Z', '+00:00'))
+        )
+        for row in rows
+    ]
+    return [
+        ApplicationData(
+            id=app.id,
+            property_id=app.property_id,
+            department=app.department,
+            position=app.position,
+            applicant_data=app.applicant_data,
+            status=app.status,
+            applied_at=app.applied_at.isoformat(),
+            reviewed_by=app.reviewed_by,
+            reviewed_at=app.reviewed_at.isoformat() if app.reviewed_at else None
+        ).model_dump()
+        for app in applications
+    ]
+
+
+def after(payload: bytes):
+    applications = [application_from_row(row, lean=True) for row in json.loads(payload)]
+    return [
+        {
+            "id": app.id,
+            "property_id": app.property_id,
+            "property_name": None,
+            "department": app.department,
+            "position": app.position,
+            "applicant_data": app.applicant_data,
+            "status": app.status.value,
+            "applied_at": app.applied_at.isoformat(),
+            "reviewed_by": app.reviewed_by,
+            "reviewed_at": app.reviewed_at.isoformat() if app.reviewed_at else None,
+            "rejection_reason": app.rejection_reason
+        }
+        for app in applications
+    ]
+
+
+def timed(label: str, fn, payload: bytes, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = fn(payload)
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<8} {len(payload) / 1024 / 1024:8.1f} MiB payload  {best * 1000:9.1f} ms  "
+          f"({len(result) / best:,.0f} rows/s)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    columns = [column.strip() for column in APPLICATION_LIST_COLUMNS.split(",")]
+    full_payload = json.dumps(rows).encode()
+    projected_payload = json.dumps([{column: row[column] for column in columns} for row in rows]).encode()
+
+    print(f"{args.rows:,} job_applications rows, best of {args.repeat}")
+    old = timed("before", before, full_payload, args.repeat)
+    new = timed("after", after, projected_payload, args.repeat)
+
+    mismatched = sum(1 for a, b in zip(old, new) if a != b)
+    print(f"output rows identical: {'yes' if not mismatched else f'no ({mismatched} differ)'}")
+
+
+if __name__ == "__main__":
+    main()
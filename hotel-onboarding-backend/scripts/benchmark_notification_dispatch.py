@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the notification dispatcher
+
+Queues notifications across channels with mixed priorities and reports
+notifications per second delivered by the channel workers. Channel senders are
+replaced with coroutines that sleep for --latency-ms to mimic provider calls;
+rate limits are lifted unless --keep-rate-limits is given.
+
+Usage:
+    python scripts/benchmark_notification_dispatch.py [--count 20000] [--latency-ms 2]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.notification_service import (
+    ChannelConfig, DEFAULT_CHANNEL_CONFIG, Notification, NotificationChannel,
+    NotificationPriority, NotificationService, NotificationType
+)
+
+CHANNELS = [NotificationChannel.IN_APP, NotificationChannel.EMAIL, NotificationChannel.PUSH, NotificationChannel.SMS]
+
+
+async def run(count: int, latency: float, keep_rate_limits: bool):
+    config = None
+    if not keep_rate_limits:
+        config = {
+            channel: ChannelConfig(workers=defaults.workers, rate_per_second=1e9, burst=1_000_000)
+            for channel, defaults in DEFAULT_CHANNEL_CONFIG.items()
+        }
+    service = NotificationService(channel_config=config)
+
+    async def provider(notification):
+        await asyncio.sleep(latency)
+    for name in ("_send_email", "_send_in_app", "_send_sms", "_send_push"):
+        setattr(service, name, provider)
+
+    await service.start()
+    started = time.perf_counter()
+    for _ in range(count):
+        await service._queue_notification(Notification(
+            id=str(uuid.uuid4()),
+            type=NotificationType.SYSTEM_ANNOUNCEMENT,
+            channel=random.choice(CHANNELS),
+            recipient="bench",
+            subject="Benchmark",
+            body="Benchmark",
+            priority=random.choice(list(NotificationPriority)[1:])
+        ))
+    while service.dispatch_stats["sent"] < count:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    await service.stop()
+
+    print(f"Delivered {count:,} notifications in {elapsed:.2f}s "
+          f"({count / elapsed:,.0f} notifications/s, {latency * 1000:.1f} ms simulated provider latency)")
+    for channel in CHANNELS:
+        workers = service.channel_config[channel].workers
+        print(f"  {channel.value:<8} {workers} workers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--keep-rate-limits", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.count, args.latency_ms / 1000, args.keep_rate_limits))
+
+
+if __name__ == "__main__":
+    main()
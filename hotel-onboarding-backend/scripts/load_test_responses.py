@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Load test for response encoding and compression
+
+Compares the previous response stack (BaseHTTPMiddleware + stdlib JSONResponse,
+no compression) against ResponseMiddleware + FastJSONResponse, serving a
+synthetic /hr/applications-sized payload in-process. Reports latency
+percentiles, throughput and bytes on the wire per request. In-process runs
+share one event loop with the client, so keep --concurrency at 1 there for
+meaningful latencies.
+
+With --url, the same measurements are taken against a running server instead,
+once with and once without Accept-Encoding, e.g.
+    python scripts/load_test_responses.py --url http://localhost:8000/hr/applications --token <jwt>
+
+Usage:
+    python scripts/load_test_responses.py [--rows 2000] [--requests 300] [--concurrency 1]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.response_utils import HAS_BROTLI, HAS_ORJSON, FastJSONResponse, ResponseFormatter, ResponseMiddleware
+
+
+class LegacyResponseMiddleware(BaseHTTPMiddleware):
+    """The middleware as it was before: request ID only, no compression"""
+
+    async def dispatch(self, request, call_next):
+        request.state.request_id = str(uuid.uuid4())
+        return await call_next(request)
+
+
+def make_rows(count: int):
+    base = datetime(2025, 1, 1)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "property_id": str(uuid.uuid4()),
+            "department": "Housekeeping",
+            "position": "Room Attendant",
+            "status": "pending",
+            "applied_at": (base + timedelta(minutes=i)).isoformat(),
+            "applicant_data": {
+                "first_name": f"First{i}",
+                "last_name": f"Last{i}",
+                "email": f"applicant{i}@example.com",
+                "phone": "555-010-0000",
+                "experience_years": i % 12,
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def make_app(rows, optimized: bool) -> FastAPI:
+    app = FastAPI()
+    response_class = FastJSONResponse if optimized else JSONResponse
+    app.add_middleware(ResponseMiddleware if optimized else LegacyResponseMiddleware)
+
+    @app.get("/hr/applications")
+    async def applications():
+        return response_class(content=ResponseFormatter.success(data=rows))
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, url: str, headers: dict, total: int, concurrency: int):
+    latencies, wire_bytes = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            async with client.stream("GET", url, headers=headers) as response:
+                size = 0
+                async for chunk in response.aiter_raw():
+                    size += len(chunk)
+                response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+            wire_bytes.append(size)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "rps": total / elapsed,
+        "bytes": statistics.mean(wire_bytes),
+    }
+
+
+def report(label: str, result: dict):
+    print(f"{label:<34} p50 {result['p50']:7.2f} ms  p95 {result['p95']:7.2f} ms  "
+          f"{result['rps']:8.1f} req/s  {result['bytes'] / 1024:9.1f} KiB/response")
+
+
+async def run_in_process(rows: int, total: int, concurrency: int):
+    data = make_rows(rows)
+    print(f"{rows:,} rows per response, {total} requests, concurrency {concurrency} "
+          f"(orjson={'yes' if HAS_ORJSON else 'no'}, brotli={'yes' if HAS_BROTLI else 'no'})")
+
+    scenarios = [
+        ("before: stdlib json, identity", False, {"Accept-Encoding": "identity"}),
+        ("after: orjson, identity", True, {"Accept-Encoding": "identity"}),
+        ("after: orjson, gzip", True, {"Accept-Encoding": "gzip"}),
+    ]
+    if HAS_BROTLI:
+        scenarios.append(("after: orjson, br", True, {"Accept-Encoding": "br, gzip"}))
+
+    for label, optimized, headers in scenarios:
+        transport = httpx.ASGITransport(app=make_app(data, optimized))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await measure(client, "/hr/applications", headers, min(total, 20), concurrency)  # warm up
+            report(label, await measure(client, "/hr/applications", headers, total, concurrency))
+
+
+async def run_against_server(url: str, token: str, total: int, concurrency: int):
+    auth = {"Authorization": f"Bearer {token}"} if token else {}
+    async with httpx.AsyncClient(timeout=60) as client:
+        for label, encoding in (("identity", "identity"), ("gzip", "gzip"), ("br", "br, gzip")):
+            report(label, await measure(client, url, {**auth, "Accept-Encoding": encoding}, total, concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--url", help="measure a running server instead of the in-process comparison")
+    parser.add_argument("--token", default="", help="bearer token for --url")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run_against_server(args.url, args.token, args.requests, args.concurrency))
+    else:
+        asyncio.run(run_in_process(args.rows, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
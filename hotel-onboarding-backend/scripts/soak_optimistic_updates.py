@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Soak test for the optimistic update state store
+
+Pushes a long stream of updates across a rotating set of resources, with a
+fraction of them deliberately touching the same field so conflicts are created
+and resolved, and prints process RSS and store sizes at checkpoints. Memory
+should level off once the retention limits are reached instead of growing with
+the number of updates.
+
+Usage:
+    python scripts/soak_optimistic_updates.py [--updates 1000000] [--resources 20000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.optimistic_update_service import OptimisticUpdateService, UpdateType
+
+
+async def discard(*args, **kwargs):
+    return None
+
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to peak RSS where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run(updates: int, resources: int, conflict_every: int, checkpoints: int):
+    service = OptimisticUpdateService(resource_idle_seconds=60, max_resources=resources // 2)
+    step = max(updates // checkpoints, 1)
+    started = time.perf_counter()
+
+    print(f"{'updates':>10} {'rss_mb':>8} {'pending':>8} {'confirmed':>10} {'resources':>10} {'conflicts':>10}")
+    for i in range(1, updates + 1):
+        # Every Nth update reuses the previous resource while its update is still pending
+        contended = i % conflict_every == 0
+        resource_id = f"r{(i - contended) % resources}"
+        await service.create_optimistic_update(
+            f"user-{i % 50}", "employee", resource_id, UpdateType.UPDATE,
+            [{"field_path": "status", "new_value": i}]
+        )
+        if (i + 1) % conflict_every:
+            # Let the processors catch up so the remaining updates confirm without contention
+            await service.drain()
+        if i % step == 0:
+            await service.drain()
+            metrics = service.get_metrics()
+            print(f"{i:>10,} {rss_mb():>8.1f} {metrics['pending_updates']:>8} "
+                  f"{metrics['retained_confirmed_updates']:>10} {metrics['tracked_resources']:>10} "
+                  f"{metrics['conflicts_detected']:>10}")
+
+    await service.drain()
+    elapsed = time.perf_counter() - started
+    await service.shutdown()
+    print(f"Processed {updates:,} updates in {elapsed:.1f}s ({updates / elapsed:,.0f} updates/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=1_000_000)
+    parser.add_argument("--resources", type=int, default=20_000)
+    parser.add_argument("--conflict-every", type=int, default=10,
+                        help="every Nth update targets the previous resource before it is processed")
+    parser.add_argument("--checkpoints", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    # Collaborator broadcasts and user notifications are not part of what is being measured.
+    # Plain coroutines rather than AsyncMock, which would keep every call it receives.
+    with patch("app.optimistic_update_service.websocket_manager.send_to_user", discard), \
+            patch("app.optimistic_update_service.notification_service.send_notification", discard):
+        asyncio.run(run(args.updates, args.resources, args.conflict_every, args.checkpoints))
+
+
+if __name__ == "__main__":
+    main()
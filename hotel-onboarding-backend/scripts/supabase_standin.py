@@ -0,0 +1,624 @@
+#!/usr/bin/env python3
+"""
+In-process stand-in for the Supabase client used by EnhancedSupabaseService
+
+Rows live in SQLite as JSON documents, so any table or column the service
+touches works without a schema. On top of that sits the part of the
+supabase-py surface the service uses:
+
+    table(): select (column projection, count="exact", one level of embedded
+             resources such as "properties(*)"), insert, update, upsert, delete
+    filters: eq, neq, gt, gte, lt, lte, like, ilike, is_, in_, not_, or_,
+             order, limit, range, single, maybe_single
+    rpc():   functions registered in Python with register_rpc(); the queries
+             a function makes through the client run "server-side" and are
+             neither counted nor delayed, like statements inside a plpgsql
+             function
+    storage: list_buckets, create_bucket, from_(bucket).upload / download /
+             remove / list / get_public_url
+
+Every execute() and storage call is one round trip: it is counted (per
+"table.operation", "rpc.name" or "storage.operation") and sleeps for the
+configured latency. The sleep blocks the calling thread, as the real
+synchronous client does.
+
+Usage:
+    client = StandInClient(latency_ms=2.0, jitter_ms=0.5)
+    app.supabase_service_enhanced.create_client = lambda url, key: client
+"""
+
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_COLUMN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(->>?[A-Za-z_][A-Za-z0-9_]*)*$")
+_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+RpcFunction = Callable[["StandInClient", Dict[str, Any]], List[Dict[str, Any]]]
+
+
+class StandInError(Exception):
+    """A request the real API would reject; carries a PostgREST-style code"""
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+@dataclass
+class StandInResponse:
+    """Shaped like postgrest's APIResponse: rows in data, total in count"""
+    data: Any
+    count: Optional[int] = None
+
+
+def _table_name(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise StandInError(f"Invalid table name: {name}")
+    return name
+
+
+def _column_sql(column: str) -> str:
+    """json_extract() for a column or JSON path (personal_info->>first_name)"""
+    column = column.strip()
+    if not _COLUMN.match(column):
+        raise StandInError(f"Invalid column: {column}")
+    path = "$." + ".".join(f'"{part}"' for part in re.split(r"->>?", column))
+    return f"json_extract(data, '{path}')"
+
+
+def _sql_value(value: Any) -> Any:
+    if isinstance(value, bool) or value is None or isinstance(value, (int, float, str)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _like_pattern(pattern: str) -> str:
+    # PostgREST accepts * as well as % for wildcards
+    return str(pattern).replace("*", "%")
+
+
+def _singular(name: str) -> str:
+    if name.endswith("ies"):
+        return name[:-3] + "y"
+    return name[:-1] if name.endswith("s") else name
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        depth += (char == "(") - (char == ")")
+        current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+def _literal(value: str) -> Any:
+    return {"true": True, "false": False, "null": None}.get(value.lower(), value)
+
+
+class _Filters:
+    """WHERE clauses shared by queries and or_() groups"""
+
+    def __init__(self):
+        self.clauses: List[str] = []
+        self.params: List[Any] = []
+        self._negate_next = False
+
+    def add(self, column: str, operator: str, value: Any):
+        sql, params = self.compile(column, operator, value)
+        if self._negate_next:
+            sql = f"NOT ({sql})"
+            self._negate_next = False
+        self.clauses.append(sql)
+        self.params.extend(params)
+
+    @staticmethod
+    def compile(column: str, operator: str, value: Any) -> Tuple[str, List[Any]]:
+        expression = _column_sql(column)
+        if operator in _OPERATORS:
+            if value is None:
+                return f"{expression} IS {'NOT ' if operator == 'neq' else ''}NULL", []
+            return f"{expression} {_OPERATORS[operator]} ?", [_sql_value(value)]
+        if operator == "like":
+            return f"{expression} LIKE ?", [_like_pattern(value)]
+        if operator == "ilike":
+            return f"lower({expression}) LIKE lower(?)", [_like_pattern(value)]
+        if operator == "is":
+            if value is None or str(value).lower() == "null":
+                return f"{expression} IS NULL", []
+            return f"{expression} = ?", [bool(_literal(str(value)))]
+        if operator == "in":
+            values = [_sql_value(v) for v in value]
+            if not values:
+                return "0", []
+            return f"{expression} IN ({', '.join('?' * len(values))})", values
+        raise StandInError(f"Unsupported filter operator: {operator}")
+
+    def where(self) -> Tuple[str, List[Any]]:
+        if not self.clauses:
+            return "", []
+        return " WHERE " + " AND ".join(f"({clause})" for clause in self.clauses), list(self.params)
+
+
+class StandInQuery:
+    """Builder returned by client.table(); mirrors postgrest's request builders"""
+
+    def __init__(self, client: "StandInClient", table: str):
+        self._client = client
+        self._table = _table_name(table)
+        self._operation = "select"
+        self._columns = "*"
+        self._count: Optional[str] = None
+        self._payload: Any = None
+        self._on_conflict = "id"
+        self._filters = _Filters()
+        self._order: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single: Optional[str] = None
+
+    # ----- operations -----
+
+    def select(self, *columns: str, count: Optional[str] = None, head: bool = False) -> "StandInQuery":
+        self._operation = "select"
+        self._columns = ", ".join(columns) if columns else "*"
+        self._count = count
+        return self
+
+    def insert(self, rows: Any, **kwargs) -> "StandInQuery":
+        self._operation, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows: Any, on_conflict: str = "id", **kwargs) -> "StandInQuery":
+        self._operation, self._payload = "upsert", rows
+        self._on_conflict = on_conflict or "id"
+        return self
+
+    def update(self, values: Dict[str, Any], **kwargs) -> "StandInQuery":
+        self._operation, self._payload = "update", values
+        return self
+
+    def delete(self, **kwargs) -> "StandInQuery":
+        self._operation = "delete"
+        return self
+
+    # ----- filters -----
+
+    def eq(self, column, value) -> "StandInQuery":
+        self._filters.add(column, "eq", value)
+        return self
+
+    def neq(self, column, value) -> "StandInQuery":
+        self._filters.add(column, "neq", value)
+        return self
+
+    def gt(self, column, value) -> "StandInQuery":
+        self._filters.add(column, "gt", value)
+        return self
+
+    def gte(self, column, value) -> "StandInQuery":
+        self._filters.add(column, "gte", value)
+        return self
+
+    def lt(self, column, value) -> "StandInQuery":
+        self._filters.add(column, "lt", value)
+        return self
+
+    def lte(self, column, value) -> "StandInQuery":
+        self._filters.add(column, "lte", value)
+        return self
+
+    def like(self, column, pattern) -> "StandInQuery":
+        self._filters.add(column, "like", pattern)
+        return self
+
+    def ilike(self, column, pattern) -> "StandInQuery":
+        self._filters.add(column, "ilike", pattern)
+        return self
+
+    def is_(self, column, value) -> "StandInQuery":
+        self._filters.add(column, "is", value)
+        return self
+
+    def in_(self, column, values) -> "StandInQuery":
+        self._filters.add(column, "in", list(values))
+        return self
+
+    def filter(self, column: str, operator: str, value: Any) -> "StandInQuery":
+        if operator == "in" and isinstance(value, str):
+            value = [v.strip().strip('"') for v in value.strip("()").split(",") if v.strip()]
+        self._filters.add(column, operator, value)
+        return self
+
+    @property
+    def not_(self) -> "StandInQuery":
+        self._filters._negate_next = True
+        return self
+
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> "StandInQuery":
+        """PostgREST or filter string: "col.op.value,col.op.value" """
+        alternatives, params = [], []
+        for condition in _split_top_level(filters):
+            column, operator, value = condition.split(".", 2)
+            if operator == "in":
+                value = [v.strip() for v in value.strip("()").split(",") if v.strip()]
+            elif operator != "is":
+                value = _literal(value)
+            sql, condition_params = _Filters.compile(column, operator, value)
+            alternatives.append(f"({sql})")
+            params.extend(condition_params)
+        self._filters.clauses.append(" OR ".join(alternatives) or "0")
+        self._filters.params.extend(params)
+        return self
+
+    # ----- modifiers -----
+
+    def order(self, column: str, desc: bool = False, **kwargs) -> "StandInQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs) -> "StandInQuery":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> "StandInQuery":
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self) -> "StandInQuery":
+        self._single = "single"
+        return self
+
+    def maybe_single(self) -> "StandInQuery":
+        self._single = "maybe"
+        return self
+
+    # ----- execution -----
+
+    def execute(self) -> StandInResponse:
+        self._client._round_trip(f"{self._table}.{self._operation}")
+        with self._client._lock:
+            self._client._ensure_table(self._table)
+            if self._operation == "select":
+                response = self._execute_select()
+            elif self._operation == "insert":
+                response = StandInResponse(self._client._insert_rows(self._table, self._rows()))
+            elif self._operation == "upsert":
+                response = StandInResponse(self._execute_upsert())
+            elif self._operation == "update":
+                response = StandInResponse(self._execute_update())
+            else:
+                response = StandInResponse(self._execute_delete())
+        return self._apply_single(response)
+
+    def _rows(self) -> List[Dict[str, Any]]:
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        return [dict(row) for row in rows]
+
+    def _matching(self) -> List[Tuple[int, Dict[str, Any]]]:
+        where, params = self._filters.where()
+        sql = f'SELECT pk, data FROM "{self._table}"{where}'
+        if self._order:
+            sql += " ORDER BY " + ", ".join(
+                f"{_column_sql(column)} IS NULL {'DESC' if desc else 'ASC'}, {_column_sql(column)} {'DESC' if desc else 'ASC'}"
+                for column, desc in self._order
+            )
+        if self._limit is not None or self._offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [self._limit if self._limit is not None else -1, self._offset]
+        return [(pk, json.loads(data)) for pk, data in self._client._db.execute(sql, params)]
+
+    def _execute_select(self) -> StandInResponse:
+        rows = [row for _, row in self._matching()]
+        count = None
+        if self._count:
+            where, params = self._filters.where()
+            count = self._client._db.execute(f'SELECT COUNT(*) FROM "{self._table}"{where}', params).fetchone()[0]
+        return StandInResponse(self._client._project(self._table, rows, self._columns), count)
+
+    def _execute_update(self) -> List[Dict[str, Any]]:
+        updated = []
+        for pk, row in self._matching():
+            row.update(self._payload)
+            self._client._db.execute(f'UPDATE "{self._table}" SET data = ? WHERE pk = ?', (_dumps(row), pk))
+            updated.append(row)
+        return updated
+
+    def _execute_delete(self) -> List[Dict[str, Any]]:
+        deleted = self._matching()
+        self._client._db.executemany(f'DELETE FROM "{self._table}" WHERE pk = ?', [(pk,) for pk, _ in deleted])
+        return [row for _, row in deleted]
+
+    def _execute_upsert(self) -> List[Dict[str, Any]]:
+        keys = [key.strip() for key in self._on_conflict.split(",")]
+        written = []
+        for row in self._rows():
+            if "id" in keys:
+                row.setdefault("id", str(uuid.uuid4()))
+            lookup = _Filters()
+            for key in keys:
+                lookup.add(key, "eq", row.get(key))
+            where, params = lookup.where()
+            existing = self._client._db.execute(f'SELECT pk, data FROM "{self._table}"{where} LIMIT 1', params).fetchone()
+            if existing:
+                merged = {**json.loads(existing[1]), **row}
+                self._client._db.execute(f'UPDATE "{self._table}" SET data = ? WHERE pk = ?', (_dumps(merged), existing[0]))
+                written.append(merged)
+            else:
+                written.extend(self._client._insert_rows(self._table, [row]))
+        return written
+
+    def _apply_single(self, response: StandInResponse) -> StandInResponse:
+        if self._single is None:
+            return response
+        rows = response.data
+        if len(rows) > 1 or (self._single == "single" and not rows):
+            raise StandInError(f"JSON object requested, {len(rows)} rows returned", code="PGRST116")
+        return StandInResponse(rows[0] if rows else None, response.count)
+
+
+class _RpcCall:
+    def __init__(self, client: "StandInClient", name: str, params: Dict[str, Any]):
+        self._client, self._name, self._params = client, name, params
+
+    def execute(self) -> StandInResponse:
+        function = self._client._rpc_functions.get(self._name)
+        self._client._round_trip(f"rpc.{self._name}")
+        if function is None:
+            raise StandInError(f"Could not find the function public.{self._name}", code="PGRST202")
+        with self._client._lock:
+            self._client._server_side.active = True
+            try:
+                return StandInResponse(function(self._client, dict(self._params)))
+            finally:
+                self._client._server_side.active = False
+
+
+class StandInBucket:
+    """storage.from_(bucket)"""
+
+    def __init__(self, client: "StandInClient", bucket: str):
+        self._client, self.bucket = client, bucket
+
+    def upload(self, path: str, file: Any, file_options: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        options = file_options or {}
+        content = file if isinstance(file, (bytes, bytearray)) else open(file, "rb").read()
+        self._client._round_trip("storage.upload")
+        with self._client._lock:
+            exists = self._client._db.execute(
+                "SELECT 1 FROM _storage_objects WHERE bucket = ? AND path = ?", (self.bucket, path)
+            ).fetchone()
+            if exists and str(options.get("upsert", "false")).lower() != "true":
+                raise StandInError("The resource already exists", code="409")
+            self._client._db.execute(
+                "INSERT OR REPLACE INTO _storage_objects (bucket, path, content, content_type) VALUES (?, ?, ?, ?)",
+                (self.bucket, path, bytes(content), options.get("content-type", "application/octet-stream"))
+            )
+        return {"path": path, "fullPath": f"{self.bucket}/{path}"}
+
+    def download(self, path: str) -> bytes:
+        self._client._round_trip("storage.download")
+        with self._client._lock:
+            row = self._client._db.execute(
+                "SELECT content FROM _storage_objects WHERE bucket = ? AND path = ?", (self.bucket, path)
+            ).fetchone()
+        if row is None:
+            raise StandInError("Object not found", code="404")
+        return row[0]
+
+    def remove(self, paths: Sequence[str]) -> List[Dict[str, str]]:
+        self._client._round_trip("storage.remove")
+        removed = []
+        with self._client._lock:
+            for path in paths:
+                cursor = self._client._db.execute(
+                    "DELETE FROM _storage_objects WHERE bucket = ? AND path = ?", (self.bucket, path)
+                )
+                if cursor.rowcount:
+                    removed.append({"name": path, "bucket_id": self.bucket})
+        return removed
+
+    def list(self, path: str = "", options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        self._client._round_trip("storage.list")
+        prefix = f"{path.rstrip('/')}/" if path else ""
+        with self._client._lock:
+            rows = self._client._db.execute(
+                "SELECT path, length(content) FROM _storage_objects WHERE bucket = ? AND path LIKE ? ORDER BY path",
+                (self.bucket, prefix + "%")
+            ).fetchall()
+        return [{"name": name[len(prefix):], "metadata": {"size": size}} for name, size in rows]
+
+    def get_public_url(self, path: str, options: Optional[Dict[str, Any]] = None) -> str:
+        # Built locally by the real client too; not a round trip
+        return f"{self._client.url}/storage/v1/object/public/{self.bucket}/{path}"
+
+
+class StandInStorage:
+    """client.storage"""
+
+    def __init__(self, client: "StandInClient"):
+        self._client = client
+
+    def list_buckets(self) -> List[Dict[str, Any]]:
+        self._client._round_trip("storage.list_buckets")
+        with self._client._lock:
+            rows = self._client._db.execute("SELECT name, public FROM _storage_buckets ORDER BY name").fetchall()
+        return [{"id": name, "name": name, "public": bool(public)} for name, public in rows]
+
+    def create_bucket(self, id: str, name: Optional[str] = None, options: Optional[Dict[str, Any]] = None):
+        self._client._round_trip("storage.create_bucket")
+        with self._client._lock:
+            try:
+                self._client._db.execute(
+                    "INSERT INTO _storage_buckets (name, public) VALUES (?, ?)",
+                    (id, bool((options or {}).get("public")))
+                )
+            except sqlite3.IntegrityError:
+                raise StandInError("The resource already exists", code="409")
+        return {"name": id}
+
+    def from_(self, bucket: str) -> StandInBucket:
+        return StandInBucket(self._client, bucket)
+
+
+class StandInClient:
+    """
+    Drop-in for the supabase Client returned by create_client().
+
+    ``latency_ms`` (plus up to ``jitter_ms``, from a seeded RNG) is slept on
+    every round trip; ``round_trips`` counts them by kind.
+    """
+
+    def __init__(self, path: str = ":memory:", latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 seed: int = 0, url: str = "http://standin.local"):
+        self.url = url
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.round_trips: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._server_side = threading.local()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode = MEMORY")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS _storage_objects ("
+            "bucket TEXT, path TEXT, content BLOB, content_type TEXT, PRIMARY KEY (bucket, path))"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS _storage_buckets (name TEXT PRIMARY KEY, public INTEGER)")
+        self._tables = set()
+        self._rpc_functions: Dict[str, RpcFunction] = {}
+        self.storage = StandInStorage(self)
+
+    # ----- supabase Client surface -----
+
+    def table(self, name: str) -> StandInQuery:
+        return StandInQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> _RpcCall:
+        return _RpcCall(self, name, params or {})
+
+    # ----- harness API (not round trips) -----
+
+    def register_rpc(self, name: str, function: RpcFunction):
+        """Serve client.rpc(name, params) with function(client, params) -> rows"""
+        self._rpc_functions[name] = function
+
+    def load(self, table: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """Bulk insert seed rows without counting round trips"""
+        with self._lock:
+            self._ensure_table(_table_name(table))
+            return len(self._insert_rows(table, [dict(row) for row in rows]))
+
+    def create_index(self, table: str, *columns: str):
+        """Expression index so filters on these columns avoid full scans"""
+        with self._lock:
+            self._ensure_table(_table_name(table))
+            name = "idx_" + "_".join([table, *(re.sub(r"\W", "_", column) for column in columns)])
+            self._db.execute(
+                f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({", ".join(_column_sql(c) for c in columns)})'
+            )
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        """Every row of a table, for rpc implementations and assertions"""
+        with self._lock:
+            self._ensure_table(_table_name(table))
+            return [json.loads(data) for (data,) in self._db.execute(f'SELECT data FROM "{table}" ORDER BY pk')]
+
+    def round_trip_count(self) -> int:
+        return sum(self.round_trips.values())
+
+    def reset_round_trips(self):
+        self.round_trips.clear()
+
+    # ----- internals -----
+
+    def _round_trip(self, kind: str):
+        if getattr(self._server_side, "active", False):
+            return
+        self.round_trips[kind] += 1
+        delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _ensure_table(self, table: str):
+        if table not in self._tables:
+            self._db.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (pk INTEGER PRIMARY KEY, data TEXT NOT NULL)')
+            self._db.execute(
+                f'CREATE INDEX IF NOT EXISTS "idx_{table}_id" ON "{table}" ({_column_sql("id")})'
+            )
+            self._tables.add(table)
+
+    def _insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for row in rows:
+            row.setdefault("id", str(uuid.uuid4()))
+        self._db.executemany(f'INSERT INTO "{table}" (data) VALUES (?)', [(_dumps(row),) for row in rows])
+        return rows
+
+    def _project(self, table: str, rows: List[Dict[str, Any]], columns: str) -> List[Dict[str, Any]]:
+        plain, embeds, star = [], [], False
+        for item in _split_top_level(columns):
+            alias, _, item = item.partition(":") if ":" in item.split("(")[0] else ("", "", item)
+            if "(" in item:
+                relation, inner = item.split("(", 1)
+                embeds.append((alias or relation.split("!")[0], relation.split("!")[0], inner[:-1] or "*"))
+            elif item == "*":
+                star = True
+            else:
+                plain.append((alias or item, item))
+
+        projected = [dict(row) if star else {name: row.get(column) for name, column in plain} for row in rows]
+        for name, relation, inner in embeds:
+            self._embed(table, rows, projected, name, _table_name(relation), inner)
+        return projected
+
+    def _embed(self, table, rows, projected, name, relation, inner):
+        self._ensure_table(relation)
+        foreign_key = f"{_singular(relation)}_id"
+        if any(foreign_key in row for row in rows):
+            # Many-to-one: rows carry relation_id
+            keys = sorted({str(row[foreign_key]) for row in rows if row.get(foreign_key) is not None})
+            related = self._fetch_in(relation, "id", keys)
+            by_id = {str(raw["id"]): shaped for raw, shaped in zip(related, self._project(relation, related, inner))}
+            for row, target in zip(rows, projected):
+                target[name] = by_id.get(str(row.get(foreign_key)))
+            return
+        # One-to-many: relation rows carry table_id
+        back_key = f"{_singular(table)}_id"
+        keys = sorted({str(row["id"]) for row in rows if row.get("id") is not None})
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        related = self._fetch_in(relation, back_key, keys)
+        for raw, shaped in zip(related, self._project(relation, related, inner)):
+            grouped.setdefault(str(raw.get(back_key)), []).append(shaped)
+        for row, target in zip(rows, projected):
+            target[name] = grouped.get(str(row.get("id")), [])
+
+    def _fetch_in(self, table: str, column: str, keys: List[str]) -> List[Dict[str, Any]]:
+        found = []
+        for start in range(0, len(keys), 500):
+            sql, params = _Filters.compile(column, "in", keys[start:start + 500])
+            found.extend(json.loads(data) for (data,) in self._db.execute(f'SELECT data FROM "{table}" WHERE {sql}', params))
+        return found
+
+
+def _dumps(row: Dict[str, Any]) -> str:
+    return json.dumps(row, default=_sql_value, separators=(",", ":"))
@@ -0,0 +1,27 @@
+-- Migration: Guarantee (token, step_id) uniqueness for autosave upserts
+-- Date: 2025-08-12
+-- Description: save_onboarding_form_data now issues a single
+-- INSERT ... ON CONFLICT (token, step_id) DO UPDATE, which requires a unique
+-- index on the conflict target. Older deployments created the table without it.
+
+-- ============================================
+-- Remove duplicate rows, keeping the most recently updated one
+-- ============================================
+-- Rows with no updated_at rank below any that have one
+DELETE FROM onboarding_form_data
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, row_number() OVER (
+            PARTITION BY token, step_id
+            ORDER BY updated_at DESC NULLS LAST, created_at DESC NULLS LAST, id DESC
+        ) AS position
+        FROM onboarding_form_data
+    ) ranked
+    WHERE position > 1
+);
+
+-- ============================================
+-- Conflict target for upserts
+-- ============================================
+CREATE UNIQUE INDEX IF NOT EXISTS uq_onboarding_form_data_token_step
+    ON onboarding_form_data(token, step_id);
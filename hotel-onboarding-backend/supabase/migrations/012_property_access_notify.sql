@@ -0,0 +1,71 @@
+-- Migration: Publish property access changes over LISTEN/NOTIFY
+-- Date: 2025-08-13
+-- Description: PropertyAccessController keeps manager -> property and
+-- application/employee -> property maps in memory. These triggers send a
+-- property_access_changed notification whenever one of those mappings changes,
+-- so every API worker (not only the one that handled the write) can drop the
+-- affected entries. Payloads are small JSON objects keyed by table name.
+
+-- ============================================
+-- Notification function
+-- ============================================
+CREATE OR REPLACE FUNCTION notify_property_access_changed()
+RETURNS TRIGGER AS $$
+DECLARE
+    row_data RECORD;
+    payload JSON;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := OLD;
+    ELSE
+        row_data := NEW;
+    END IF;
+
+    IF TG_TABLE_NAME = 'property_managers' THEN
+        payload := json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'manager_id', row_data.manager_id,
+            'property_id', row_data.property_id
+        );
+    ELSIF TG_TABLE_NAME = 'properties' THEN
+        payload := json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'property_id', row_data.id
+        );
+    ELSE
+        payload := json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'id', row_data.id
+        );
+    END IF;
+
+    PERFORM pg_notify('property_access_changed', payload::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- Triggers
+-- ============================================
+DROP TRIGGER IF EXISTS property_managers_access_changed ON property_managers;
+CREATE TRIGGER property_managers_access_changed
+    AFTER INSERT OR UPDATE OR DELETE ON property_managers
+    FOR EACH ROW EXECUTE FUNCTION notify_property_access_changed();
+
+DROP TRIGGER IF EXISTS properties_access_changed ON properties;
+CREATE TRIGGER properties_access_changed
+    AFTER DELETE ON properties
+    FOR EACH ROW EXECUTE FUNCTION notify_property_access_changed();
+
+DROP TRIGGER IF EXISTS job_applications_access_changed ON job_applications;
+CREATE TRIGGER job_applications_access_changed
+    AFTER UPDATE OF property_id OR DELETE ON job_applications
+    FOR EACH ROW EXECUTE FUNCTION notify_property_access_changed();
+
+DROP TRIGGER IF EXISTS employees_access_changed ON employees;
+CREATE TRIGGER employees_access_changed
+    AFTER UPDATE OF property_id OR DELETE ON employees
+    FOR EACH ROW EXECUTE FUNCTION notify_property_access_changed();
@@ -0,0 +1,130 @@
+-- Migration: Content-addressed storage blobs with reference counting
+-- Date: 2025-08-14
+-- Description: EnhancedSupabaseService stores uploaded and generated files
+-- once per bucket under blobs/<sha256>, so a regenerated PDF with identical
+-- bytes costs a metadata row instead of another upload. storage_blobs counts
+-- how many documents rows point at each blob. register_storage_uploads bumps
+-- the counts and writes the documents/generated_pdfs rows for a whole batch
+-- in one call, and reports which blobs still need uploading;
+-- release_storage_documents reverses it and returns blobs nobody references.
+
+-- ============================================
+-- Tables
+-- ============================================
+CREATE TABLE IF NOT EXISTS storage_blobs (
+    bucket TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    object_path TEXT NOT NULL,
+    size BIGINT NOT NULL,
+    content_type TEXT,
+    ref_count INTEGER NOT NULL DEFAULT 0 CHECK (ref_count >= 0),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (bucket, sha256)
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    id UUID PRIMARY KEY,
+    bucket TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size BIGINT,
+    content_type TEXT,
+    public_url TEXT,
+    uploaded_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS sha256 TEXT;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS object_path TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_documents_bucket_path ON documents(bucket, path);
+
+CREATE TABLE IF NOT EXISTS generated_pdfs (
+    id UUID PRIMARY KEY,
+    employee_id TEXT NOT NULL,
+    form_type TEXT NOT NULL,
+    storage_path TEXT NOT NULL,
+    storage_url TEXT,
+    is_signed BOOLEAN DEFAULT FALSE,
+    generated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_generated_pdfs_employee ON generated_pdfs(employee_id, generated_at DESC);
+
+-- ============================================
+-- Register a batch of uploads
+-- ============================================
+-- p_items: [{"document": {...documents row...}, "generated_pdf": {...} | absent}]
+CREATE OR REPLACE FUNCTION register_storage_uploads(p_items JSONB)
+RETURNS TABLE(item_bucket TEXT, item_sha256 TEXT, needs_upload BOOLEAN) AS $$
+DECLARE
+    item JSONB;
+    doc JSONB;
+    pdf JSONB;
+    inserted BOOLEAN;
+BEGIN
+    FOR item IN SELECT value FROM jsonb_array_elements(p_items) LOOP
+        doc := item->'document';
+
+        INSERT INTO storage_blobs AS b (bucket, sha256, object_path, size, content_type, ref_count)
+        VALUES (
+            doc->>'bucket', doc->>'sha256', doc->>'object_path',
+            (doc->>'size')::BIGINT, doc->>'content_type', 1
+        )
+        ON CONFLICT (bucket, sha256) DO UPDATE SET ref_count = b.ref_count + 1
+        RETURNING (xmax = 0) INTO inserted;
+
+        INSERT INTO documents (id, bucket, path, size, content_type, public_url, uploaded_at, sha256, object_path)
+        VALUES (
+            (doc->>'id')::UUID, doc->>'bucket', doc->>'path', (doc->>'size')::BIGINT,
+            doc->>'content_type', doc->>'public_url', (doc->>'uploaded_at')::TIMESTAMPTZ,
+            doc->>'sha256', doc->>'object_path'
+        );
+
+        pdf := item->'generated_pdf';
+        IF pdf IS NOT NULL THEN
+            INSERT INTO generated_pdfs (id, employee_id, form_type, storage_path, storage_url, is_signed, generated_at)
+            VALUES (
+                (pdf->>'id')::UUID, pdf->>'employee_id', pdf->>'form_type', pdf->>'storage_path',
+                pdf->>'storage_url', COALESCE((pdf->>'is_signed')::BOOLEAN, FALSE),
+                (pdf->>'generated_at')::TIMESTAMPTZ
+            );
+        END IF;
+
+        item_bucket := doc->>'bucket';
+        item_sha256 := doc->>'sha256';
+        needs_upload := inserted;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- Release documents and collect unreferenced blobs
+-- ============================================
+CREATE OR REPLACE FUNCTION release_storage_documents(p_bucket TEXT, p_paths TEXT[])
+RETURNS TABLE(orphan_path TEXT) AS $$
+BEGIN
+    DELETE FROM generated_pdfs g
+    WHERE p_bucket = 'generated-pdfs' AND g.storage_path = ANY(p_paths);
+
+    RETURN QUERY
+    WITH removed AS (
+        DELETE FROM documents d
+        WHERE d.bucket = p_bucket AND d.path = ANY(p_paths) AND d.sha256 IS NOT NULL
+        RETURNING d.sha256
+    ), counts AS (
+        SELECT r.sha256, COUNT(*) AS refs FROM removed r GROUP BY r.sha256
+    ), updated AS (
+        UPDATE storage_blobs b
+        SET ref_count = GREATEST(b.ref_count - c.refs, 0)
+        FROM counts c
+        WHERE b.bucket = p_bucket AND b.sha256 = c.sha256
+        RETURNING b.object_path, b.ref_count
+    )
+    SELECT u.object_path FROM updated u WHERE u.ref_count = 0;
+
+    DELETE FROM storage_blobs b WHERE b.bucket = p_bucket AND b.ref_count = 0;
+
+    -- Rows written before dedup have no blob; drop them as before
+    DELETE FROM documents d WHERE d.bucket = p_bucket AND d.path = ANY(p_paths);
+END;
+$$ LANGUAGE plpgsql;
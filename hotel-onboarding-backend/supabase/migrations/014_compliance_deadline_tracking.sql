@@ -0,0 +1,123 @@
+-- Migration: Persist compliance deadlines and violations
+-- Date: 2025-08-15
+-- Description: FederalComplianceEngine kept I-9 deadlines and compliance
+-- violations in process memory, so they vanished on restart and every
+-- dashboard call scanned all of them. These tables hold them durably; the
+-- indexes serve per-property "what is due / still open" reads, and a
+-- compliance_changed notification lets every API worker keep its in-memory
+-- deadline heap current. compliance_property_counts() returns the dashboard
+-- totals grouped by property in one call.
+
+-- ============================================
+-- Tables
+-- ============================================
+CREATE TABLE IF NOT EXISTS compliance_deadlines (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    document_id TEXT NOT NULL UNIQUE,
+    deadline_type TEXT NOT NULL,
+    employee_id TEXT NOT NULL,
+    property_id TEXT,
+    hire_date DATE,
+    deadline_date DATE NOT NULL,
+    is_met BOOLEAN NOT NULL DEFAULT FALSE,
+    completion_date DATE,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_compliance_deadlines_property_due
+    ON compliance_deadlines(property_id, deadline_date, is_met);
+CREATE INDEX IF NOT EXISTS idx_compliance_deadlines_open
+    ON compliance_deadlines(deadline_date) WHERE NOT is_met;
+CREATE INDEX IF NOT EXISTS idx_compliance_deadlines_employee
+    ON compliance_deadlines(employee_id);
+
+CREATE TABLE IF NOT EXISTS compliance_violations (
+    violation_id UUID PRIMARY KEY,
+    violation_type TEXT NOT NULL,
+    document_category TEXT NOT NULL,
+    employee_id TEXT NOT NULL,
+    property_id TEXT,
+    document_id TEXT,
+    violation_message TEXT NOT NULL,
+    legal_reference TEXT NOT NULL,
+    detected_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    resolved_at TIMESTAMPTZ,
+    resolution_notes TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_compliance_violations_property_open
+    ON compliance_violations(property_id, detected_at DESC) WHERE resolved_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_compliance_violations_property
+    ON compliance_violations(property_id, violation_type, resolved_at);
+
+DROP TRIGGER IF EXISTS compliance_deadlines_updated_at ON compliance_deadlines;
+CREATE OR REPLACE FUNCTION touch_compliance_deadline()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER compliance_deadlines_updated_at
+    BEFORE UPDATE ON compliance_deadlines
+    FOR EACH ROW EXECUTE FUNCTION touch_compliance_deadline();
+
+-- ============================================
+-- Dashboard totals
+-- ============================================
+CREATE OR REPLACE FUNCTION compliance_property_counts()
+RETURNS TABLE(
+    property_id TEXT,
+    total_deadlines BIGINT,
+    total_violations BIGINT,
+    critical_violations BIGINT,
+    resolved_violations BIGINT
+) AS $$
+    SELECT
+        COALESCE(d.property_id, v.property_id),
+        COALESCE(d.total, 0),
+        COALESCE(v.total, 0),
+        COALESCE(v.critical, 0),
+        COALESCE(v.resolved, 0)
+    FROM (
+        SELECT property_id, COUNT(*) AS total
+        FROM compliance_deadlines
+        GROUP BY property_id
+    ) d
+    FULL OUTER JOIN (
+        SELECT
+            property_id,
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE violation_type = 'critical') AS critical,
+            COUNT(*) FILTER (WHERE resolved_at IS NOT NULL) AS resolved
+        FROM compliance_violations
+        GROUP BY property_id
+    ) v ON d.property_id IS NOT DISTINCT FROM v.property_id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- Change notifications
+-- ============================================
+CREATE OR REPLACE FUNCTION notify_compliance_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('compliance_changed', json_build_object(
+        'table', TG_TABLE_NAME,
+        'op', TG_OP,
+        'row', row_to_json(NEW)
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS compliance_deadlines_changed ON compliance_deadlines;
+CREATE TRIGGER compliance_deadlines_changed
+    AFTER INSERT OR UPDATE ON compliance_deadlines
+    FOR EACH ROW EXECUTE FUNCTION notify_compliance_changed();
+
+DROP TRIGGER IF EXISTS compliance_violations_changed ON compliance_violations;
+CREATE TRIGGER compliance_violations_changed
+    AFTER INSERT OR UPDATE ON compliance_violations
+    FOR EACH ROW EXECUTE FUNCTION notify_compliance_changed();
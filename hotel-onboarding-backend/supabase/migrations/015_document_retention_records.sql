@@ -0,0 +1,229 @@
+-- Migration: Persist document retention records with pre-aggregated counts
+-- Date: 2025-08-16
+-- Description: DocumentRetentionService kept retention records in memory and
+-- walked all of them for the dashboard, terminations and holds. Records now
+-- live in document_retention_records, indexed by employee, by status and by
+-- retention end date. Statement-level triggers keep document_retention_counts
+-- (one row per document type and status) current, so the dashboard reads a
+-- handful of rows regardless of portfolio size. sweep_document_retention()
+-- moves ACTIVE -> EXPIRING_SOON -> EXPIRED in bounded batches, and
+-- apply_retention_termination() re-dates an employee's I-9s in one UPDATE.
+
+-- ============================================
+-- Tables
+-- ============================================
+CREATE TABLE IF NOT EXISTS document_retention_records (
+    record_id UUID PRIMARY KEY,
+    document_id TEXT NOT NULL UNIQUE,
+    document_type TEXT NOT NULL,
+    employee_id TEXT NOT NULL,
+    employee_name TEXT,
+    created_date DATE NOT NULL,
+    hire_date DATE,
+    termination_date DATE,
+    retention_policy_id TEXT NOT NULL,
+    retention_end_date DATE NOT NULL,
+    retention_status TEXT NOT NULL CHECK (
+        retention_status IN ('active', 'expiring_soon', 'expired', 'destroyed', 'hold')
+    ),
+    last_reviewed TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    review_notes TEXT,
+    legal_hold BOOLEAN NOT NULL DEFAULT FALSE,
+    destroyed_date DATE
+);
+
+CREATE INDEX IF NOT EXISTS idx_retention_records_employee
+    ON document_retention_records(employee_id, document_type);
+CREATE INDEX IF NOT EXISTS idx_retention_records_status_end
+    ON document_retention_records(retention_status, retention_end_date);
+-- Rows the sweeper may still transition
+CREATE INDEX IF NOT EXISTS idx_retention_records_sweep
+    ON document_retention_records(retention_end_date)
+    WHERE retention_status IN ('active', 'expiring_soon') AND NOT legal_hold;
+-- Keyset order for paging through destruction candidates
+CREATE INDEX IF NOT EXISTS idx_retention_records_destruction
+    ON document_retention_records(retention_end_date, record_id)
+    WHERE retention_status = 'expired' AND NOT legal_hold;
+
+CREATE TABLE IF NOT EXISTS document_retention_counts (
+    document_type TEXT NOT NULL,
+    retention_status TEXT NOT NULL,
+    document_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (document_type, retention_status)
+);
+
+-- ============================================
+-- Count maintenance (one delta per statement, not per row)
+-- ============================================
+CREATE OR REPLACE FUNCTION apply_retention_count_deltas()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO document_retention_counts AS c (document_type, retention_status, document_count)
+        SELECT document_type, retention_status, COUNT(*)
+        FROM new_rows
+        GROUP BY document_type, retention_status
+        ON CONFLICT (document_type, retention_status)
+        DO UPDATE SET document_count = c.document_count + EXCLUDED.document_count;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO document_retention_counts AS c (document_type, retention_status, document_count)
+        SELECT document_type, retention_status, SUM(delta)
+        FROM (
+            SELECT document_type, retention_status, 1 AS delta FROM new_rows
+            UNION ALL
+            SELECT document_type, retention_status, -1 AS delta FROM old_rows
+        ) changes
+        GROUP BY document_type, retention_status
+        HAVING SUM(delta) <> 0
+        ON CONFLICT (document_type, retention_status)
+        DO UPDATE SET document_count = c.document_count + EXCLUDED.document_count;
+    ELSE
+        INSERT INTO document_retention_counts AS c (document_type, retention_status, document_count)
+        SELECT document_type, retention_status, -COUNT(*)
+        FROM old_rows
+        GROUP BY document_type, retention_status
+        ON CONFLICT (document_type, retention_status)
+        DO UPDATE SET document_count = c.document_count + EXCLUDED.document_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS retention_counts_insert ON document_retention_records;
+CREATE TRIGGER retention_counts_insert
+    AFTER INSERT ON document_retention_records
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_retention_count_deltas();
+
+DROP TRIGGER IF EXISTS retention_counts_update ON document_retention_records;
+CREATE TRIGGER retention_counts_update
+    AFTER UPDATE ON document_retention_records
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_retention_count_deltas();
+
+DROP TRIGGER IF EXISTS retention_counts_delete ON document_retention_records;
+CREATE TRIGGER retention_counts_delete
+    AFTER DELETE ON document_retention_records
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_retention_count_deltas();
+
+-- ============================================
+-- Status sweep
+-- ============================================
+-- Transitions at most p_batch_size rows per status per call so each call is
+-- a short transaction; callers repeat until both counts come back below it.
+CREATE OR REPLACE FUNCTION sweep_document_retention(
+    p_today DATE,
+    p_expiring_days INTEGER DEFAULT 30,
+    p_batch_size INTEGER DEFAULT 5000
+)
+RETURNS TABLE(expired BIGINT, expiring_soon BIGINT) AS $$
+DECLARE
+    v_expired BIGINT;
+    v_expiring BIGINT;
+BEGIN
+    WITH batch AS (
+        SELECT record_id
+        FROM document_retention_records
+        WHERE retention_status IN ('active', 'expiring_soon')
+          AND NOT legal_hold
+          AND retention_end_date < p_today
+        ORDER BY retention_end_date
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE document_retention_records r
+    SET retention_status = 'expired', last_reviewed = NOW()
+    FROM batch
+    WHERE r.record_id = batch.record_id;
+    GET DIAGNOSTICS v_expired = ROW_COUNT;
+
+    WITH batch AS (
+        SELECT record_id
+        FROM document_retention_records
+        WHERE retention_status = 'active'
+          AND NOT legal_hold
+          AND retention_end_date >= p_today
+          AND retention_end_date <= p_today + p_expiring_days
+        ORDER BY retention_end_date
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE document_retention_records r
+    SET retention_status = 'expiring_soon', last_reviewed = NOW()
+    FROM batch
+    WHERE r.record_id = batch.record_id;
+    GET DIAGNOSTICS v_expiring = ROW_COUNT;
+
+    RETURN QUERY SELECT v_expired, v_expiring;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- Termination: I-9 retention is the later of hire + 3 years and termination + 1 year
+-- ============================================
+CREATE OR REPLACE FUNCTION apply_retention_termination(
+    p_employee_id TEXT,
+    p_termination_date DATE,
+    p_today DATE,
+    p_expiring_days INTEGER DEFAULT 30
+)
+RETURNS SETOF document_retention_records AS $$
+    UPDATE document_retention_records r
+    SET termination_date = p_termination_date,
+        retention_end_date = t.end_date,
+        retention_status = CASE
+            WHEN r.legal_hold THEN 'hold'
+            WHEN r.retention_status = 'destroyed' THEN 'destroyed'
+            WHEN t.end_date < p_today THEN 'expired'
+            WHEN t.end_date <= p_today + p_expiring_days THEN 'expiring_soon'
+            ELSE 'active'
+        END,
+        last_reviewed = NOW(),
+        review_notes = 'Updated due to termination: ' || t.method
+    FROM (
+        SELECT
+            record_id,
+            GREATEST(hire_date + 1095, p_termination_date + 365) AS end_date,
+            CASE WHEN hire_date + 1095 > p_termination_date + 365
+                THEN '3 years from hire date'
+                ELSE '1 year from termination date'
+            END AS method
+        FROM document_retention_records
+        WHERE employee_id = p_employee_id
+          AND document_type = 'i9_form'
+          AND hire_date IS NOT NULL
+    ) t
+    WHERE r.record_id = t.record_id
+      AND r.retention_end_date IS DISTINCT FROM t.end_date
+    RETURNING r.*;
+$$ LANGUAGE sql;
+
+-- ============================================
+-- Report aggregates
+-- ============================================
+CREATE OR REPLACE FUNCTION retention_report(p_start DATE, p_end DATE, p_today DATE, p_max_findings INTEGER DEFAULT 100)
+RETURNS TABLE(
+    documents_created BIGINT,
+    documents_destroyed BIGINT,
+    documents_within_retention BIGINT,
+    documents_past_retention BIGINT,
+    average_retention_days BIGINT,
+    i9_mismatched_documents TEXT[]
+) AS $$
+    SELECT
+        COUNT(*) FILTER (WHERE created_date BETWEEN p_start AND p_end),
+        COUNT(*) FILTER (WHERE destroyed_date BETWEEN p_start AND p_end),
+        COUNT(*) FILTER (WHERE retention_status = 'active'),
+        COUNT(*) FILTER (WHERE retention_status = 'expired'),
+        COALESCE(AVG(COALESCE(destroyed_date, p_today) - created_date)::BIGINT, 0),
+        COALESCE((ARRAY_AGG(document_id) FILTER (
+            WHERE document_type = 'i9_form'
+              AND hire_date IS NOT NULL
+              AND retention_end_date <> CASE
+                  WHEN termination_date IS NULL THEN hire_date + 1095
+                  ELSE GREATEST(hire_date + 1095, termination_date + 365)
+              END
+        ))[1:p_max_findings], ARRAY[]::TEXT[])
+    FROM document_retention_records;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,181 @@
+-- Migration: Set-based HR manager and property listings
+-- Date: 2025-08-17
+-- Description: /hr/managers looked up each manager's properties and
+-- /hr/properties queried property_managers once per property, so listing
+-- pages cost one round trip per row. list_hr_managers() and
+-- list_hr_properties() return a page of rows with their assignments (and,
+-- for properties, manager and employee counts) from a single query, with
+-- filtering, search, sorting and pagination done in SQL. Rows are returned
+-- as JSONB so the functions do not depend on the exact column types of the
+-- users/properties tables. The search/sort/limit/offset arguments are
+-- optional; NULL limit returns every row. total_count is the number of
+-- matching rows whatever the page; a page past the end returns a single row
+-- with a NULL manager/property and the total.
+
+-- ============================================
+-- Indexes used by the joins and counts
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_property_managers_manager ON property_managers(manager_id);
+CREATE INDEX IF NOT EXISTS idx_property_managers_property ON property_managers(property_id);
+CREATE INDEX IF NOT EXISTS idx_employees_property_id ON employees(property_id);
+CREATE INDEX IF NOT EXISTS idx_users_role_active ON users(role, is_active);
+
+-- ============================================
+-- Helpers
+-- ============================================
+-- ILIKE pattern that matches p_search literally anywhere in the value
+CREATE OR REPLACE FUNCTION hr_search_pattern(p_search TEXT)
+RETURNS TEXT AS $$
+    SELECT '%' || replace(replace(replace(p_search, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+$$ LANGUAGE sql IMMUTABLE;
+
+-- ============================================
+-- Managers with their properties
+-- ============================================
+CREATE OR REPLACE FUNCTION list_hr_managers(
+    p_property_id TEXT DEFAULT NULL,
+    p_is_active BOOLEAN DEFAULT NULL,
+    p_include_inactive BOOLEAN DEFAULT FALSE,
+    p_search TEXT DEFAULT NULL,
+    p_sort TEXT DEFAULT 'created_at',
+    p_descending BOOLEAN DEFAULT FALSE,
+    p_limit INTEGER DEFAULT NULL,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE(manager JSONB, total_count BIGINT) AS $$
+    WITH matched AS (
+        SELECT
+            u.id, u.email, u.first_name, u.last_name,
+            COALESCE(u.is_active, TRUE) AS is_active,
+            u.created_at,
+            ROW_NUMBER() OVER (ORDER BY
+                CASE WHEN NOT p_descending THEN CASE p_sort
+                    WHEN 'email' THEN lower(u.email)
+                    WHEN 'first_name' THEN lower(u.first_name)
+                    WHEN 'last_name' THEN lower(u.last_name)
+                END END ASC,
+                CASE WHEN p_descending THEN CASE p_sort
+                    WHEN 'email' THEN lower(u.email)
+                    WHEN 'first_name' THEN lower(u.first_name)
+                    WHEN 'last_name' THEN lower(u.last_name)
+                END END DESC,
+                CASE WHEN NOT p_descending THEN u.created_at END ASC,
+                CASE WHEN p_descending THEN u.created_at END DESC,
+                u.id
+            ) AS position
+        FROM users u
+        WHERE u.role = 'manager'
+          AND CASE
+                WHEN p_is_active IS NOT NULL THEN COALESCE(u.is_active, TRUE) = p_is_active
+                WHEN NOT p_include_inactive THEN COALESCE(u.is_active, TRUE)
+                ELSE TRUE
+              END
+          AND (p_search IS NULL
+               OR u.email ILIKE hr_search_pattern(p_search)
+               OR u.first_name ILIKE hr_search_pattern(p_search)
+               OR u.last_name ILIKE hr_search_pattern(p_search))
+          AND (p_property_id IS NULL OR EXISTS (
+                SELECT 1 FROM property_managers pm
+                WHERE pm.manager_id = u.id AND pm.property_id::TEXT = p_property_id
+              ))
+    ),
+    total AS (
+        SELECT COUNT(*) AS total_count FROM matched
+    ),
+    page AS (
+        SELECT * FROM matched
+        ORDER BY position
+        LIMIT p_limit OFFSET p_offset
+    )
+    SELECT
+        CASE WHEN page.id IS NOT NULL THEN jsonb_build_object(
+            'id', page.id,
+            'email', page.email,
+            'first_name', page.first_name,
+            'last_name', page.last_name,
+            'is_active', page.is_active,
+            'created_at', page.created_at,
+            'properties', COALESCE(assigned.properties, '[]'::JSONB)
+        ) END,
+        total.total_count
+    FROM total
+    LEFT JOIN page ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT jsonb_agg(
+            jsonb_build_object('id', p.id, 'name', p.name, 'city', p.city, 'state', p.state)
+            ORDER BY p.name
+        ) AS properties
+        FROM property_managers pm
+        JOIN properties p ON p.id = pm.property_id
+        WHERE pm.manager_id = page.id
+    ) assigned ON TRUE
+    ORDER BY page.position;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- Properties with their managers and counts
+-- ============================================
+CREATE OR REPLACE FUNCTION list_hr_properties(
+    p_search TEXT DEFAULT NULL,
+    p_is_active BOOLEAN DEFAULT NULL,
+    p_sort TEXT DEFAULT 'created_at',
+    p_descending BOOLEAN DEFAULT FALSE,
+    p_limit INTEGER DEFAULT NULL,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE(property JSONB, total_count BIGINT) AS $$
+    WITH matched AS (
+        SELECT
+            p.*,
+            ROW_NUMBER() OVER (ORDER BY
+                CASE WHEN NOT p_descending THEN CASE p_sort
+                    WHEN 'name' THEN lower(p.name)
+                    WHEN 'city' THEN lower(p.city)
+                    WHEN 'state' THEN lower(p.state)
+                END END ASC,
+                CASE WHEN p_descending THEN CASE p_sort
+                    WHEN 'name' THEN lower(p.name)
+                    WHEN 'city' THEN lower(p.city)
+                    WHEN 'state' THEN lower(p.state)
+                END END DESC,
+                CASE WHEN NOT p_descending THEN p.created_at END ASC,
+                CASE WHEN p_descending THEN p.created_at END DESC,
+                p.id
+            ) AS position
+        FROM properties p
+        WHERE (p_is_active IS NULL OR COALESCE(p.is_active, TRUE) = p_is_active)
+          AND (p_search IS NULL
+               OR p.name ILIKE hr_search_pattern(p_search)
+               OR p.city ILIKE hr_search_pattern(p_search)
+               OR p.state ILIKE hr_search_pattern(p_search)
+               OR p.address ILIKE hr_search_pattern(p_search))
+    ),
+    total AS (
+        SELECT COUNT(*) AS total_count FROM matched
+    ),
+    page AS (
+        SELECT * FROM matched
+        ORDER BY position
+        LIMIT p_limit OFFSET p_offset
+    )
+    SELECT
+        CASE WHEN page.id IS NOT NULL THEN (to_jsonb(page) - 'position') || jsonb_build_object(
+            'manager_ids', COALESCE(managers.manager_ids, '[]'::JSONB),
+            'manager_count', COALESCE(managers.manager_count, 0),
+            'employee_count', COALESCE(staff.employee_count, 0)
+        ) END,
+        total.total_count
+    FROM total
+    LEFT JOIN page ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT jsonb_agg(pm.manager_id) AS manager_ids, COUNT(*) AS manager_count
+        FROM property_managers pm
+        WHERE pm.property_id = page.id
+    ) managers ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS employee_count
+        FROM employees e
+        WHERE e.property_id = page.id
+    ) staff ON TRUE
+    ORDER BY page.position;
+$$ LANGUAGE sql STABLE;
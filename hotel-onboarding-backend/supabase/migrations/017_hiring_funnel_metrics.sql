@@ -0,0 +1,173 @@
+-- Migration: SQL-aggregated manager performance and hiring funnel metrics
+-- Date: 2025-08-18
+-- Description: get_manager_performance loaded every application at a
+-- manager's properties into Python and ran a second query to compute the
+-- approval rate and time to decision. manager_hiring_metrics() and
+-- property_hiring_funnel() compute funnel counts by status, approval rate and
+-- average/median/p90 decision latency in the database, from a covering index
+-- on job_applications(property_id, applied_at), so the response is a few rows
+-- however long the application history gets. Both accept optional id lists
+-- and an applied_at window [p_since, p_until).
+
+-- ============================================
+-- Indexes
+-- ============================================
+-- Covers every column the aggregates read, so they run as index-only scans
+CREATE INDEX IF NOT EXISTS idx_job_applications_funnel
+    ON job_applications(property_id, applied_at)
+    INCLUDE (status, reviewed_by, reviewed_at);
+CREATE INDEX IF NOT EXISTS idx_job_applications_reviewed_by
+    ON job_applications(reviewed_by, reviewed_at)
+    WHERE reviewed_by IS NOT NULL;
+
+-- ============================================
+-- Per-manager metrics, by property and in total
+-- ============================================
+-- One row per (manager, assigned property) plus one total row per manager
+-- with property_id NULL. Funnel counts cover every application at the
+-- manager's properties; decisions, approvals and latency cover only the
+-- applications this manager reviewed.
+CREATE OR REPLACE FUNCTION manager_hiring_metrics(
+    p_manager_ids TEXT[] DEFAULT NULL,
+    p_property_ids TEXT[] DEFAULT NULL,
+    p_since TIMESTAMPTZ DEFAULT NULL,
+    p_until TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE(
+    manager_id TEXT,
+    manager_name TEXT,
+    property_id TEXT,
+    property_name TEXT,
+    applications BIGINT,
+    pending BIGINT,
+    approved BIGINT,
+    rejected BIGINT,
+    talent_pool BIGINT,
+    withdrawn BIGINT,
+    decisions BIGINT,
+    approvals BIGINT,
+    approval_rate NUMERIC,
+    avg_decision_hours NUMERIC,
+    median_decision_hours NUMERIC,
+    p90_decision_hours NUMERIC
+) AS $$
+    WITH scoped AS (
+        SELECT
+            pm.manager_id::TEXT AS manager_id,
+            trim(concat_ws(' ', u.first_name, u.last_name)) AS manager_name,
+            pm.property_id::TEXT AS property_id,
+            p.name AS property_name,
+            ja.id AS application_id,
+            ja.status,
+            ja.status IN ('approved', 'rejected', 'talent_pool')
+                AND ja.reviewed_by::TEXT = pm.manager_id::TEXT AS decided_by_manager,
+            EXTRACT(EPOCH FROM (ja.reviewed_at - ja.applied_at)) / 3600.0 AS decision_hours
+        FROM property_managers pm
+        JOIN users u ON u.id = pm.manager_id
+        JOIN properties p ON p.id = pm.property_id
+        LEFT JOIN job_applications ja
+            ON ja.property_id = pm.property_id
+           AND (p_since IS NULL OR ja.applied_at >= p_since)
+           AND (p_until IS NULL OR ja.applied_at < p_until)
+        WHERE (p_manager_ids IS NULL OR pm.manager_id::TEXT = ANY(p_manager_ids))
+          AND (p_property_ids IS NULL OR pm.property_id::TEXT = ANY(p_property_ids))
+    ),
+    aggregated AS (
+        SELECT
+            manager_id,
+            manager_name,
+            property_id,
+            property_name,
+            COUNT(application_id) AS applications,
+            COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+            COUNT(*) FILTER (WHERE status = 'approved') AS approved,
+            COUNT(*) FILTER (WHERE status = 'rejected') AS rejected,
+            COUNT(*) FILTER (WHERE status = 'talent_pool') AS talent_pool,
+            COUNT(*) FILTER (WHERE status = 'withdrawn') AS withdrawn,
+            COUNT(*) FILTER (WHERE decided_by_manager) AS decisions,
+            COUNT(*) FILTER (WHERE decided_by_manager AND status = 'approved') AS approvals,
+            AVG(decision_hours) FILTER (WHERE decided_by_manager) AS avg_decision_hours,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY decision_hours)
+                FILTER (WHERE decided_by_manager) AS median_decision_hours,
+            percentile_cont(0.9) WITHIN GROUP (ORDER BY decision_hours)
+                FILTER (WHERE decided_by_manager) AS p90_decision_hours
+        FROM scoped
+        GROUP BY GROUPING SETS ((manager_id, manager_name, property_id, property_name), (manager_id, manager_name))
+    )
+    SELECT
+        manager_id,
+        manager_name,
+        property_id,
+        property_name,
+        applications, pending, approved, rejected, talent_pool, withdrawn,
+        decisions,
+        approvals,
+        ROUND(approvals * 100.0 / NULLIF(decisions, 0), 2),
+        ROUND(avg_decision_hours::NUMERIC, 2),
+        ROUND(median_decision_hours::NUMERIC, 2),
+        ROUND(p90_decision_hours::NUMERIC, 2)
+    FROM aggregated
+    ORDER BY manager_id, property_id NULLS FIRST;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- Per-property hiring funnel
+-- ============================================
+-- Counts and latency over all reviewers, one row per property
+CREATE OR REPLACE FUNCTION property_hiring_funnel(
+    p_property_ids TEXT[] DEFAULT NULL,
+    p_since TIMESTAMPTZ DEFAULT NULL,
+    p_until TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE(
+    property_id TEXT,
+    property_name TEXT,
+    applications BIGINT,
+    pending BIGINT,
+    approved BIGINT,
+    rejected BIGINT,
+    talent_pool BIGINT,
+    withdrawn BIGINT,
+    decisions BIGINT,
+    approval_rate NUMERIC,
+    avg_decision_hours NUMERIC,
+    median_decision_hours NUMERIC,
+    p90_decision_hours NUMERIC
+) AS $$
+    WITH aggregated AS (
+        SELECT
+            p.id::TEXT AS property_id,
+            p.name AS property_name,
+            COUNT(ja.id) AS applications,
+            COUNT(*) FILTER (WHERE ja.status = 'pending') AS pending,
+            COUNT(*) FILTER (WHERE ja.status = 'approved') AS approved,
+            COUNT(*) FILTER (WHERE ja.status = 'rejected') AS rejected,
+            COUNT(*) FILTER (WHERE ja.status = 'talent_pool') AS talent_pool,
+            COUNT(*) FILTER (WHERE ja.status = 'withdrawn') AS withdrawn,
+            COUNT(*) FILTER (WHERE ja.status IN ('approved', 'rejected', 'talent_pool')) AS decisions,
+            AVG(EXTRACT(EPOCH FROM (ja.reviewed_at - ja.applied_at)) / 3600.0)
+                FILTER (WHERE ja.status IN ('approved', 'rejected', 'talent_pool')) AS avg_decision_hours,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM (ja.reviewed_at - ja.applied_at)) / 3600.0)
+                FILTER (WHERE ja.status IN ('approved', 'rejected', 'talent_pool')) AS median_decision_hours,
+            percentile_cont(0.9) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM (ja.reviewed_at - ja.applied_at)) / 3600.0)
+                FILTER (WHERE ja.status IN ('approved', 'rejected', 'talent_pool')) AS p90_decision_hours
+        FROM properties p
+        LEFT JOIN job_applications ja
+            ON ja.property_id = p.id
+           AND (p_since IS NULL OR ja.applied_at >= p_since)
+           AND (p_until IS NULL OR ja.applied_at < p_until)
+        WHERE p_property_ids IS NULL OR p.id::TEXT = ANY(p_property_ids)
+        GROUP BY p.id, p.name
+    )
+    SELECT
+        property_id,
+        property_name,
+        applications, pending, approved, rejected, talent_pool, withdrawn,
+        decisions,
+        ROUND(approved * 100.0 / NULLIF(decisions, 0), 2),
+        ROUND(avg_decision_hours::NUMERIC, 2),
+        ROUND(median_decision_hours::NUMERIC, 2),
+        ROUND(p90_decision_hours::NUMERIC, 2)
+    FROM aggregated
+    ORDER BY property_name, property_id;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,176 @@
+-- Migration: Set-based bulk employee messaging with delivery tracking
+-- Date: 2025-08-19
+-- Description: bulk_message_employees loaded every matching employee into
+-- Python, wrote one communication row per recipient and returned the whole
+-- recipient list in the API response. queue_employee_message() now writes the
+-- message, resolves recipients from the employee filters inside the database
+-- and writes the in-app inbox rows and one delivery row per recipient and
+-- channel in a single call. The delivery worker pages through pending rows by
+-- (employee_id, channel) and writes statuses back a page at a time, and the
+-- API reports counts from employee_message_deliveries instead of listing
+-- recipients inline.
+--
+-- employee_messages and employee_communications usually exist already, with
+-- UUID keys, created by create_employee_management_tables.sql; the
+-- definitions below match it for databases that never ran that script.
+-- Bulk messages list their recipients in employee_message_deliveries, so
+-- recipient_ids defaults to an empty array.
+
+-- ============================================
+-- Tables
+-- ============================================
+CREATE TABLE IF NOT EXISTS employee_messages (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    sender_id UUID NOT NULL REFERENCES users(id),
+    recipient_ids JSONB NOT NULL DEFAULT '[]',
+    subject VARCHAR(255) NOT NULL,
+    content TEXT NOT NULL,
+    message_type VARCHAR(50) DEFAULT 'general',
+    priority VARCHAR(20) DEFAULT 'normal',
+    template_id UUID,
+    status VARCHAR(50) DEFAULT 'sent',
+    sent_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE employee_messages ALTER COLUMN recipient_ids SET DEFAULT '[]';
+ALTER TABLE employee_messages ADD COLUMN IF NOT EXISTS recipient_filters JSONB;
+ALTER TABLE employee_messages ADD COLUMN IF NOT EXISTS channels TEXT[];
+ALTER TABLE employee_messages ADD COLUMN IF NOT EXISTS recipients_count INTEGER;
+ALTER TABLE employee_messages ADD COLUMN IF NOT EXISTS completed_at TIMESTAMPTZ;
+
+CREATE TABLE IF NOT EXISTS employee_communications (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    employee_id UUID NOT NULL REFERENCES employees(id) ON DELETE CASCADE,
+    message_id UUID REFERENCES employee_messages(id),
+    type VARCHAR(100) NOT NULL,
+    subject VARCHAR(255),
+    content TEXT,
+    sender_id UUID REFERENCES users(id),
+    read_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_employee_communications_employee
+    ON employee_communications(employee_id, created_at DESC);
+
+-- Recipient filter column, also added by create_employee_management_tables.sql
+ALTER TABLE employees ADD COLUMN IF NOT EXISTS lifecycle_stage VARCHAR(50) DEFAULT 'onboarding';
+
+-- employee_id is kept as text so delivery pages can start after ('', '')
+CREATE TABLE IF NOT EXISTS employee_message_deliveries (
+    message_id UUID NOT NULL REFERENCES employee_messages(id) ON DELETE CASCADE,
+    employee_id TEXT NOT NULL,
+    channel TEXT NOT NULL CHECK (channel IN ('in_app', 'email', 'websocket')),
+    recipient_user_id TEXT,
+    recipient_email TEXT,
+    recipient_name TEXT,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (
+        status IN ('pending', 'delivered', 'skipped', 'failed')
+    ),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    delivered_at TIMESTAMPTZ,
+    PRIMARY KEY (message_id, employee_id, channel)
+);
+
+-- Summary counts and status-filtered delivery pages
+CREATE INDEX IF NOT EXISTS idx_message_deliveries_status
+    ON employee_message_deliveries(message_id, status, employee_id, channel);
+
+-- ============================================
+-- Queue a message: message row, then recipients and fan-out rows
+-- ============================================
+-- Writes inbox and delivery rows for an employee_messages row that already
+-- exists and returns the number of recipients. p_filters may hold
+-- property_id, department, employment_status and lifecycle_stage; absent
+-- keys match all.
+CREATE OR REPLACE FUNCTION fan_out_employee_message(
+    p_message_id UUID,
+    p_filters JSONB,
+    p_channels TEXT[],
+    p_sender_id UUID,
+    p_subject TEXT,
+    p_content TEXT
+)
+RETURNS INTEGER AS $$
+    WITH recipients AS MATERIALIZED (
+        SELECT
+            e.id AS employee_id,
+            e.user_id::TEXT AS user_id,
+            COALESCE(u.email, e.personal_info->>'email') AS email,
+            NULLIF(trim(concat_ws(' ',
+                COALESCE(u.first_name, e.personal_info->>'first_name'),
+                COALESCE(u.last_name, e.personal_info->>'last_name'))), '') AS name
+        FROM employees e
+        LEFT JOIN users u ON u.id = e.user_id
+        WHERE (p_filters->>'property_id' IS NULL OR e.property_id::TEXT = p_filters->>'property_id')
+          AND (p_filters->>'department' IS NULL OR e.department = p_filters->>'department')
+          AND (p_filters->>'employment_status' IS NULL OR e.employment_status = p_filters->>'employment_status')
+          AND (p_filters->>'lifecycle_stage' IS NULL OR e.lifecycle_stage = p_filters->>'lifecycle_stage')
+    ),
+    inbox AS (
+        INSERT INTO employee_communications (employee_id, message_id, type, subject, content, sender_id, created_at)
+        SELECT r.employee_id, p_message_id, 'message_received', p_subject, p_content, p_sender_id, NOW()
+        FROM recipients r
+        WHERE 'in_app' = ANY(p_channels)
+    ),
+    deliveries AS (
+        INSERT INTO employee_message_deliveries (
+            message_id, employee_id, channel, recipient_user_id, recipient_email, recipient_name,
+            status, delivered_at
+        )
+        SELECT
+            p_message_id, r.employee_id::TEXT, c.channel, r.user_id, r.email, r.name,
+            CASE
+                -- The inbox row written above is the in-app delivery
+                WHEN c.channel = 'in_app' THEN 'delivered'
+                WHEN c.channel = 'email' AND r.email IS NULL THEN 'skipped'
+                WHEN c.channel = 'websocket' AND r.user_id IS NULL THEN 'skipped'
+                ELSE 'pending'
+            END,
+            CASE WHEN c.channel = 'in_app' THEN NOW() END
+        FROM recipients r
+        CROSS JOIN unnest(p_channels) AS c(channel)
+        ON CONFLICT (message_id, employee_id, channel) DO NOTHING
+    )
+    SELECT COUNT(*)::INTEGER FROM recipients;
+$$ LANGUAGE sql VOLATILE;
+
+-- Inserts the message first, so the inbox rows' foreign key to it holds,
+-- then fans out and records the recipient count. Returns that count.
+DROP FUNCTION IF EXISTS queue_employee_message(TEXT, JSONB, TEXT[], TEXT, TEXT, TEXT);
+
+CREATE OR REPLACE FUNCTION queue_employee_message(
+    p_message_id UUID,
+    p_filters JSONB,
+    p_channels TEXT[],
+    p_sender_id UUID,
+    p_subject TEXT,
+    p_content TEXT,
+    p_message_type TEXT DEFAULT 'general',
+    p_priority TEXT DEFAULT 'normal',
+    p_template_id UUID DEFAULT NULL
+)
+RETURNS INTEGER AS $$
+DECLARE
+    recipients INTEGER;
+BEGIN
+    INSERT INTO employee_messages (
+        id, sender_id, subject, content, message_type, priority, template_id,
+        status, recipient_filters, channels, sent_at, created_at
+    )
+    VALUES (
+        p_message_id, p_sender_id, p_subject, p_content, p_message_type, p_priority, p_template_id,
+        'queued', p_filters, p_channels, NOW(), NOW()
+    );
+
+    recipients := fan_out_employee_message(p_message_id, p_filters, p_channels, p_sender_id, p_subject, p_content);
+
+    UPDATE employee_messages
+    SET recipients_count = recipients,
+        status = CASE WHEN recipients > 0 THEN 'sending' ELSE 'no_recipients' END
+    WHERE id = p_message_id;
+    RETURN recipients;
+END;
+$$ LANGUAGE plpgsql;
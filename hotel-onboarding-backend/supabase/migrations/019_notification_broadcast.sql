@@ -0,0 +1,150 @@
+-- Migration: Set-based role and property notification broadcasts
+-- Date: 2025-08-20
+-- Description: broadcast_notification selected every matching user into
+-- Python and called send_notification once per user and channel, each doing a
+-- preferences lookup and a notifications insert, and the /broadcast endpoint
+-- in notification_api.py only created a single notification.
+-- broadcast_notifications() resolves the audience by role and property
+-- (direct users.property_id, manager assignments and employee records),
+-- honours the per-channel opt-outs in user_preferences and writes every
+-- notification row in one INSERT ... SELECT. In-app rows are stored as sent;
+-- email rows are stored as queued so the notification dispatcher delivers them
+-- at its own rate. Of the user ids passed in p_online_user_ids (the sessions
+-- currently connected to this instance) it returns those that are recipients,
+-- with their in-app notification id, so only they get a WebSocket push.
+--
+-- The notifications table from 004 predates the notification dispatcher, so
+-- it gains the columns NotificationService writes (one row per channel and
+-- recipient), the dispatcher's statuses and notification types, and loses the
+-- NOT NULLs on the 004-only user_type and title columns.
+
+-- ============================================
+-- Dispatcher columns and constraints
+-- ============================================
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS channel VARCHAR(20);
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS recipient TEXT;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS subject TEXT;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS body TEXT;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS html_body TEXT;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS scheduled_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS sent_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS retry_count INTEGER DEFAULT 0;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS metadata JSONB DEFAULT '{}'::jsonb;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS error_message TEXT;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS broadcast_id TEXT;
+
+ALTER TABLE notifications ALTER COLUMN user_type DROP NOT NULL;
+ALTER TABLE notifications ALTER COLUMN title DROP NOT NULL;
+
+-- The dispatcher's statuses (NotificationStatus), plus 'cancelled' from 004
+ALTER TABLE notifications DROP CONSTRAINT IF EXISTS notifications_status_check;
+ALTER TABLE notifications ADD CONSTRAINT notifications_status_check CHECK (status IN (
+    'pending', 'queued', 'sending', 'sent', 'delivered', 'failed', 'retry', 'dead_letter', 'cancelled'
+));
+
+-- 004's types plus NotificationType
+ALTER TABLE notifications DROP CONSTRAINT IF EXISTS notifications_type_check;
+ALTER TABLE notifications ADD CONSTRAINT notifications_type_check CHECK (type IN (
+    'new_application', 'application_approved', 'application_rejected',
+    'onboarding_reminder', 'deadline_reminder', 'document_uploaded',
+    'system_alert', 'maintenance_notice', 'policy_update',
+    'bulk_operation_complete', 'report_ready', 'compliance_alert',
+    'application_received', 'onboarding_started', 'onboarding_complete',
+    'i9_deadline', 'w4_reminder', 'document_expiring', 'system_announcement',
+    'deadline_alert', 'compliance_warning'
+));
+
+-- mark_as_read() stamps read_at without the 004 is_read flag
+ALTER TABLE notifications DROP CONSTRAINT IF EXISTS valid_read_timestamp;
+ALTER TABLE notifications ADD CONSTRAINT valid_read_timestamp CHECK (
+    read_at IS NULL OR read_at >= created_at
+);
+
+-- ============================================
+-- Indexes
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_notifications_broadcast
+    ON notifications(broadcast_id, channel, status)
+    WHERE broadcast_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_users_property_role ON users(property_id, role);
+CREATE INDEX IF NOT EXISTS idx_employees_user_property ON employees(user_id, property_id);
+
+-- ============================================
+-- Audience resolution and notification rows
+-- ============================================
+-- p_roles / p_property_ids NULL match every role / property. p_channels may
+-- hold 'in_app' and 'email'; recipients without an email address or who have
+-- turned a channel off in user_preferences get no row for that channel.
+-- p_priority is one of 004's priority names ('low' .. 'urgent').
+CREATE OR REPLACE FUNCTION broadcast_notifications(
+    p_broadcast_id TEXT,
+    p_roles TEXT[],
+    p_property_ids TEXT[],
+    p_channels TEXT[],
+    p_type TEXT,
+    p_subject TEXT,
+    p_body TEXT,
+    p_priority TEXT,
+    p_metadata JSONB,
+    p_online_user_ids TEXT[] DEFAULT NULL
+)
+RETURNS TABLE(
+    recipients_count BIGINT,
+    in_app_count BIGINT,
+    email_count BIGINT,
+    online_recipients JSONB
+) AS $$
+    WITH recipients AS MATERIALIZED (
+        SELECT
+            u.id::TEXT AS user_id,
+            u.email,
+            COALESCE(up.in_app_notifications, TRUE) AS in_app_enabled,
+            COALESCE(up.email_notifications, TRUE) AS email_enabled
+        FROM users u
+        LEFT JOIN user_preferences up ON up.user_id = u.id
+        WHERE COALESCE(u.is_active, TRUE)
+          AND (p_roles IS NULL OR u.role = ANY(p_roles))
+          AND (p_property_ids IS NULL
+               OR u.property_id::TEXT = ANY(p_property_ids)
+               OR EXISTS (
+                    SELECT 1 FROM property_managers pm
+                    WHERE pm.manager_id = u.id AND pm.property_id::TEXT = ANY(p_property_ids)
+               )
+               OR EXISTS (
+                    SELECT 1 FROM employees e
+                    WHERE e.user_id = u.id AND e.property_id::TEXT = ANY(p_property_ids)
+               ))
+    ),
+    inserted AS (
+        INSERT INTO notifications (
+            id, type, channel, recipient, subject, body, priority, status,
+            scheduled_at, sent_at, retry_count, metadata, broadcast_id, created_at
+        )
+        SELECT
+            gen_random_uuid(), p_type, c.channel,
+            CASE WHEN c.channel = 'email' THEN r.email ELSE r.user_id END,
+            p_subject, p_body, p_priority,
+            CASE WHEN c.channel = 'in_app' THEN 'sent' ELSE 'queued' END,
+            -- Due now, so the dispatcher's next scheduled-load pass picks email rows up
+            CASE WHEN c.channel = 'email' THEN NOW() END,
+            CASE WHEN c.channel = 'in_app' THEN NOW() END,
+            0, p_metadata, p_broadcast_id, NOW()
+        FROM recipients r
+        CROSS JOIN unnest(p_channels) AS c(channel)
+        WHERE (c.channel = 'in_app' AND r.in_app_enabled)
+           OR (c.channel = 'email' AND r.email_enabled AND r.email IS NOT NULL)
+        RETURNING id::TEXT AS id, channel, recipient
+    )
+    SELECT
+        (SELECT COUNT(*) FROM recipients),
+        COUNT(*) FILTER (WHERE i.channel = 'in_app'),
+        COUNT(*) FILTER (WHERE i.channel = 'email'),
+        COALESCE(
+            jsonb_object_agg(i.recipient, i.id) FILTER (
+                WHERE i.channel = 'in_app' AND i.recipient = ANY(p_online_user_ids)
+            ),
+            '{}'::jsonb
+        )
+    FROM inserted i;
+$$ LANGUAGE sql VOLATILE;
@@ -0,0 +1,228 @@
+-- Migration: Transactional application approval with an outbox for side effects
+-- Date: 2025-08-21
+-- Description: /applications/{id}/approve updated the application, created
+-- the employee, started the onboarding session and moved competing
+-- applications to the talent pool in separate round trips, then sent two
+-- emails over SMTP before responding. A failure part way through left an
+-- approved application with no employee or session, and the response waited
+-- on SMTP. approve_job_application() does all of the database work in one
+-- transaction and records the emails as outbox_events rows in that same
+-- transaction; the outbox dispatcher sends them after commit and retries
+-- failures with backoff.
+
+-- ============================================
+-- Outbox
+-- ============================================
+CREATE TABLE IF NOT EXISTS outbox_events (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    event_type TEXT NOT NULL,
+    aggregate_type TEXT NOT NULL,
+    aggregate_id TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (
+        status IN ('pending', 'processing', 'sent', 'dead')
+    ),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    locked_at TIMESTAMPTZ,
+    last_error TEXT,
+    processed_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Claim scans only touch undelivered rows
+CREATE INDEX IF NOT EXISTS idx_outbox_events_due
+    ON outbox_events(available_at)
+    WHERE status IN ('pending', 'processing');
+CREATE INDEX IF NOT EXISTS idx_outbox_events_aggregate
+    ON outbox_events(aggregate_type, aggregate_id);
+
+-- Competing-application lookup for the talent pool move
+CREATE INDEX IF NOT EXISTS idx_job_applications_open_position
+    ON job_applications(property_id, position)
+    WHERE status = 'pending';
+
+-- Claims up to p_limit due events for one dispatcher. Rows stuck in
+-- 'processing' longer than p_lock_timeout (a dispatcher that died mid-send)
+-- are claimed again. SKIP LOCKED lets several workers poll concurrently.
+CREATE OR REPLACE FUNCTION claim_outbox_events(
+    p_limit INTEGER DEFAULT 50,
+    p_lock_timeout INTERVAL DEFAULT INTERVAL '5 minutes'
+)
+RETURNS TABLE(id TEXT, event_type TEXT, payload JSONB, attempts INTEGER) AS $$
+    UPDATE outbox_events o
+    SET status = 'processing',
+        locked_at = NOW(),
+        attempts = o.attempts + 1
+    WHERE o.id IN (
+        SELECT e.id
+        FROM outbox_events e
+        WHERE e.available_at <= NOW()
+          AND (e.status = 'pending'
+               OR (e.status = 'processing' AND e.locked_at < NOW() - p_lock_timeout))
+        ORDER BY e.available_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING o.id::TEXT, o.event_type, o.payload, o.attempts;
+$$ LANGUAGE sql VOLATILE;
+
+-- Writes back one dispatcher batch: each claimed event becomes 'sent',
+-- 'dead' or 'pending' again, retried p_retry_in seconds from now. Returns the
+-- number of events updated.
+CREATE OR REPLACE FUNCTION complete_outbox_events(
+    p_ids TEXT[],
+    p_statuses TEXT[],
+    p_errors TEXT[],
+    p_retry_in FLOAT8[]
+)
+RETURNS INTEGER AS $$
+    WITH updated AS (
+        UPDATE outbox_events o
+        SET status = u.status,
+            last_error = u.error,
+            locked_at = NULL,
+            processed_at = CASE WHEN u.status = 'sent' THEN NOW() END,
+            available_at = NOW() + make_interval(secs => u.retry_in)
+        FROM unnest(p_ids, p_statuses, p_errors, p_retry_in) AS u(id, status, error, retry_in)
+        WHERE o.id::TEXT = u.id
+        RETURNING o.id
+    )
+    SELECT COUNT(*)::INTEGER FROM updated;
+$$ LANGUAGE sql VOLATILE;
+
+-- ============================================
+-- Approval
+-- ============================================
+-- Raises SQLSTATE P0002 when the application does not exist and 55000 when
+-- it is no longer pending; nothing is written in either case. p_employee
+-- holds position, hire_date, pay_rate, pay_frequency and personal_info.
+CREATE OR REPLACE FUNCTION approve_job_application(
+    p_application_id TEXT,
+    p_reviewer_id TEXT,
+    p_employee JSONB,
+    p_token TEXT,
+    p_expires_at TIMESTAMPTZ,
+    p_onboarding_url TEXT
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_application job_applications%ROWTYPE;
+    -- Assigned from TEXT so the ids match whatever type the users table uses
+    v_reviewer_id users.id%TYPE := p_reviewer_id;
+    v_employee_id employees.id%TYPE;
+    v_session_id onboarding_sessions.id%TYPE;
+    v_talent_pool_count INTEGER;
+    v_property_name TEXT;
+    v_manager_name TEXT;
+    v_manager_email TEXT;
+    v_applicant_name TEXT;
+    v_email_payload JSONB;
+BEGIN
+    SELECT * INTO v_application
+    FROM job_applications
+    WHERE id::TEXT = p_application_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Application % not found', p_application_id USING ERRCODE = 'P0002';
+    END IF;
+    IF v_application.status <> 'pending' THEN
+        RAISE EXCEPTION 'Application % is %, not pending', p_application_id, v_application.status
+            USING ERRCODE = '55000';
+    END IF;
+
+    UPDATE job_applications
+    SET status = 'approved', reviewed_by = v_reviewer_id, reviewed_at = NOW(), updated_at = NOW()
+    WHERE id = v_application.id;
+
+    INSERT INTO employees (
+        id, application_id, property_id, manager_id, department, position, hire_date,
+        pay_rate, pay_frequency, employment_type, personal_info,
+        employment_status, onboarding_status, created_at
+    )
+    VALUES (
+        gen_random_uuid(), v_application.id, v_application.property_id, v_reviewer_id,
+        v_application.department, p_employee->>'position', (p_employee->>'hire_date')::DATE,
+        (p_employee->>'pay_rate')::NUMERIC, p_employee->>'pay_frequency',
+        COALESCE(v_application.applicant_data->>'employment_type', 'full_time'),
+        COALESCE(p_employee->'personal_info', '{}'::jsonb),
+        'pending_onboarding', 'not_started', NOW()
+    )
+    RETURNING id INTO v_employee_id;
+
+    INSERT INTO onboarding_sessions (
+        id, employee_id, application_id, property_id, manager_id, token,
+        status, current_step, expires_at, created_at, updated_at
+    )
+    VALUES (
+        gen_random_uuid(), v_employee_id, v_application.id, v_application.property_id, v_reviewer_id,
+        p_token, 'in_progress', 'welcome', p_expires_at, NOW(), NOW()
+    )
+    RETURNING id INTO v_session_id;
+
+    INSERT INTO onboarding_tokens (employee_id, token, token_type, expires_at, session_id, created_by)
+    VALUES (v_employee_id, p_token, 'onboarding', p_expires_at, v_session_id, v_reviewer_id);
+
+    WITH moved AS (
+        UPDATE job_applications
+        SET status = 'talent_pool', talent_pool_date = NOW(),
+            reviewed_by = v_reviewer_id, reviewed_at = NOW(), updated_at = NOW()
+        WHERE property_id = v_application.property_id
+          AND position = v_application.position
+          AND status = 'pending'
+          AND id <> v_application.id
+        RETURNING id
+    ),
+    history AS (
+        INSERT INTO application_status_history (
+            id, application_id, previous_status, new_status, changed_by, changed_at, reason, notes
+        )
+        SELECT gen_random_uuid(), v_application.id, 'pending', 'approved', v_reviewer_id, NOW(), NULL,
+               'Employee ' || v_employee_id::TEXT || ' created'
+        UNION ALL
+        SELECT gen_random_uuid(), m.id, 'pending', 'talent_pool', v_reviewer_id, NOW(),
+               'Position filled', 'Filled by application ' || v_application.id::TEXT
+        FROM moved m
+    )
+    SELECT COUNT(*) INTO v_talent_pool_count FROM moved;
+
+    SELECT p.name INTO v_property_name FROM properties p WHERE p.id = v_application.property_id;
+    SELECT NULLIF(trim(concat_ws(' ', u.first_name, u.last_name)), ''), u.email
+    INTO v_manager_name, v_manager_email
+    FROM users u WHERE u.id = v_reviewer_id;
+
+    v_applicant_name := trim(concat_ws(' ',
+        v_application.applicant_data->>'first_name', v_application.applicant_data->>'last_name'));
+    v_email_payload := jsonb_build_object(
+        'applicant_email', v_application.applicant_data->>'email',
+        'applicant_name', v_applicant_name,
+        'property_name', COALESCE(v_property_name, 'Hotel Property'),
+        'position', v_application.position,
+        'job_title', p_employee->>'position',
+        'start_date', p_employee->>'hire_date',
+        'start_time', p_employee->'personal_info'->>'start_time',
+        'pay_rate', (p_employee->>'pay_rate')::NUMERIC,
+        'onboarding_url', p_onboarding_url,
+        'expires_at', p_expires_at,
+        'manager_name', COALESCE(v_manager_name, 'Hiring Manager'),
+        'manager_email', COALESCE(v_manager_email, 'manager@hotel.com')
+    );
+
+    INSERT INTO outbox_events (event_type, aggregate_type, aggregate_id, payload)
+    VALUES
+        ('application.approval_email', 'job_application', v_application.id::TEXT, v_email_payload),
+        ('onboarding.welcome_email', 'job_application', v_application.id::TEXT, v_email_payload);
+
+    RETURN jsonb_build_object(
+        'application_id', v_application.id::TEXT,
+        'property_id', v_application.property_id::TEXT,
+        'employee_id', v_employee_id::TEXT,
+        'session_id', v_session_id::TEXT,
+        'talent_pool_count', v_talent_pool_count,
+        'applicant_name', v_applicant_name,
+        'applicant_email', v_application.applicant_data->>'email',
+        'department', v_application.department
+    );
+END;
+$$ LANGUAGE plpgsql VOLATILE;
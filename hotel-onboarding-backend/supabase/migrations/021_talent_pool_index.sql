@@ -0,0 +1,221 @@
+-- Migration: Indexed talent-pool matching
+-- Date: 2025-08-22
+-- Description: /hr/applications/talent-pool loaded every talent-pool
+-- application and searched applicant_data in Python, and the pool grows with
+-- every approval. talent_pool_candidates keeps one row per pooled application
+-- with the matching attributes pulled out of applicant_data (availability
+-- date, shift, employment type, experience band, hotel experience). A trigger
+-- on job_applications adds, refreshes or removes the row whenever an
+-- application's status or data changes, so the table never needs a rebuild.
+-- match_talent_pool() ranks candidates for an opening and pages them in SQL.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ============================================
+-- Candidate table
+-- ============================================
+CREATE TABLE IF NOT EXISTS talent_pool_candidates (
+    application_id TEXT PRIMARY KEY,
+    property_id TEXT NOT NULL,
+    department TEXT,
+    position TEXT,
+    employment_type TEXT,
+    shift_preference TEXT,
+    available_from DATE,
+    -- 0: 0-1 years, 1: 2-5, 2: 6-10, 3: 10+
+    experience_rank SMALLINT NOT NULL DEFAULT 0,
+    hotel_experience BOOLEAN NOT NULL DEFAULT FALSE,
+    first_name TEXT,
+    last_name TEXT,
+    email TEXT,
+    search_text TEXT NOT NULL DEFAULT '',
+    applied_at TIMESTAMPTZ,
+    talent_pool_date TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_talent_pool_property_position
+    ON talent_pool_candidates(property_id, position, experience_rank DESC, talent_pool_date DESC);
+CREATE INDEX IF NOT EXISTS idx_talent_pool_property_department
+    ON talent_pool_candidates(property_id, department, experience_rank DESC, talent_pool_date DESC);
+CREATE INDEX IF NOT EXISTS idx_talent_pool_recent
+    ON talent_pool_candidates(property_id, talent_pool_date DESC);
+CREATE INDEX IF NOT EXISTS idx_talent_pool_search
+    ON talent_pool_candidates USING GIN (search_text gin_trgm_ops);
+
+-- ============================================
+-- Incremental maintenance
+-- ============================================
+CREATE OR REPLACE FUNCTION talent_pool_experience_rank(p_band TEXT)
+RETURNS SMALLINT AS $$
+    SELECT CASE p_band
+        WHEN '10+' THEN 3
+        WHEN '6-10' THEN 2
+        WHEN '2-5' THEN 1
+        ELSE 0
+    END::SMALLINT;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- A malformed start date must not make the application update fail
+CREATE OR REPLACE FUNCTION talent_pool_parse_date(p_value TEXT)
+RETURNS DATE AS $$
+BEGIN
+    RETURN p_value::DATE;
+EXCEPTION WHEN OTHERS THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Upserts the candidate rows for the given applications (NULL: every
+-- talent-pool application) from job_applications
+CREATE OR REPLACE FUNCTION refresh_talent_pool_candidates(p_application_ids TEXT[] DEFAULT NULL)
+RETURNS BIGINT AS $$
+    WITH upserted AS (
+        INSERT INTO talent_pool_candidates (
+            application_id, property_id, department, position, employment_type, shift_preference,
+            available_from, experience_rank, hotel_experience, first_name, last_name, email,
+            search_text, applied_at, talent_pool_date, updated_at
+        )
+        SELECT
+            ja.id::TEXT,
+            ja.property_id::TEXT,
+            ja.department,
+            ja.position,
+            ja.applicant_data->>'employment_type',
+            ja.applicant_data->>'shift_preference',
+            talent_pool_parse_date(ja.applicant_data->>'start_date'),
+            talent_pool_experience_rank(ja.applicant_data->>'experience_years'),
+            COALESCE(ja.applicant_data->>'hotel_experience' = 'yes', FALSE),
+            ja.applicant_data->>'first_name',
+            ja.applicant_data->>'last_name',
+            ja.applicant_data->>'email',
+            lower(concat_ws(' ', ja.applicant_data->>'first_name', ja.applicant_data->>'last_name',
+                            ja.applicant_data->>'email')),
+            ja.applied_at,
+            COALESCE(ja.talent_pool_date, NOW()),
+            NOW()
+        FROM job_applications ja
+        WHERE ja.status = 'talent_pool'
+          AND (p_application_ids IS NULL OR ja.id = ANY(p_application_ids::UUID[]))
+        ON CONFLICT (application_id) DO UPDATE SET
+            property_id = EXCLUDED.property_id,
+            department = EXCLUDED.department,
+            position = EXCLUDED.position,
+            employment_type = EXCLUDED.employment_type,
+            shift_preference = EXCLUDED.shift_preference,
+            available_from = EXCLUDED.available_from,
+            experience_rank = EXCLUDED.experience_rank,
+            hotel_experience = EXCLUDED.hotel_experience,
+            first_name = EXCLUDED.first_name,
+            last_name = EXCLUDED.last_name,
+            email = EXCLUDED.email,
+            search_text = EXCLUDED.search_text,
+            applied_at = EXCLUDED.applied_at,
+            talent_pool_date = EXCLUDED.talent_pool_date,
+            updated_at = NOW()
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM upserted;
+$$ LANGUAGE sql VOLATILE;
+
+CREATE OR REPLACE FUNCTION sync_talent_pool_candidate()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' OR NEW.status IS DISTINCT FROM 'talent_pool' THEN
+        DELETE FROM talent_pool_candidates
+        WHERE application_id = (CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END)::TEXT;
+    ELSE
+        PERFORM refresh_talent_pool_candidates(ARRAY[NEW.id::TEXT]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS job_applications_talent_pool_sync ON job_applications;
+CREATE TRIGGER job_applications_talent_pool_sync
+    AFTER INSERT OR DELETE OR UPDATE OF status, property_id, department, position, applicant_data, talent_pool_date
+    ON job_applications
+    FOR EACH ROW EXECUTE FUNCTION sync_talent_pool_candidate();
+
+-- Backfill the existing pool
+SELECT refresh_talent_pool_candidates();
+
+-- ============================================
+-- Ranked matching
+-- ============================================
+-- Candidates must match p_position or p_department when given (an opening
+-- with neither ranks the whole pool). The score weights an exact position
+-- match, experience, hotel experience, shift and employment type fit, and
+-- availability by p_available_by; ties go to the most recently pooled.
+-- p_limit NULL returns every row. total_count is the number of matching
+-- candidates; a page past the end returns a single row with a NULL candidate
+-- and the total.
+CREATE OR REPLACE FUNCTION match_talent_pool(
+    p_property_ids TEXT[] DEFAULT NULL,
+    p_department TEXT DEFAULT NULL,
+    p_position TEXT DEFAULT NULL,
+    p_employment_type TEXT DEFAULT NULL,
+    p_shift_preference TEXT DEFAULT NULL,
+    p_available_by DATE DEFAULT NULL,
+    p_min_experience INTEGER DEFAULT NULL,
+    p_search TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT NULL,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE(candidate JSONB, score INTEGER, total_count BIGINT) AS $$
+    WITH scored AS (
+        SELECT
+            c.*,
+            (CASE WHEN p_position IS NOT NULL AND c.position = p_position THEN 40 ELSE 0 END
+             + CASE WHEN p_department IS NOT NULL AND c.department = p_department THEN 15 ELSE 0 END
+             + c.experience_rank * 8
+             + CASE WHEN c.hotel_experience THEN 10 ELSE 0 END
+             + CASE WHEN p_shift_preference IS NOT NULL
+                         AND c.shift_preference IN (p_shift_preference, 'flexible') THEN 10 ELSE 0 END
+             + CASE WHEN p_employment_type IS NOT NULL AND c.employment_type = p_employment_type THEN 10 ELSE 0 END
+             + CASE WHEN p_available_by IS NOT NULL
+                         AND (c.available_from IS NULL OR c.available_from <= p_available_by) THEN 10 ELSE 0 END
+            ) AS score
+        FROM talent_pool_candidates c
+        WHERE (p_property_ids IS NULL OR c.property_id = ANY(p_property_ids))
+          AND (p_position IS NULL AND p_department IS NULL
+               OR c.position = p_position
+               OR c.department = p_department)
+          AND (p_min_experience IS NULL OR c.experience_rank >= p_min_experience)
+          AND (p_search IS NULL OR c.search_text ILIKE hr_search_pattern(lower(p_search)))
+    ),
+    total AS (
+        SELECT COUNT(*) AS total_count FROM scored
+    ),
+    page AS (
+        SELECT s.*
+        FROM scored s
+        ORDER BY s.score DESC, s.talent_pool_date DESC, s.application_id
+        LIMIT p_limit
+        OFFSET p_offset
+    )
+    -- applicant_data is read back only for the returned page
+    SELECT
+        CASE WHEN p.application_id IS NOT NULL THEN jsonb_build_object(
+            'id', p.application_id,
+            'property_id', p.property_id,
+            'department', p.department,
+            'position', p.position,
+            'applicant_data', ja.applicant_data,
+            'status', 'talent_pool',
+            'applied_at', p.applied_at,
+            'rejection_reason', ja.rejection_reason,
+            'talent_pool_date', p.talent_pool_date,
+            'employment_type', p.employment_type,
+            'shift_preference', p.shift_preference,
+            'available_from', p.available_from,
+            'experience_rank', p.experience_rank,
+            'hotel_experience', p.hotel_experience
+        ) END,
+        p.score,
+        total.total_count
+    FROM total
+    LEFT JOIN page p ON TRUE
+    LEFT JOIN job_applications ja ON ja.id = p.application_id::UUID
+    ORDER BY p.score DESC, p.talent_pool_date DESC, p.application_id;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,50 @@
+-- Migration: Claim scheduled notifications across workers
+-- Date: 2025-08-23
+-- Description: every app worker polled the notifications table for queued
+-- and retry rows and loaded the same ones onto its own timer wheel, so each
+-- scheduled email or SMS went out once per worker. claim_notifications()
+-- moves due rows to 'sending' with FOR UPDATE SKIP LOCKED, so concurrent
+-- workers never receive the same row, and stamps a lease in claimed_until.
+-- Rows a worker creates or re-schedules itself are written as 'sending' with
+-- a lease too. If a worker dies holding rows, another claims them once the
+-- lease has run out. Rows are due by the dispatcher's scheduled_at column
+-- (added in 019), not 004's scheduled_for.
+
+-- ============================================
+-- Column and index
+-- ============================================
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_notifications_claimable
+    ON notifications(scheduled_at NULLS FIRST)
+    WHERE status IN ('queued', 'retry', 'sending');
+
+-- ============================================
+-- Claim
+-- ============================================
+-- Claims up to p_limit rows that are queued or retrying and due by p_horizon
+-- (or unscheduled), or whose lease has expired. Each claimed row is leased
+-- until p_lease_seconds after the later of now and its scheduled_at.
+CREATE OR REPLACE FUNCTION claim_notifications(
+    p_horizon TIMESTAMP WITH TIME ZONE,
+    p_lease_seconds INTEGER,
+    p_limit INTEGER
+)
+RETURNS SETOF notifications AS $$
+    WITH due AS (
+        SELECT id
+        FROM notifications
+        WHERE (status IN ('queued', 'retry') AND (scheduled_at IS NULL OR scheduled_at <= p_horizon))
+           OR (status = 'sending' AND claimed_until < NOW())
+        ORDER BY scheduled_at NULLS FIRST
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE notifications n
+    SET status = 'sending',
+        claimed_until = GREATEST(NOW(), COALESCE(n.scheduled_at, NOW())) + make_interval(secs => p_lease_seconds),
+        updated_at = NOW()
+    FROM due
+    WHERE n.id = due.id
+    RETURNING n.*;
+$$ LANGUAGE sql VOLATILE;
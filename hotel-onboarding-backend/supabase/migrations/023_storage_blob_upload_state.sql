@@ -0,0 +1,131 @@
+-- Migration: Track upload state and generations for storage blobs
+-- Date: 2025-08-24
+-- Description: register_storage_uploads (013) told only the caller whose
+-- insert created a blob row to upload it; anyone registering the same content
+-- meanwhile got success for an object that might never exist. Blob rows now
+-- carry upload_state ('pending' until the owner calls
+-- mark_storage_blobs_uploaded), and registrants that do not own the upload
+-- wait for that state, taking the upload over once the owner's lease runs out.
+-- Every blob row also gets its own object path (the sha256 plus the id of the
+-- document that created the row), so when release_storage_documents drops the
+-- last reference and the object is removed afterwards, a blob registered again
+-- in between is written to a different path and cannot be deleted by mistake.
+
+-- ============================================
+-- Columns
+-- ============================================
+-- Blobs written before this migration were uploaded by the time they were visible
+ALTER TABLE storage_blobs ADD COLUMN IF NOT EXISTS upload_state TEXT NOT NULL DEFAULT 'uploaded'
+    CHECK (upload_state IN ('pending', 'uploaded'));
+ALTER TABLE storage_blobs ADD COLUMN IF NOT EXISTS upload_owner UUID;
+ALTER TABLE storage_blobs ADD COLUMN IF NOT EXISTS upload_lease_until TIMESTAMPTZ;
+
+-- ============================================
+-- Register a batch of uploads
+-- ============================================
+-- p_items: [{"document": {...documents row...}, "generated_pdf": {...} | absent}]
+-- document.object_path is where the blob goes if this item creates its row;
+-- item_object_path is where it actually lives. needs_upload is true for the
+-- item that owns the upload, either because it created the row or because the
+-- previous owner's lease expired while the blob was still pending.
+DROP FUNCTION IF EXISTS register_storage_uploads(JSONB);
+
+CREATE OR REPLACE FUNCTION register_storage_uploads(p_items JSONB, p_lease_seconds INTEGER DEFAULT 60)
+RETURNS TABLE(
+    item_id UUID, item_bucket TEXT, item_sha256 TEXT, item_object_path TEXT,
+    upload_state TEXT, needs_upload BOOLEAN
+) AS $$
+#variable_conflict use_column
+DECLARE
+    item JSONB;
+    doc JSONB;
+    pdf JSONB;
+    blob storage_blobs%ROWTYPE;
+    url TEXT;
+BEGIN
+    FOR item IN SELECT value FROM jsonb_array_elements(p_items) LOOP
+        doc := item->'document';
+
+        INSERT INTO storage_blobs AS b (
+            bucket, sha256, object_path, size, content_type, ref_count,
+            upload_state, upload_owner, upload_lease_until
+        )
+        VALUES (
+            doc->>'bucket', doc->>'sha256', doc->>'object_path',
+            (doc->>'size')::BIGINT, doc->>'content_type', 1,
+            'pending', (doc->>'id')::UUID, NOW() + make_interval(secs => p_lease_seconds)
+        )
+        ON CONFLICT (bucket, sha256) DO UPDATE SET
+            ref_count = b.ref_count + 1,
+            upload_owner = CASE WHEN b.upload_state = 'pending' AND b.upload_lease_until < NOW()
+                                THEN EXCLUDED.upload_owner ELSE b.upload_owner END,
+            upload_lease_until = CASE WHEN b.upload_state = 'pending' AND b.upload_lease_until < NOW()
+                                      THEN EXCLUDED.upload_lease_until ELSE b.upload_lease_until END
+        RETURNING b.* INTO blob;
+
+        -- The candidate URL embeds the candidate path; point it at the real one
+        url := replace(doc->>'public_url', doc->>'object_path', blob.object_path);
+
+        INSERT INTO documents (id, bucket, path, size, content_type, public_url, uploaded_at, sha256, object_path)
+        VALUES (
+            (doc->>'id')::UUID, doc->>'bucket', doc->>'path', (doc->>'size')::BIGINT,
+            doc->>'content_type', url, (doc->>'uploaded_at')::TIMESTAMPTZ,
+            doc->>'sha256', blob.object_path
+        );
+
+        pdf := item->'generated_pdf';
+        IF pdf IS NOT NULL THEN
+            INSERT INTO generated_pdfs (id, employee_id, form_type, storage_path, storage_url, is_signed, generated_at)
+            VALUES (
+                (pdf->>'id')::UUID, pdf->>'employee_id', pdf->>'form_type', pdf->>'storage_path',
+                url, COALESCE((pdf->>'is_signed')::BOOLEAN, FALSE),
+                (pdf->>'generated_at')::TIMESTAMPTZ
+            );
+        END IF;
+
+        item_id := (doc->>'id')::UUID;
+        item_bucket := blob.bucket;
+        item_sha256 := blob.sha256;
+        item_object_path := blob.object_path;
+        upload_state := blob.upload_state;
+        needs_upload := blob.upload_state = 'pending' AND blob.upload_owner = item_id;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- Upload ownership
+-- ============================================
+-- Called by the owner once the object is in the bucket. Any successful upload
+-- of the same bytes will do, so the owner is not checked.
+CREATE OR REPLACE FUNCTION mark_storage_blobs_uploaded(p_bucket TEXT, p_sha256 TEXT[])
+RETURNS VOID AS $$
+    UPDATE storage_blobs
+    SET upload_state = 'uploaded', upload_owner = NULL, upload_lease_until = NULL
+    WHERE bucket = p_bucket AND sha256 = ANY(p_sha256) AND upload_state = 'pending';
+$$ LANGUAGE sql VOLATILE;
+
+-- Takes over pending blobs whose owner's lease has expired; returns the ones
+-- p_owner now has to upload
+CREATE OR REPLACE FUNCTION claim_storage_uploads(
+    p_bucket TEXT,
+    p_sha256 TEXT[],
+    p_owner UUID,
+    p_lease_seconds INTEGER DEFAULT 60
+)
+RETURNS TABLE(item_sha256 TEXT) AS $$
+    UPDATE storage_blobs
+    SET upload_owner = p_owner, upload_lease_until = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE bucket = p_bucket AND sha256 = ANY(p_sha256)
+      AND upload_state = 'pending' AND upload_lease_until < NOW()
+    RETURNING sha256;
+$$ LANGUAGE sql VOLATILE;
+
+-- Lets waiting registrants take over at once after the owner's upload failed
+CREATE OR REPLACE FUNCTION abandon_storage_uploads(p_bucket TEXT, p_sha256 TEXT[])
+RETURNS VOID AS $$
+    UPDATE storage_blobs
+    SET upload_lease_until = NOW()
+    WHERE bucket = p_bucket AND sha256 = ANY(p_sha256) AND upload_state = 'pending';
+$$ LANGUAGE sql VOLATILE;
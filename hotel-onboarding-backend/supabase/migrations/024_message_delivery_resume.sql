@@ -0,0 +1,66 @@
+-- Migration: Resume bulk message deliveries and reach WebSocket users on any worker
+-- Date: 2025-08-25
+-- Description: the employee message dispatcher only ran inside the request's
+-- worker, so a restart left a message in 'sending' with pending rows forever,
+-- and WebSocket rows were marked skipped whenever the recipient was connected
+-- to a different worker. employee_messages.delivery_lease_until lets a worker
+-- that starts up claim messages whose dispatcher has gone away, and WebSocket
+-- rows for users connected elsewhere stay pending: the dispatcher announces
+-- the message on the employee_message_pending NOTIFY channel, and each worker
+-- pushes it to the users connected to it (or when they next connect).
+
+-- ============================================
+-- Columns and indexes
+-- ============================================
+ALTER TABLE employee_messages ADD COLUMN IF NOT EXISTS delivery_lease_until TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_employee_messages_sending
+    ON employee_messages(delivery_lease_until)
+    WHERE status = 'sending';
+
+-- Pending pushes by recipient, for users connecting to a worker
+CREATE INDEX IF NOT EXISTS idx_message_deliveries_websocket_pending
+    ON employee_message_deliveries(recipient_user_id)
+    WHERE channel = 'websocket' AND status = 'pending';
+
+-- ============================================
+-- Queue with a lease
+-- ============================================
+-- Same as 018, but the queueing worker holds the delivery lease from the
+-- start so another worker's startup does not claim the message mid-send.
+DROP FUNCTION IF EXISTS queue_employee_message(UUID, JSONB, TEXT[], UUID, TEXT, TEXT, TEXT, TEXT, UUID);
+
+CREATE OR REPLACE FUNCTION queue_employee_message(
+    p_message_id UUID,
+    p_filters JSONB,
+    p_channels TEXT[],
+    p_sender_id UUID,
+    p_subject TEXT,
+    p_content TEXT,
+    p_message_type TEXT DEFAULT 'general',
+    p_priority TEXT DEFAULT 'normal',
+    p_template_id UUID DEFAULT NULL,
+    p_lease_seconds INTEGER DEFAULT 300
+)
+RETURNS INTEGER AS $$
+DECLARE
+    recipients INTEGER;
+BEGIN
+    INSERT INTO employee_messages (
+        id, sender_id, subject, content, message_type, priority, template_id,
+        status, recipient_filters, channels, sent_at, created_at, delivery_lease_until
+    )
+    VALUES (
+        p_message_id, p_sender_id, p_subject, p_content, p_message_type, p_priority, p_template_id,
+        'queued', p_filters, p_channels, NOW(), NOW(), NOW() + make_interval(secs => p_lease_seconds)
+    );
+
+    recipients := fan_out_employee_message(p_message_id, p_filters, p_channels, p_sender_id, p_subject, p_content);
+
+    UPDATE employee_messages
+    SET recipients_count = recipients,
+        status = CASE WHEN recipients > 0 THEN 'sending' ELSE 'no_recipients' END
+    WHERE id = p_message_id;
+    RETURN recipients;
+END;
+$$ LANGUAGE plpgsql;
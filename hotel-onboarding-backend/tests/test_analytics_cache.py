@@ -0,0 +1,88 @@
+"""
+Tests for the AnalyticsCache memory tier
+"""
+import pytest
+
+from app.services.analytics_cache import AnalyticsCache, MemoryTier
+
+
+class TestMemoryTier:
+    """Test O(1) LRU behaviour, byte budget and indexed invalidation"""
+
+    def test_lru_evicts_least_recently_used(self):
+        tier = MemoryTier(max_items=3, max_bytes=1 << 20)
+        for key in ("a", "b", "c"):
+            tier.set(key, key)
+
+        tier.get("a")
+        tier.set("d", "d")
+
+        assert tier.get("b") is MemoryTier.MISSING
+        assert tier.get("a") == "a"
+        assert tier.evictions == 1
+
+    def test_byte_budget_tracks_replacements(self):
+        tier = MemoryTier(max_items=100, max_bytes=10_000)
+        tier.set("k", "x" * 1000)
+        first = tier.total_bytes
+        tier.set("k", "x" * 1000)
+
+        assert tier.total_bytes == first
+        for i in range(50):
+            tier.set(f"k{i}", "y" * 1000)
+        assert tier.total_bytes <= 10_000
+        assert tier.evictions > 0
+
+    def test_expired_entries_are_misses_and_purged(self):
+        tier = MemoryTier(max_items=10, max_bytes=1 << 20)
+        tier.set("gone", 1, ttl=-1)
+        tier.set("kept", 2, ttl=60)
+        tier.set("forever", 3)
+
+        assert tier.purge_expired() == 1
+        assert tier.get("gone") is MemoryTier.MISSING
+        assert tier.get("kept") == 2
+        assert tier.get("forever") == 3
+
+    def test_prefix_invalidation_matches_glob_semantics(self):
+        tier = MemoryTier(max_items=100, max_bytes=1 << 20)
+        keys = [
+            "analytics:metrics:property:12",
+            "analytics:metrics:property:12:apps",
+            "analytics:metrics:property:123:apps",
+            "analytics:metrics:property:4:apps",
+            "analytics:metrics:applications:daily",
+        ]
+        for key in keys:
+            tier.set(key, 1)
+
+        assert tier.invalidate_pattern("analytics:metrics:property:12:*") == 1
+        assert tier.invalidate_pattern("analytics:metrics:property:12*") == 2
+        assert tier.invalidate_pattern("analytics:metrics:application*") == 1
+        assert tier.keys() == ["analytics:metrics:property:4:apps"]
+
+
+class TestAnalyticsCacheMemoryLevel:
+    """Test AnalyticsCache on the memory tier alone (no Redis)"""
+
+    @pytest.mark.asyncio
+    async def test_get_set_and_pattern_invalidation(self):
+        cache = AnalyticsCache(redis_url="redis://127.0.0.1:1")
+        cache.redis_available = False
+
+        await cache.set("metrics", "property:p1:hires", {"count": 3})
+        await cache.set("metrics", "property:p2:hires", {"count": 5})
+
+        assert await cache.get("metrics", "property:p1:hires") == {"count": 3}
+        assert await cache.invalidate_pattern("metrics", "property:p1*") == 1
+        assert await cache.get("metrics", "property:p1:hires") is None
+        assert await cache.get("metrics", "property:p2:hires") == {"count": 5}
+
+        stats = await cache.get_cache_statistics()
+        assert stats["memory_cache"]["entries"] == 1
+        await cache.shutdown()
+
+    def test_construct_without_running_loop(self):
+        # Module-level construction (as in analytics_api) must not require a loop
+        cache = AnalyticsCache(redis_url="redis://127.0.0.1:1")
+        assert cache._redis_init_task is None
@@ -0,0 +1,161 @@
+"""
+Tests for transactional application approval and the outbox dispatcher
+"""
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.application_approval_service import (
+    ApplicationApprovalService, ApplicationNotFoundError, ApplicationNotPendingError
+)
+from app.services.outbox_dispatcher import OutboxDispatcher
+
+
+class PostgrestError(Exception):
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+def rpc_supabase(result=None, error=None):
+    """A supabase service whose approve_job_application RPC returns result or raises error"""
+    supabase = MagicMock()
+    supabase.client.rpc.return_value.execute = MagicMock(
+        return_value=MagicMock(data=result), side_effect=error
+    )
+    supabase._run_sync = AsyncMock(side_effect=lambda func: func())
+    return supabase
+
+
+APPROVAL_ARGS = dict(
+    application_id="app-1",
+    reviewer_id="mgr-1",
+    job_title="Front Desk Agent",
+    start_date="2025-09-01",
+    start_time="09:00",
+    pay_rate=18.5,
+    pay_frequency="biweekly",
+    benefits_eligible="yes",
+    supervisor="Jane Smith"
+)
+
+
+class TestApplicationApprovalService:
+    """Test the single-round-trip approval"""
+
+    @pytest.mark.asyncio
+    async def test_approval_is_one_statement_and_wakes_the_outbox(self):
+        supabase = rpc_supabase({
+            "application_id": "app-1",
+            "property_id": "prop-1",
+            "employee_id": "emp-1",
+            "session_id": "sess-1",
+            "talent_pool_count": 3,
+            "applicant_name": "John Doe",
+            "applicant_email": "john@example.com",
+            "department": "Front Office"
+        })
+        outbox = MagicMock()
+        service = ApplicationApprovalService(supabase, outbox=outbox)
+
+        result = await service.approve(**APPROVAL_ARGS)
+
+        supabase.client.rpc.assert_called_once()
+        name, params = supabase.client.rpc.call_args.args
+        assert name == "approve_job_application"
+        assert (params["p_application_id"], params["p_reviewer_id"]) == ("app-1", "mgr-1")
+        assert params["p_employee"]["hire_date"] == "2025-09-01"
+        assert params["p_employee"]["personal_info"]["supervisor"] == "Jane Smith"
+        assert params["p_onboarding_url"].endswith(f"/onboard?token={params['p_token']}")
+        json.dumps(params)
+
+        outbox.notify.assert_called_once()
+        assert result["employee_id"] == "emp-1"
+        assert result["talent_pool_count"] == 3
+        assert result["token"] == params["p_token"]
+        assert result["expires_at"].isoformat() == params["p_expires_at"]
+
+    @pytest.mark.asyncio
+    async def test_database_errors_map_to_service_errors(self):
+        outbox = MagicMock()
+
+        service = ApplicationApprovalService(rpc_supabase(error=PostgrestError("missing", "P0002")), outbox=outbox)
+        with pytest.raises(ApplicationNotFoundError):
+            await service.approve(**APPROVAL_ARGS)
+
+        service = ApplicationApprovalService(rpc_supabase(error=PostgrestError("approved, not pending", "55000")), outbox=outbox)
+        with pytest.raises(ApplicationNotPendingError):
+            await service.approve(**APPROVAL_ARGS)
+
+        with pytest.raises(ValueError):
+            await service.approve(**{**APPROVAL_ARGS, "start_date": "09/01/2025"})
+        outbox.notify.assert_not_called()
+
+
+class TestOutboxDispatcher:
+    """Test claiming, retry backoff and batched completion"""
+
+    @pytest.mark.asyncio
+    async def test_outcomes_are_written_back_in_one_update(self):
+        events = [
+            {"id": "e1", "event_type": "test.ok", "payload": "{\"n\": 1}", "attempts": 1},
+            {"id": "e2", "event_type": "test.fail", "payload": {}, "attempts": 2},
+            {"id": "e3", "event_type": "test.fail", "payload": {}, "attempts": 5},
+            {"id": "e4", "event_type": "test.unknown", "payload": {}, "attempts": 1},
+        ]
+        supabase = rpc_supabase(result=events)
+        dispatcher = OutboxDispatcher(batch_size=10, max_attempts=5)
+        received = []
+
+        async def ok(payload):
+            received.append(payload)
+            return True
+
+        async def fail(payload):
+            raise RuntimeError("SMTP unavailable")
+
+        dispatcher.register("test.ok", ok)
+        dispatcher.register("test.fail", fail)
+
+        counts = await dispatcher.dispatch_once(supabase)
+
+        assert counts == {"claimed": 4, "sent": 1, "pending": 2, "dead": 1}
+        assert received == [{"n": 1}]
+        (claim, claim_params), (complete, outcomes) = [call.args for call in supabase.client.rpc.call_args_list]
+        assert (claim, claim_params) == ("claim_outbox_events", {"p_limit": 10})
+        assert complete == "complete_outbox_events"
+        assert outcomes["p_ids"] == ["e1", "e2", "e3", "e4"]
+        assert outcomes["p_statuses"] == ["sent", "pending", "dead", "pending"]
+        assert outcomes["p_errors"][0] is None and outcomes["p_errors"][1] == "SMTP unavailable"
+        assert outcomes["p_retry_in"] == [0.0, 60.0, 0.0, 30.0]
+
+    @pytest.mark.asyncio
+    async def test_approval_emails_use_the_email_service(self):
+        email_service = MagicMock()
+        email_service.send_approval_notification = AsyncMock(return_value=True)
+        email_service.send_onboarding_welcome_email = AsyncMock(return_value=True)
+        dispatcher = OutboxDispatcher(email_service=email_service)
+        payload = {
+            "applicant_email": "john@example.com",
+            "applicant_name": "John Doe",
+            "property_name": "Grand Hotel",
+            "position": "Front Desk",
+            "job_title": "Front Desk Agent",
+            "start_date": "2025-09-01",
+            "start_time": "09:00",
+            "pay_rate": 18.5,
+            "onboarding_url": "http://localhost:3000/onboard?token=abc",
+            "expires_at": "2025-08-24T12:00:00+00:00",
+            "manager_name": "Mary Manager",
+            "manager_email": "mary@example.com"
+        }
+
+        for event_type in ("application.approval_email", "onboarding.welcome_email"):
+            assert await dispatcher._handle({"id": "e", "event_type": event_type, "payload": payload, "attempts": 1}) is None
+
+        welcome = email_service.send_onboarding_welcome_email.await_args.kwargs
+        assert welcome["to_email"] == "john@example.com"
+        assert welcome["start_date"].isoformat() == "2025-09-01"
+        assert welcome["expires_at"].tzinfo is not None
+        assert email_service.send_approval_notification.await_args.kwargs["onboarding_link"] == payload["onboarding_url"]
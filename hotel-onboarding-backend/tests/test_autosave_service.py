@@ -0,0 +1,173 @@
+"""
+Tests for onboarding autosave coalescing and JSON-patch partial updates
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+
+from app.services.autosave_service import AutosaveService, JsonPatchError, apply_json_patch
+
+
+class TestApplyJsonPatch:
+    """Test the RFC 6902 subset used for partial form saves"""
+
+    def test_replace_and_add_nested_fields(self):
+        original = {"firstName": "Ana", "address": {"city": "Austin"}}
+        patched = apply_json_patch(original, [
+            {"op": "replace", "path": "/firstName", "value": "Maria"},
+            {"op": "add", "path": "/address/zip", "value": "78701"},
+            {"op": "add", "path": "/emergency/name", "value": "Luis"}
+        ])
+
+        assert patched == {
+            "firstName": "Maria",
+            "address": {"city": "Austin", "zip": "78701"},
+            "emergency": {"name": "Luis"}
+        }
+        # The original document is never mutated
+        assert original == {"firstName": "Ana", "address": {"city": "Austin"}}
+
+    def test_remove_and_array_operations(self):
+        patched = apply_json_patch({"a~b": 1, "items": ["x", "z"]}, [
+            {"op": "remove", "path": "/a~0b"},
+            {"op": "add", "path": "/items/1", "value": "y"},
+            {"op": "add", "path": "/items/-", "value": "end"}
+        ])
+
+        assert patched == {"items": ["x", "y", "z", "end"]}
+
+    def test_invalid_operations_are_rejected(self):
+        with pytest.raises(JsonPatchError):
+            apply_json_patch({}, [{"op": "move", "path": "/a", "from": "/b"}])
+        with pytest.raises(JsonPatchError):
+            apply_json_patch({}, [{"op": "remove", "path": "/missing"}])
+        with pytest.raises(JsonPatchError):
+            apply_json_patch({}, [{"op": "replace", "path": "/a"}])
+
+
+class TestAutosaveService:
+    """Test debounce coalescing and batched upserts"""
+
+    @pytest.fixture
+    def supabase(self):
+        service = MagicMock()
+        service.upsert_onboarding_form_data_batch.return_value = True
+        service.get_onboarding_form_data.return_value = {"firstName": "Ana", "lastName": "Lee"}
+        return service
+
+    @pytest.mark.asyncio
+    async def test_rapid_saves_coalesce_into_one_write(self, supabase):
+        autosave = AutosaveService(supabase, debounce_seconds=0.05)
+
+        for i in range(10):
+            await autosave.save("tok", "emp-1", "personal-info", {"revision": i})
+
+        await asyncio.sleep(0.15)
+
+        supabase.upsert_onboarding_form_data_batch.assert_called_once()
+        rows = supabase.upsert_onboarding_form_data_batch.call_args[0][0]
+        assert rows == [{
+            "token": "tok",
+            "employee_id": "emp-1",
+            "step_id": "personal-info",
+            "form_data": {"revision": 9}
+        }]
+        assert autosave.stats["saves_coalesced"] == 9
+        assert not autosave.has_pending()
+
+    @pytest.mark.asyncio
+    async def test_max_delay_bounds_continuous_saves(self, supabase):
+        autosave = AutosaveService(supabase, debounce_seconds=0.05, max_delay_seconds=0.1)
+
+        for i in range(8):
+            await autosave.save("tok", "emp-1", "w4-form", {"revision": i})
+            await asyncio.sleep(0.03)
+        await autosave.flush()
+
+        # Writes happened before the client stopped typing
+        assert supabase.upsert_onboarding_form_data_batch.call_count >= 2
+
+    @pytest.mark.asyncio
+    async def test_flush_batches_all_pending_steps(self, supabase):
+        autosave = AutosaveService(supabase, debounce_seconds=60)
+
+        await autosave.save("tok", "emp-1", "personal-info", {"a": 1})
+        await autosave.save("tok", "emp-1", "w4-form", {"b": 2})
+        await autosave.save("other", "emp-2", "w4-form", {"c": 3})
+
+        assert await autosave.flush(token="tok")
+
+        supabase.upsert_onboarding_form_data_batch.assert_called_once()
+        rows = supabase.upsert_onboarding_form_data_batch.call_args[0][0]
+        assert {row["step_id"] for row in rows} == {"personal-info", "w4-form"}
+        assert autosave.has_pending("other")
+        assert not autosave.has_pending("tok")
+
+    @pytest.mark.asyncio
+    async def test_patch_applies_to_stored_form_data(self, supabase):
+        autosave = AutosaveService(supabase, debounce_seconds=60)
+
+        await autosave.patch("tok", "emp-1", "personal-info", [
+            {"op": "replace", "path": "/lastName", "value": "Park"}
+        ])
+        await autosave.patch("tok", "emp-1", "personal-info", [
+            {"op": "add", "path": "/phone", "value": "555-0100"}
+        ])
+
+        # Base data is loaded once, later patches build on the pending copy
+        supabase.get_onboarding_form_data.assert_called_once_with("tok", "personal-info")
+        assert await autosave.get_form_data("tok", "personal-info") == {
+            "firstName": "Ana", "lastName": "Park", "phone": "555-0100"
+        }
+
+    @pytest.mark.asyncio
+    async def test_patch_after_flush_sees_writes_made_elsewhere(self, supabase):
+        autosave = AutosaveService(supabase, debounce_seconds=60)
+
+        await autosave.patch("tok", "emp-1", "personal-info", [
+            {"op": "replace", "path": "/lastName", "value": "Park"}
+        ])
+        assert await autosave.flush()
+        # Another worker saves the step after this one flushed
+        supabase.get_onboarding_form_data.return_value = {"firstName": "Ana", "lastName": "Park", "city": "Austin"}
+
+        await autosave.patch("tok", "emp-1", "personal-info", [
+            {"op": "add", "path": "/phone", "value": "555-0100"}
+        ])
+        assert await autosave.flush()
+
+        rows = supabase.upsert_onboarding_form_data_batch.call_args[0][0]
+        assert rows[0]["form_data"] == {"firstName": "Ana", "lastName": "Park", "city": "Austin", "phone": "555-0100"}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_patches_both_apply(self, supabase):
+        def slow_read(token, step_id):
+            time.sleep(0.05)
+            return {"firstName": "Ana", "lastName": "Lee"}
+
+        supabase.get_onboarding_form_data.side_effect = slow_read
+        autosave = AutosaveService(supabase, debounce_seconds=60)
+
+        await asyncio.gather(
+            autosave.patch("tok", "emp-1", "personal-info", [{"op": "replace", "path": "/lastName", "value": "Park"}]),
+            autosave.patch("tok", "emp-1", "personal-info", [{"op": "add", "path": "/phone", "value": "555-0100"}]),
+            autosave.save("tok", "emp-1", "address", {"city": "Austin"})
+        )
+
+        assert await autosave.get_form_data("tok", "personal-info") == {
+            "firstName": "Ana", "lastName": "Park", "phone": "555-0100"
+        }
+        assert supabase.get_onboarding_form_data.call_count == 1
+        assert not autosave._step_locks
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_requeued(self, supabase):
+        supabase.upsert_onboarding_form_data_batch.return_value = False
+        autosave = AutosaveService(supabase, debounce_seconds=60)
+
+        await autosave.save("tok", "emp-1", "personal-info", {"a": 1})
+        assert not await autosave.flush()
+
+        assert autosave.has_pending("tok")
+        assert autosave.stats["write_failures"] == 1
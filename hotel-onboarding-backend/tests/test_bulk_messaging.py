@@ -0,0 +1,197 @@
+"""
+Tests for set-based bulk employee messaging and the bounded delivery worker
+"""
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.employee_management_service import EmployeeManagementService
+from app.services.message_dispatcher import (
+    CLAIM_STALLED_MESSAGES_SQL, COMPLETE_MESSAGE_SQL, CONNECTED_DELIVERIES_SQL, NOTIFY_PENDING_SQL,
+    PENDING_DELIVERIES_SQL, QUEUE_MESSAGE_SQL, UPDATE_DELIVERIES_SQL, UPDATE_PUSHED_SQL,
+    EmployeeMessageDispatcher
+)
+
+MESSAGE = {"id": "msg-1", "sender_id": "hr-1", "subject": "Pool closed", "content": "The pool is closed\ntoday."}
+
+
+class FakeDeliveryDB:
+    """Serves execute_query() for the dispatcher's statements over an in-memory delivery table"""
+
+    def __init__(self, rows, stalled=()):
+        self.rows = rows  # (employee_id, channel) -> row
+        self.stalled = list(stalled)
+        self.calls = []
+
+    async def execute_query(self, query, params=()):
+        self.calls.append(query)
+        if query == PENDING_DELIVERIES_SQL:
+            message_id, after_employee, after_channel, limit = params
+            keys = sorted(k for k, row in self.rows.items() if row["status"] == "pending" and k > (after_employee, after_channel))
+            return [dict(self.rows[k], employee_id=k[0], channel=k[1]) for k in keys[:limit]]
+        if query == UPDATE_DELIVERIES_SQL:
+            for employee_id, channel, status, error in zip(*params[2:6]):
+                self.rows[(employee_id, channel)].update(status=status, error=error)
+            return []
+        if query == CLAIM_STALLED_MESSAGES_SQL:
+            claimed, self.stalled = self.stalled, []
+            return claimed
+        if query == CONNECTED_DELIVERIES_SQL:
+            user_ids = params[0]
+            return [
+                dict(message_id=MESSAGE["id"], employee_id=k[0], recipient_user_id=row["recipient_user_id"],
+                     subject=MESSAGE["subject"], content=MESSAGE["content"], priority=None)
+                for k, row in sorted(self.rows.items())
+                if k[1] == "websocket" and row["status"] == "pending" and row["recipient_user_id"] in user_ids
+            ]
+        if query == UPDATE_PUSHED_SQL:
+            for employee_id in params[1]:
+                self.rows[(employee_id, "websocket")]["status"] = "delivered"
+            return []
+        return []
+
+
+def delivery_rows(count, channels=("email", "websocket")):
+    return {
+        (f"emp-{i:04d}", channel): {
+            "recipient_user_id": f"user-{i:04d}", "recipient_email": f"e{i}@hotel.test",
+            "recipient_name": f"Employee {i}", "status": "pending"
+        }
+        for i in range(count) for channel in channels
+    }
+
+
+class ConcurrencyProbe:
+    """Async send function that records how many calls overlap"""
+
+    def __init__(self, result=True):
+        self.active = self.peak = self.calls = 0
+        self.result = result
+
+    async def __call__(self, *args, **kwargs):
+        self.active += 1
+        self.calls += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0)
+        self.active -= 1
+        return self.result
+
+
+class TestQueueing:
+    """Test that a bulk send is one statement and returns a summary"""
+
+    @pytest.mark.asyncio
+    async def test_bulk_message_returns_summary_only(self):
+        supabase = MagicMock()
+        supabase.execute_query = AsyncMock(return_value=[{"recipients_count": 5000}])
+        dispatcher = EmployeeMessageDispatcher(email_service=MagicMock(), websocket_manager=MagicMock())
+        dispatcher.submit = MagicMock()
+        service = EmployeeManagementService(supabase, dispatcher=dispatcher)
+
+        result = await service.bulk_message_employees(
+            {"sender_id": "hr-1", "subject": "Announcement", "content": "Hello"},
+            {"property_id": "prop-1"},
+            ["in_app", "email", "in_app"]
+        )
+
+        assert result == {
+            "success": True, "message_id": result["message_id"], "recipients_count": 5000,
+            "channels": ["in_app", "email"], "status": "sending"
+        }
+        query, params = supabase.execute_query.call_args.args
+        assert query == QUEUE_MESSAGE_SQL
+        assert params[1] == '{"property_id": "prop-1"}' and params[2] == ["in_app", "email"]
+        assert params[0] == result["message_id"] and params[-1] == dispatcher.lease_seconds
+        dispatcher.submit.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_no_recipients_and_bad_channels(self):
+        supabase = MagicMock()
+        supabase.execute_query = AsyncMock(return_value=[{"recipients_count": 0}])
+        dispatcher = EmployeeMessageDispatcher(email_service=MagicMock(), websocket_manager=MagicMock())
+        dispatcher.submit = MagicMock()
+        service = EmployeeManagementService(supabase, dispatcher=dispatcher)
+        message = {"sender_id": "hr-1", "subject": "s", "content": "c"}
+
+        empty = await service.bulk_message_employees(message, {"department": "Spa"})
+        invalid = await service.bulk_message_employees(message, {}, ["sms"])
+
+        assert empty == {"success": False, "message": "No employees found matching filters"}
+        assert invalid["success"] is False and "sms" in invalid["message"]
+        dispatcher.submit.assert_not_called()
+        assert supabase.execute_query.await_count == 1
+
+
+class TestDelivery:
+    """Test paged, bounded-concurrency fan-out with batched status writes"""
+
+    @pytest.mark.asyncio
+    async def test_pages_through_pending_rows(self):
+        db = FakeDeliveryDB(delivery_rows(25))
+        email = ConcurrencyProbe()
+        websocket_manager = MagicMock(active_connections={f"user-{i:04d}" for i in range(0, 25, 2)})
+        websocket_manager.send_to_user = AsyncMock(return_value=True)
+        dispatcher = EmployeeMessageDispatcher(
+            email_service=MagicMock(send_email=email), websocket_manager=websocket_manager,
+            page_size=10, concurrency=4
+        )
+
+        totals = await dispatcher.deliver(db, MESSAGE)
+
+        assert totals == {"delivered": 25 + 13, "pending": 12}
+        assert email.calls == 25 and email.peak <= 4
+        assert db.calls.count(UPDATE_DELIVERIES_SQL) == 5
+        assert db.calls[-2:] == [COMPLETE_MESSAGE_SQL, NOTIFY_PENDING_SQL]
+        assert [k for k, row in db.rows.items() if row["status"] == "pending"] == [
+            (f"emp-{i:04d}", "websocket") for i in range(1, 25, 2)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failed_sends_are_recorded(self):
+        db = FakeDeliveryDB(delivery_rows(3, channels=("email",)))
+        dispatcher = EmployeeMessageDispatcher(
+            email_service=MagicMock(send_email=ConcurrencyProbe(result=False)), websocket_manager=MagicMock()
+        )
+
+        totals = await dispatcher.deliver(db, MESSAGE)
+
+        assert totals == {"failed": 3}
+        assert {row["error"] for row in db.rows.values()} == {"email not accepted"}
+        assert NOTIFY_PENDING_SQL not in db.calls
+
+
+class TestResume:
+    """Test resuming stalled messages and pushing rows left for other workers"""
+
+    @pytest.mark.asyncio
+    async def test_start_resumes_stalled_messages(self):
+        db = FakeDeliveryDB(delivery_rows(3, channels=("email",)), stalled=[MESSAGE])
+        dispatcher = EmployeeMessageDispatcher(
+            email_service=MagicMock(send_email=ConcurrencyProbe()), websocket_manager=MagicMock()
+        )
+
+        resumed = await dispatcher.start(db)
+        await asyncio.gather(*dispatcher._tasks)
+
+        assert resumed == 1 and dispatcher.stats["delivered"] == 3
+        assert all(row["status"] == "delivered" for row in db.rows.values())
+        assert await dispatcher.start(db) == 0
+
+    @pytest.mark.asyncio
+    async def test_connected_users_get_pending_pushes(self):
+        db = FakeDeliveryDB(delivery_rows(4, channels=("websocket",)))
+        websocket_manager = MagicMock(active_connections=set())
+        websocket_manager.send_to_user = AsyncMock(return_value=True)
+        dispatcher = EmployeeMessageDispatcher(email_service=MagicMock(), websocket_manager=websocket_manager)
+        await dispatcher.start(db)
+
+        assert await dispatcher.deliver(db, MESSAGE) == {"pending": 4}
+        websocket_manager.active_connections.update({"user-0000", "user-0002"})
+        pushed = await dispatcher.deliver_to_connected(message_id=MESSAGE["id"])
+        websocket_manager.active_connections.add("user-0003")
+        await dispatcher.user_connected("user-0003")
+
+        assert pushed == 2
+        assert websocket_manager.send_to_user.await_count == 3
+        assert [k[0] for k, row in db.rows.items() if row["status"] == "pending"] == ["emp-0001"]
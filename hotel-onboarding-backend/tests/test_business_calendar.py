@@ -0,0 +1,114 @@
+"""
+Tests for the federal business-day calendar and the compliance engine deadline math
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.business_calendar import BusinessDayCalendar, federal_holidays
+from app.compliance_engine import FederalComplianceEngine
+
+
+def loop_add(start, n, holidays):
+    """Reference day-by-day implementation the calendar replaced"""
+    current, added = start, 0
+    while added < n:
+        current += timedelta(days=1)
+        if current.weekday() < 5 and current not in holidays:
+            added += 1
+    return current
+
+
+def loop_between(start, end, holidays):
+    count, current = 0, start
+    while current < end:
+        current += timedelta(days=1)
+        if current.weekday() < 5 and current not in holidays:
+            count += 1
+    return count
+
+
+class TestFederalHolidays:
+    """Test rule-based holiday generation and observed-date shifting"""
+
+    def test_2025_matches_published_schedule(self):
+        assert [day for day, _ in federal_holidays(2025)] == [
+            date(2025, 1, 1), date(2025, 1, 20), date(2025, 2, 17), date(2025, 5, 26),
+            date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1), date(2025, 10, 13),
+            date(2025, 11, 11), date(2025, 11, 27), date(2025, 12, 25),
+        ]
+
+    def test_weekend_holidays_are_observed_on_adjacent_weekdays(self):
+        holidays_2026 = dict(federal_holidays(2026))
+        assert holidays_2026[date(2026, 7, 3)] == "Independence Day"  # July 4 is a Saturday
+
+        holidays_2027 = dict(federal_holidays(2027))
+        assert holidays_2027[date(2027, 12, 24)] == "Christmas Day"     # Saturday
+        assert holidays_2027[date(2027, 12, 31)] == "New Year's Day"    # Jan 1, 2028 is a Saturday
+        assert date(2027, 7, 5) in holidays_2027                        # July 4 is a Sunday
+
+        assert date(2028, 1, 1) not in dict(federal_holidays(2028))
+        assert not [name for _, name in federal_holidays(2020) if name == "Juneteenth"]
+
+
+class TestBusinessDayCalendar:
+    """Test precomputed business-day arithmetic against the loop implementation"""
+
+    def test_matches_loop_across_years(self):
+        calendar = BusinessDayCalendar(2019, 2031)
+        holidays = {day for year in range(2019, 2033) for day, _ in federal_holidays(year)}
+        starts = [date(2019, 1, 1) + timedelta(days=offset) for offset in range(0, 365 * 12, 3)]
+
+        for start in starts:
+            for n in (0, 1, 3, 10):
+                assert calendar.add_business_days(start, n) == loop_add(start, n, holidays), (start, n)
+            end = start + timedelta(days=17)
+            assert calendar.business_days_between(start, end) == loop_between(start, end, holidays)
+            assert calendar.business_days_between(end, start) == 0
+
+    def test_bulk_api_matches_scalar_api(self):
+        calendar = BusinessDayCalendar(2024, 2026)
+        starts = [date(2025, 1, 1) + timedelta(days=offset) for offset in range(365)]
+
+        deadlines = calendar.add_business_days_bulk(starts, 3)
+        counts = calendar.business_days_between_bulk(starts, deadlines)
+
+        assert deadlines.dtype == np.dtype("datetime64[D]")
+        assert deadlines.astype(date).tolist() == [calendar.add_business_days(s, 3) for s in starts]
+        assert (counts == 3).all()
+
+    def test_range_extends_on_demand(self):
+        calendar = BusinessDayCalendar(2025, 2025)
+
+        assert calendar.add_business_days(date(2025, 12, 31), 3) == date(2026, 1, 6)
+        assert calendar.business_days_between(date(1999, 12, 31), date(2000, 1, 4)) == 2
+        start_year, end_year = calendar.year_range
+        assert start_year == 1999 and end_year >= 2026
+
+    def test_negative_offsets_are_rejected(self):
+        with pytest.raises(ValueError):
+            BusinessDayCalendar(2025, 2025).add_business_days(date(2025, 1, 2), -1)
+
+
+class TestComplianceEngineDeadlines:
+    """Test FederalComplianceEngine deadline math on the shared calendar"""
+
+    def test_i9_deadline_skips_juneteenth(self):
+        engine = FederalComplianceEngine()
+
+        deadline = engine.create_i9_section2_deadline("emp-1", "doc-1", date(2025, 6, 18))
+
+        assert deadline.deadline_date == date(2025, 6, 24)
+        assert date(2025, 6, 19) in engine.federal_holidays_2025
+
+    def test_bulk_deadlines(self):
+        engine = FederalComplianceEngine()
+        hire_dates = [date(2025, 12, 24), date(2025, 12, 19), date(2026, 1, 2)]
+
+        results = engine.calculate_i9_deadlines_bulk(hire_dates, as_of=date(2025, 12, 26))
+
+        assert [r["deadline_date"] for r in results] == [date(2025, 12, 30), date(2025, 12, 24), date(2026, 1, 7)]
+        assert [r["business_days_remaining"] for r in results] == [2, 0, 7]
+        assert [r["is_overdue"] for r in results] == [False, True, False]
+        assert engine.calculate_i9_deadlines_bulk([]) == []
@@ -0,0 +1,144 @@
+"""
+Tests for the bounded response cache
+"""
+import asyncio
+import pytest
+
+from app.cache_service import CacheService, cached
+
+
+class TestCacheBounds:
+    """Test LRU eviction and expiry"""
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = CacheService(default_ttl=60, max_entries=3)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+
+        cache.get("a")  # "b" becomes least recently used
+        cache.set("d", "d")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "a"
+        assert cache.get_stats()["evictions"] == 1
+        assert cache.get_stats()["entries"] == 3
+
+    def test_byte_budget_is_enforced(self):
+        cache = CacheService(default_ttl=60, max_entries=1000, max_bytes=20_000)
+        for i in range(100):
+            cache.set(f"k{i}", "x" * 1000)
+
+        assert cache.total_bytes <= 20_000
+        assert cache.get("k99") is not None
+        assert cache.get("k0") is None
+
+    def test_purge_expired_removes_dead_entries(self):
+        cache = CacheService(default_ttl=0)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=60)
+
+        assert cache.purge_expired() == 1
+        assert "a" not in cache.cache
+        assert cache.get("b") == 2
+
+    def test_tag_invalidation(self):
+        cache = CacheService(default_ttl=60)
+        cache.set("p1-list", [1], tags=["applications", "applications:p1"])
+        cache.set("p2-list", [2], tags=["applications", "applications:p2"])
+        cache.set("props", [3], tags=["properties"])
+
+        assert cache.invalidate_tags("applications:p1") == 1
+        assert cache.get("p1-list") is None
+        assert cache.get("p2-list") == [2]
+
+        cache.invalidate_tags("applications")
+        assert cache.get("p2-list") is None
+        assert cache.get("props") == [3]
+
+
+class TestSingleFlight:
+    """Test request coalescing and stale-while-revalidate"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self):
+        cache = CacheService(default_ttl=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"total": 42}
+
+        results = await asyncio.gather(*[
+            cache.get_or_compute("stats", loader) for _ in range(20)
+        ])
+
+        assert calls == 1
+        assert all(result == {"total": 42} for result in results)
+        assert cache.get_stats()["coalesced_loads"] == 19
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_refreshing(self):
+        cache = CacheService(default_ttl=60, stale_ttl=60)
+        cache.set("stats", "old", ttl=0)
+        refreshed = asyncio.Event()
+
+        async def loader():
+            refreshed.set()
+            return "new"
+
+        assert await cache.get_or_compute("stats", loader) == "old"
+        await asyncio.wait_for(refreshed.wait(), 1)
+        await asyncio.sleep(0)
+        assert await cache.get_or_compute("stats", loader) == "new"
+        assert cache.get_stats()["background_refreshes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_loader_errors_propagate_and_are_not_cached(self):
+        cache = CacheService(default_ttl=60)
+
+        async def failing():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("stats", failing)
+        assert "stats" not in cache.cache
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_load_is_not_overwritten(self):
+        cache = CacheService(default_ttl=60)
+        release = asyncio.Event()
+
+        async def slow_loader():
+            await release.wait()
+            return "before write"
+
+        load = asyncio.ensure_future(cache.get_or_compute("p1-list", slow_loader, tags=["applications:p1"]))
+        await asyncio.sleep(0)
+        cache.invalidate_tags("applications:p1")
+        release.set()
+
+        assert await load == "before write"
+        assert "p1-list" not in cache.cache
+        assert await cache.get_or_compute("p1-list", lambda: asyncio.sleep(0, "after write")) == "after write"
+
+    @pytest.mark.asyncio
+    async def test_cached_decorator_ignores_self(self):
+        cache = CacheService(default_ttl=60)
+        calls = 0
+
+        class Service:
+            @cached(ttl=60, tags=lambda self, property_id: [f"applications:{property_id}"], cache_instance=cache)
+            async def load(self, property_id):
+                nonlocal calls
+                calls += 1
+                return [property_id]
+
+        assert await Service().load("p1") == ["p1"]
+        assert await Service().load("p1") == ["p1"]
+        assert calls == 1
+
+        cache.invalidate_tags("applications:p1")
+        await Service().load("p1")
+        assert calls == 2
@@ -0,0 +1,263 @@
+"""
+Tests for the persistent compliance deadline tracker behind the compliance dashboard
+"""
+import json
+import random
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.compliance_engine import (
+    ComplianceDeadline, ComplianceDeadlineType, ComplianceTracker, ComplianceViolation,
+    ComplianceViolationType, FederalComplianceEngine, deadline_to_row, violation_to_row
+)
+from app.models import DocumentCategory, UserRole
+
+TODAY = date(2025, 8, 13)  # a Wednesday
+
+
+def make_deadline(document_id, property_id, due, is_met=False):
+    return ComplianceDeadline(
+        deadline_type=ComplianceDeadlineType.I9_SECTION2_THREE_DAY,
+        employee_id=f"emp-{document_id}",
+        document_id=document_id,
+        deadline_date=due,
+        is_met=is_met,
+        property_id=property_id
+    )
+
+
+def make_violation(violation_id, property_id, critical=True, resolved=False):
+    return ComplianceViolation(
+        violation_id=violation_id,
+        violation_type=ComplianceViolationType.CRITICAL if critical else ComplianceViolationType.WARNING,
+        document_category=DocumentCategory.I9_EMPLOYMENT_ELIGIBILITY,
+        employee_id="emp-1",
+        document_id=None,
+        violation_message="I-9 Section 2 overdue",
+        legal_reference="INA 274A",
+        detected_at=datetime(2025, 8, 1, tzinfo=timezone.utc),
+        resolved_at=datetime(2025, 8, 2, tzinfo=timezone.utc) if resolved else None,
+        property_id=property_id
+    )
+
+
+@pytest.fixture
+def supabase_service():
+    service = MagicMock()
+    service.upsert_compliance_deadlines = AsyncMock(return_value=True)
+    service.upsert_compliance_violations = AsyncMock(return_value=True)
+    service.insert_compliance_violations = AsyncMock(return_value=True)
+    service.get_open_compliance_deadlines = AsyncMock(return_value=[])
+    service.get_unresolved_compliance_violations = AsyncMock(return_value=[])
+    service.get_resolved_compliance_violation_ids = AsyncMock(return_value=[])
+    service.get_compliance_property_counts = AsyncMock(return_value=[])
+    service.get_compliance_deadline = AsyncMock(return_value=None)
+    return service
+
+
+class TestDashboardIndex:
+    """Test per-property scoping and the heap-backed due-deadline query"""
+
+    def test_dashboard_is_scoped_per_property(self):
+        tracker = ComplianceTracker()
+        tracker.track_deadline(make_deadline("a", "p1", TODAY - timedelta(days=1)))
+        tracker.track_deadline(make_deadline("b", "p1", TODAY))
+        tracker.track_deadline(make_deadline("c", "p1", TODAY + timedelta(days=30)))
+        tracker.track_deadline(make_deadline("d", "p2", TODAY + timedelta(days=1)))
+        tracker.track_deadline(make_deadline("e", "p2", TODAY, is_met=True))
+        tracker.track_violation(make_violation("v1", "p1"))
+        tracker.track_violation(make_violation("v2", "p2", critical=False, resolved=True))
+
+        p1 = tracker.dashboard(["p1"], today=TODAY)
+        assert [d.document_id for d in p1["deadlines"]] == ["a", "b"]
+        assert p1["overview"] == {
+            "total_deadlines": 3, "open_deadlines": 3, "overdue_deadlines": 1, "approaching_deadlines": 1,
+            "total_violations": 1, "critical_violations": 1, "resolved_violations": 0
+        }
+        assert [v.violation_id for v in p1["violations"]] == ["v1"]
+        assert [a["type"] for a in p1["compliance_alerts"]] == ["overdue_deadline", "approaching_deadline"]
+
+        p2 = tracker.dashboard(["p2"], today=TODAY)
+        assert [d.document_id for d in p2["deadlines"]] == ["d"]
+        assert p2["deadlines"][0].business_days_remaining == 1
+        assert p2["violations"] == []
+        assert p2["overview"]["resolved_violations"] == 1
+
+        everything = tracker.dashboard(None, today=TODAY)
+        assert [d.document_id for d in everything["deadlines"]] == ["a", "b", "d"]
+        assert tracker.dashboard([], today=TODAY)["overview"]["total_deadlines"] == 0
+
+    def test_matches_brute_force_under_churn(self):
+        tracker = ComplianceTracker()
+        rng = random.Random(7)
+        for step in range(3000):
+            document_id = f"doc-{rng.randrange(400)}"
+            tracker.track_deadline(make_deadline(
+                document_id,
+                rng.choice(["p1", "p2", None]),
+                TODAY + timedelta(days=rng.randrange(-10, 60)),
+                is_met=rng.random() < 0.3
+            ))
+
+        cutoff = TODAY + timedelta(days=7)
+        for property_id in ("p1", "p2", None):
+            expected = sorted(
+                d.document_id for d in tracker.deadlines.values()
+                if d.property_id == property_id and not d.is_met and d.deadline_date <= cutoff
+            )
+            result = tracker.dashboard([property_id], today=TODAY)
+            assert sorted(d.document_id for d in result["deadlines"]) == expected
+            assert result["overview"]["total_deadlines"] == sum(
+                1 for d in tracker.deadlines.values() if d.property_id == property_id
+            )
+        assert tracker.stats["heap_rebuilds"] > 0
+
+    def test_engine_dashboard_respects_roles(self):
+        engine = FederalComplianceEngine()
+        engine.tracker.track_deadline(make_deadline("a", "p1", date.today()))
+        engine.tracker.track_deadline(make_deadline("b", "p2", date.today()))
+
+        hr = engine.get_compliance_dashboard(UserRole.HR)
+        manager = engine.get_compliance_dashboard(UserRole.MANAGER, property_ids=["p2"])
+        employee = engine.get_compliance_dashboard(UserRole.EMPLOYEE, property_id="p1")
+        unassigned_manager = engine.get_compliance_dashboard(UserRole.MANAGER)
+
+        assert len(hr["deadlines"]) == 2
+        assert [d.document_id for d in manager["deadlines"]] == ["b"]
+        assert employee["deadlines"] == [] and employee["overview"]["total_deadlines"] == 1
+        assert unassigned_manager["deadlines"] == []
+
+
+class TestPersistence:
+    """Test batched writes, warm-up and cross-worker change events"""
+
+    @pytest.mark.asyncio
+    async def test_flush_batches_and_retries_failures(self, supabase_service):
+        engine = FederalComplianceEngine(tracker=ComplianceTracker(supabase_service))
+        engine.validate_i9_three_day_compliance("emp-1", "i9-emp-1", date(2025, 1, 6), property_id="p1")
+        engine.validate_i9_three_day_compliance("emp-1", "i9-emp-1", date(2025, 1, 6), property_id="p1")
+        engine.validate_i9_three_day_compliance("emp-2", "i9-emp-2", date(2025, 1, 6), property_id="p1")
+
+        supabase_service.insert_compliance_violations.return_value = False
+        assert await engine.tracker.flush() is False
+
+        deadline_rows = supabase_service.upsert_compliance_deadlines.call_args.args[0]
+        assert sorted(row["document_id"] for row in deadline_rows) == ["i9-emp-1", "i9-emp-2"]
+        # Re-checking a missed deadline does not record a second violation
+        assert len(supabase_service.insert_compliance_violations.call_args.args[0]) == 2
+
+        supabase_service.insert_compliance_violations.return_value = True
+        assert await engine.tracker.flush() is True
+        assert supabase_service.upsert_compliance_deadlines.call_count == 1
+        assert supabase_service.insert_compliance_violations.call_count == 2
+        assert await engine.tracker.flush() is True
+        assert supabase_service.insert_compliance_violations.call_count == 2
+        supabase_service.upsert_compliance_violations.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_resolution_survives_a_restart(self, supabase_service):
+        first = FederalComplianceEngine(tracker=ComplianceTracker(supabase_service))
+        first.validate_i9_three_day_compliance("emp-1", "i9-emp-1", date(2025, 1, 6), property_id="p1")
+        violation_id = next(iter(first.compliance_violations))
+        assert first.resolve_violation(violation_id, "Completed with counsel")
+        await first.tracker.flush()
+        # Created and resolved before the first flush: one insert carries the resolution
+        row = supabase_service.insert_compliance_violations.call_args.args[0][0]
+        assert row["resolution_notes"] == "Completed with counsel"
+
+        supabase_service.get_resolved_compliance_violation_ids.return_value = [violation_id]
+        restarted = FederalComplianceEngine(tracker=ComplianceTracker())
+        await restarted.tracker.warm(supabase_service)
+        is_compliant, _, warnings = restarted.validate_i9_three_day_compliance(
+            "emp-1", "i9-emp-1", date(2025, 1, 6), property_id="p1"
+        )
+        await restarted.tracker.flush()
+
+        assert not is_compliant and warnings
+        assert violation_id not in restarted.compliance_violations
+        assert supabase_service.insert_compliance_violations.call_count == 1
+        supabase_service.upsert_compliance_violations.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_met_deadlines_are_evicted_once_written(self, supabase_service):
+        tracker = ComplianceTracker(supabase_service)
+        tracker.track_deadline(make_deadline("open", "p1", TODAY))
+        tracker.track_deadline(make_deadline("met", "p1", TODAY, is_met=True))
+        tracker.handle_change_notification(json.dumps({
+            "table": "compliance_deadlines", "op": "UPDATE",
+            "row": deadline_to_row(make_deadline("other", "p1", TODAY, is_met=True))
+        }))
+
+        supabase_service.upsert_compliance_deadlines.return_value = False
+        await tracker.flush()
+        assert set(tracker.deadlines) == {"open", "met"}
+
+        supabase_service.upsert_compliance_deadlines.return_value = True
+        await tracker.flush()
+        assert set(tracker.deadlines) == {"open"}
+        assert tracker.dashboard(["p1"], today=TODAY)["overview"]["total_deadlines"] == 2
+
+    @pytest.mark.asyncio
+    async def test_warm_and_change_notifications(self, supabase_service):
+        supabase_service.get_open_compliance_deadlines.return_value = [
+            deadline_to_row(make_deadline("a", "p1", TODAY))
+        ]
+        supabase_service.get_unresolved_compliance_violations.return_value = [
+            violation_to_row(make_violation("11111111-1111-1111-1111-111111111111", "p1"))
+        ]
+        supabase_service.get_compliance_property_counts.return_value = [
+            {"property_id": "p1", "total_deadlines": 40, "total_violations": 5,
+             "critical_violations": 3, "resolved_violations": 4}
+        ]
+        tracker = ComplianceTracker()
+
+        assert await tracker.warm(supabase_service) == 1
+        overview = tracker.dashboard(["p1"], today=TODAY)["overview"]
+        assert (overview["total_deadlines"], overview["open_deadlines"], overview["total_violations"]) == (40, 1, 5)
+
+        # Another worker creates a deadline, then marks ours met
+        tracker.handle_change_notification(json.dumps({
+            "table": "compliance_deadlines", "op": "INSERT",
+            "row": deadline_to_row(make_deadline("b", "p1", TODAY + timedelta(days=1)))
+        }))
+        tracker.handle_change_notification(json.dumps({
+            "table": "compliance_deadlines", "op": "UPDATE",
+            "row": deadline_to_row(make_deadline("a", "p1", TODAY, is_met=True))
+        }))
+        tracker.handle_change_notification("not json")
+
+        dashboard = tracker.dashboard(["p1"], today=TODAY)
+        assert [d.document_id for d in dashboard["deadlines"]] == ["b"]
+        assert dashboard["overview"]["total_deadlines"] == 41
+        assert tracker.stats["notifications"] == 3
+
+    @pytest.mark.asyncio
+    async def test_loaded_and_new_violations_sort_together(self, supabase_service):
+        loaded = violation_to_row(make_violation("11111111-1111-1111-1111-111111111111", "p1"))
+        loaded["detected_at"] = "2025-08-01T00:00:00"
+        supabase_service.get_unresolved_compliance_violations.return_value = [loaded]
+        engine = FederalComplianceEngine(tracker=ComplianceTracker())
+        await engine.tracker.warm(supabase_service)
+
+        engine.validate_i9_three_day_compliance("emp-2", "i9-emp-2", date(2025, 1, 6), property_id="p1")
+        violations = engine.tracker.dashboard(["p1"])["violations"]
+
+        assert [v.violation_id for v in violations][-1] == loaded["violation_id"]
+        assert all(v.detected_at.tzinfo is not None for v in violations)
+        assert engine.resolve_violation(violations[0].violation_id, "Fixed")
+        assert violations[0].resolved_at > violations[-1].detected_at
+
+    @pytest.mark.asyncio
+    async def test_met_deadline_is_loaded_once(self, supabase_service):
+        row = deadline_to_row(make_deadline("i9-emp-9", "p1", TODAY, is_met=True))
+        supabase_service.get_compliance_deadline.return_value = row
+        tracker = ComplianceTracker(supabase_service)
+
+        first = await tracker.load_deadline("i9-emp-9")
+        second = await tracker.load_deadline("i9-emp-9")
+
+        assert first is second and first.is_met
+        supabase_service.get_compliance_deadline.assert_awaited_once_with("i9-emp-9")
+        assert tracker._dirty_deadlines == set()
@@ -0,0 +1,174 @@
+"""
+Tests for persisted document retention: batched sweeps, paged destruction and count-based dashboard
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import HTTPException
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from supabase_standin import StandInClient
+from app import main_enhanced
+from app.supabase_service_enhanced import EnhancedSupabaseService
+from app.document_retention_service import (
+    DocumentRetentionService, RetentionStatus, record_from_row, record_to_row, retention_status_for
+)
+from app.models import DocumentType, UserRole
+
+
+@pytest.fixture
+def supabase_service():
+    service = MagicMock()
+    service.upsert_retention_records = AsyncMock(return_value=True)
+    service.update_retention_records = AsyncMock(return_value=[])
+    service.get_retention_counts = AsyncMock(return_value=[])
+    service.get_expiring_retention_records = AsyncMock(return_value=[])
+    return service
+
+
+@pytest.fixture
+def retention(supabase_service):
+    return DocumentRetentionService(supabase_service, sweep_batch_size=100)
+
+
+def candidate_rows(service, count, start=date(2020, 1, 1)):
+    return [
+        record_to_row(service.build_retention_record(
+            f"doc-{i}", DocumentType.W4_FORM, "emp-1", "Jane Doe", start + timedelta(days=i), start
+        ))
+        for i in range(count)
+    ]
+
+
+class TestRecords:
+    """Test record construction and row round-trips"""
+
+    def test_status_follows_end_date(self):
+        today = date(2025, 8, 15)
+        assert retention_status_for(date(2025, 8, 14), today) == RetentionStatus.EXPIRED
+        assert retention_status_for(date(2025, 9, 14), today) == RetentionStatus.EXPIRING_SOON
+        assert retention_status_for(date(2025, 9, 15), today) == RetentionStatus.ACTIVE
+
+    @pytest.mark.asyncio
+    async def test_create_saves_one_row(self, retention, supabase_service):
+        record = await retention.create_retention_record(
+            "doc-1", DocumentType.I9_FORM, "emp-1", "Jane Doe", date(2025, 1, 6), date(2025, 1, 6)
+        )
+
+        (rows,), _ = supabase_service.upsert_retention_records.call_args
+        assert rows == [record_to_row(record)]
+        assert record_from_row(rows[0]) == record
+        assert record.retention_end_date == date(2025, 1, 6) + timedelta(days=3 * 365)
+
+
+class TestSweeper:
+    """Test batched status transitions and paged destruction"""
+
+    @pytest.mark.asyncio
+    async def test_sweep_repeats_until_drained(self, retention, supabase_service):
+        supabase_service.sweep_document_retention = AsyncMock(side_effect=[
+            {"expired": 100, "expiring_soon": 30},
+            {"expired": 100, "expiring_soon": 0},
+            {"expired": 12, "expiring_soon": 0},
+        ])
+
+        totals = await retention.sweep(today=date(2025, 8, 15))
+
+        assert totals == {"expired": 212, "expiring_soon": 30}
+        assert supabase_service.sweep_document_retention.await_count == 3
+        assert supabase_service.sweep_document_retention.call_args.args == (date(2025, 8, 15), 30, 100)
+
+    @pytest.mark.asyncio
+    async def test_destruction_candidates_are_paged_by_keyset(self, retention, supabase_service):
+        rows = candidate_rows(retention, 5)
+        pages = {None: rows[:2], (rows[1]["retention_end_date"], rows[1]["record_id"]): rows[2:4],
+                 (rows[3]["retention_end_date"], rows[3]["record_id"]): rows[4:]}
+        supabase_service.get_retention_destruction_candidates = AsyncMock(
+            side_effect=lambda after, limit: pages[after]
+        )
+
+        seen = [[r.document_id for r in page] async for page in retention.iter_destruction_candidates(page_size=2)]
+
+        assert seen == [["doc-0", "doc-1"], ["doc-2", "doc-3"], ["doc-4"]]
+
+    @pytest.mark.asyncio
+    async def test_bulk_destruction_skips_held_and_unexpired(self, retention, supabase_service):
+        supabase_service.update_retention_records.return_value = [{"document_id": "doc-1"}]
+
+        destroyed = await retention.mark_documents_destroyed(["doc-1", "doc-2"], "shred", "hr-1")
+
+        assert destroyed == ["doc-1"]
+        args, kwargs = supabase_service.update_retention_records.call_args
+        assert args[0] == ["doc-1", "doc-2"]
+        assert args[1]["retention_status"] == "destroyed"
+        assert kwargs == {"statuses": ["expired"], "legal_hold": False}
+        assert await retention.mark_documents_destroyed([], "shred", "hr-1") == []
+
+
+class TestDashboard:
+    """Test that the dashboard reads aggregated counts"""
+
+    @pytest.mark.asyncio
+    async def test_dashboard_from_counts(self, retention, supabase_service):
+        supabase_service.get_retention_counts.return_value = [
+            {"document_type": "i9_form", "retention_status": "active", "document_count": 900_000},
+            {"document_type": "i9_form", "retention_status": "expired", "document_count": 1_200},
+            {"document_type": "w4_form", "retention_status": "expiring_soon", "document_count": 40},
+            {"document_type": "w4_form", "retention_status": "hold", "document_count": 3},
+        ]
+        soon = (date.today() + timedelta(days=10)).isoformat()
+        supabase_service.get_expiring_retention_records.return_value = [
+            {"document_id": "doc-9", "document_type": "w4_form", "employee_name": "Jane Doe", "retention_end_date": soon}
+        ]
+
+        dashboard = await retention.get_retention_dashboard(UserRole.HR)
+
+        assert dashboard["summary"] == {
+            "total_documents": 901_243, "active_documents": 900_000, "expiring_soon": 40,
+            "expired_awaiting_destruction": 1_200, "legal_holds": 3, "destroyed": 0
+        }
+        assert dashboard["by_document_type"]["i9_form"] == {"total": 901_200, "active": 900_000, "expired": 1_200}
+        assert dashboard["expiring_documents"][0]["days_until_expiration"] == 10
+        assert [alert["severity"] for alert in dashboard["compliance_alerts"]] == ["warning", "info"]
+
+
+class TestRetentionRoutes:
+    """Test the retention routes against stored rows"""
+
+    @pytest.fixture
+    def stored(self, monkeypatch):
+        monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+        monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+        client = StandInClient()
+        with patch("app.supabase_service_enhanced.create_client", return_value=client):
+            service = DocumentRetentionService(EnhancedSupabaseService())
+        client.load("document_retention_records", candidate_rows(service, 1))
+        with patch.object(main_enhanced, "retention_service", service):
+            yield client
+
+    @pytest.mark.asyncio
+    async def test_legal_hold_writes_the_hold(self, stored):
+        hr = MagicMock(role="hr", email="hr@example.com")
+
+        response = await main_enhanced.place_legal_hold("doc-0", "Litigation", current_user=hr)
+        with pytest.raises(HTTPException) as missing:
+            await main_enhanced.place_legal_hold("doc-404", "Litigation", current_user=hr)
+
+        (row,) = stored.rows("document_retention_records")
+        assert response["success"] is True
+        assert (row["legal_hold"], row["retention_status"]) == (True, "hold")
+        assert row["review_notes"] == "Legal hold placed: Litigation"
+        assert missing.value.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_dashboard_route_returns_the_dashboard(self, stored):
+        with patch.object(main_enhanced.retention_service.supabase_service, "get_retention_counts",
+                          AsyncMock(return_value=[{"document_type": "w4_form", "retention_status": "active", "document_count": 1}])):
+            response = await main_enhanced.get_retention_dashboard(current_user=MagicMock(role="hr"))
+
+        assert response["dashboard"]["summary"]["total_documents"] == 1
@@ -0,0 +1,153 @@
+"""
+Tests for streaming document ingest and chunked authenticated encryption
+"""
+import hashlib
+import os
+import tracemalloc
+import pytest
+from cryptography.fernet import Fernet
+
+from app.document_storage import (
+    ChunkedDecryptor, ChunkedEncryptor, DocumentStorageService, DocumentTooLargeError, derive_stream_key
+)
+from app.models import DocumentType
+
+
+class ChunkedUpload:
+    """Stands in for UploadFile: async read(size) over generated data, counting bytes handed out"""
+
+    def __init__(self, total: int, block: bytes = None):
+        self.total = total
+        self.block = block or os.urandom(4096)
+        self.sent = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        size = min(size, self.total - self.sent)
+        if size <= 0:
+            return b""
+        reps = size // len(self.block) + 1
+        chunk = (self.block * reps)[:size]
+        self.sent += size
+        return chunk
+
+    def expected(self) -> bytes:
+        return (self.block * (self.total // len(self.block) + 1))[:self.total]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return DocumentStorageService(storage_path=str(tmp_path / "docs"), encryption_key=Fernet.generate_key())
+
+
+async def store(storage, source, filename="scan.png"):
+    return await storage.store_document_stream(
+        source, filename, DocumentType.I9_FORM, "emp-1", "prop-1", "hr-1"
+    )
+
+
+class TestChunkedCipher:
+    """Test the chunked AES-GCM format"""
+
+    @pytest.mark.parametrize("size", [0, 1, 1024, 4096, 4097, 10_000])
+    def test_round_trip_fed_in_odd_pieces(self, size):
+        key = os.urandom(32)
+        plaintext = os.urandom(size)
+        encryptor = ChunkedEncryptor(key, chunk_size=1024)
+        ciphertext = b"".join(encryptor.update(plaintext[i:i + 700]) for i in range(0, size, 700))
+        ciphertext += encryptor.finalize()
+
+        decryptor = ChunkedDecryptor(key)
+        recovered = b"".join(decryptor.update(ciphertext[i:i + 333]) for i in range(0, len(ciphertext), 333))
+        decryptor.finalize()
+
+        assert recovered == plaintext
+
+    def test_tampering_and_truncation_are_detected(self):
+        key = os.urandom(32)
+        encryptor = ChunkedEncryptor(key, chunk_size=1024)
+        ciphertext = encryptor.update(os.urandom(3000)) + encryptor.finalize()
+
+        flipped = bytearray(ciphertext)
+        flipped[1500] ^= 1
+        with pytest.raises(ValueError):
+            ChunkedDecryptor(key).update(bytes(flipped))
+
+        # Dropping the final record leaves a stream that never saw its final chunk
+        record = 4 + 1024 + 16
+        truncated = ChunkedDecryptor(key)
+        truncated.update(ciphertext[:16 + 2 * record])
+        with pytest.raises(ValueError):
+            truncated.finalize()
+
+        with pytest.raises(ValueError):
+            ChunkedDecryptor(os.urandom(32)).update(ciphertext)
+
+
+class TestStreamingStorage:
+    """Test store_document_stream and streaming reads"""
+
+    @pytest.mark.asyncio
+    async def test_store_and_stream_back(self, storage):
+        upload = ChunkedUpload(300_000)
+
+        stored = await store(storage, upload)
+
+        expected = upload.expected()
+        assert stored.file_size == len(expected)
+        assert stored.file_hash == hashlib.sha256(expected).hexdigest()
+        on_disk = open(stored.file_path, "rb").read()
+        assert expected[:4096] not in on_disk
+
+        chunks = [chunk async for chunk in storage.stream_document(stored.document_id)]
+        assert len(chunks) > 1
+        assert b"".join(chunks) == expected
+
+        content, metadata = await storage.retrieve_document(stored.document_id, "hr-1")
+        assert content == expected
+        assert metadata.mime_type == "image/png"
+
+    @pytest.mark.asyncio
+    async def test_size_limit_stops_reading_early(self, storage):
+        storage.max_file_size = 200_000
+        upload = ChunkedUpload(50_000_000)
+
+        with pytest.raises(DocumentTooLargeError):
+            await store(storage, upload)
+
+        assert upload.sent < 200_000 + 128 * 1024
+        assert not [path for path in storage.storage_path.rglob("*") if path.is_file()]
+
+    @pytest.mark.asyncio
+    async def test_peak_memory_is_bounded(self, storage):
+        storage.max_file_size = 64 * 1024 * 1024
+        upload = ChunkedUpload(16 * 1024 * 1024)
+
+        tracemalloc.start()
+        try:
+            stored = await store(storage, upload)
+            async for _ in storage.stream_document(stored.document_id):
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert peak < 2 * 1024 * 1024
+
+    @pytest.mark.asyncio
+    async def test_legacy_fernet_files_still_read(self, storage, tmp_path):
+        directory = storage.storage_path / DocumentType.I9_FORM.value / "emp-1"
+        directory.mkdir(parents=True)
+        (directory / "legacy-doc_20250101_000000.pdf").write_bytes(storage.cipher.encrypt(b"%PDF-legacy"))
+
+        content, _ = await storage.retrieve_document("legacy-doc", "hr-1")
+
+        assert content == b"%PDF-legacy"
+
+    def test_missing_document_fails_before_streaming(self, storage):
+        with pytest.raises(FileNotFoundError):
+            storage.stream_document("missing")
+
+    def test_stream_key_is_stable_per_fernet_key(self):
+        key = Fernet.generate_key()
+        assert derive_stream_key(key) == derive_stream_key(key)
+        assert derive_stream_key(key) != derive_stream_key(Fernet.generate_key())
@@ -0,0 +1,109 @@
+"""
+Tests for SQL-aggregated manager performance and hiring funnel metrics
+"""
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.analytics_service import AnalyticsService
+from app.supabase_service_enhanced import EnhancedSupabaseService
+
+
+def metrics_row(property_id=None, property_name=None, applications=0, decisions=0, approvals=0,
+                approval_rate=None, avg=None, median=None, p90=None):
+    return {
+        "manager_id": "mgr-1", "manager_name": "Jane Doe",
+        "property_id": property_id, "property_name": property_name,
+        "applications": applications, "pending": applications - decisions, "approved": approvals,
+        "rejected": decisions - approvals, "talent_pool": 0, "withdrawn": 0,
+        "decisions": decisions, "approvals": approvals, "approval_rate": approval_rate,
+        "avg_decision_hours": avg, "median_decision_hours": median, "p90_decision_hours": p90
+    }
+
+
+@pytest.fixture
+def client():
+    return MagicMock()
+
+
+@pytest.fixture
+def service(monkeypatch, client):
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+    with patch("app.supabase_service_enhanced.create_client", return_value=client):
+        yield EnhancedSupabaseService()
+
+
+class TestManagerPerformance:
+    """Test that manager performance is one aggregate call rather than row scans"""
+
+    @pytest.mark.asyncio
+    async def test_performance_from_aggregate_rows(self, service, client):
+        client.rpc.return_value.execute.return_value = MagicMock(data=[
+            metrics_row(applications=300_000, decisions=1_000, approvals=250,
+                        approval_rate=25.0, avg=60.0, median=30.5, p90=120.0),
+            metrics_row("prop-1", "Grand Hotel", 200_000, 600, 200, 33.33, 50.0, 28.0, 100.0),
+            metrics_row("prop-2", "Bay Inn", 100_000, 400, 50, 12.5, 75.0, 40.0, 150.0),
+        ])
+        since = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+        performance = await service.get_manager_performance("mgr-1", since=since)
+
+        client.rpc.assert_called_once_with("manager_hiring_metrics", {
+            "p_manager_ids": ["mgr-1"], "p_property_ids": None,
+            "p_since": since.isoformat(), "p_until": None
+        })
+        client.table.assert_not_called()
+        assert performance["properties_count"] == 2
+        assert performance["applications_count"] == 300_000
+        assert (performance["decisions_count"], performance["approvals_count"]) == (1_000, 250)
+        assert performance["approval_rate"] == 25.0
+        assert performance["average_response_time_days"] == 2.5
+        assert (performance["median_decision_hours"], performance["p90_decision_hours"]) == (30.5, 120.0)
+        assert performance["funnel"]["pending"] == 299_000
+        assert [p["id"] for p in performance["properties"]] == ["prop-1", "prop-2"]
+        assert performance["properties"][1]["approval_rate"] == 12.5
+
+    @pytest.mark.asyncio
+    async def test_unassigned_manager_and_failures_return_zeros(self, service, client):
+        client.rpc.return_value.execute.return_value = MagicMock(data=[])
+        empty = await service.get_manager_performance("mgr-9")
+
+        client.rpc.return_value.execute.side_effect = RuntimeError("connection reset")
+        failed = await service.get_manager_performance("mgr-9")
+
+        assert empty == failed
+        assert empty["properties"] == [] and empty["approval_rate"] == 0
+        assert empty["median_decision_hours"] is None
+
+
+class TestAnalyticsPerformance:
+    """Test the analytics performance section on the aggregate queries"""
+
+    @pytest.mark.asyncio
+    async def test_performance_metrics_use_two_queries(self):
+        supabase = MagicMock()
+        supabase.get_manager_hiring_metrics = AsyncMock(return_value=[
+            metrics_row(applications=10, decisions=4, approvals=3, approval_rate=75.0, avg=12.0, median=10.0, p90=20.0),
+            metrics_row("prop-1", "Grand Hotel", 10, 4, 3, 75.0, 12.0, 10.0, 20.0),
+        ])
+        supabase.get_property_hiring_funnel = AsyncMock(return_value=[
+            {"property_id": "prop-1", "property_name": "Grand Hotel", "applications": 10, "pending": 6,
+             "approved": 3, "rejected": 1, "talent_pool": 0, "withdrawn": 0, "decisions": 4,
+             "approval_rate": 75.0, "avg_decision_hours": 12.0, "median_decision_hours": 10.0,
+             "p90_decision_hours": 20.0}
+        ])
+        start, end = datetime(2025, 7, 1), datetime(2025, 8, 1)
+
+        metrics = await AnalyticsService(supabase)._get_performance_metrics(None, start, end)
+
+        assert metrics["manager_performance"] == [{
+            "manager_id": "mgr-1", "manager_name": "Jane Doe", "applications_reviewed": 4,
+            "applications_approved": 3, "approval_rate": 75.0, "avg_review_time": 12.0,
+            "median_review_time": 10.0, "p90_review_time": 20.0, "score": 75.0
+        }]
+        assert metrics["property_performance"][0]["completion_rate"] == 40.0
+        supabase.get_manager_hiring_metrics.assert_awaited_once_with(property_ids=None, since=start, until=end)
+        supabase.get_applications_by_reviewer.assert_not_called()
+        supabase.get_applications.assert_not_called()
@@ -0,0 +1,111 @@
+"""
+Tests for the join-based HR manager and property listings
+"""
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import Response
+
+from app import main_enhanced
+from app.supabase_service_enhanced import EnhancedSupabaseService
+
+
+def rpc_result(rows):
+    return MagicMock(execute=MagicMock(return_value=MagicMock(data=rows)))
+
+
+@pytest.fixture
+def client():
+    return MagicMock()
+
+
+@pytest.fixture
+def service(monkeypatch, client):
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+    with patch("app.supabase_service_enhanced.create_client", return_value=client):
+        yield EnhancedSupabaseService()
+
+
+PROPERTY = {
+    "id": "prop-1", "name": "Grand Hotel", "address": "1 Main St", "city": "Austin", "state": "TX",
+    "zip_code": "78701", "phone": None, "is_active": True, "created_at": "2025-08-01T00:00:00+00:00",
+    "manager_ids": ["mgr-1", "mgr-2"], "manager_count": 2, "employee_count": 14
+}
+
+
+class TestListingQueries:
+    """Test that each listing is a single RPC with SQL-side filtering and paging"""
+
+    @pytest.mark.asyncio
+    async def test_managers_are_one_rpc(self, service, client):
+        client.rpc.return_value = rpc_result([
+            {"manager": {"id": "mgr-1", "properties": [{"id": "prop-1"}]}, "total_count": 37},
+            {"manager": {"id": "mgr-2", "properties": []}, "total_count": 37},
+        ])
+
+        managers, total = await service.list_hr_managers(
+            search="smith", sort="last_name", descending=True, limit=2, offset=10
+        )
+
+        assert [m["id"] for m in managers] == ["mgr-1", "mgr-2"] and total == 37
+        client.rpc.assert_called_once_with("list_hr_managers", {
+            "p_property_id": None, "p_is_active": None, "p_include_inactive": False, "p_search": "smith",
+            "p_sort": "last_name", "p_descending": True, "p_limit": 2, "p_offset": 10
+        })
+        client.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_page_past_the_end_keeps_the_total(self, service, client):
+        client.rpc.return_value = rpc_result([{"property": None, "total_count": 42}])
+
+        assert await service.list_hr_properties(search="", limit=50, offset=500) == ([], 42)
+        assert client.rpc.call_args.args[1]["p_search"] is None
+        client.table.assert_not_called()
+
+
+class TestListingRoutes:
+    """Test the HR routes on top of the listing queries"""
+
+    @pytest.mark.asyncio
+    async def test_properties_route_maps_rows(self):
+        supabase_service = MagicMock()
+        supabase_service.list_hr_properties = AsyncMock(return_value=([PROPERTY], 1))
+
+        with patch.object(main_enhanced, "supabase_service", supabase_service):
+            unpaged = await main_enhanced.get_hr_properties(
+                search=None, is_active=None, sort_by="created_at", sort_order="asc",
+                limit=None, offset=0, current_user=MagicMock()
+            )
+            paged = await main_enhanced.get_hr_properties(
+                search="grand", is_active=True, sort_by="name", sort_order="desc",
+                limit=25, offset=50, current_user=MagicMock()
+            )
+
+        prop = json.loads(unpaged.body)["data"][0]
+        assert prop["manager_ids"] == ["mgr-1", "mgr-2"]
+        assert (prop["manager_count"], prop["employee_count"]) == (2, 14)
+        assert prop["qr_code_url"].endswith("/apply/prop-1")
+
+        body = json.loads(paged.body)
+        assert body["pagination"]["page"] == 3 and body["pagination"]["total_items"] == 1
+        assert supabase_service.list_hr_properties.call_args.kwargs == {
+            "search": "grand", "is_active": True, "sort": "name", "descending": True, "limit": 25, "offset": 50
+        }
+
+    @pytest.mark.asyncio
+    async def test_managers_route_sets_total_header(self):
+        supabase_service = MagicMock()
+        supabase_service.list_hr_managers = AsyncMock(return_value=([{"id": "mgr-1"}], 120))
+        response = Response()
+
+        with patch.object(main_enhanced, "supabase_service", supabase_service):
+            managers = await main_enhanced.get_managers(
+                response, property_id="prop-1", is_active=None, include_inactive=False, search=None,
+                sort_by="email", sort_order="asc", limit=1, offset=0, current_user=MagicMock()
+            )
+
+        assert managers == [{"id": "mgr-1"}]
+        assert response.headers["X-Total-Count"] == "120"
+        supabase_service.get_manager_properties.assert_not_called()
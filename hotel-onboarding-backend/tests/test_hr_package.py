@@ -0,0 +1,149 @@
+"""
+Tests for the merged HR package builder
+"""
+import fitz
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException
+
+from app import pdf_api
+from app.document_storage import DocumentStorageService
+from app.models import DocumentType, UserRole
+from app.services.hr_package_service import HRPackageService
+
+
+def one_page_pdf(text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def fake_render(form, data):
+    return one_page_pdf(f"{form}: {data['first_name']}")
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = HRPackageService(document_storage=DocumentStorageService(storage_path=str(tmp_path / "documents")))
+    # Threads stand in for the process pool so render_form can be patched
+    service._executor = ThreadPoolExecutor(max_workers=2)
+    yield service
+    service.shutdown()
+
+
+FORMS_DATA = {
+    "w4_data": {"first_name": "John"},
+    "direct_deposit_data": {"first_name": "John"},
+    "i9_data": {"first_name": "John"},
+}
+
+
+async def read_all(iterator):
+    return b"".join([chunk async for chunk in iterator])
+
+
+class TestHRPackageService:
+    """Test rendering, merging and encrypted storage"""
+
+    @pytest.mark.asyncio
+    async def test_forms_merge_in_package_order_with_bookmarks(self, service):
+        with patch("app.services.hr_package_service.render_form", side_effect=fake_render):
+            package = await service.build({"id": "../emp-1", "first_name": "John", "last_name": "Doe"}, FORMS_DATA)
+
+        content = await read_all(service.stream(package.document_id.upper()))
+        assert package.forms == ["i9", "w4", "direct_deposit"]
+        with fitz.open(stream=content, filetype="pdf") as merged:
+            assert merged.page_count == 3
+            assert [(level, page) for level, _, page in merged.get_toc()] == [(1, 1), (1, 2), (1, 3)]
+            assert merged.get_toc()[0][1].startswith("Form I-9")
+            assert "w4: John" in merged[1].get_text()
+            assert merged.metadata["title"] == "HR Package - John Doe"
+
+        assert len(content) == package.size
+        stored = service.document_storage.locate_document(package.document_id)
+        assert stored.parent.name == "___emp-1" and stored.parent.parent.name == "other"
+        assert b"w4: John" not in stored.read_bytes()
+
+    @pytest.mark.asyncio
+    async def test_empty_package_and_bad_hash_are_rejected(self, service):
+        with pytest.raises(ValueError):
+            await service.build({}, {"w4_data": {}})
+        with pytest.raises(FileNotFoundError):
+            service.stream("../../etc/passwd")
+        with pytest.raises(FileNotFoundError):
+            service.stream("00000000-0000-0000-0000-000000000000")
+
+    @pytest.mark.asyncio
+    async def test_only_packages_resolve_to_an_employee(self, service):
+        with patch("app.services.hr_package_service.render_form", side_effect=fake_render):
+            package = await service.build({"id": "emp-1", "first_name": "John"}, FORMS_DATA)
+        other = await service.document_storage.store_document(
+            one_page_pdf("x"), "x.pdf", DocumentType.I9_FORM, "emp-1", "prop-1", "system"
+        )
+
+        assert service.employee_id(package.document_id) == "emp-1"
+        with pytest.raises(FileNotFoundError):
+            service.employee_id(other.document_id)
+
+
+class TestHRPackageRoutes:
+    """Test the streamed package responses"""
+
+    @pytest.mark.asyncio
+    async def test_package_streams_pdf_and_is_served_again_by_id(self, service):
+        hr_user = MagicMock(role="hr")
+        with patch.object(pdf_api, "hr_package_service", service), \
+                patch("app.services.hr_package_service.render_form", side_effect=fake_render):
+            response = await pdf_api.generate_hr_package({
+                "employee_data": {"first_name": "José", "last_name": "Núñez"},
+                "forms_data": FORMS_DATA
+            })
+            body = await read_all(response.body_iterator)
+            document_id = response.headers["X-Package-Id"]
+
+            again = await pdf_api.get_hr_package(document_id, hr_user)
+            with pytest.raises(HTTPException) as missing:
+                await pdf_api.get_hr_package("f" * 64, hr_user)
+
+        assert response.media_type == "application/pdf" and body.startswith(b"%PDF")
+        assert response.headers["Content-Length"] == str(len(body))
+        assert response.headers["X-Package-Forms"] == "i9,w4,direct_deposit"
+        assert response.headers["Cache-Control"] == "private, no-store"
+        assert response.headers["Content-Disposition"] == (
+            "attachment; filename=\"hr-package-Jose-Nunez.pdf\"; "
+            "filename*=UTF-8''hr-package-Jos%C3%A9-N%C3%BA%C3%B1ez.pdf"
+        )
+        assert await read_all(again.body_iterator) == body
+        assert missing.value.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_managers_only_get_packages_for_their_employees(self, service):
+        manager = MagicMock(role=UserRole.MANAGER)
+        access_controller = MagicMock()
+        access_controller.validate_manager_employee_access.side_effect = lambda user, employee_id: employee_id == "emp-1"
+        with patch("app.services.hr_package_service.render_form", side_effect=fake_render):
+            own = await service.build({"id": "emp-1", "first_name": "John"}, FORMS_DATA)
+            other = await service.build({"id": "emp-2", "first_name": "Jane"}, FORMS_DATA)
+
+        with patch.object(pdf_api, "hr_package_service", service), \
+                patch.object(pdf_api, "get_property_access_controller", return_value=access_controller):
+            allowed = await pdf_api.get_hr_package(own.document_id, manager)
+            with pytest.raises(HTTPException) as denied:
+                await pdf_api.get_hr_package(other.document_id, manager)
+
+        assert (await read_all(allowed.body_iterator)).startswith(b"%PDF")
+        assert denied.value.status_code == 403
+
+    def test_serving_a_package_again_requires_hr_or_manager(self):
+        from fastapi.testclient import TestClient
+        from fastapi import FastAPI
+
+        app = FastAPI()
+        app.include_router(pdf_api.router)
+        response = TestClient(app).get("/api/forms/package/hr/00000000-0000-0000-0000-000000000000")
+
+        assert response.status_code in (401, 403)
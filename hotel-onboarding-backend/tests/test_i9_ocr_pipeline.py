@@ -0,0 +1,178 @@
+"""
+Tests for the I-9 OCR pipeline: image normalization, engines, concurrency limit and result cache
+"""
+import asyncio
+import io
+import json
+import pytest
+from unittest.mock import MagicMock, AsyncMock, patch
+from PIL import Image
+
+from app.i9_ocr_service import (
+    GroqVisionEngine, I9DocumentOCRService, OCREngine, TesseractEngine, normalize_document_image
+)
+from app.i9_section2 import I9DocumentType
+
+
+def make_photo(width=4000, height=3000, orientation=None, color=(200, 30, 30)) -> bytes:
+    image = Image.new("RGB", (width, height), color)
+    output = io.BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        image.save(output, format="JPEG", quality=95, exif=exif)
+    else:
+        image.save(output, format="JPEG", quality=95)
+    return output.getvalue()
+
+
+class RecordingEngine(OCREngine):
+    name = "recording"
+
+    def __init__(self, delay=0.0, fail_times=0):
+        self.calls = []
+        self.delay = delay
+        self.fail_times = fail_times
+        self.in_flight = 0
+        self.peak = 0
+
+    async def extract(self, image, document_type, prompt):
+        self.calls.append(image)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail_times:
+                self.fail_times -= 1
+                raise RuntimeError("engine unavailable")
+            return {"document_number": "D1234567", "first_name": "JANE", "last_name": "DOE"}
+        finally:
+            self.in_flight -= 1
+
+
+class TestNormalization:
+    """Test Pillow preprocessing"""
+
+    def test_photo_is_rotated_grayscaled_and_downsized(self):
+        original = make_photo(orientation=6)  # rotate 90° for display
+
+        normalized = normalize_document_image(original, max_dimension=1600)
+
+        with Image.open(io.BytesIO(normalized)) as image:
+            assert image.format == "JPEG"
+            assert image.mode == "L"
+            assert image.size == (1200, 1600)
+        assert len(normalized) < len(original)
+
+
+class TestOCRService:
+    """Test caching, concurrency and failure handling"""
+
+    @pytest.mark.asyncio
+    async def test_reuploads_are_served_from_cache(self):
+        engine = RecordingEngine(delay=0.01)
+        service = I9DocumentOCRService(engine=engine)
+        photo = make_photo(800, 600)
+
+        first, second = await asyncio.gather(
+            service.extract_document_fields(I9DocumentType.DRIVERS_LICENSE, photo, "a.jpg"),
+            service.extract_document_fields(I9DocumentType.DRIVERS_LICENSE, photo, "a.jpg"),
+        )
+        first["extracted_data"]["first_name"] = "EDITED"
+        third = await service.extract_document_fields(I9DocumentType.DRIVERS_LICENSE, photo, "copy.jpg")
+
+        assert len(engine.calls) == 1
+        assert second["extracted_data"]["first_name"] == "JANE"
+        assert third["extracted_data"]["first_name"] == "JANE"
+
+        # Same bytes as a different document type is a separate extraction
+        await service.extract_document_fields(I9DocumentType.US_PASSPORT, photo, "a.jpg")
+        assert len(engine.calls) == 2
+        assert service.get_stats()["engine_calls"] == 2
+
+    @pytest.mark.asyncio
+    async def test_engine_calls_respect_concurrency_limit(self):
+        engine = RecordingEngine(delay=0.02)
+        service = I9DocumentOCRService(engine=engine, max_concurrency=2)
+        photos = [make_photo(64, 64, color=(i, i, i)) for i in range(0, 240, 40)]
+
+        await asyncio.gather(*[
+            service.extract_document_fields(I9DocumentType.DRIVERS_LICENSE, photo, "p.jpg") for photo in photos
+        ])
+
+        assert len(engine.calls) == len(photos)
+        assert engine.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self):
+        engine = RecordingEngine(fail_times=1)
+        service = I9DocumentOCRService(engine=engine)
+        photo = make_photo(64, 64)
+
+        failed = await service.extract_document_fields(I9DocumentType.SSN_CARD, photo, "ssn.jpg")
+        retried = await service.extract_document_fields(I9DocumentType.SSN_CARD, photo, "ssn.jpg")
+
+        assert failed["extracted_data"]["ssn"] == ""
+        assert retried["extracted_data"]["document_number"] == "D1234567"
+        assert len(engine.calls) == 2
+        assert service.stats["engine_errors"] == 1
+
+    def test_requires_client_or_engine(self):
+        with pytest.raises(ValueError):
+            I9DocumentOCRService()
+
+
+class TestEngines:
+    """Test the Groq and Tesseract engines"""
+
+    def _completion(self, payload):
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=json.dumps(payload)))])
+
+    @pytest.mark.asyncio
+    async def test_groq_engine_supports_sync_and_async_clients(self):
+        sync_client = MagicMock()
+        sync_client.chat.completions.create.return_value = self._completion({"first_name": "A"})
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(return_value=self._completion({"first_name": "B"}))
+
+        assert await GroqVisionEngine(sync_client).extract(b"jpeg", I9DocumentType.US_PASSPORT, "p") == {"first_name": "A"}
+        assert await GroqVisionEngine(async_client).extract(b"jpeg", I9DocumentType.US_PASSPORT, "p") == {"first_name": "B"}
+
+        content = async_client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert content[1]["image_url"]["url"] == "data:image/jpeg;base64,anBlZw=="
+
+    def test_tesseract_text_parsing(self):
+        text = """
+        CALIFORNIA DRIVER LICENSE
+        DL D1234567
+        EXP 08/31/2029
+        LN DOE
+        FN JANE MARIE
+        DOB 05/14/1990
+        ISS 08/31/2024
+        """
+
+        fields = TesseractEngine.parse_text(text, I9DocumentType.DRIVERS_LICENSE)
+
+        assert fields["document_number"] == "D1234567"
+        assert fields["last_name"] == "DOE"
+        assert fields["first_name"] == "JANE MARIE"
+        assert fields["date_of_birth"] == "1990-05-14"
+        assert fields["expiration_date"] == "2029-08-31"
+        assert fields["issue_date"] == "2024-08-31"
+
+        ssn = TesseractEngine.parse_text("SOCIAL SECURITY\n123 45 6789\nJANE DOE", I9DocumentType.SSN_CARD)
+        assert ssn["ssn"] == "123-45-6789"
+
+    @pytest.mark.asyncio
+    async def test_tesseract_engine_runs_offline(self):
+        service = I9DocumentOCRService(engine=TesseractEngine())
+
+        with patch("pytesseract.image_to_string", return_value="PASSPORT NO 123456789\nSURNAME\nDOE\nGIVEN NAMES\nJANE") as ocr:
+            result = await service.extract_document_fields(I9DocumentType.US_PASSPORT, make_photo(400, 300), "pp.jpg")
+
+        ocr.assert_called_once()
+        assert result["extracted_data"]["document_number"] == "123456789"
+        assert result["extracted_data"]["last_name"] == "DOE"
+        assert result["extracted_data"]["first_name"] == "JANE"
+        assert result["extracted_data"]["issuing_authority"] == "United States of America"
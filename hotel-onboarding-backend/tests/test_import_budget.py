@@ -0,0 +1,109 @@
+"""
+Cold-start budget for app.main_enhanced and tests for the lazy service proxy
+
+The budget defaults to 3 seconds and can be overridden with
+IMPORT_BUDGET_SECONDS on slower CI runners.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from unittest.mock import MagicMock
+
+from app.lazy_service import LazyService
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
+
+# Libraries that only specific routes need; importing main must not pull them in
+DEFERRED_MODULES = ("pandas", "fitz", "pymupdf", "reportlab", "PyPDF2", "groq", "xlsxwriter", "PIL")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main_enhanced as main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "loaded": [name for name in %r if name in sys.modules],
+    "supabase_initialized": main.supabase_service.is_initialized,
+}))
+""" % (DEFERRED_MODULES,)
+
+
+@pytest.fixture(scope="module")
+def cold_import():
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+    env.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+    env.setdefault("GROQ_API_KEY", "test-groq-key")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestImportBudget:
+    """Test that importing the app stays cheap"""
+
+    def test_import_within_budget(self, cold_import):
+        assert cold_import["seconds"] < IMPORT_BUDGET_SECONDS, (
+            f"import app.main_enhanced took {cold_import['seconds']:.2f}s "
+            f"(budget {IMPORT_BUDGET_SECONDS:.2f}s); run `python -X importtime -c "
+            f"\"import app.main_enhanced\"` to find the regression"
+        )
+
+    def test_heavy_libraries_are_deferred(self, cold_import):
+        assert cold_import["loaded"] == []
+
+    def test_clients_are_not_built_at_import(self, cold_import):
+        assert cold_import["supabase_initialized"] is False
+
+
+class TestLazyService:
+    """Test the lazy proxy used for module-level services"""
+
+    def test_factory_runs_once_on_first_use(self):
+        factory = MagicMock(return_value=MagicMock(name="service"))
+        service = LazyService(factory)
+
+        assert not service.is_initialized
+        factory.assert_not_called()
+
+        service.ping()
+        service.ping()
+        service.timeout = 5
+
+        factory.assert_called_once()
+        assert service.get().timeout == 5
+        assert service.get().ping.call_count == 2
+
+    def test_concurrent_first_use_builds_one_instance(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        service = LazyService(factory)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(service.get())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert len({id(result) for result in results}) == 1
@@ -0,0 +1,110 @@
+"""
+Tests for projected list reads and lean row decoding in EnhancedSupabaseService
+"""
+import pytest
+from datetime import datetime, timezone, date
+from unittest.mock import MagicMock, patch
+
+from app.models import ApplicationStatus, OnboardingStatus
+from app.supabase_service_enhanced import (
+    APPLICATION_LIST_COLUMNS, EMPLOYEE_LIST_COLUMNS, EnhancedSupabaseService,
+    application_from_row, employee_from_row, parse_db_timestamp
+)
+
+APPLICATION_ROW = {
+    "id": "app-1",
+    "property_id": "prop-1",
+    "department": "Housekeeping",
+    "position": "Room Attendant",
+    "applicant_data": {
+        "first_name": "Ana", "last_name": "Diaz", "email": "ana@example.com", "phone": "555",
+        "address": "1 Main", "city": "Austin", "state": "TX", "zip_code": "78701", "work_authorized": True
+    },
+    "status": "pending",
+    "applied_at": "2025-03-01T10:00:00Z",
+    "reviewed_at": None,
+}
+
+EMPLOYEE_ROW = {
+    "id": "emp-1",
+    "user_id": "user-1",
+    "property_id": "prop-1",
+    "manager_id": "mgr-1",
+    "department": "Front Desk",
+    "position": "Agent",
+    "hire_date": "2025-03-10",
+    "pay_rate": 18.5,
+    "onboarding_status": "in_progress",
+    "created_at": "2025-03-09T08:00:00.123456+00:00",
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+    with patch("app.supabase_service_enhanced.create_client", return_value=MagicMock()):
+        yield EnhancedSupabaseService()
+
+
+class TestRowDecoding:
+    """Test full and lean decoding"""
+
+    def test_parse_db_timestamp(self):
+        assert parse_db_timestamp("2025-03-01T10:00:00Z") == datetime(2025, 3, 1, 10, tzinfo=timezone.utc)
+        assert parse_db_timestamp(None) is None
+        stamp = datetime.now(timezone.utc)
+        assert parse_db_timestamp(stamp) is stamp
+
+    def test_lean_matches_validated_decode(self):
+        full = application_from_row(APPLICATION_ROW)
+        lean = application_from_row(APPLICATION_ROW, lean=True)
+
+        assert lean.model_dump() == full.model_dump()
+        assert lean.status is ApplicationStatus.PENDING
+
+        employee = employee_from_row(EMPLOYEE_ROW, lean=True)
+        assert employee.hire_date == date(2025, 3, 10)
+        assert employee.onboarding_status is OnboardingStatus.IN_PROGRESS
+        assert employee.model_dump() == employee_from_row(EMPLOYEE_ROW).model_dump()
+
+    def test_lean_skips_validation_for_narrow_projections(self):
+        application = application_from_row({"department": "Housekeeping"}, lean=True)
+        assert application.department == "Housekeeping"
+
+        with pytest.raises(Exception):
+            application_from_row({"department": "Housekeeping"})
+
+    def test_decoders_cover_every_model_field(self):
+        from app.models import Employee, JobApplication
+
+        assert set(application_from_row({}, lean=True).__dict__) == set(JobApplication.model_fields)
+        assert set(employee_from_row({}, lean=True).__dict__) == set(Employee.model_fields)
+
+
+class TestProjectedReads:
+    """Test that list reads select only the requested columns"""
+
+    @pytest.mark.asyncio
+    async def test_default_projection_excludes_encrypted_columns(self, service):
+        table = service.client.table.return_value
+        table.select.return_value.in_.return_value.execute.return_value.data = [APPLICATION_ROW]
+
+        applications = await service.get_applications_by_properties(["prop-1"])
+
+        table.select.assert_called_once_with(APPLICATION_LIST_COLUMNS)
+        assert "encrypted" not in APPLICATION_LIST_COLUMNS and "encrypted" not in EMPLOYEE_LIST_COLUMNS
+        assert applications[0].applied_at.tzinfo is not None
+
+    @pytest.mark.asyncio
+    async def test_caller_projection_and_lean(self, service):
+        table = service.client.table.return_value
+        table.select.return_value.execute.return_value.data = [
+            {"id": "emp-1", "employment_status": "active"},
+            {"id": "emp-2", "employment_status": "terminated"},
+        ]
+
+        employees = await service.get_all_employees(columns="id, employment_status", lean=True)
+
+        table.select.assert_called_once_with("id, employment_status")
+        assert [emp.employment_status for emp in employees] == ["active", "terminated"]
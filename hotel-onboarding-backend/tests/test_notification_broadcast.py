@@ -0,0 +1,103 @@
+"""
+Tests for set-based role/property notification broadcasts
+"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.notification_service import (
+    BROADCAST_NOTIFICATIONS_SQL, NotificationChannel, NotificationService
+)
+
+
+def make_service(row, connected=()):
+    service = NotificationService(supabase_service=MagicMock(), broadcast_push_batch=2)
+    service.supabase.execute_query = AsyncMock(return_value=[row])
+    service.websocket_manager = MagicMock()
+    service.websocket_manager.active_connections = {user_id: MagicMock() for user_id in connected}
+    service.websocket_manager.send_to_user = AsyncMock(side_effect=lambda user_id, message: user_id != "u3")
+    return service
+
+
+class TestBroadcastAudience:
+    """Test scope and filter resolution"""
+
+    def test_scopes_resolve_to_role_and_property_lists(self):
+        service = NotificationService()
+        assert service._broadcast_audience("role", None, role="manager") == (["manager"], None)
+        assert service._broadcast_audience("property", {"property_id": "p1"}) == (None, ["p1"])
+        assert service._broadcast_audience(
+            "filtered", {"roles": ["employee", "manager"], "property_ids": ["p2", "p1"]}
+        ) == (["employee", "manager"], ["p1", "p2"])
+        assert service._broadcast_audience("global", None, requires_hr=True) == (None, None)
+
+    def test_invalid_requests_are_rejected(self):
+        service = NotificationService()
+        with pytest.raises(ValueError):
+            service._broadcast_audience("global", None)
+        with pytest.raises(ValueError):
+            service._broadcast_audience("property", {})
+        with pytest.raises(ValueError):
+            service._broadcast_audience("role", {"role": "admin"})
+        with pytest.raises(ValueError):
+            service._broadcast_audience("filtered", {"email": "a@example.com"})
+
+
+class TestBroadcastNotification:
+    """Test the single-statement insert and background WebSocket push"""
+
+    @pytest.mark.asyncio
+    async def test_rows_written_in_one_call_and_only_online_recipients_pushed(self):
+        row = {
+            "recipients_count": 1200,
+            "in_app_count": 1200,
+            "email_count": 0,
+            "online_recipients": json.dumps({"u1": "n1", "u2": "n2", "u3": "n3"})
+        }
+        service = make_service(row, connected=["u1", "u2", "u3", "outsider"])
+
+        result = await service.broadcast_notification(
+            scope="role",
+            message="Fire drill at 3pm",
+            channels=[NotificationChannel.IN_APP],
+            subject="Drill",
+            role="employee"
+        )
+
+        assert result["recipients_count"] == 1200
+        assert result["notifications_created"] == 1200
+        assert result["notifications_by_channel"] == {"in_app": 1200}
+        assert result["websocket_recipients"] == 3
+
+        service.supabase.execute_query.assert_awaited_once()
+        query, params = service.supabase.execute_query.await_args.args
+        assert query == BROADCAST_NOTIFICATIONS_SQL
+        assert params[1:4] == [["employee"], None, ["in_app"]]
+        assert params[5:8] == ["Drill", "Fire drill at 3pm", "high"]
+        assert sorted(params[-1]) == ["outsider", "u1", "u2", "u3"]
+
+        await asyncio.gather(*service._broadcast_tasks)
+        pushed = {call.args[0]: call.args[1] for call in service.websocket_manager.send_to_user.await_args_list}
+        assert set(pushed) == {"u1", "u2", "u3"}
+        assert pushed["u1"]["data"]["id"] == "n1"
+        assert pushed["u1"]["data"]["broadcast_id"] == result["broadcast_id"]
+
+        service.supabase.execute_query = AsyncMock(return_value=[
+            {"channel": "in_app", "status": "sent", "count": 1200}
+        ])
+        status = await service.get_broadcast_status(result["broadcast_id"])
+        assert status["notifications"] == {"in_app": {"sent": 1200}}
+        assert status["websocket"] == {"pending": 0, "delivered": 2, "failed": 1}
+
+    @pytest.mark.asyncio
+    async def test_unsupported_channels_are_rejected_before_writing(self):
+        service = make_service({})
+        with pytest.raises(ValueError):
+            await service.broadcast_notification(
+                scope="global",
+                message="Hello",
+                channels=[NotificationChannel.SMS],
+                requires_hr=True
+            )
+        service.supabase.execute_query.assert_not_awaited()
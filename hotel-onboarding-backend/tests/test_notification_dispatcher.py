@@ -0,0 +1,197 @@
+"""
+Tests for the notification dispatcher: priority heaps, channel workers, timer wheel and batched status writes
+"""
+import asyncio
+import time
+import uuid
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from app.notification_service import (
+    ChannelConfig, Notification, NotificationChannel, NotificationPriority,
+    NotificationService, NotificationStatus, NotificationType, TimerWheel
+)
+
+
+def make_notification(channel=NotificationChannel.IN_APP, priority=NotificationPriority.NORMAL, **kwargs):
+    return Notification(
+        id=kwargs.pop("id", str(uuid.uuid4())),
+        type=NotificationType.SYSTEM_ANNOUNCEMENT,
+        channel=channel,
+        recipient="user-1",
+        subject="Subject",
+        body="Body",
+        priority=priority,
+        **kwargs
+    )
+
+
+def recording_sender(service, delivered):
+    async def send(notification):
+        delivered.append(notification)
+    service._send_in_app = send
+    service._send_sms = send
+
+
+class TestTimerWheel:
+    """Test hashed timing wheel scheduling"""
+
+    def test_items_fire_on_their_tick_across_revolutions(self):
+        wheel = TimerWheel(tick_seconds=1.0, slots=8, now=1000)
+        assert wheel.schedule("soon", 1003, "soon")
+        assert wheel.schedule("later", 1003 + 8 * 3, "later")  # same slot, three revolutions out
+        assert not wheel.schedule("past", 999, "past")
+
+        assert wheel.advance(now=1002) == []
+        assert wheel.advance(now=1003) == ["soon"]
+        assert wheel.advance(now=1020) == []
+        assert wheel.advance(now=1030) == ["later"]
+        assert len(wheel) == 0
+
+    def test_cancel_and_long_pause(self):
+        wheel = TimerWheel(tick_seconds=1.0, slots=4, now=0)
+        for i in range(1, 10):
+            wheel.schedule(f"n{i}", i, i)
+        assert wheel.cancel("n5")
+
+        # Jumping far ahead visits each slot once and still returns everything due
+        assert sorted(wheel.advance(now=100)) == [1, 2, 3, 4, 6, 7, 8, 9]
+
+
+class TestDispatcher:
+    """Test channel workers and priority ordering"""
+
+    @pytest.mark.asyncio
+    async def test_priority_then_fifo_order(self):
+        service = NotificationService(channel_config={
+            NotificationChannel.IN_APP: ChannelConfig(workers=1, rate_per_second=1000, burst=1000)
+        })
+        delivered = []
+        recording_sender(service, delivered)
+
+        low = make_notification(priority=NotificationPriority.LOW)
+        normal_a = make_notification()
+        high = make_notification(priority=NotificationPriority.HIGH)
+        normal_b = make_notification()
+        for notification in (low, normal_a, high, normal_b):
+            await service._queue_notification(notification)
+
+        await service.start()
+        await service.stop()
+
+        assert delivered == [high, normal_a, normal_b, low]
+        assert all(n.status == NotificationStatus.SENT for n in delivered)
+
+    @pytest.mark.asyncio
+    async def test_channel_rate_limit(self):
+        service = NotificationService(channel_config={
+            NotificationChannel.SMS: ChannelConfig(workers=3, rate_per_second=50, burst=1)
+        })
+        delivered = []
+        recording_sender(service, delivered)
+        await service.start()
+
+        started = time.monotonic()
+        for _ in range(6):
+            await service._queue_notification(make_notification(channel=NotificationChannel.SMS))
+        while len(delivered) < 6:
+            await asyncio.sleep(0.01)
+        elapsed = time.monotonic() - started
+        await service.stop()
+
+        # One token up front, then 50/s for the remaining five
+        assert elapsed >= 0.09
+        assert service.get_dispatch_stats()["notifications_per_second"] > 0
+
+    @pytest.mark.asyncio
+    async def test_failures_are_retried_from_the_wheel(self):
+        service = NotificationService()
+
+        async def failing(notification):
+            raise RuntimeError("provider down")
+        service._send_in_app = failing
+
+        notification = make_notification()
+        await service._send_immediate(notification)
+
+        assert notification.status == NotificationStatus.RETRY
+        assert notification.id in service.timer_wheel
+        assert service.dispatch_stats["failed"] == 1
+
+
+class TestPersistence:
+    """Test batched status updates and loading scheduled rows"""
+
+    @pytest.mark.asyncio
+    async def test_status_changes_flush_as_one_upsert(self):
+        supabase = MagicMock()
+        service = NotificationService(supabase, status_batch_size=1000)
+        delivered = []
+        recording_sender(service, delivered)
+
+        for _ in range(25):
+            await service._send_immediate(make_notification())
+
+        assert await service.flush_status_updates() == 25
+        supabase.client.table.return_value.upsert.assert_called_once()
+        rows = supabase.client.table.return_value.upsert.call_args[0][0]
+        assert len(rows) == 25
+        assert {row["status"] for row in rows} == {"sent"}
+        assert "created_at" not in rows[0]
+
+    @pytest.mark.asyncio
+    async def test_scheduled_rows_are_claimed_once(self):
+        now = datetime.now()
+        rows = [
+            {"id": "due", "type": "system_announcement", "channel": "in_app", "recipient": "u", "subject": "s",
+             "body": "b", "priority": "normal", "status": "sending", "scheduled_at": (now - timedelta(seconds=5)).isoformat()},
+            {"id": "future", "type": "system_announcement", "channel": "email", "recipient": "u", "subject": "s",
+             "body": "b", "priority": "high", "status": "sending", "scheduled_at": (now + timedelta(seconds=30)).isoformat(),
+             "metadata": "{\"a\": 1}"},
+        ]
+        supabase = MagicMock()
+        supabase.client.rpc.return_value.execute.return_value.data = rows
+        service = NotificationService(supabase, claim_lease_seconds=120)
+
+        assert await service._load_scheduled(page_size=500) == 2
+        assert service.queue_depth(NotificationChannel.IN_APP) == 1
+        assert "future" in service.timer_wheel
+        name, params = supabase.client.rpc.call_args[0]
+        assert name == "claim_notifications"
+        assert (params["p_lease_seconds"], params["p_limit"]) == (120, 500)
+        supabase.client.table.assert_not_called()
+
+        # Rows the dispatcher already holds are not loaded twice
+        assert await service._load_scheduled() == 0
+
+    @pytest.mark.asyncio
+    async def test_held_rows_are_stored_leased(self):
+        supabase = MagicMock()
+        service = NotificationService(supabase, claim_lease_seconds=60)
+        notification = make_notification()
+        notification.scheduled_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+
+        await service._schedule_notification(notification)
+        stored = supabase.client.table.return_value.insert.call_args[0][0]
+        notification.status = NotificationStatus.SENT
+        finished = service._persisted_row(notification)
+
+        assert stored["status"] == "sending"
+        assert datetime.fromisoformat(stored["claimed_until"]) >= notification.scheduled_at + timedelta(seconds=60)
+        assert finished["status"] == "sent" and "claimed_until" not in finished
+
+    def test_claimed_rows_are_stored_with_utc_lease(self):
+        service = NotificationService(MagicMock(), claim_lease_seconds=60)
+        scheduled_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+        notification = service._notification_from_row({
+            "id": "n1", "type": "system_announcement", "channel": "email", "recipient": "u@example.com",
+            "subject": "s", "body": "b", "priority": "normal", "status": "sending",
+            "scheduled_at": scheduled_at.isoformat()
+        })
+
+        stored = service._persisted_row(notification)
+        retried = make_notification(scheduled_at=datetime.now() + timedelta(minutes=20))
+
+        assert datetime.fromisoformat(stored["claimed_until"]) == scheduled_at + timedelta(seconds=60)
+        assert datetime.fromisoformat(service._persisted_row(retried)["claimed_until"]) > scheduled_at
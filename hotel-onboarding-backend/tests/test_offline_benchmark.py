@@ -0,0 +1,173 @@
+"""
+Tests for the offline benchmark harness: the Supabase stand-in and seed data
+"""
+import os
+import sys
+import threading
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from benchmark_data import seed
+from supabase_standin import StandInClient, StandInError
+from app.models import ApplicationStatus, JobApplication
+from app.supabase_service_enhanced import EnhancedSupabaseService
+
+
+@pytest.fixture
+def client():
+    client = StandInClient()
+    client.load("properties", [
+        {"id": "p1", "name": "Grand Hotel", "city": "Austin", "is_active": True},
+        {"id": "p2", "name": "Harbor Inn", "city": "Savannah", "is_active": False},
+        {"id": "p3", "name": "Grandview Lodge", "city": None, "is_active": True},
+    ])
+    client.load("property_managers", [
+        {"manager_id": "m1", "property_id": "p1"},
+        {"manager_id": "m1", "property_id": "p3"},
+    ])
+    return client
+
+
+class TestStandInQueries:
+    """Test the PostgREST query surface the service relies on"""
+
+    def test_filters_counts_and_ordering(self, client):
+        active = client.table("properties").select("id", count="exact").eq("is_active", True).execute()
+        assert (sorted(r["id"] for r in active.data), active.count) == (["p1", "p3"], 2)
+
+        names = client.table("properties").select("name").ilike("name", "%GRAND%").order("name", desc=True).execute()
+        assert [r["name"] for r in names.data] == ["Grandview Lodge", "Grand Hotel"]
+
+        rest = client.table("properties").select("id").not_.in_("id", ["p1"]).or_("city.is.null,is_active.eq.false").execute()
+        assert sorted(r["id"] for r in rest.data) == ["p2", "p3"]
+
+        # NULLs sort last ascending, as in Postgres
+        cities = client.table("properties").select("city").order("city").range(0, 2).execute()
+        assert [r["city"] for r in cities.data] == ["Austin", "Savannah", None]
+
+    def test_embedding_writes_and_single(self, client):
+        embedded = client.table("property_managers").select("properties(name)").eq("manager_id", "m1").execute()
+        assert [r["properties"] for r in embedded.data] == [{"name": "Grand Hotel"}, {"name": "Grandview Lodge"}]
+
+        client.table("properties").update({"is_active": True}).eq("id", "p2").execute()
+        client.table("properties").upsert({"id": "p2", "name": "Harbor Inn & Suites"}).execute()
+        row = client.table("properties").select("*").eq("id", "p2").single().execute().data
+        assert (row["name"], row["is_active"]) == ("Harbor Inn & Suites", True)
+
+        with pytest.raises(StandInError) as error:
+            client.table("properties").select("*").eq("id", "missing").single().execute()
+        assert error.value.code == "PGRST116"
+
+    def test_round_trips_storage_and_rpc(self, client):
+        client.register_rpc("active_count", lambda c, params: [{"n": len(c.rows(params["p_table"]))}])
+        bucket = client.storage.from_("onboarding-documents")
+
+        bucket.upload("emp-1/i9.pdf", b"%PDF-1.7", file_options={"content-type": "application/pdf"})
+        assert bucket.download("emp-1/i9.pdf") == b"%PDF-1.7"
+        with pytest.raises(StandInError):
+            bucket.upload("emp-1/i9.pdf", b"again")
+        assert client.rpc("active_count", {"p_table": "properties"}).execute().data == [{"n": 3}]
+        with pytest.raises(StandInError):
+            client.rpc("missing_function").execute()
+
+        assert client.round_trips["storage.upload"] == 2
+        assert client.round_trips["rpc.active_count"] == 1
+        assert bucket.get_public_url("a.pdf").endswith("/onboarding-documents/a.pdf")
+
+
+class TestStandInWithService:
+    """Test EnhancedSupabaseService reads against seeded data"""
+
+    @pytest.mark.asyncio
+    async def test_service_reads_seeded_rows(self, monkeypatch):
+        monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+        monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+        client = StandInClient()
+        data = seed(client, "small", seed=7)
+        assert seed(StandInClient(), "small", seed=7).session_tokens == data.session_tokens
+
+        with patch("app.supabase_service_enhanced.create_client", return_value=client):
+            service = EnhancedSupabaseService()
+        manager_id, property_ids = next(iter(data.manager_properties.items()))
+
+        properties = await service.get_manager_properties(manager_id)
+        applications = await service.get_applications_by_properties(property_ids, lean=True)
+        pending = await service.get_pending_applications_count()
+
+        assert sorted(p.id for p in properties) == sorted(property_ids)
+        assert applications and {a.property_id for a in applications} <= set(property_ids)
+        assert pending == sum(1 for row in client.rows("job_applications") if row["status"] == "pending")
+        assert client.round_trip_count() == 3
+
+    @pytest.mark.asyncio
+    async def test_create_application_inserts_off_the_event_loop(self, monkeypatch):
+        monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+        monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+        client = StandInClient()
+        with patch("app.supabase_service_enhanced.create_client", return_value=client):
+            service = EnhancedSupabaseService()
+        query_type = type(client.table("job_applications"))
+        execute, insert_threads = query_type.execute, []
+
+        def recording_execute(query):
+            insert_threads.append(threading.current_thread())
+            return execute(query)
+
+        monkeypatch.setattr(query_type, "execute", recording_execute)
+        application = JobApplication.model_construct(
+            id="a1", property_id="p1", department="F&B", position="Server", status=ApplicationStatus.PENDING,
+            applicant_data={"first_name": "Ana"}, applied_at=datetime(2025, 8, 1, tzinfo=timezone.utc)
+        )
+
+        assert await service.create_application(application) is application
+        assert [row["id"] for row in client.rows("job_applications")] == ["a1"]
+        assert insert_threads and threading.main_thread() not in insert_threads
+
+
+class TestHiringEventScenario:
+    """Test the approval function and SLO evaluation of the load scenario"""
+
+    def test_approval_is_one_round_trip_and_fills_the_opening(self):
+        from load_hiring_event import approve_job_application
+
+        client = StandInClient()
+        applicant = {"first_name": "Ana", "last_name": "Lopez", "email": "ana@example.com"}
+        client.load("job_applications", [
+            {"id": "a1", "property_id": "p1", "position": "Server", "department": "F&B",
+             "status": "pending", "applicant_data": applicant},
+            {"id": "a2", "property_id": "p1", "position": "Server", "department": "F&B",
+             "status": "pending", "applicant_data": applicant},
+        ])
+        client.register_rpc("approve_job_application", approve_job_application)
+        params = {
+            "p_application_id": "a1", "p_reviewer_id": "m1", "p_token": "tok", "p_expires_at": "2025-09-01T00:00:00",
+            "p_employee": {"position": "Server", "personal_info": {"start_time": "09:00"}},
+        }
+
+        approval = client.rpc("approve_job_application", params).execute().data
+        with pytest.raises(StandInError) as not_pending:
+            client.rpc("approve_job_application", params).execute()
+
+        assert approval["talent_pool_count"] == 1 and approval["applicant_name"] == "Ana Lopez"
+        assert {row["id"]: row["status"] for row in client.rows("job_applications")} == {"a1": "approved", "a2": "talent_pool"}
+        assert client.rows("onboarding_sessions")[0]["token"] == "tok"
+        assert not_pending.value.code == "55000"
+        assert dict(client.round_trips) == {"rpc.approve_job_application": 2}
+
+    def test_slo_breaches_and_first_saturated_endpoint(self):
+        from load_hiring_event import Sample, StageResult, first_breach, summarize
+
+        samples = [Sample("autosave", 5.0, 200)] * 99 + [Sample("autosave", 5.0, 500)]
+        samples += [Sample("apply", float(ms), 200) for ms in range(1, 101)]
+        samples += [Sample("approve", 900.0, 200)] * 10
+
+        autosave, apply, approve = (summarize(name, samples, 10.0) for name in ("autosave", "apply", "approve"))
+        stages = [StageResult(1.0, 10, 1, 5, 10.0, 0.0, 0.0, {"autosave": autosave, "apply": apply, "approve": approve})]
+
+        assert autosave.breaches == ["errors 1.00% > 0.10%"]
+        assert (apply.p95_ms, apply.breaches, apply.rps) == (95.0, [], 10.0)
+        assert approve.breaches == ["p95 900 ms > 500 ms"]
+        assert first_breach(stages).startswith("POST /applications/{id}/approve saturates first, at x1")
@@ -0,0 +1,145 @@
+"""
+Tests for the bounded, event-driven OptimisticUpdateService
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.optimistic_update_service import (
+    BoundedTTLMap, ConflictResolutionStrategy, OptimisticUpdateService, UpdateStatus, UpdateType
+)
+
+
+@pytest.fixture(autouse=True)
+def quiet_side_channels():
+    with patch("app.optimistic_update_service.websocket_manager") as ws, \
+            patch("app.optimistic_update_service.notification_service") as notifications:
+        ws.send_to_user = AsyncMock()
+        notifications.send_notification = AsyncMock()
+        yield
+
+
+def change(field_path="name", value="new"):
+    return [{"field_path": field_path, "new_value": value}]
+
+
+class TestBoundedTTLMap:
+    """Test size and age limits"""
+
+    def test_size_cap_drops_oldest(self):
+        store = BoundedTTLMap(max_items=3, ttl_seconds=60)
+        for i in range(5):
+            store.put(f"k{i}", i)
+
+        assert len(store) == 3
+        assert store.get("k0") is None
+        assert store.get("k4") == 4
+        assert store.evictions == 2
+
+    def test_expired_entries_are_dropped(self):
+        store = BoundedTTLMap(max_items=10, ttl_seconds=30)
+        with patch("app.optimistic_update_service.time.monotonic", return_value=100.0):
+            store.put("old", 1)
+        with patch("app.optimistic_update_service.time.monotonic", return_value=140.0):
+            assert store.get("old") is None
+            assert len(store) == 0
+
+
+class TestUpdateProcessing:
+    """Test event-driven confirmation and validation"""
+
+    @pytest.mark.asyncio
+    async def test_updates_confirm_without_polling(self):
+        service = OptimisticUpdateService()
+        update_id = await service.create_optimistic_update("u1", "employee", "e1", UpdateType.UPDATE, change())
+        await service.drain()
+
+        assert update_id not in service.pending_updates
+        assert service.confirmed_updates.get(update_id).status == UpdateStatus.CONFIRMED
+        assert service.get_resource_version("employee", "e1") == 1
+        assert [c["field_path"] for c in service.get_change_history("employee", "e1")] == ["name"]
+        await service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_validator_rejection_is_retried_then_rejected(self):
+        service = OptimisticUpdateService(retry_base_delay=0)
+        calls = []
+
+        async def validator(update):
+            calls.append(update.update_id)
+            return False
+        service.register_validator("employee", validator)
+
+        update_id = await service.create_optimistic_update("u1", "employee", "e1", UpdateType.UPDATE, change())
+        for _ in range(50):
+            await service.drain()
+            if update_id not in service.pending_updates:
+                break
+            await asyncio.sleep(0)
+
+        assert len(calls) == 4  # first attempt plus max_retries
+        assert service.metrics["rejected_updates"] == 1
+        await service.shutdown()
+
+
+class TestConflicts:
+    """Test field-indexed conflict detection and resolution"""
+
+    @pytest.mark.asyncio
+    async def test_only_overlapping_fields_conflict(self):
+        service = OptimisticUpdateService()
+        first = await service.create_optimistic_update("u1", "employee", "e1", UpdateType.UPDATE, change("name"))
+        await service.create_optimistic_update("u2", "employee", "e1", UpdateType.UPDATE, change("email"))
+        assert not service.conflicts
+
+        second = await service.create_optimistic_update("u2", "employee", "e1", UpdateType.UPDATE, change("name", "x"))
+        conflict = next(iter(service.conflicts.values()))
+        assert conflict.conflicting_updates == [second, first]
+        assert conflict.conflicting_fields == ["name"]
+
+        await service.drain()
+        assert not service.conflicts
+        assert service.get_conflict(conflict.conflict_id).resolved
+        assert not service.pending_updates
+        await service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_manual_conflicts_stay_open(self):
+        service = OptimisticUpdateService()
+        await service.create_optimistic_update(
+            "u1", "employee", "e1", UpdateType.UPDATE, change(),
+            conflict_resolution=ConflictResolutionStrategy.MANUAL
+        )
+        await service.create_optimistic_update(
+            "u2", "employee", "e1", UpdateType.UPDATE, change(value="other"),
+            conflict_resolution=ConflictResolutionStrategy.MANUAL
+        )
+        await service.drain()
+
+        conflict = next(iter(service.conflicts.values()))
+        assert not conflict.resolved
+        assert len(service.pending_updates) == 2
+
+        conflict.resolution_strategy = ConflictResolutionStrategy.REJECT_CONFLICTED
+        await service._resolve_conflict(conflict)
+        assert not service.conflicts
+        assert not service.pending_updates
+        await service.shutdown()
+
+
+class TestRetention:
+    """Test that state stays bounded under sustained load"""
+
+    @pytest.mark.asyncio
+    async def test_idle_resources_and_confirmed_updates_are_capped(self):
+        service = OptimisticUpdateService(history_limit=5, max_confirmed=20, max_resources=10)
+        for i in range(200):
+            await service.create_optimistic_update("u1", "employee", f"e{i % 50}", UpdateType.UPDATE, change(value=i))
+        await service.drain()
+
+        metrics = service.get_metrics()
+        assert metrics["pending_updates"] == 0
+        assert metrics["retained_confirmed_updates"] <= 20
+        assert metrics["tracked_resources"] <= 10
+        assert all(len(state.history) <= 5 for state in service.resources.values())
+        await service.shutdown()
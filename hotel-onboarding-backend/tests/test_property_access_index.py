@@ -0,0 +1,128 @@
+"""
+Tests for the in-memory ACL index in PropertyAccessController
+"""
+import json
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+from app.models import UserRole
+from app.property_access_control import PropertyAccessController
+
+
+def make_manager(manager_id="mgr-1"):
+    return MagicMock(id=manager_id, role=UserRole.MANAGER)
+
+
+class TestManagerIndex:
+    """Test manager → property lookups and invalidation"""
+
+    @pytest.fixture
+    def supabase(self):
+        service = MagicMock()
+        service.get_manager_properties_sync.return_value = [MagicMock(id="prop-1"), MagicMock(id="prop-2")]
+        return service
+
+    def test_repeat_checks_are_memory_lookups(self, supabase):
+        controller = PropertyAccessController(supabase)
+        manager = make_manager()
+
+        for _ in range(10):
+            assert controller.validate_manager_property_access(manager, "prop-2")
+            assert not controller.validate_manager_property_access(manager, "prop-3")
+
+        supabase.get_manager_properties_sync.assert_called_once_with("mgr-1")
+        assert controller.stats["manager_hits"] == 19
+
+    def test_property_invalidation_uses_reverse_index(self, supabase):
+        controller = PropertyAccessController(supabase)
+        controller.get_manager_properties("mgr-1")
+        controller.get_manager_properties("mgr-2")
+        supabase.get_manager_properties_sync.return_value = [MagicMock(id="prop-9")]
+        controller.get_manager_properties("mgr-3")
+
+        controller.clear_property_cache("prop-1")
+
+        assert set(controller._manager_property_cache) == {"mgr-3"}
+        assert "prop-1" not in controller._property_managers
+        assert controller._property_managers["prop-9"] == {"mgr-3"}
+
+    @pytest.mark.asyncio
+    async def test_warm_loads_all_assignments_in_one_query(self, supabase):
+        supabase.get_property_manager_assignments = AsyncMock(return_value=[
+            {"manager_id": "mgr-1", "property_id": "prop-1"},
+            {"manager_id": "mgr-1", "property_id": "prop-2"},
+            {"manager_id": "mgr-2", "property_id": "prop-2"},
+        ])
+        controller = PropertyAccessController(supabase)
+
+        assert await controller.warm_manager_index() == 2
+        assert controller.get_manager_properties("mgr-1") == ["prop-1", "prop-2"]
+        assert controller._property_managers["prop-2"] == {"mgr-1", "mgr-2"}
+        supabase.get_manager_properties_sync.assert_not_called()
+
+
+class TestEntityIndex:
+    """Test application/employee → property lookups and the batch filter"""
+
+    @pytest.fixture
+    def supabase(self):
+        service = MagicMock()
+        service.get_manager_properties_sync.return_value = [MagicMock(id="prop-1")]
+        service.get_application_by_id_sync.return_value = MagicMock(id="app-1", property_id="prop-1")
+        return service
+
+    def test_application_property_is_fetched_once(self, supabase):
+        controller = PropertyAccessController(supabase)
+        manager = make_manager()
+
+        assert controller.validate_manager_application_access(manager, "app-1")
+        assert controller.validate_manager_application_access(manager, "app-1")
+
+        supabase.get_application_by_id_sync.assert_called_once_with("app-1")
+
+    def test_batch_filter_fetches_only_unknown_ids(self, supabase):
+        supabase.get_record_property_ids.return_value = {"app-2": "prop-2", "app-3": "prop-1"}
+        controller = PropertyAccessController(supabase)
+        controller.remember_entities("application", [{"id": "app-1", "property_id": "prop-1"}])
+
+        allowed = controller.filter_accessible_ids(make_manager(), "application", ["app-3", "app-1", "app-2", "app-4"])
+
+        assert allowed == ["app-3", "app-1"]
+        supabase.get_record_property_ids.assert_called_once_with("job_applications", ["app-3", "app-2", "app-4"])
+
+        # Resolved rows are now in the index
+        controller.filter_accessible_ids(make_manager(), "application", ["app-2", "app-3"])
+        assert supabase.get_record_property_ids.call_count == 1
+
+    def test_entity_index_is_bounded(self, supabase):
+        controller = PropertyAccessController(supabase, max_entities=3)
+        controller.remember_entities("employee", [
+            {"id": f"emp-{i}", "property_id": "prop-1"} for i in range(5)
+        ])
+
+        assert list(controller._entity_properties["employee"]) == ["emp-2", "emp-3", "emp-4"]
+
+
+class TestChangeNotifications:
+    """Test NOTIFY payload handling"""
+
+    def test_notifications_drop_affected_entries(self):
+        supabase = MagicMock()
+        supabase.get_manager_properties_sync.return_value = [MagicMock(id="prop-1")]
+        controller = PropertyAccessController(supabase)
+        controller.get_manager_properties("mgr-1")
+        controller.get_manager_properties("mgr-2")
+        controller.remember_entities("employee", [{"id": "emp-1", "property_id": "prop-1"}])
+
+        controller.handle_change_notification(json.dumps({
+            "table": "property_managers", "op": "DELETE", "manager_id": "mgr-1", "property_id": "prop-7"
+        }))
+        assert set(controller._manager_property_cache) == {"mgr-2"}
+
+        controller.handle_change_notification(json.dumps({"table": "employees", "op": "UPDATE", "id": "emp-1"}))
+        assert "emp-1" not in controller._entity_properties["employee"]
+        assert "mgr-2" in controller._manager_property_cache
+
+        controller.handle_change_notification("not json")
+        assert not controller._manager_property_cache
+        assert controller.stats["notifications"] == 3
@@ -0,0 +1,104 @@
+"""
+Tests for the ASGI response middleware: request IDs, error envelopes and compression
+"""
+import uuid
+import pytest
+from datetime import datetime
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.response_utils import (
+    FastJSONResponse, ResponseMiddleware, dumps_json, success_response
+)
+
+
+def make_client(minimum_size=500):
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(ResponseMiddleware, minimum_size=minimum_size)
+
+    @app.get("/small")
+    async def small(request: Request):
+        return success_response(data={"request_id": request.state.request_id})
+
+    @app.get("/large")
+    async def large():
+        return success_response(data=[{"id": str(i), "status": "pending"} for i in range(200)])
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"line {i}\n".encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("unexpected")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+class TestEncoding:
+    """Test the orjson-backed response class"""
+
+    def test_native_types_serialize(self):
+        stamp = datetime(2025, 1, 2, 3, 4, 5)
+        ident = uuid.UUID(int=1)
+        body = dumps_json({"at": stamp, "id": ident, 1: "non-str key", "tags": {"a"}})
+
+        assert b'"at":"2025-01-02T03:04:05"' in body
+        assert str(ident).encode() in body
+        assert b'"1":"non-str key"' in body
+        assert b'"tags":["a"]' in body
+
+
+class TestMiddleware:
+    """Test request tagging, error handling and content negotiation"""
+
+    def test_request_id_and_small_bodies_pass_through(self):
+        response = make_client().get("/small", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        uuid.UUID(response.json()["data"]["request_id"])
+
+    def test_unhandled_exception_becomes_envelope(self):
+        response = make_client().get("/boom")
+
+        assert response.status_code == 500
+        body = response.json()
+        assert body["success"] is False
+        assert body["error_code"] == "INTERNAL_SERVER_ERROR"
+        assert body["request_id"]
+
+    def test_large_body_is_gzipped(self):
+        client = make_client()
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+        plain = client.get("/large", headers={"Accept-Encoding": "identity"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.json() == {**plain.json(), "timestamp": response.json()["timestamp"]}
+        assert "content-encoding" not in plain.headers
+
+    @pytest.mark.parametrize("header, expected", [
+        ("gzip, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("deflate", None),
+    ])
+    def test_negotiation(self, header, expected, monkeypatch):
+        monkeypatch.setattr("app.response_utils.HAS_BROTLI", True)
+        assert ResponseMiddleware._negotiate_encoding(header) == expected
+
+    def test_brotli_is_skipped_when_unavailable(self, monkeypatch):
+        monkeypatch.setattr("app.response_utils.HAS_BROTLI", False)
+        assert ResponseMiddleware._negotiate_encoding("br, gzip;q=0.5") == "gzip"
+
+    def test_streamed_body_is_compressed_incrementally(self):
+        response = make_client().get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text == "line 0\nline 1\nline 2\n"
@@ -0,0 +1,144 @@
+"""
+Tests for direct SQL execution on the asyncpg pool
+"""
+import uuid
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.employee_management_api import get_performance_analytics
+from app.supabase_service_enhanced import (
+    EnhancedSupabaseService, SupabaseConnectionError, is_transaction_pooler_url,
+    listener_database_url, translate_placeholders
+)
+
+
+class FakePool:
+    """Mimics asyncpg.Pool.acquire() and Connection.fetch()"""
+
+    def __init__(self, rows):
+        self.connection = MagicMock()
+        self.connection.fetch = AsyncMock(return_value=rows)
+        self.acquire_timeouts = []
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        self.acquire_timeouts.append(timeout)
+        yield self.connection
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    with patch("app.supabase_service_enhanced.create_client", return_value=MagicMock()):
+        yield EnhancedSupabaseService()
+
+
+class TestPlaceholders:
+    """Test %s to $n translation"""
+
+    def test_placeholders_outside_literals_and_comments(self):
+        query = (
+            "SELECT * FROM t WHERE a = %s AND b LIKE 'x%s%%' AND \"%s\" = %s -- %s\n"
+            "AND c = $$ %s $$ AND d = $fn$%s$fn$ AND e = E'it\\'s %s' /* %s */ AND f = %s"
+        )
+
+        sql, count = translate_placeholders(query)
+
+        assert count == 3
+        assert sql == (
+            "SELECT * FROM t WHERE a = $1 AND b LIKE 'x%s%' AND \"%s\" = $2 -- %s\n"
+            "AND c = $$ %s $$ AND d = $fn$%s$fn$ AND e = E'it\\'s %s' /* %s */ AND f = $3"
+        )
+
+    def test_translation_is_cached(self):
+        translate_placeholders.cache_clear()
+        query = "SELECT * FROM employee_goals WHERE employee_id = %s"
+
+        for _ in range(3):
+            translate_placeholders(query)
+
+        assert translate_placeholders.cache_info().hits == 2
+
+
+class TestPoolerUrls:
+    """Test pool and listener settings for Supabase's transaction-mode pooler"""
+
+    POOLER = "postgresql://postgres.ref:pw@aws-0-us-east-1.pooler.supabase.com:6543/postgres"
+    SESSION = "postgresql://postgres.ref:pw@aws-0-us-east-1.pooler.supabase.com:5432/postgres"
+
+    def test_transaction_pooler_is_detected(self):
+        assert is_transaction_pooler_url(self.POOLER)
+        assert is_transaction_pooler_url("postgresql://u:p@db.internal:5433/app?pgbouncer=true")
+        assert not is_transaction_pooler_url(self.SESSION)
+        assert not is_transaction_pooler_url("postgresql://u:p@localhost/app")
+
+    @pytest.mark.asyncio
+    async def test_pool_disables_statement_cache_behind_the_pooler(self, service, monkeypatch):
+        monkeypatch.setenv("DATABASE_URL", self.POOLER)
+        monkeypatch.delenv("DB_STATEMENT_CACHE_SIZE", raising=False)
+        with patch("app.supabase_service_enhanced.asyncpg.create_pool", AsyncMock()) as create_pool:
+            await service.initialize_db_pool()
+        assert create_pool.await_args.kwargs["statement_cache_size"] == 0
+
+    def test_listeners_need_a_session_url(self, monkeypatch):
+        monkeypatch.delenv("DATABASE_LISTEN_URL", raising=False)
+        monkeypatch.setenv("DATABASE_URL", self.POOLER)
+        assert listener_database_url() is None
+
+        monkeypatch.setenv("DATABASE_LISTEN_URL", self.SESSION)
+        assert listener_database_url() == self.SESSION
+
+
+class TestExecuteQuery:
+    """Test pooled execution, row decoding and failure modes"""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_decoded(self, service):
+        goal_id = uuid.uuid4()
+        service.db_pool = FakePool([
+            {"id": goal_id, "count": Decimal("3"), "avg_progress": Decimal("66.5"), "status": "completed", "tags": [goal_id]}
+        ])
+
+        rows = await service.execute_query(
+            "SELECT * FROM employee_goals WHERE employee_id = %s AND status = %s", ["emp-1", "completed"], timeout=2.5
+        )
+
+        assert rows == [{"id": str(goal_id), "count": 3, "avg_progress": 66.5, "status": "completed", "tags": [str(goal_id)]}]
+        service.db_pool.connection.fetch.assert_awaited_once_with(
+            "SELECT * FROM employee_goals WHERE employee_id = $1 AND status = $2", "emp-1", "completed", timeout=2.5
+        )
+        assert service.db_pool.acquire_timeouts == [2.5]
+        assert service.query_metrics["total_queries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failures(self, service):
+        with pytest.raises(SupabaseConnectionError):
+            await service.execute_query("SELECT 1")
+
+        service.db_pool = FakePool([])
+        with pytest.raises(ValueError):
+            await service.execute_query("SELECT * FROM employees WHERE id = %s", [])
+
+        service.db_pool.connection.fetch.side_effect = TimeoutError()
+        with pytest.raises(TimeoutError):
+            await service.execute_query("SELECT pg_sleep(60)")
+        assert service.query_metrics["failed_queries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_performance_analytics_handler(self, service):
+        service.db_pool = FakePool([{"status": "completed", "count": 4, "avg_progress": Decimal("100")}])
+
+        response = await get_performance_analytics(
+            property_id="prop-1", department="Front Desk", current_user={}, supabase_service=service
+        )
+
+        assert response.status_code == 200
+        calls = service.db_pool.connection.fetch.await_args_list
+        assert len(calls) == 2
+        assert all(call.args[1:] == ("prop-1", "Front Desk") for call in calls)
+        assert "e.property_id = $1 AND e.department = $2" in calls[0].args[0]
@@ -0,0 +1,276 @@
+"""
+Tests for content-addressed Supabase storage: bucket setup, dedup, batching and release
+"""
+import hashlib
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.supabase_service_enhanced import (
+    EnhancedSupabaseService, StorageUpload, SupabaseConnectionError, blob_object_path
+)
+
+
+class FakeStorageDB:
+    """Mimics the storage_blobs functions from migrations 013 and 023 over in-memory tables"""
+
+    def __init__(self):
+        self.blobs = {}        # (bucket, sha) -> {"ref_count", "object_path", "upload_state", "owner", "expired"}
+        self.documents = {}    # (bucket, path) -> sha
+        self.generated_pdfs = []
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append(name)
+        data = getattr(self, name)(**params)
+        return MagicMock(execute=MagicMock(return_value=MagicMock(data=data)))
+
+    def table(self, name):
+        assert name == "storage_blobs"
+        query = MagicMock()
+        query.select.return_value.eq.return_value.in_.side_effect = lambda column, shas: MagicMock(
+            execute=MagicMock(return_value=MagicMock(data=[
+                {"sha256": sha, "upload_state": blob["upload_state"]}
+                for (bucket, sha), blob in self.blobs.items() if sha in shas
+            ]))
+        )
+        return query
+
+    def register_storage_uploads(self, p_items, p_lease_seconds):
+        rows = []
+        for item in p_items:
+            doc = item["document"]
+            key = (doc["bucket"], doc["sha256"])
+            blob = self.blobs.setdefault(key, {
+                "ref_count": 0, "object_path": doc["object_path"],
+                "upload_state": "pending", "owner": doc["id"], "expired": False
+            })
+            blob["ref_count"] += 1
+            if blob["upload_state"] == "pending" and blob["expired"]:
+                blob.update(owner=doc["id"], expired=False)
+            self.documents[(doc["bucket"], doc["path"])] = doc["sha256"]
+            if "generated_pdf" in item:
+                self.generated_pdfs.append(dict(item["generated_pdf"], storage_url=doc["public_url"].replace(
+                    doc["object_path"], blob["object_path"])))
+            rows.append({
+                "item_id": doc["id"], "item_bucket": doc["bucket"], "item_sha256": doc["sha256"],
+                "item_object_path": blob["object_path"], "upload_state": blob["upload_state"],
+                "needs_upload": blob["upload_state"] == "pending" and blob["owner"] == doc["id"]
+            })
+        return rows
+
+    def mark_storage_blobs_uploaded(self, p_bucket, p_sha256):
+        for sha in p_sha256:
+            if (p_bucket, sha) in self.blobs:
+                self.blobs[(p_bucket, sha)].update(upload_state="uploaded", owner=None)
+
+    def claim_storage_uploads(self, p_bucket, p_sha256, p_owner, p_lease_seconds):
+        claimed = []
+        for sha in p_sha256:
+            blob = self.blobs.get((p_bucket, sha))
+            if blob and blob["upload_state"] == "pending" and blob["expired"]:
+                blob.update(owner=p_owner, expired=False)
+                claimed.append({"item_sha256": sha})
+        return claimed
+
+    def abandon_storage_uploads(self, p_bucket, p_sha256):
+        for sha in p_sha256:
+            if (p_bucket, sha) in self.blobs:
+                self.blobs[(p_bucket, sha)]["expired"] = True
+
+    def release_storage_documents(self, p_bucket, p_paths):
+        orphans = []
+        for path in p_paths:
+            sha = self.documents.pop((p_bucket, path), None)
+            if sha is None:
+                continue
+            blob = self.blobs[(p_bucket, sha)]
+            blob["ref_count"] -= 1
+            if blob["ref_count"] == 0:
+                del self.blobs[(p_bucket, sha)]
+                orphans.append({"orphan_path": blob["object_path"]})
+        return orphans
+
+
+@pytest.fixture
+def client():
+    client = MagicMock()
+    db = FakeStorageDB()
+    client.rpc.side_effect = db.rpc
+    client.table.side_effect = db.table
+    client.db = db
+    client.storage.list_buckets.return_value = [MagicMock(name="bucket")]
+    client.storage.list_buckets.return_value[0].name = "onboarding-documents"
+    client.storage.from_.return_value.get_public_url.side_effect = lambda path: f"https://cdn/{path}"
+    return client
+
+
+@pytest.fixture
+def service(monkeypatch, client):
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+    with patch("app.supabase_service_enhanced.create_client", return_value=client):
+        yield EnhancedSupabaseService()
+
+
+def uploads_made(client):
+    return [c.args[0] for c in client.storage.from_.return_value.upload.call_args_list]
+
+
+class TestBuckets:
+    """Test that buckets are checked once rather than per upload"""
+
+    @pytest.mark.asyncio
+    async def test_startup_creates_missing_buckets_once(self, service, client):
+        assert await service.initialize_storage_buckets()
+
+        created = [c.args[0] for c in client.storage.create_bucket.call_args_list]
+        assert created == ["generated-pdfs", "employee-photos"]
+        assert client.storage.create_bucket.call_args.kwargs == {"options": {"public": True}}
+
+        for i in range(5):
+            await service.upload_employee_document("emp-1", "license", f"doc {i}".encode(), f"{i}.pdf")
+        client.storage.list_buckets.assert_called_once()
+
+
+class TestDedup:
+    """Test content-addressed uploads and reference counting"""
+
+    @pytest.mark.asyncio
+    async def test_regenerated_identical_pdf_is_not_uploaded_again(self, service, client):
+        await service.ensure_storage_buckets()
+        pdf = b"%PDF-1.7 identical"
+
+        first = await service.upload_generated_pdf("emp-1", "w4", pdf)
+        second = await service.upload_generated_pdf("emp-1", "w4", pdf, signed=True)
+
+        digest = hashlib.sha256(pdf).hexdigest()
+        assert uploads_made(client) == [blob_object_path(digest, first["id"])]
+        assert first["object_path"] == second["object_path"] == blob_object_path(digest, first["id"])
+        assert second["public_url"] == first["public_url"]
+        assert client.db.blobs[("generated-pdfs", digest)]["ref_count"] == 2
+        assert [row["is_signed"] for row in client.db.generated_pdfs] == [False, True]
+        assert client.db.generated_pdfs[0]["storage_url"] == first["public_url"]
+        assert client.db.calls == ["register_storage_uploads", "mark_storage_blobs_uploaded", "register_storage_uploads"]
+        assert service.storage_stats["deduplicated"] == 1
+        client.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_multi_document_batch_is_one_metadata_call(self, service, client):
+        await service.ensure_storage_buckets()
+
+        results = await service.upload_employee_documents("emp-1", [
+            {"document_type": "list_b", "file_data": b"license", "file_name": "dl.jpg", "content_type": "image/jpeg"},
+            {"document_type": "list_c", "file_data": b"ssn card", "file_name": "ssn.jpg", "content_type": "image/jpeg"},
+            {"document_type": "list_c_back", "file_data": b"license", "file_name": "dl2.jpg"},
+        ])
+
+        assert client.db.calls == ["register_storage_uploads", "mark_storage_blobs_uploaded"]
+        assert len(uploads_made(client)) == 2
+        assert [r["document_type"] for r in results] == ["list_b", "list_c", "list_c_back"]
+        assert results[0]["object_path"] == results[2]["object_path"]
+
+    @pytest.mark.asyncio
+    async def test_failed_upload_releases_the_batch(self, service, client):
+        await service.ensure_storage_buckets()
+        bucket = client.storage.from_.return_value
+        bucket.upload.side_effect = [None, RuntimeError("storage unavailable")]
+
+        with pytest.raises(RuntimeError):
+            await service.store_storage_objects([
+                StorageUpload("onboarding-documents", "emp-1/a.pdf", b"a"),
+                StorageUpload("onboarding-documents", "emp-1/b.pdf", b"b"),
+            ])
+
+        assert client.db.blobs == {}
+        assert client.db.documents == {}
+        assert sorted(bucket.remove.call_args.args[0]) == sorted(uploads_made(client))
+        assert "mark_storage_blobs_uploaded" not in client.db.calls
+
+    @pytest.mark.asyncio
+    async def test_blob_is_removed_with_its_last_reference(self, service, client):
+        await service.ensure_storage_buckets()
+        first = await service.upload_document_to_storage("onboarding-documents", "emp-1/a.pdf", b"same")
+        await service.upload_document_to_storage("onboarding-documents", "emp-2/a.pdf", b"same")
+        bucket = client.storage.from_.return_value
+
+        assert await service.delete_document_from_storage("onboarding-documents", "emp-1/a.pdf")
+        assert first["object_path"] not in [path for c in bucket.remove.call_args_list for path in c.args[0]]
+
+        assert await service.delete_document_from_storage("onboarding-documents", "emp-2/a.pdf")
+        assert bucket.remove.call_args.args[0] == [first["object_path"], "emp-2/a.pdf"]
+        assert bucket.remove.call_count == 2
+
+
+class TestUploadState:
+    """Test that registrants of a blob still being uploaded wait for it, and that released blobs change path"""
+
+    @pytest.mark.asyncio
+    async def test_registrant_waits_for_a_pending_upload(self, service, client):
+        await service.ensure_storage_buckets()
+        service.storage_upload_poll_interval = 0
+        digest = hashlib.sha256(b"same").hexdigest()
+        # Another worker registered the content and is still uploading it
+        client.db.blobs[("onboarding-documents", digest)] = {
+            "ref_count": 1, "object_path": blob_object_path(digest, "other"),
+            "upload_state": "pending", "owner": "other", "expired": False
+        }
+        polls = []
+
+        def upload_finishes(name):
+            polls.append(name)
+            if len(polls) == 2:
+                client.db.mark_storage_blobs_uploaded("onboarding-documents", [digest])
+            return FakeStorageDB.table(client.db, name)
+        client.table.side_effect = upload_finishes
+
+        result = await service.upload_document_to_storage("onboarding-documents", "emp-1/a.pdf", b"same")
+
+        assert result["object_path"] == blob_object_path(digest, "other")
+        assert len(polls) == 2
+        assert uploads_made(client) == []
+
+    @pytest.mark.asyncio
+    async def test_stalled_upload_is_taken_over(self, service, client):
+        await service.ensure_storage_buckets()
+        digest = hashlib.sha256(b"same").hexdigest()
+        client.db.blobs[("onboarding-documents", digest)] = {
+            "ref_count": 1, "object_path": blob_object_path(digest, "other"),
+            "upload_state": "pending", "owner": "other", "expired": True
+        }
+
+        await service.store_storage_objects([
+            StorageUpload("onboarding-documents", "emp-1/a.pdf", b"same"),
+            StorageUpload("onboarding-documents", "emp-2/a.pdf", b"same"),
+        ])
+
+        assert uploads_made(client) == [blob_object_path(digest, "other")]
+        assert client.db.blobs[("onboarding-documents", digest)]["upload_state"] == "uploaded"
+        assert client.db.blobs[("onboarding-documents", digest)]["ref_count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_and_releases_the_batch(self, service, client):
+        await service.ensure_storage_buckets()
+        service.storage_upload_lease_seconds = 0
+        digest = hashlib.sha256(b"same").hexdigest()
+        client.db.blobs[("onboarding-documents", digest)] = {
+            "ref_count": 1, "object_path": blob_object_path(digest, "other"),
+            "upload_state": "pending", "owner": "other", "expired": False
+        }
+
+        with pytest.raises(SupabaseConnectionError):
+            await service.upload_document_to_storage("onboarding-documents", "emp-1/a.pdf", b"same")
+
+        assert client.db.blobs[("onboarding-documents", digest)]["ref_count"] == 1
+        assert client.db.documents == {}
+
+    @pytest.mark.asyncio
+    async def test_content_stored_again_after_release_gets_a_new_path(self, service, client):
+        await service.ensure_storage_buckets()
+        first = await service.upload_document_to_storage("onboarding-documents", "emp-1/a.pdf", b"same")
+        assert await service.delete_document_from_storage("onboarding-documents", "emp-1/a.pdf")
+
+        second = await service.upload_document_to_storage("onboarding-documents", "emp-1/a.pdf", b"same")
+
+        # Removing the first object can no longer take the new one with it
+        assert second["object_path"] != first["object_path"]
+        assert uploads_made(client) == [first["object_path"], second["object_path"]]
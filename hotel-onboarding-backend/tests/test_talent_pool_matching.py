@@ -0,0 +1,115 @@
+"""
+Tests for indexed talent-pool listing and ranked matching
+"""
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import HTTPException, Response
+
+from app import main_enhanced
+from app.supabase_service_enhanced import EnhancedSupabaseService
+
+
+def rpc_result(rows):
+    return MagicMock(execute=MagicMock(return_value=MagicMock(data=rows)))
+
+
+@pytest.fixture
+def client():
+    return MagicMock()
+
+
+@pytest.fixture
+def service(monkeypatch, client):
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+    with patch("app.supabase_service_enhanced.create_client", return_value=client):
+        yield EnhancedSupabaseService()
+
+
+def manager(user_id="mgr-1"):
+    return MagicMock(id=user_id, role="manager")
+
+
+class TestMatchQuery:
+    """Test that matching is a single RPC against the candidate index"""
+
+    @pytest.mark.asyncio
+    async def test_match_is_one_rpc(self, service, client):
+        client.rpc.return_value = rpc_result([
+            {"candidate": {"id": "app-1", "position": "Front Desk Agent"}, "score": 74, "total_count": 9},
+            {"candidate": {"id": "app-2", "position": "Night Auditor"}, "score": 31, "total_count": 9},
+        ])
+
+        candidates, total = await service.match_talent_pool(
+            property_ids=["prop-1"], department="Front Office", position="Front Desk Agent",
+            shift_preference="night", available_by=date(2025, 9, 1), min_experience=1, limit=2, offset=4
+        )
+
+        assert [(c["id"], c["match_score"]) for c in candidates] == [("app-1", 74), ("app-2", 31)]
+        assert total == 9
+        client.rpc.assert_called_once_with("match_talent_pool", {
+            "p_property_ids": ["prop-1"], "p_department": "Front Office", "p_position": "Front Desk Agent",
+            "p_employment_type": None, "p_shift_preference": "night", "p_available_by": "2025-09-01",
+            "p_min_experience": 1, "p_search": None, "p_limit": 2, "p_offset": 4
+        })
+        client.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_page_past_the_end_keeps_the_total(self, service, client):
+        client.rpc.return_value = rpc_result([{"candidate": None, "score": None, "total_count": 9}])
+
+        assert await service.match_talent_pool(search="", limit=25, offset=50) == ([], 9)
+        assert client.rpc.call_args.args[1]["p_search"] is None
+
+
+class TestTalentPoolRoutes:
+    """Test manager scoping and paging on the talent-pool routes"""
+
+    @pytest.mark.asyncio
+    async def test_talent_pool_is_scoped_to_manager_properties(self):
+        supabase_service = MagicMock()
+        supabase_service.match_talent_pool = AsyncMock(return_value=([{"id": "app-1"}], 41))
+        response = Response()
+
+        with patch.object(main_enhanced, "supabase_service", supabase_service), \
+                patch.object(main_enhanced, "get_manager_property_ids", return_value=["prop-1", "prop-2"]):
+            applications = await main_enhanced.get_talent_pool(
+                response, property_id="prop-9", position=None, department=None, search="smith",
+                limit=20, offset=20, current_user=manager()
+            )
+
+        assert applications == [{"id": "app-1"}]
+        assert response.headers["X-Total-Count"] == "41"
+        assert supabase_service.match_talent_pool.call_args.kwargs == {
+            "property_ids": ["prop-1", "prop-2"], "department": None, "position": None,
+            "search": "smith", "limit": 20, "offset": 20
+        }
+
+    @pytest.mark.asyncio
+    async def test_matches_require_an_opening_and_property_access(self):
+        supabase_service = MagicMock()
+        supabase_service.match_talent_pool = AsyncMock(return_value=([], 0))
+        params = dict(
+            department=None, employment_type=None, shift_preference=None, available_by=None,
+            min_experience=None, search=None, limit=25, offset=0
+        )
+
+        with patch.object(main_enhanced, "supabase_service", supabase_service), \
+                patch.object(main_enhanced, "get_manager_property_ids", return_value=["prop-1"]):
+            with pytest.raises(HTTPException) as missing:
+                await main_enhanced.get_talent_pool_matches(
+                    Response(), position=None, property_id=None, current_user=manager(), **params
+                )
+            with pytest.raises(HTTPException) as denied:
+                await main_enhanced.get_talent_pool_matches(
+                    Response(), position="Housekeeper", property_id="prop-2", current_user=manager(), **params
+                )
+            await main_enhanced.get_talent_pool_matches(
+                Response(), position="Housekeeper", property_id="prop-1", current_user=manager(), **params
+            )
+
+        assert (missing.value.status_code, denied.value.status_code) == (400, 403)
+        supabase_service.match_talent_pool.assert_awaited_once()
+        assert supabase_service.match_talent_pool.call_args.kwargs["property_ids"] == ["prop-1"]